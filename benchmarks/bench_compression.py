@@ -0,0 +1,141 @@
+# benchmarks/bench_compression.py
+#
+# Mede a redução de tamanho e o custo de leitura da compressão de colunas (src/db/compression.py).
+#
+#   python -m benchmarks.bench_compression              # corpus sintético
+#   python -m benchmarks.bench_compression --from-db    # amostra dos conteúdos do DATABASE_URL
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import Column, Integer, MetaData, Table, Text, create_engine, insert, select
+
+from src.core.config import settings
+from src.db import compression
+from src.db.compression import CompressedText, compress_text, decompress_text
+
+SENTENCES = [
+    "O governo federal anunciou nesta segunda-feira um novo pacote de medidas econômicas.",
+    "Segundo especialistas ouvidos pela reportagem, a informação que circula nas redes sociais é falsa.",
+    "A vacina passou por todas as fases de testes clínicos e foi aprovada pela Anvisa.",
+    "Compartilhe antes que apaguem! A mídia não quer que você saiba a verdade.",
+    "De acordo com dados do IBGE, a taxa de desemprego caiu para 7,8% no trimestre.",
+    "A agência de checagem consultou o Ministério da Saúde, que negou a existência do documento.",
+    "O vídeo foi gravado em 2019 e não tem relação com os acontecimentos desta semana.",
+    "Nossa equipe entrou em contato com a assessoria do parlamentar, que não respondeu até a publicação.",
+]
+
+
+def synthetic_corpus(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(SENTENCES) for _ in range(rng.randint(5, 120))) for _ in range(n)]
+
+
+def corpus_from_db(n: int):
+    from src.db.database import SyncSessionLocal
+    from src.models.content import Content
+
+    with SyncSessionLocal() as db:
+        return [c for c in db.execute(select(Content.body).limit(n)).scalars() if c]
+
+
+def per_value_us(fn, values, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for v in values:
+            fn(v)
+        best = min(best, time.perf_counter() - start)
+    return best / len(values) * 1e6
+
+
+def bench_codecs(corpus):
+    raw_sizes = [len(t.encode("utf-8")) for t in corpus]
+    total_raw = sum(raw_sizes)
+    print(f"Corpus: {len(corpus)} textos, {total_raw / 1024:.1f} KiB, mediana {statistics.median(raw_sizes)} bytes\n")
+    print(f"{'codec':<22}{'tamanho':>12}{'razão':>9}{'enc µs':>10}{'dec µs':>10}")
+
+    def report(name, encoded, enc_us, dec_us):
+        size = sum(len(e) for e in encoded)
+        print(f"{name:<22}{size / 1024:>10.1f}Ki{total_raw / size:>9.2f}{enc_us:>10.1f}{dec_us:>10.1f}")
+
+    level = settings.COMPRESSION_LEVEL
+    zl = [zlib.compress(t.encode("utf-8"), level) for t in corpus]
+    report("zlib", zl,
+           per_value_us(lambda t: zlib.compress(t.encode("utf-8"), level), corpus),
+           per_value_us(lambda d: zlib.decompress(d).decode("utf-8"), zl))
+
+    if compression.zstandard is None:
+        print("(zstandard não instalado: zstd ignorado)")
+        return
+    zstd = compression.zstandard
+    plain_c, plain_d = zstd.ZstdCompressor(level=level), zstd.ZstdDecompressor()
+    zs = [plain_c.compress(t.encode("utf-8")) for t in corpus]
+    report("zstd", zs,
+           per_value_us(lambda t: plain_c.compress(t.encode("utf-8")), corpus),
+           per_value_us(lambda d: plain_d.decompress(d), zs))
+
+    # Dicionário treinado com metade do corpus e avaliado na outra metade
+    half = len(corpus) // 2
+    train, test = corpus[:half], corpus[half:]
+    dictionary = compression.train_dictionary(train, dict_size=min(112_640, sum(len(t) for t in train) // 10))
+    dict_c, dict_d = zstd.ZstdCompressor(level=level, dict_data=dictionary), zstd.ZstdDecompressor(dict_data=dictionary)
+    test_raw = sum(len(t.encode("utf-8")) for t in test)
+    zd = [dict_c.compress(t.encode("utf-8")) for t in test]
+    size = sum(len(e) for e in zd)
+    print(f"{'zstd+dict (holdout)':<22}{size / 1024:>10.1f}Ki{test_raw / size:>9.2f}"
+          f"{per_value_us(lambda t: dict_c.compress(t.encode('utf-8')), test):>10.1f}"
+          f"{per_value_us(lambda d: dict_d.decompress(d), zd):>10.1f}")
+
+
+def bench_roundtrip(corpus):
+    """
+    Tempo de SELECT de todas as linhas com coluna Text vs CompressedText num SQLite temporário.
+    """
+    print("\nLeitura via SQLAlchemy (SQLite temporário):")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        metadata = MetaData()
+        plain = Table("plain", metadata, Column("id", Integer, primary_key=True), Column("content", Text))
+        packed = Table("packed", metadata, Column("id", Integer, primary_key=True), Column("content", CompressedText()))
+        metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(insert(plain), [{"content": t} for t in corpus])
+            conn.execute(insert(packed), [{"content": t} for t in corpus])
+        for table in (plain, packed):
+            timings = []
+            for _ in range(5):
+                with engine.connect() as conn:
+                    start = time.perf_counter()
+                    conn.execute(select(table.c.content)).scalars().all()
+                    timings.append(time.perf_counter() - start)
+            print(f"  {table.name:<8} {min(timings) * 1000:8.2f} ms para {len(corpus)} linhas")
+        engine.dispose()
+        print(f"  arquivo SQLite final: {os.path.getsize(os.path.join(tmp, 'bench.db')) / 1024:.1f} KiB (ambas as tabelas)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da compressão de colunas.")
+    parser.add_argument("--from-db", action="store_true", help="Usa conteúdos reais de DATABASE_URL.")
+    parser.add_argument("-n", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = corpus_from_db(args.n) if args.from_db else synthetic_corpus(args.n)
+    if not corpus:
+        print("Nenhum conteúdo encontrado.")
+        return
+    assert all(decompress_text(compress_text(t)) == t for t in corpus[:50])
+    bench_codecs(corpus)
+    bench_roundtrip(corpus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# benchmarks/bench_job_transport.py
+#
+# Compara o transporte das análises no mesmo Redis: Celery (broker + result backend, com a configuração de
+# src.celery_utils) e Redis Streams (src.core.job_stream). Os jobs não fazem nada além de registrar a
+# latência fila -> execução, então o resultado mede só o transporte. Os dois workers rodam em processos
+# separados com o mesmo número de threads. Usa filas/streams próprios (bench:*), sem tocar nos de produção.
+#
+#   python -m benchmarks.bench_job_transport                      # 2000 jobs, 8 threads, payload de 2 KiB
+#   python -m benchmarks.bench_job_transport --jobs 20000 --concurrency 16 --transport streams
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import redis
+
+from src.core.config import settings
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+CELERY_QUEUE = "bench:jobs:celery"
+STREAM_KEY = "bench:jobs:stream"
+STREAM_GROUP = "bench-workers"
+LATENCIES_KEY = "bench:jobs:latencies" # Uma lista por rodada; o worker faz RPUSH da latência de cada job
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _redis() -> redis.Redis:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+def record_job(analysis_id, content, preferred_llm=None):
+    """Job no-op: o conteúdo começa com o instante de publicação."""
+    _redis().rpush(LATENCIES_KEY, time.time() - float(content.split("|", 1)[0]))
+
+
+def _make_celery_app():
+    from celery import Celery
+
+    app = Celery("bench_job_transport", broker=settings.CELERY_BROKER_URL, backend=settings.CELERY_RESULT_BACKEND)
+    app.conf.update(
+        task_track_started=True,
+        task_acks_late=True,
+        worker_prefetch_multiplier=1,
+        task_default_queue=CELERY_QUEUE,
+    )
+    app.task(name="bench.record_job")(record_job)
+    return app
+
+
+celery_app = _make_celery_app() # Alvo do `celery -A benchmarks.bench_job_transport:celery_app worker`
+
+
+def _payload(size: int) -> str:
+    return f"{time.time()}|" + "x" * size
+
+
+def _wait_for(count: int, timeout: float, worker: subprocess.Popen) -> float:
+    start = time.perf_counter()
+    while _redis().llen(LATENCIES_KEY) < count:
+        if worker.poll() is not None:
+            worker.stderr.seek(0)
+            raise RuntimeError(f"Worker saiu com código {worker.returncode}:\n{worker.stderr.read()[-2000:]}")
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError(f"Só {_redis().llen(LATENCIES_KEY)} de {count} jobs executados em {timeout:.0f}s.")
+        time.sleep(0.01)
+    return time.perf_counter()
+
+
+def _start_worker(cmd) -> subprocess.Popen:
+    stderr = tempfile.TemporaryFile(mode="w+") # Arquivo, não PIPE: o worker nunca bloqueia escrevendo log
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=stderr, text=True)
+    proc.stderr = stderr
+    return proc
+
+
+def _stop_worker(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+    proc.stderr.close()
+
+
+def run_celery(jobs: int, concurrency: int, payload: int, timeout: float):
+    worker = _start_worker([
+        sys.executable, "-m", "celery", "-A", "benchmarks.bench_job_transport:celery_app", "worker",
+        "-P", "threads", "-c", str(concurrency), "-Q", CELERY_QUEUE,
+        "--without-gossip", "--without-mingle", "--without-heartbeat", "-l", "warning",
+    ])
+    task = celery_app.tasks["bench.record_job"]
+    task_ids = []
+    try:
+        _redis().delete(LATENCIES_KEY)
+        task.delay(str(uuid.uuid4()), _payload(0), None) # Aquecimento: espera o worker ficar pronto
+        _wait_for(1, timeout, worker)
+        _redis().delete(LATENCIES_KEY)
+
+        start = time.perf_counter()
+        for _ in range(jobs):
+            task_ids.append(task.delay(str(uuid.uuid4()), _payload(payload), None).id)
+        enqueued = time.perf_counter()
+        drained = _wait_for(jobs, timeout, worker)
+        time.sleep(0.5) # Estados SUCCESS gravados depois da execução
+    finally:
+        _stop_worker(worker)
+
+    backend = redis.Redis.from_url(settings.CELERY_RESULT_BACKEND)
+    meta_keys = [f"celery-task-meta-{task_id}" for task_id in task_ids]
+    stored = sum(backend.exists(*meta_keys[i:i + 1000]) for i in range(0, len(meta_keys), 1000))
+    for i in range(0, len(meta_keys), 1000):
+        backend.delete(*meta_keys[i:i + 1000])
+    return start, enqueued, drained, f"{stored} resultados gravados no result backend"
+
+
+def run_streams(jobs: int, concurrency: int, payload: int, timeout: float):
+    from src.core.job_stream import encode_job
+
+    client = _redis()
+    client.delete(STREAM_KEY, LATENCIES_KEY)
+    worker = _start_worker([
+        sys.executable, "-m", "benchmarks.bench_job_transport", "--stream-worker", "--concurrency", str(concurrency),
+    ])
+    try:
+        client.xadd(STREAM_KEY, encode_job(uuid.uuid4(), _payload(0), None)) # Aquecimento
+        _wait_for(1, timeout, worker)
+        client.delete(LATENCIES_KEY)
+
+        start = time.perf_counter()
+        for _ in range(jobs): # XLEN + XADD por job, como a API (uma requisição por análise)
+            client.xlen(STREAM_KEY)
+            client.xadd(STREAM_KEY, encode_job(uuid.uuid4(), _payload(payload), None))
+        enqueued = time.perf_counter()
+        drained = _wait_for(jobs, timeout, worker)
+        time.sleep(0.5) # Último lote de ACK/XDEL
+    finally:
+        _stop_worker(worker)
+
+    pending = client.xpending(STREAM_KEY, STREAM_GROUP)["pending"]
+    note = f"{client.xlen(STREAM_KEY)} entradas restantes no stream, {pending} sem ACK"
+    client.delete(STREAM_KEY)
+    return start, enqueued, drained, note
+
+
+def serve_stream_worker(concurrency: int) -> None:
+    import signal
+
+    from src.core.job_stream import JobStreamWorker
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    worker = JobStreamWorker(
+        handler=record_job, concurrency=concurrency, stream=STREAM_KEY, group=STREAM_GROUP, consumer=f"bench-{os.getpid()}",
+    )
+    worker.run(stop, idle_block_ms=200)
+
+
+def report(label: str, jobs: int, result) -> None:
+    start, enqueued, drained, note = result
+    latencies = sorted(float(value) * 1000 for value in _redis().lrange(LATENCIES_KEY, 0, -1))
+    _redis().delete(LATENCIES_KEY)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:<9}{(enqueued - start) / jobs * 1e6:>12.0f}{jobs / (drained - start):>12.0f}"
+          f"{statistics.median(latencies):>12.1f}{p99:>12.1f}   {note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do transporte de jobs: Celery x Redis Streams.")
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8, help="Threads do worker (as duas opções).")
+    parser.add_argument("--payload", type=int, default=2048, help="Bytes de conteúdo por job.")
+    parser.add_argument("--transport", choices=["celery", "streams", "both"], default="both")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--stream-worker", action="store_true", help=argparse.SUPPRESS) # Processo worker interno
+    args = parser.parse_args()
+
+    if args.stream_worker:
+        serve_stream_worker(args.concurrency)
+        return
+
+    print(f"{args.jobs} jobs, {args.concurrency} threads, payload {args.payload} B, Redis {settings.REDIS_URL}")
+    print(f"{'':<9}{'publicar µs':>12}{'jobs/s':>12}{'p50 ms':>12}{'p99 ms':>12}")
+    if args.transport in ("celery", "both"):
+        report("celery", args.jobs, run_celery(args.jobs, args.concurrency, args.payload, args.timeout))
+    if args.transport in ("streams", "both"):
+        report("streams", args.jobs, run_streams(args.jobs, args.concurrency, args.payload, args.timeout))
+
+
+if __name__ == "__main__":
+    main()
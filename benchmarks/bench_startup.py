@@ -0,0 +1,122 @@
+# benchmarks/bench_startup.py
+#
+# Mede o custo de inicialização dos pontos de entrada: tempo de import e RSS de um processo novo
+# (sem cache de módulos), e quais SDKs pesados ficaram carregados. Com --warm-up, mede também
+# src.core.llm_providers.warm_up() para os provedores de LLM_WARMUP_PROVIDERS.
+#
+#   python -m benchmarks.bench_startup                      # API (src.main) e worker (tasks)
+#   python -m benchmarks.bench_startup --repeat 5 --warm-up
+#   python -m benchmarks.bench_startup --module src.core.llm_integration --importtime
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+ENTRY_POINTS = {
+    "api": ["src.main"],
+    "worker": ["src.celery_utils", "src.core.tasks"],
+}
+
+# Módulos cuja presença em sys.modules indica import ansioso (SDKs, torch, monkey patching)
+HEAVY_MODULES = [
+    "google.generativeai", "openai", "anthropic", "huggingface_hub",
+    "sentence_transformers", "torch", "eventlet",
+]
+
+PROBE = """
+import importlib, json, os, sys, time
+
+def rss_mib():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / 2**20 if sys.platform == "darwin" else rss / 1024
+
+sys.path.insert(0, {root!r})
+result = {{"rss_before_mib": rss_mib()}}
+start = time.perf_counter()
+try:
+    for name in {modules!r}:
+        importlib.import_module(name)
+except BaseException as e:
+    result["error"] = f"{{type(e).__name__}}: {{e}}"
+result["import_ms"] = (time.perf_counter() - start) * 1000
+result["rss_mib"] = rss_mib()
+if {warm_up!r} and "error" not in result:
+    from src.core.llm_providers import warm_up
+    start = time.perf_counter()
+    result["warm_up"] = warm_up()
+    result["warm_up_ms"] = (time.perf_counter() - start) * 1000
+    result["rss_after_warm_up_mib"] = rss_mib()
+result["heavy"] = [name for name in {heavy!r} if name in sys.modules]
+print("BENCH_RESULT " + json.dumps(result))
+"""
+
+
+def run_probe(modules, warm_up: bool = False, importtime: bool = False):
+    code = PROBE.format(root=ROOT, modules=modules, warm_up=warm_up, heavy=HEAVY_MODULES)
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT)
+    lines = [line for line in proc.stdout.splitlines() if line.startswith("BENCH_RESULT ")]
+    if not lines:
+        raise RuntimeError(f"Processo de medição falhou:\n{proc.stderr[-2000:]}")
+    return json.loads(lines[-1][len("BENCH_RESULT "):]), proc.stderr
+
+
+def slowest_imports(stderr: str, top: int):
+    """Módulos com maior tempo cumulativo na saída de -X importtime."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def report(label, modules, repeat: int, warm_up: bool, importtime: bool, top: int):
+    results = [run_probe(modules, warm_up)[0] for _ in range(repeat)]
+    first = results[0]
+    if "error" in first:
+        print(f"{label:<10} falhou ao importar {', '.join(modules)}: {first['error']}")
+        return
+    import_ms = [r["import_ms"] for r in results]
+    print(f"{label:<10}{statistics.median(import_ms):>10.0f} ms (min {min(import_ms):.0f})"
+          f"{statistics.median(r['rss_mib'] for r in results):>10.1f} MiB"
+          f"   interpretador vazio {first['rss_before_mib']:.1f} MiB")
+    print(f"{'':<10}SDKs/módulos pesados carregados: {', '.join(first['heavy']) or 'nenhum'}")
+    if warm_up:
+        print(f"{'':<10}warm-up {statistics.median(r['warm_up_ms'] for r in results):.0f} ms"
+              f" -> {statistics.median(r['rss_after_warm_up_mib'] for r in results):.1f} MiB {first['warm_up']}")
+    if importtime:
+        _, stderr = run_probe(modules, importtime=True)
+        print(f"{'':<10}{'cumul. ms':>10}{'próprio ms':>12}  módulo")
+        for cumulative_us, self_us, name in slowest_imports(stderr, top):
+            print(f"{'':<10}{cumulative_us / 1000:>10.1f}{self_us / 1000:>12.1f}  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização da API e do worker.")
+    parser.add_argument("--module", action="append", help="Mede estes módulos em vez dos pontos de entrada.")
+    parser.add_argument("--repeat", type=int, default=3, help="Processos novos por ponto de entrada (mediana).")
+    parser.add_argument("--warm-up", action="store_true", help="Mede também warm_up() dos provedores de LLM.")
+    parser.add_argument("--importtime", action="store_true", help="Lista os imports mais lentos (-X importtime).")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    targets = {"custom": args.module} if args.module else ENTRY_POINTS
+    print(f"{'entrada':<10}{'import':>10}{'RSS':>14}")
+    for label, modules in targets.items():
+        report(label, modules, args.repeat, args.warm_up, args.importtime, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# src/api/responses.py
+
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from src.utils import fast_json
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    Resposta JSON renderizada com orjson (com fallback para o json da stdlib).
+    Usada como default_response_class nos roteadores de leitura mais acessados.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return fast_json.dumps(content)
+
+
+# Documentação das rotas servidas por conditional_json_response
+NOT_MODIFIED_RESPONSE = {304: {"description": "A representação do cliente (If-None-Match) continua válida; corpo vazio."}}
+
+
+def make_etag(body: bytes) -> str:
+    """
+    ETag forte derivado do corpo exato da resposta.
+    """
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match usa comparação fraca: ignora o prefixo W/
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def conditional_json_response(request: Request, content: Any, cache_control: str) -> Response:
+    """
+    Renderiza `content` com ETag e Cache-Control, respondendo 304 quando o
+    cliente já possui a mesma representação (If-None-Match).
+    """
+    body = fast_json.dumps(content)
+    etag = make_etag(body)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
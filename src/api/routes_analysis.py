@@ -1,19 +1,32 @@
 # src/api/routes_analysis.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.db.database import get_db_session_async
 from src.db.crud_operations import get_all_analyses, create_analysis_entry, get_analysis_by_id
 from src.models.analysis import Analysis # Importa o modelo ORM diretamente aqui para o Pydantic
+from src.api.responses import NOT_MODIFIED_RESPONSE, ORJSONResponse, conditional_json_response
+from src.core.analysis_cache import cache_control_for, get_analysis_payload
+from src.core.config import settings
+from src.core import cost_accounting, fast_classifier
+from src.core.ledger import get_proof
+from src.db.content_operations import find_reusable_verdict
+from src.db.cost_operations import get_analysis_cost
+from src.db.stats_operations import record_analysis_rollup_sync
+from src.utils.content_hash import content_hash
+from src.schemas.analysis_schemas import AnalysisCostResponse, AnalysisDetail, LedgerProofResponse
+from src.utils.colors import get_color_from_classification
+from src.utils.urls import detect_submission_url
 
 from typing import List, Optional
 from pydantic import BaseModel
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 
-# Importa sua instância do Celery e as tarefas
-from src.celery_utils import celery_app
-from src.core.tasks import analyze_content_task # Nome da tarefa Celery que você criou
+# Backend de execução das análises (Celery ou embutido, ver JOB_BACKEND)
+from src.core.job_backends import JobQueueFull, get_job_backend
+from src.core.tasks import mark_analysis_failed
 
 router = APIRouter()
 
@@ -50,10 +63,72 @@ async def read_all_analyses(db: AsyncSession = Depends(get_db_session_async)):
 async def analyze_text(request: AnalysisRequest, db: AsyncSession = Depends(get_db_session_async)):
     """
     Recebe um texto para análise, cria uma entrada pendente no banco de dados
-    e despacha uma tarefa assíncrona para processamento (via Celery).
+    e despacha o job para processamento assíncrono (Celery ou backend embutido, ver JOB_BACKEND).
     """
     new_analysis_id = uuid.uuid4()
-    
+
+    # Envio de URL: guarda a URL pronta para download; o worker extrai o texto da página
+    submitted_url = detect_submission_url(request.content)
+    if submitted_url is not None:
+        request.content = submitted_url
+
+    # Conteúdo idêntico (mesmo hash normalizado) já verificado recentemente: reaproveita o veredito
+    reusable = await find_reusable_verdict(db, content_hash(request.content), settings.VERDICT_REUSE_MAX_AGE_SECONDS)
+    if reusable is not None:
+        reused = await create_analysis_entry(
+            db,
+            id=new_analysis_id,
+            content=request.content,
+            classification=reusable.classification,
+            color=reusable.color,
+            status="completed",
+            sources=reusable.sources,
+            message=reusable.message,
+            created_at=datetime.utcnow()
+        )
+        reused.provider = "reuse"
+        reused.decision_path = "reuse"
+        reused.completed_at = reused.created_at
+        await db.run_sync(record_analysis_rollup_sync, reused)
+        await db.commit()
+        await db.refresh(reused)
+        cost_accounting.record_without_llm(reused.id, "reuse", "verdict_reuse")
+        return reused
+
+    # Casos óbvios (opinião, sátira, correntes já desmentidas): classificador local, sem Celery/LLM
+    prediction = fast_classifier.classify(request.content) if submitted_url is None else None
+    if prediction is not None and prediction.short_circuit:
+        local = await create_analysis_entry(
+            db,
+            id=new_analysis_id,
+            content=request.content,
+            classification=prediction.label,
+            color=get_color_from_classification(prediction.label),
+            status="completed",
+            sources="[]",
+            message=f"Classificado pelo modelo local (confiança {prediction.confidence:.0%}), sem consulta à LLM.",
+            created_at=datetime.utcnow()
+        )
+        local.provider = "local"
+        local.decision_path = "local"
+        local.local_confidence = prediction.confidence
+        local.completed_at = local.created_at
+        await db.run_sync(record_analysis_rollup_sync, local)
+        await db.commit()
+        await db.refresh(local)
+        cost_accounting.record_without_llm(local.id, "local", "local_classifier")
+        return local
+
+    # Orçamento diário de LLM esgotado: só as respostas sem custo acima continuam sendo servidas
+    if await cost_accounting.daily_budget_exceeded(db):
+        now = datetime.utcnow()
+        tomorrow = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Orçamento diário de análises esgotado; tente novamente amanhã.",
+            headers={"Retry-After": str(int((tomorrow - now).total_seconds()) + 1)},
+        )
+
     # Cria a entrada inicial no banco de dados com status "pending"
     new_analysis = await create_analysis_entry(
         db,
@@ -66,21 +141,29 @@ async def analyze_text(request: AnalysisRequest, db: AsyncSession = Depends(get_
         message="Análise pendente.", # Valor inicial vazio
         created_at=datetime.utcnow()
     )
+    new_analysis.decision_path = "llm"
+    new_analysis.local_confidence = prediction.confidence if prediction is not None else None
+    await db.commit()
 
-    # --- Aqui você despacharia a tarefa Celery ---
+    # --- Despacha o job para o backend configurado (Celery ou embutido) ---
     try:
         # Pega o preferred_llm da requisição, ou usa "gemini" como padrão se não for fornecido
         preferred_llm_for_task = request.preferred_llm if request.preferred_llm else "gemini" 
 
-        task = analyze_content_task.delay(
-            str(new_analysis.id),
+        await get_job_backend().enqueue_analysis(
+            new_analysis.id,
             new_analysis.content, # Passando o conteúdo da análise para a tarefa
             preferred_llm_for_task # AGORA PEGA DA REQUISIÇÃO!
         )
-        # Opcional: Se o seu modelo Analysis tiver um campo para 'celery_task_id', atualize aqui
-        # new_analysis.celery_task_id = task.id
-        # await db.commit() # Salve o ID da tarefa Celery
-        # await db.refresh(new_analysis)
+    except JobQueueFull as e:
+        # Fila cheia: a análise não fica pendente para sempre; o cliente tenta de novo mais tarde
+        print(f"Análise {new_analysis.id} recusada: {e}")
+        await run_in_threadpool(mark_analysis_failed, str(new_analysis.id), "Fila de análises cheia; tente novamente.")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Fila de análises cheia; tente novamente em instantes.",
+            headers={"Retry-After": str(int(settings.JOB_EMBEDDED_HEARTBEAT_SECONDS))},
+        )
     except Exception as e:
         # Lidar com erros no despacho da tarefa
         print(f"Erro ao despachar tarefa Celery: {e}")
@@ -94,12 +177,40 @@ async def analyze_text(request: AnalysisRequest, db: AsyncSession = Depends(get_
     return new_analysis
 
 # Endpoint para obter o status de uma análise específica
-@router.get("/{analysis_id}", response_model=AnalysisResponse, summary="Obter status de uma análise por ID")
-async def get_single_analysis(analysis_id: uuid.UUID, db: AsyncSession = Depends(get_db_session_async)):
+@router.get(
+    "/{analysis_id}", response_model=AnalysisDetail, response_class=ORJSONResponse, responses=NOT_MODIFIED_RESPONSE,
+    summary="Obter status de uma análise por ID",
+)
+async def get_single_analysis(analysis_id: uuid.UUID, request: Request, db: AsyncSession = Depends(get_db_session_async)):
     """
     Retorna os detalhes de uma análise específica pelo seu ID.
+    Análises finalizadas são servidas do cache e respondem 304 a If-None-Match.
     """
-    analysis = await get_analysis_by_id(db, analysis_id)
-    if not analysis:
+    payload = await get_analysis_payload(db, analysis_id)
+    if not payload:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Análise não encontrada.")
-    return analysis
+    return conditional_json_response(request, payload, cache_control_for(payload["status"]))
+
+
+@router.get("/{analysis_id}/proof", response_model=LedgerProofResponse, summary="Prova de inclusão da análise no ledger")
+async def get_analysis_proof(analysis_id: uuid.UUID, db: AsyncSession = Depends(get_db_session_async)):
+    """
+    Prova de Merkle que liga o registro da análise à raiz do lote selado e à cadeia de lotes,
+    verificada na hora. Análises concluídas entram no ledger no próximo lote selado.
+    """
+    proof = await get_proof(db, analysis_id)
+    if proof is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Análise ainda não incluída no ledger.")
+    return proof
+
+
+@router.get("/{analysis_id}/cost", response_model=AnalysisCostResponse, summary="Custo, tokens e tempos de uma análise")
+async def get_analysis_cost_detail(analysis_id: uuid.UUID, db: AsyncSession = Depends(get_db_session_async)):
+    """
+    Tempo por fase, tentativas por provedor/modelo (com tokens e custo estimado), buscas e acertos de
+    cache. O registro é gravado em lote: fica disponível alguns segundos depois do fim da análise.
+    """
+    cost = await get_analysis_cost(db, analysis_id)
+    if cost is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Custo da análise ainda não registrado.")
+    return cost
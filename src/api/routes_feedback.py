@@ -1,14 +1,93 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+# src/api/routes_feedback.py
+
+import uuid
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel, model_validator
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.feedback_stream import FeedbackStreamFull, decode_entry, encode_entry, publish_feedback
+from src.core.users import current_active_user
+from src.db.database import get_db_session_async
+from src.db.feedback_operations import analysis_exists, get_analysis_feedback, record_feedback_batch_sync
+from src.models.user import User
 
 router = APIRouter()
 
 class Feedback(BaseModel):
-    analysis_id: str
-    user_feedback: str
-
-@router.post("/feedback")
-async def receive_feedback(feedback: Feedback):
-    # Aqui você pode adicionar a lógica para processar o feedback
-    # Por exemplo, armazenar no banco de dados ou atualizar o modelo
-    return {"message": "Feedback recebido com sucesso", "feedback": feedback}
\ No newline at end of file
+    analysis_id: uuid.UUID
+    user_feedback: Optional[str] = None # Comentário livre
+    agrees: Optional[bool] = None # O usuário concorda com o veredito?
+    suggested_classification: Optional[Literal["verdadeiro", "fake_news", "sátira", "opinião", "tendencioso", "indefinido"]] = None
+
+    @model_validator(mode="after")
+    def _not_empty(self):
+        if self.agrees is None and self.suggested_classification is None and not self.user_feedback:
+            raise ValueError("Informe agrees, suggested_classification ou user_feedback.")
+        return self
+
+
+class FeedbackAccepted(BaseModel):
+    id: str # ID da entrada no stream
+    queued: bool # False: Redis indisponível, gravado direto no banco
+
+
+class AnalysisFeedbackResponse(BaseModel):
+    analysis_id: uuid.UUID
+    agree_count: int = 0
+    disagree_count: int = 0
+    disputed: bool = False
+    last_feedback_at: Optional[datetime] = None
+
+
+@router.post("/feedback", response_model=FeedbackAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def receive_feedback(
+    feedback: Feedback,
+    db: AsyncSession = Depends(get_db_session_async),
+    user: User = Depends(current_active_user),
+):
+    """
+    Enfileira a correção no Redis Stream; a gravação em lote e os contadores ficam com o worker.
+    Exige login: cada usuário tem um voto por análise, e um novo envio substitui o anterior.
+    Sem Redis, grava direto no banco (mais lento, mas não perde o feedback). Com o stream cheio
+    (consumidor parado), responde 503.
+    """
+    if not await analysis_exists(db, feedback.analysis_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Análise não encontrada.")
+    fields = encode_entry(
+        feedback.analysis_id, feedback.agrees, feedback.suggested_classification, feedback.user_feedback, user.id
+    )
+    try:
+        stream_id = await publish_feedback(fields)
+    except FeedbackStreamFull as e:
+        print(f"Feedback recusado: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Fila de feedback cheia; tente novamente em instantes.",
+            headers={"Retry-After": str(settings.FEEDBACK_CONSUMER_INTERVAL_SECONDS)},
+        )
+    if stream_id is not None:
+        return {"id": stream_id, "queued": True}
+
+    stream_id = f"direct-{uuid.uuid4().hex}"
+    try:
+        await db.run_sync(record_feedback_batch_sync, [decode_entry(stream_id, fields)])
+        await db.commit()
+    except Exception as e:
+        print(f"Erro ao gravar feedback: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Feedback temporariamente indisponível.")
+    return {"id": stream_id, "queued": False}
+
+
+@router.get("/feedback/{analysis_id}", response_model=AnalysisFeedbackResponse)
+async def read_feedback(analysis_id: uuid.UUID, db: AsyncSession = Depends(get_db_session_async)):
+    """
+    Contadores de concordância da análise (atualizados a cada lote do consumidor).
+    """
+    counters = await get_analysis_feedback(db, analysis_id)
+    if counters is None:
+        return {"analysis_id": analysis_id}
+    return counters
@@ -1,23 +1,90 @@
 # src/api/routes_history.py
 
+from datetime import datetime
+from types import SimpleNamespace
 from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-from src.schemas.analysis_schemas import AnalysisResult
-from src.db.crud_operations import get_all_analyses, delete_analysis_by_id
-from src.db.database import get_db_session_async
+from src.api.responses import ORJSONResponse
+from src.core.analysis_cache import analysis_cache, serialize_analysis
+from src.schemas.analysis_schemas import AnalysisHistoryItem, DuplicateContent
+from src.db.content_operations import get_top_duplicates
+from src.db.crud_operations import get_history_page, delete_analysis_by_id
+from src.db.archive_operations import iter_archived_analyses
+from src.db.database import AsyncSessionLocal, get_db_session_async
+from src.models.analysis import Analysis
+from src.utils import fast_json
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
-@router.get("/history", response_model=List[AnalysisResult])
+@router.get("/history", response_model=List[AnalysisHistoryItem])
 async def get_history(
     skip: int = 0,
     limit: int = 100,
     db: AsyncSession = Depends(get_db_session_async)
 ):
-    analyses = await get_all_analyses(db, skip=skip, limit=limit)
-    return [AnalysisResult.model_validate(analysis, from_attributes=True) for analysis in analyses]
+    # Projeção: sem `message` e com apenas um trecho do `content`
+    rows = await get_history_page(db, skip=skip, limit=limit)
+    return [
+        AnalysisHistoryItem(
+            id=str(row.id),
+            status=row.status,
+            classification=row.classification,
+            color=row.color,
+            content_preview=row.content_preview or "",
+            created_at=row.created_at,
+        )
+        for row in rows
+    ]
+
+@router.get("/duplicates", response_model=List[DuplicateContent])
+async def get_duplicates(
+    min_count: int = 2,
+    skip: int = 0,
+    limit: int = 50,
+    db: AsyncSession = Depends(get_db_session_async)
+):
+    # Conteúdos mais reenviados, a partir do ref_count da tabela `contents`
+    rows = await get_top_duplicates(db, min_count=min_count, skip=skip, limit=limit)
+    return [DuplicateContent.model_validate(row) for row in rows]
+
+@router.get("/export", summary="Exporta análises em NDJSON")
+async def export_analyses(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    include_archive: bool = True,
+    batch_size: int = 200,
+):
+    """
+    Exporta as análises do intervalo (created_at, UTC) em NDJSON, uma por linha, em streaming:
+    primeiro a tabela quente (em lotes), depois o arquivo frio lido direto dos arquivos Parquet.
+    """
+    async def generate():
+        # Sessão própria: o gerador continua rodando depois que o endpoint retorna
+        async with AsyncSessionLocal() as db:
+            last_id = None
+            while True:
+                query = select(Analysis).order_by(Analysis.id).limit(batch_size)
+                if last_id is not None:
+                    query = query.where(Analysis.id > last_id)
+                if since is not None:
+                    query = query.where(Analysis.created_at >= since)
+                if until is not None:
+                    query = query.where(Analysis.created_at < until)
+                batch = (await db.execute(query)).unique().scalars().all()
+                if not batch:
+                    break
+                yield b"".join(fast_json.dumps(serialize_analysis(a)) + b"\n" for a in batch)
+                last_id = batch[-1].id
+                db.expunge_all() # Não acumula o lote anterior na identity map
+            if include_archive:
+                async for row in iter_archived_analyses(db, since, until):
+                    yield fast_json.dumps(serialize_analysis(SimpleNamespace(**row))) + b"\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
 @router.delete("/history/{analysis_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_history_entry(
@@ -27,6 +94,7 @@ async def delete_history_entry(
     success = await delete_analysis_by_id(db, analysis_id)
     if not success:
         raise HTTPException(status_code=404, detail="Análise não encontrada")
+    await analysis_cache.invalidate(analysis_id)
     return
     # Retorna 204 No Content, não é necessário retornar nada explicitamente
-# O endpoint de delete_history_entry não precisa retornar nada, pois o status 204 No Content já indica sucesso.
\ No newline at end of file
+# O endpoint de delete_history_entry não precisa retornar nada, pois o status 204 No Content já indica sucesso.
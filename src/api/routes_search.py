@@ -0,0 +1,55 @@
+# src/api/routes_search.py
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from src.api.responses import ORJSONResponse
+from src.schemas.analysis_schemas import SearchHit, SearchResponse
+from src.db.search_operations import search_analyses, snippets_for
+from src.db.database import get_db_session_async
+from src.models.analysis import Analysis
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+@router.get("", response_model=SearchResponse, summary="Busca textual nas análises")
+async def search(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db_session_async)
+):
+    """
+    Busca ranqueada no conteúdo e na justificativa das análises finalizadas, com trechos
+    destacados. Para a próxima página, repita a consulta com `cursor=next_cursor`.
+    """
+    try:
+        hits, next_cursor = await search_analyses(db, q, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Só as análises da página atual são carregadas (e descomprimidas) para montar os trechos
+    ids = [analysis_id for analysis_id, _ in hits]
+    analyses = {}
+    if ids:
+        result = await db.execute(select(Analysis).where(Analysis.id.in_(ids)))
+        analyses = {a.id: a for a in result.unique().scalars()}
+
+    results = []
+    for analysis_id, score in hits:
+        analysis = analyses.get(analysis_id)
+        if analysis is None:
+            continue
+        content_snippet, message_snippet = snippets_for(analysis, q)
+        results.append(SearchHit(
+            id=str(analysis.id),
+            status=analysis.status,
+            classification=analysis.classification,
+            color=analysis.color,
+            score=score,
+            content_snippet=content_snippet,
+            message_snippet=message_snippet,
+            created_at=analysis.created_at,
+        ))
+    return SearchResponse(query=q, results=results, next_cursor=next_cursor)
@@ -0,0 +1,56 @@
+# src/api/routes_sources.py
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from src.api.responses import ORJSONResponse
+from src.schemas.analysis_schemas import AnalysisHistoryItem, DomainStatsResponse
+from src.db.source_operations import get_analyses_citing_domain, get_domain_stats, get_top_domains
+from src.db.database import get_db_session_async
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+@router.get("/domains", response_model=List[DomainStatsResponse], summary="Domínios mais citados")
+async def list_domains(
+    skip: int = 0,
+    limit: int = 50,
+    db: AsyncSession = Depends(get_db_session_async)
+):
+    """
+    Retorna os domínios mais citados com suas estatísticas agregadas.
+    """
+    return await get_top_domains(db, skip=skip, limit=limit)
+
+@router.get("/domains/{domain}", response_model=DomainStatsResponse, summary="Estatísticas de um domínio")
+async def read_domain_stats(domain: str, db: AsyncSession = Depends(get_db_session_async)):
+    """
+    Retorna as estatísticas agregadas e o score de confiabilidade de um domínio.
+    """
+    stats = await get_domain_stats(db, domain)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Domínio não encontrado")
+    return stats
+
+@router.get("/domains/{domain}/analyses", response_model=List[AnalysisHistoryItem], summary="Análises que citaram um domínio")
+async def read_analyses_citing_domain(
+    domain: str,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_db_session_async)
+):
+    """
+    Retorna as análises que citaram alguma URL do domínio, das mais recentes para as mais antigas.
+    """
+    rows = await get_analyses_citing_domain(db, domain, skip=skip, limit=limit)
+    return [
+        AnalysisHistoryItem(
+            id=str(row.id),
+            status=row.status,
+            classification=row.classification,
+            color=row.color,
+            content_preview=row.content_preview or "",
+            created_at=row.created_at,
+        )
+        for row in rows
+    ]
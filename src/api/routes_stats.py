@@ -0,0 +1,73 @@
+# src/api/routes_stats.py
+
+from datetime import datetime, timedelta
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.responses import ORJSONResponse
+from src.core.config import settings
+from src.schemas.analysis_schemas import CostStatsResponse, CrawlDomainReport, StatsResponse, TierStatsResponse
+from src.db.cost_operations import get_cost_stats
+from src.db.stats_operations import get_stats, get_tier_stats
+from src.db.database import get_db_session_async
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+@router.get("", response_model=StatsResponse, summary="Estatísticas agregadas das análises")
+async def read_stats(
+    granularity: Literal["hour", "day"] = "day",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db_session_async)
+):
+    """
+    Contagens por classificação, status e provedor, série temporal e percentis de latência,
+    lidos dos rollups pré-agregados (sem varrer a tabela de análises). Datas em UTC.
+    """
+    until = until or datetime.utcnow()
+    since = since or until - timedelta(days=settings.STATS_DEFAULT_WINDOW_DAYS)
+    return await get_stats(db, granularity, since, until)
+
+
+@router.get("/tiers", response_model=TierStatsResponse, summary="Latência e escalonamento por nível de modelo")
+async def read_tier_stats(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db_session_async)
+):
+    """
+    Quantas análises cada nível de modelo (fast/standard/strong) recebeu, quantas precisaram
+    escalonar e os percentis de latência da LLM por nível. Datas em UTC.
+    """
+    until = until or datetime.utcnow()
+    since = since or until - timedelta(days=settings.STATS_DEFAULT_WINDOW_DAYS)
+    return await get_tier_stats(db, since, until)
+
+
+@router.get("/costs", response_model=CostStatsResponse, summary="Gasto com LLM e busca por dia, provedor, modelo e fase")
+async def read_cost_stats(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    top: int = Query(10, ge=0, le=100),
+    db: AsyncSession = Depends(get_db_session_async)
+):
+    """
+    Gasto estimado (tokens informados pelos provedores × LLM_PRICES_PER_MTOK, mais as buscas pagas)
+    somado por dia e por provedor/modelo/fase, e as `top` análises mais caras do intervalo. Datas em UTC.
+    """
+    until = until or datetime.utcnow()
+    since = since or until - timedelta(days=settings.STATS_DEFAULT_WINDOW_DAYS)
+    return {**await get_cost_stats(db, since, until, top), "daily_budget_usd": settings.COST_DAILY_BUDGET_USD}
+
+
+@router.get("/crawl", response_model=List[CrawlDomainReport], summary="Vazão e frescor do crawler de evidências")
+def read_crawl_stats(hours: float = Query(24, gt=0, le=24 * 30)):
+    """
+    Por domínio confiável, nas últimas `hours` horas. Lido do arquivo SQLite do índice de evidências
+    (função síncrona: o FastAPI a executa no threadpool).
+    """
+    from src.core.crawler import crawl_report
+
+    return crawl_report(hours)
@@ -1,27 +1,42 @@
 # src/api/routes_status.py
 
-from fastapi import APIRouter, Depends, status, HTTPException
+import asyncio
+import time
+
+from fastapi import APIRouter, Depends, status, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession # Importe AsyncSession
+from src.api.responses import NOT_MODIFIED_RESPONSE, ORJSONResponse, conditional_json_response
+from src.core.analysis_cache import analysis_cache, cache_control_for, get_status_payload, is_terminal
+from src.core.config import settings
 from src.schemas.analysis_schemas import AnalysisStatus, AnalysisMessage
-from src.db.crud_operations import get_analysis_by_id, update_analysis_status_sync # <--- Manter sync_crud_operations se Celery for sync
+from src.db.crud_operations import get_analysis_status_by_id, update_analysis_message as update_analysis_message_db
 from src.db.database import get_db_session_async # <--- CORRIGIDO: Importe get_db_session_async
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
-@router.get("/status/{analysis_id}", response_model=AnalysisStatus)
+@router.get("/status/{analysis_id}", response_model=AnalysisStatus, response_class=ORJSONResponse, responses=NOT_MODIFIED_RESPONSE)
 async def get_analysis_status(
     analysis_id: str,
+    request: Request,
+    wait: float = Query(0, ge=0, description="Long-poll: segundos a aguardar enquanto a análise estiver pendente."),
     db: AsyncSession = Depends(get_db_session_async) # <--- CORRIGIDO: Use AsyncSession e get_db_session_async
 ):
-    db_analysis = await get_analysis_by_id(db, analysis_id)
-    if db_analysis is None:
+    # Cache (LRU/Redis) para análises finalizadas; consulta projetada para as pendentes
+    payload = await get_status_payload(db, analysis_id)
+    if payload is None:
         raise HTTPException(status_code=404, detail="Análise não encontrada")
-    return AnalysisStatus(
-        id=db_analysis.id,
-        status=db_analysis.status,
-        classification=db_analysis.classification,
-        color=db_analysis.color
-    )
+
+    # Long-poll: em vez de o cliente repetir a requisição, seguramos a resposta até
+    # a análise terminar ou o prazo acabar, com intervalos crescentes entre consultas.
+    deadline = time.monotonic() + min(wait, settings.STATUS_LONG_POLL_MAX_SECONDS)
+    delay = 0.25
+    while not is_terminal(payload["status"]) and time.monotonic() < deadline:
+        await db.rollback() # Devolve a conexão ao pool durante a espera
+        await asyncio.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+        delay = min(delay * 2, 2.0)
+        payload = await get_status_payload(db, analysis_id) or payload
+
+    return conditional_json_response(request, payload, cache_control_for(payload["status"]))
 
 @router.put("/status/{analysis_id}/message", response_model=AnalysisStatus, status_code=status.HTTP_200_OK)
 async def update_analysis_message(
@@ -29,21 +44,17 @@ async def update_analysis_message(
     analysis_message: AnalysisMessage,
     db: AsyncSession = Depends(get_db_session_async) # <--- CORRIGIDO: Use AsyncSession e get_db_session_async
 ):
-    # ATENÇÃO: update_analysis_status_sync é uma função SÍNCRONA
-    # Você precisará decidir se esta rota deve ser síncrona ou se a função CRUD deve ser assíncrona.
-    # Por agora, vou assumir que update_analysis_status_sync está em src/db/sync_crud_operations.py
-    # e que essa rota pode (temporariamente) chamar uma função síncrona dentro de uma async.
-    # Idealmente, teríamos um update_analysis_message_async em crud_operations.py
-    db_analysis = update_analysis_status_sync(db, analysis_id, analysis_message.new_message) # <--- Chame a função síncrona
-    
-    if db_analysis is None:
+    row = await update_analysis_message_db(db, analysis_id, analysis_message.new_message)
+
+    if row is None:
         raise HTTPException(status_code=404, detail="Análise não encontrada")
-    
+    await analysis_cache.invalidate(analysis_id)
+
     return AnalysisStatus(
-        id=db_analysis.id,
-        status=db_analysis.status,
-        classification=db_analysis.classification,
-        color=db_analysis.color
+        id=str(row.id),
+        status=row.status,
+        classification=row.classification,
+        color=row.color
     )
 
-# ... (outras rotas se houver)
\ No newline at end of file
+# ... (outras rotas se houver)
@@ -1,6 +1,7 @@
 # src/celery_utils.py
 
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown, worker_ready
 from src.core.config import settings
 
 # Configura o Celery
@@ -18,4 +19,57 @@ celery_app.conf.update(
     worker_prefetch_multiplier=1
 )
 
+# Tarefas periódicas (executar também `celery -A src.celery_utils beat`)
+celery_app.conf.beat_schedule = {
+    "reconcile-stats-rollups": {
+        "task": "src.core.tasks.reconcile_stats_task",
+        "schedule": settings.STATS_RECONCILE_INTERVAL_SECONDS,
+    },
+    "archive-old-analyses": {
+        "task": "src.core.tasks.archive_analyses_task",
+        "schedule": settings.ARCHIVE_INTERVAL_SECONDS,
+    },
+    "crawl-evidence-sources": {
+        "task": "src.core.tasks.crawl_evidence_task",
+        "schedule": settings.CRAWLER_INTERVAL_SECONDS,
+        "options": {"expires": settings.CRAWLER_INTERVAL_SECONDS}, # Rodadas atrasadas não se acumulam
+    },
+    "seal-verdict-ledger": {
+        "task": "src.core.tasks.seal_ledger_task",
+        "schedule": settings.LEDGER_SEAL_INTERVAL_SECONDS,
+        "options": {"expires": settings.LEDGER_SEAL_INTERVAL_SECONDS},
+    },
+    "consume-feedback-stream": {
+        "task": "src.core.tasks.consume_feedback_task",
+        "schedule": settings.FEEDBACK_CONSUMER_INTERVAL_SECONDS,
+        "options": {"expires": settings.FEEDBACK_CONSUMER_INTERVAL_SECONDS},
+    },
+}
+
+
+# Pré-carga dos SDKs de LLM (LLM_WARMUP_PROVIDERS) em cada processo que executa tasks: os filhos do
+# prefork/solo recebem worker_process_init; nos pools eventlet/gevent/threads as tasks rodam no processo principal.
+def _warm_up_llm_providers():
+    if settings.LLM_WARMUP_PROVIDERS:
+        from src.core.llm_providers import warm_up
+        warm_up()
+
+
+@worker_process_init.connect
+def _warm_up_worker_process(**kwargs):
+    _warm_up_llm_providers()
+
+
+@worker_ready.connect
+def _warm_up_worker_main(sender=None, **kwargs):
+    pool = getattr(sender, "pool", None)
+    if pool is not None and type(pool).__module__.rsplit(".", 1)[-1] in ("eventlet", "gevent", "thread"):
+        _warm_up_llm_providers()
+
+# Os filhos do prefork saem com os._exit (sem atexit): o buffer de custos (src/core/cost_accounting.py) é gravado aqui
+@worker_process_shutdown.connect
+def _flush_cost_records(**kwargs):
+    from src.core.cost_accounting import cost_writer
+    cost_writer.flush()
+
 print("DEBUG: src/celery_utils.py está sendo carregado e celery_app configurado.")
\ No newline at end of file
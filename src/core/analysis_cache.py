@@ -0,0 +1,271 @@
+# src/core/analysis_cache.py
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, Optional
+
+from src.core.config import settings
+from src.db import crud_operations
+from src.db.archive_operations import get_archived_analysis
+from src.models.analysis import TERMINAL_STATUSES
+from src.schemas.analysis_schemas import parse_sources
+from src.utils import fast_json
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "veritas:analysis:"
+
+
+def is_terminal(status: Optional[str]) -> bool:
+    return status in TERMINAL_STATUSES
+
+
+def serialize_analysis(analysis: Any) -> Dict[str, Any]:
+    """
+    Converte uma análise (objeto ORM ou Row) no dicionário JSON-serializável armazenado no cache.
+    API e worker usam a mesma função, então o ETag é idêntico independentemente de onde a entrada veio.
+    """
+    created_at = getattr(analysis, "created_at", None)
+    return {
+        "id": str(analysis.id),
+        "content": analysis.content,
+        "classification": analysis.classification,
+        "color": analysis.color,
+        "status": analysis.status,
+        "sources": parse_sources(analysis.sources),
+        "message": analysis.message,
+        "created_at": created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+    }
+
+
+def status_view(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Recorte do payload usado por GET /status/{id}.
+    """
+    return {
+        "id": payload["id"],
+        "status": payload["status"],
+        "classification": payload["classification"],
+        "color": payload["color"],
+    }
+
+
+class _LRU:
+    """
+    LRU em memória, com TTL por entrada e seguro para threads.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        if self.max_size <= 0:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class AnalysisCache:
+    """
+    Cache read-through de análises finalizadas: LRU em processo na frente do Redis.
+
+    O worker Celery grava no Redis ao concluir uma análise (store_sync); a API
+    consulta LRU -> Redis -> banco e repopula os níveis superiores (get/store).
+    Falhas do Redis nunca propagam: são tratadas como cache miss.
+    """
+
+    def __init__(self, redis_url: str, ttl_seconds: int, lru_size: int, lru_ttl_seconds: float, enabled: bool = True):
+        self.redis_url = redis_url
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.lru = _LRU(lru_size, lru_ttl_seconds)
+        self._async_redis = None
+        self._sync_redis = None
+
+    # --- Clientes Redis (criados sob demanda) ---
+
+    def _get_async_redis(self):
+        if self._async_redis is None:
+            import redis.asyncio as redis_asyncio
+            self._async_redis = redis_asyncio.from_url(self.redis_url)
+        return self._async_redis
+
+    def _get_sync_redis(self):
+        if self._sync_redis is None:
+            import redis
+            self._sync_redis = redis.Redis.from_url(self.redis_url)
+        return self._sync_redis
+
+    @staticmethod
+    def _key(analysis_id: Any) -> str:
+        # Normaliza UUID/str (com ou sem hífens) para a mesma chave
+        try:
+            analysis_id = uuid.UUID(str(analysis_id))
+        except ValueError:
+            pass
+        return f"{KEY_PREFIX}{analysis_id}"
+
+    # --- API (assíncrona) ---
+
+    async def get(self, analysis_id: Any) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        key = self._key(analysis_id)
+        payload = self.lru.get(key)
+        if payload is not None:
+            return payload
+        try:
+            raw = await self._get_async_redis().get(key)
+        except Exception as e:
+            logger.warning(f"Falha ao ler cache de análise no Redis: {e}")
+            return None
+        if raw is None:
+            return None
+        payload = fast_json.loads(raw)
+        self.lru.set(key, payload)
+        return payload
+
+    async def store(self, payload: Dict[str, Any]) -> None:
+        if not self.enabled or not is_terminal(payload.get("status")):
+            return
+        key = self._key(payload["id"])
+        self.lru.set(key, payload)
+        try:
+            await self._get_async_redis().set(key, fast_json.dumps(payload), ex=self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Falha ao gravar cache de análise no Redis: {e}")
+
+    async def invalidate(self, analysis_id: Any) -> None:
+        key = self._key(analysis_id)
+        self.lru.delete(key)
+        if not self.enabled:
+            return
+        try:
+            await self._get_async_redis().delete(key)
+        except Exception as e:
+            logger.warning(f"Falha ao invalidar cache de análise no Redis: {e}")
+
+    # --- Worker (síncrono) ---
+
+    def store_sync(self, analysis: Any) -> None:
+        """
+        Chamado pelo worker após gravar o resultado final de uma análise.
+        """
+        if not self.enabled or not is_terminal(analysis.status):
+            return
+        payload = serialize_analysis(analysis)
+        try:
+            self._get_sync_redis().set(self._key(payload["id"]), fast_json.dumps(payload), ex=self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Falha ao popular cache da análise {payload['id']} no Redis: {e}")
+
+    def invalidate_sync(self, analysis_ids: Iterable[Any]) -> None:
+        """
+        Remove as análises do Redis e do LRU deste processo (ex.: vereditos que passaram a ser
+        contestados). Os LRUs dos processos da API expiram em ANALYSIS_CACHE_LRU_TTL_SECONDS.
+        """
+        keys = [self._key(analysis_id) for analysis_id in analysis_ids]
+        for key in keys:
+            self.lru.delete(key)
+        if not self.enabled or not keys:
+            return
+        try:
+            self._get_sync_redis().delete(*keys)
+        except Exception as e:
+            logger.warning(f"Falha ao invalidar cache de análises no Redis: {e}")
+
+
+analysis_cache = AnalysisCache(
+    redis_url=settings.REDIS_URL,
+    ttl_seconds=settings.ANALYSIS_CACHE_TTL_SECONDS,
+    lru_size=settings.ANALYSIS_CACHE_LRU_SIZE,
+    lru_ttl_seconds=settings.ANALYSIS_CACHE_LRU_TTL_SECONDS,
+    enabled=settings.ANALYSIS_CACHE_ENABLED,
+)
+
+
+def cache_control_for(status: Optional[str]) -> str:
+    """
+    Cache-Control da resposta: nunca em caches compartilhados (CDNs/proxies) e, por padrão, sempre
+    revalidada; o ETag garante 304 barato. Uma análise finalizada ainda pode mudar (mensagem
+    editada, exclusão), então o max-age só vale se ANALYSIS_CACHE_MAX_AGE_SECONDS for configurado.
+    """
+    if is_terminal(status) and settings.ANALYSIS_CACHE_MAX_AGE_SECONDS > 0:
+        return f"private, max-age={settings.ANALYSIS_CACHE_MAX_AGE_SECONDS}"
+    return "private, no-cache"
+
+
+async def get_analysis_payload(db, analysis_id: Any) -> Optional[Dict[str, Any]]:
+    """
+    Leitura read-through da análise completa: LRU -> Redis -> banco -> arquivo frio.
+    Só análises finalizadas são gravadas no cache.
+    """
+    payload = await analysis_cache.get(analysis_id)
+    if payload is not None:
+        return payload
+    analysis = await crud_operations.get_analysis_by_id(db, analysis_id)
+    if analysis is None:
+        # Análises antigas saem da tabela quente para o arquivo frio (Parquet)
+        archived = await get_archived_analysis(db, analysis_id)
+        if archived is None:
+            return None
+        analysis = SimpleNamespace(**archived)
+    payload = serialize_analysis(analysis)
+    await analysis_cache.store(payload)
+    return payload
+
+
+async def get_status_payload(db, analysis_id: Any) -> Optional[Dict[str, Any]]:
+    """
+    Leitura read-through do status. Para análises pendentes usa apenas a consulta projetada;
+    a linha completa só é carregada (uma vez) para popular o cache quando a análise termina.
+    """
+    payload = await analysis_cache.get(analysis_id)
+    if payload is not None:
+        return status_view(payload)
+    row = await crud_operations.get_analysis_status_by_id(db, analysis_id)
+    if row is None:
+        payload = await get_analysis_payload(db, analysis_id) # Pode estar no arquivo frio
+        return status_view(payload) if payload is not None else None
+    if is_terminal(row.status) and analysis_cache.enabled:
+        payload = await get_analysis_payload(db, analysis_id)
+        if payload is not None:
+            return status_view(payload)
+    return {
+        "id": str(row.id),
+        "status": row.status,
+        "classification": row.classification,
+        "color": row.color,
+    }
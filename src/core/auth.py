@@ -6,6 +6,10 @@ from fastapi_users.authentication import (
     JWTStrategy,
 )
 
+from fastapi_users import exceptions
+from fastapi_users.jwt import generate_jwt
+
+from src.core.auth_cache import auth_cache
 from src.core.config import settings # Supondo que suas chaves estão em settings.py
 
 # A SECRET_KEY é carregada das suas configurações (settings.py que lê o .env)
@@ -16,10 +20,42 @@ SECRET = settings.SECRET_KEY
 # (que é /jwt/login, pois o auth_router tem prefixo "/jwt" e o get_auth_router define "/login")
 bearer_transport = BearerTransport(tokenUrl="/jwt/login")
 
+class CachedJWTStrategy(JWTStrategy):
+    """
+    JWTStrategy com cache: claims decodificadas por token e usuário por (id, token_version) no
+    auth_cache, de modo que clientes autenticados não consultam o banco a cada requisição.
+    O token leva a claim "ver"; se não bater com a token_version atual do usuário, é recusado.
+    """
+
+    async def read_token(self, token, user_manager):
+        if token is None:
+            return None
+        claims = auth_cache.decode(token, self.decode_key, self.token_audience, self.algorithm)
+        if claims is None:
+            return None
+        user_id, token_version = claims
+
+        user = await auth_cache.get_user(user_id, token_version)
+        if user is not None:
+            return user
+        try:
+            user = await user_manager.get(user_manager.parse_id(user_id))
+        except (exceptions.UserNotExists, exceptions.InvalidID):
+            return None
+        if (user.token_version or 0) != token_version:
+            return None # Token emitido antes de uma troca de senha ou desativação
+        await auth_cache.store_user(user)
+        return user
+
+    async def write_token(self, user) -> str:
+        data = {"sub": str(user.id), "aud": self.token_audience, "ver": user.token_version or 0}
+        return generate_jwt(data, self.encode_key, self.lifetime_seconds, algorithm=self.algorithm)
+
+
 # Define a estratégia JWT
 # O tempo de expiração do token (lifetime_seconds) pode ser ajustado
 def get_jwt_strategy() -> JWTStrategy:
-    return JWTStrategy(secret=SECRET, lifetime_seconds=3600) # Token válido por 1 hora (3600 segundos)
+    return CachedJWTStrategy(secret=SECRET, lifetime_seconds=3600) # Token válido por 1 hora (3600 segundos)
 
 # Define o backend de autenticação
 auth_backend = AuthenticationBackend(
@@ -0,0 +1,153 @@
+# src/core/auth_cache.py
+#
+# Cache do caminho autenticado. O JWTStrategy do fastapi_users decodifica o token e busca o usuário
+# no banco (SQLAlchemyUserDatabase) a cada requisição; aqui as claims decodificadas ficam num LRU por
+# token (até o exp) e o usuário fica num LRU curto em processo na frente do Redis, com chave
+# (id, token_version). Trocar a senha, redefini-la ou desativar o usuário incrementa token_version
+# (ver UserManager em src/core/users.py): os tokens antigos deixam de casar com a chave e são recusados.
+
+import hashlib
+import logging
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+import jwt
+from fastapi_users.jwt import decode_jwt
+from sqlalchemy.orm import make_transient_to_detached
+
+from src.core.analysis_cache import _LRU
+from src.core.config import settings
+from src.models.user import User
+from src.utils import fast_json
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "veritas:auth:user:"
+
+# Colunas guardadas no cache; hashed_password fica de fora (não sai do banco)
+USER_FIELDS = ("email", "is_active", "is_superuser", "is_verified", "token_version")
+
+
+def snapshot_user(user: Any) -> Dict[str, Any]:
+    snapshot = {"id": str(user.id)}
+    for field in USER_FIELDS:
+        snapshot[field] = getattr(user, field)
+    return snapshot
+
+
+def user_from_snapshot(snapshot: Dict[str, Any]) -> User:
+    """
+    Reconstrói o usuário como objeto *detached*: se uma rota o passar ao UserManager (PATCH /users/me),
+    session.add gera UPDATE, não INSERT, e as colunas ausentes são carregadas do banco se acessadas.
+    Cada requisição recebe uma instância nova (objetos ORM não são compartilhados entre sessões).
+    """
+    user = User(id=uuid.UUID(snapshot["id"]), **{field: snapshot[field] for field in USER_FIELDS})
+    make_transient_to_detached(user)
+    return user
+
+
+class AuthCache:
+    """
+    Claims por token (só em processo) e usuários por (id, versão do token): LRU -> Redis -> banco.
+    Falhas do Redis nunca propagam: são tratadas como cache miss.
+    """
+
+    def __init__(self, redis_url: str, ttl_seconds: int, user_lru_size: int, user_lru_ttl_seconds: float,
+                 token_lru_size: int, token_lru_ttl_seconds: float, enabled: bool = True):
+        self.redis_url = redis_url
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.users = _LRU(user_lru_size, user_lru_ttl_seconds)
+        self.tokens = _LRU(token_lru_size, token_lru_ttl_seconds)
+        self._async_redis = None
+
+    def _get_async_redis(self):
+        if self._async_redis is None:
+            import redis.asyncio as redis_asyncio
+            self._async_redis = redis_asyncio.from_url(self.redis_url)
+        return self._async_redis
+
+    @staticmethod
+    def _key(user_id: Any, token_version: int) -> str:
+        return f"{KEY_PREFIX}{user_id}:{token_version}"
+
+    # --- Claims ---
+
+    def decode(self, token: str, secret: Any, audience: Any, algorithm: str) -> Optional[Tuple[str, int]]:
+        """
+        (sub, versão) do token, ou None se inválido/expirado. Tokens válidos ficam no LRU até o
+        próprio exp; tokens sem a claim "ver" (emitidos antes dela) valem como versão 0.
+        """
+        key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        if self.enabled:
+            claims = self.tokens.get(key)
+            if claims is not None:
+                return claims
+        try:
+            data = decode_jwt(token, secret, audience, algorithms=[algorithm])
+        except jwt.PyJWTError:
+            return None
+        if data.get("sub") is None:
+            return None
+        claims = (str(data["sub"]), int(data.get("ver", 0)))
+        if self.enabled:
+            expires_in = data["exp"] - time.time() if "exp" in data else None
+            if expires_in is None or expires_in > 0:
+                self.tokens.set(key, claims, ttl_seconds=expires_in)
+        return claims
+
+    # --- Usuários ---
+
+    async def get_user(self, user_id: str, token_version: int) -> Optional[User]:
+        if not self.enabled:
+            return None
+        key = self._key(user_id, token_version)
+        snapshot = self.users.get(key)
+        if snapshot is None:
+            try:
+                raw = await self._get_async_redis().get(key)
+            except Exception as e:
+                logger.warning(f"Falha ao ler cache de usuário no Redis: {e}")
+                return None
+            if raw is None:
+                return None
+            snapshot = fast_json.loads(raw)
+            self.users.set(key, snapshot)
+        return user_from_snapshot(snapshot)
+
+    async def store_user(self, user: Any) -> None:
+        if not self.enabled:
+            return
+        snapshot = snapshot_user(user)
+        key = self._key(snapshot["id"], snapshot["token_version"])
+        self.users.set(key, snapshot)
+        try:
+            await self._get_async_redis().set(key, fast_json.dumps(snapshot), ex=self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Falha ao gravar cache de usuário no Redis: {e}")
+
+    async def invalidate_user(self, user_id: Any, token_version: int) -> None:
+        """
+        Remove o usuário deste processo e do Redis. Os LRUs de outros processos expiram em
+        AUTH_USER_CACHE_LOCAL_TTL_SECONDS.
+        """
+        key = self._key(user_id, token_version)
+        self.users.delete(key)
+        if not self.enabled:
+            return
+        try:
+            await self._get_async_redis().delete(key)
+        except Exception as e:
+            logger.warning(f"Falha ao invalidar cache de usuário no Redis: {e}")
+
+
+auth_cache = AuthCache(
+    redis_url=settings.REDIS_URL,
+    ttl_seconds=settings.AUTH_USER_CACHE_TTL_SECONDS,
+    user_lru_size=settings.AUTH_USER_CACHE_SIZE,
+    user_lru_ttl_seconds=settings.AUTH_USER_CACHE_LOCAL_TTL_SECONDS,
+    token_lru_size=settings.AUTH_TOKEN_CACHE_SIZE,
+    token_lru_ttl_seconds=settings.AUTH_TOKEN_CACHE_TTL_SECONDS,
+    enabled=settings.AUTH_CACHE_ENABLED,
+)
@@ -1,7 +1,7 @@
 # src/core/celery_app.py
 from celery import Celery
-import eventlet
-eventlet.monkey_patch() # CHAME monkey_patch() BEM NO INÍCIO
+# Sem eventlet.monkey_patch() aqui: `celery worker -P eventlet` já aplica o patch ao iniciar, antes de
+# importar o app. No import, ele alterava (e deixava mais lento) qualquer processo que carregasse o módulo.
 
 from src.core.config import settings
 
@@ -1,13 +1,60 @@
-def determine_color(score):
-    if score >= 0.8:
-        return "🟢"  # Verde - Conteúdo verificado como verdadeiro
-    elif score >= 0.5:
-        return "⚪"  # Cinza - Conteúdo ainda em análise
-    elif score >= 0.2:
-        return "🔵"  # Azul - Neutro (opinião, sátira, meme)
-    else:
-        return "🔴"  # Vermelho - Fake news identificada
+# src/core/color_decision.py
+#
+# Cor final de uma análise a partir das pontuações por classificação (vetor de pontuações do
+# ensemble em src/core/verification.py, na ordem de CATEGORIES).
+
+from typing import List, Mapping, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.core.config import settings
+
+CLASSIFICATION_COLORS = {
+    "verdadeiro": "🟢",
+    "fake_news": "🔴",
+    "sátira": "⚪",
+    "opinião": "🔵",
+    "tendencioso": "🟠",
+    "indefinido": "⚫"
+}
+CATEGORIES = tuple(CLASSIFICATION_COLORS)
+
+Scores = Union[Mapping[str, float], Sequence[float], np.ndarray]
+
+
+def as_score_vector(scores: Scores) -> np.ndarray:
+    """Dicionário classificação → pontuação, ou vetor já na ordem de CATEGORIES."""
+    if isinstance(scores, Mapping):
+        return np.array([float(scores.get(name, 0.0)) for name in CATEGORIES])
+    return np.asarray(scores, dtype=float)
+
+
+def top_classification(scores: Scores) -> Tuple[str, float]:
+    """
+    Classificação de maior pontuação e a pontuação. Abaixo de ENSEMBLE_MIN_CONFIDENCE
+    (provedores divididos) a resposta é `indefinido`.
+    """
+    vector = as_score_vector(scores)
+    if not vector.size or not vector.any():
+        return "indefinido", 0.0
+    best = int(vector.argmax())
+    score = float(vector[best])
+    if score < settings.ENSEMBLE_MIN_CONFIDENCE:
+        return "indefinido", score
+    return CATEGORIES[best], score
+
+
+def determine_color(scores: Scores) -> str:
+    return CLASSIFICATION_COLORS[top_classification(scores)[0]]
+
+
+def determine_colors(score_matrix: np.ndarray) -> List[str]:
+    """determine_color para várias análises de uma vez (uma linha por análise)."""
+    score_matrix = np.asarray(score_matrix, dtype=float)
+    best = score_matrix.argmax(axis=1)
+    confident = score_matrix[np.arange(len(score_matrix)), best] >= settings.ENSEMBLE_MIN_CONFIDENCE
+    return [CLASSIFICATION_COLORS[CATEGORIES[index]] if ok else CLASSIFICATION_COLORS["indefinido"] for index, ok in zip(best, confident)]
+
 
 def classify_content(content_analysis):
-    score = content_analysis.get('trust_score', 0)
-    return determine_color(score)
\ No newline at end of file
+    return determine_color(content_analysis.get("scores", {}))
@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -8,6 +8,7 @@ class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite+aiosqlite:///./test.db"
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/1" # Adicionado para consistência
+    REDIS_URL: str = "redis://localhost:6379/2" # Cache de análises e demais usos diretos do Redis
 
     GEMINI_API_KEY: Optional[str] = None
     OPENAI_API_KEY: Optional[str] = None
@@ -20,6 +21,11 @@ class Settings(BaseSettings):
     HUGGINGFACE_API_KEY: Optional[str] = None
     HUGGINGFACE_MODEL_ID: Optional[str] = None
 
+    # Busca externa: Google Custom Search JSON API (src/core/google_search_tool.py); sem as duas, fica desativada
+    GOOGLE_SEARCH_API_KEY: Optional[str] = None
+    GOOGLE_SEARCH_ENGINE_ID: Optional[str] = None
+    GOOGLE_SEARCH_RESULTS_PER_QUERY: int = 5 # Máximo da API: 10
+
     SECRET_KEY: str = "your-super-secret-key" # Certifique-se de que esta chave seja segura em produção
     JWT_ALGORITHM: str = "HS256" # Exemplo de algoritmo JWT
 
@@ -27,4 +33,200 @@ class Settings(BaseSettings):
     DB_MAX_OVERFLOW: int = 20
     PROJECT_NAME: str = "Veritas API"
 
+    # Cache de leitura para análises finalizadas (completed/failed)
+    ANALYSIS_CACHE_ENABLED: bool = True
+    ANALYSIS_CACHE_TTL_SECONDS: int = 86400 # TTL no Redis
+    ANALYSIS_CACHE_LRU_SIZE: int = 2048 # Entradas no LRU em memória de cada processo da API
+    ANALYSIS_CACHE_LRU_TTL_SECONDS: int = 300 # Limita a defasagem entre processos após invalidações
+    ANALYSIS_CACHE_MAX_AGE_SECONDS: int = 0 # max-age (private) de análises finalizadas; 0: sempre revalidar via ETag
+    STATUS_LONG_POLL_MAX_SECONDS: float = 25.0 # Espera máxima aceita em GET /status/{id}?wait=N
+
+    # Compressão transparente de colunas grandes (content, message, sources)
+    COMPRESSION_MIN_BYTES: int = 512 # Valores menores ficam em UTF-8 puro
+    COMPRESSION_LEVEL: int = 6
+    COMPRESSION_ZSTD_DICT_DIR: Optional[str] = None # Diretório com dicionários zstd treinados (*.zdict)
+
+    # Reaproveita o veredito de um conteúdo idêntico (mesmo hash) concluído há menos que isso; 0 desativa
+    VERDICT_REUSE_MAX_AGE_SECONDS: int = 6 * 3600
+
+    # Rollups de estatísticas (GET /stats)
+    STATS_RECONCILE_INTERVAL_SECONDS: int = 3600 # Periodicidade da reconciliação no Celery beat
+    STATS_DEFAULT_WINDOW_DAYS: int = 7 # Janela padrão de GET /stats
+
+    # Arquivo frio: análises finalizadas mais antigas que isso saem da tabela quente para Parquet
+    ARCHIVE_DIR: str = "./data/archive"
+    ARCHIVE_AFTER_DAYS: int = 90
+    ARCHIVE_BATCH_SIZE: int = 500 # Linhas por lote (e no máximo por arquivo Parquet)
+    ARCHIVE_COMPRESSION: str = "zstd" # Codec Parquet (zstd, snappy, gzip...)
+    ARCHIVE_INTERVAL_SECONDS: int = 86400 # Periodicidade do job no Celery beat
+
+    # Download de páginas (src/utils/http_fetch.py)
+    SCRAPER_USER_AGENT: str = "VeritasBot/1.0"
+    SCRAPER_HTTP2: bool = True # Só tem efeito com o pacote h2 instalado
+    SCRAPER_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    SCRAPER_TIMEOUT_SECONDS: float = 8.0 # Leitura/escrita/pool, por operação
+    SCRAPER_TOTAL_TIMEOUT_SECONDS: float = 15.0 # Teto por página, incluindo redirecionamentos
+    SCRAPER_MAX_BYTES: int = 2_000_000 # Corpo lido no máximo até aqui
+    SCRAPER_MAX_REDIRECTS: int = 5 # Cada salto passa de novo pela verificação de destino público
+    SCRAPER_MAX_CONNECTIONS: int = 50
+    SCRAPER_PER_HOST_LIMIT: int = 4 # Requisições simultâneas por host
+    SCRAPER_POLITENESS_DELAY_SECONDS: float = 0.25 # Intervalo mínimo entre requisições ao mesmo host
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_DIR: Optional[str] = "./data/http_cache" # Cache HTTP em disco (ETag/Last-Modified)
+
+    # Envio de URLs: o texto principal da página substitui a URL no prompt
+    URL_ARTICLE_MAX_CHARS: int = 12000 # Teto do corpo da matéria enviado à LLM com LONG_DOC_ENABLED desligado
+    URL_EXTRACTION_TTL_SECONDS: int = 24 * 3600 # Validade da extração em cache por URL
+    URL_EXTRACTION_FAILURE_TTL_SECONDS: int = 600 # Falhas são tentadas de novo depois disso
+
+    # Índice local de evidências (portais confiáveis) consultado antes da busca externa
+    EVIDENCE_RETRIEVAL: str = "hybrid" # "google" (só busca externa), "local" (só índice) ou "hybrid"
+    EVIDENCE_INDEX_PATH: str = "./data/evidence_index.db"
+    EVIDENCE_TOP_K: int = 5 # Passagens por consulta
+    EVIDENCE_MIN_LOCAL_HITS: int = 3 # No modo hybrid, abaixo disso a busca externa complementa
+    EVIDENCE_PASSAGE_WORDS: int = 120
+    EVIDENCE_PASSAGE_OVERLAP_WORDS: int = 30
+    EVIDENCE_EMBEDDING_MODEL: Optional[str] = None # Ex.: "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+    TRUSTED_SOURCE_DOMAINS: List[str] = [
+        "g1.globo.com", "folha.uol.com.br", "estadao.com.br", "bbc.com", "reuters.com",
+        "apnews.com", "aosfatos.org", "lupa.uol.com.br", "boatos.org", "agenciabrasil.ebc.com.br",
+        "gov.br", "who.int",
+    ]
+
+    # Crawler incremental dos portais confiáveis (src/core/crawler.py), agendado no Celery beat
+    CRAWLER_INTERVAL_SECONDS: int = 600 # Periodicidade das rodadas
+    CRAWLER_FEED_INTERVAL_SECONDS: int = 900 # Sitemaps e feeds RSS/Atom
+    CRAWLER_DEFAULT_INTERVAL_SECONDS: int = 6 * 3600 # Revisita de uma matéria sem <changefreq>
+    CRAWLER_MIN_INTERVAL_SECONDS: int = 900
+    CRAWLER_MAX_INTERVAL_SECONDS: int = 14 * 86400
+    CRAWLER_MAX_ARTICLE_AGE_DAYS: int = 30 # Entradas de feed mais antigas são ignoradas
+    CRAWLER_MAX_FETCHES_PER_RUN: int = 500
+    CRAWLER_MAX_FETCHES_PER_DOMAIN: int = 100 # Por rodada
+    CRAWLER_MAX_CHILD_SITEMAPS: int = 5 # Filhos mais recentes seguidos de cada sitemapindex
+
+    # Documentos longos: verificação por trechos em paralelo (map-reduce)
+    LONG_DOC_ENABLED: bool = True
+    LONG_DOC_THRESHOLD_CHARS: int = 8000 # Acima disso o conteúdo é analisado por trechos
+    LONG_DOC_CHUNK_CHARS: int = 4000
+    LONG_DOC_MAX_CHUNKS: int = 16 # Trechos crescem para respeitar este teto
+    LONG_DOC_MAX_CONCURRENCY: int = 8 # Trechos verificados ao mesmo tempo
+    LONG_DOC_MAX_CHARS: int = 64000 # Teto do texto de URLs enviado à análise neste modo
+    LONG_DOC_CHUNK_CACHE_TTL_SECONDS: int = 7 * 86400 # Cache de vereditos por trecho no Redis; 0 desativa
+
+    # Montagem do prompt de análise (src/core/prompt_builder.py)
+    PROMPT_TOKEN_BUDGET: int = 6000 # Entrada total: instruções + conteúdo + evidências
+    PROMPT_EVIDENCE_TOKEN_BUDGET: int = 2500 # Teto só para as evidências
+    PROMPT_MAX_SNIPPET_TOKENS: int = 180 # Cada trecho de evidência é cortado aqui
+    PROMPT_DEDUP_SIMILARITY: float = 0.8 # Jaccard acima do qual dois trechos são considerados o mesmo
+
+    # Porte do modelo por complexidade do conteúdo (src/core/model_tiering.py)
+    MODEL_TIERING_ENABLED: bool = True # Desativado: sempre o nível "standard"
+    MODEL_TIER_THRESHOLDS: List[float] = [0.35, 0.6] # Nota abaixo do 1º: "fast"; abaixo do 2º: "standard"; senão "strong"
+    MODEL_TIER_ESCALATION: bool = True # Resposta "indefinido" é repetida no nível seguinte
+    MODEL_TIERS: Dict[str, Dict[str, str]] = {
+        "gemini": {"fast": "gemini-1.5-flash-8b", "standard": "gemini-1.5-flash", "strong": "gemini-1.5-pro"},
+        "openai": {"fast": "gpt-3.5-turbo", "standard": "gpt-4o-mini", "strong": "gpt-4-turbo"},
+        "claude": {"fast": "claude-3-haiku-20240307", "standard": "claude-3-sonnet-20240229", "strong": "claude-3-opus-20240229"},
+        "deepseek": {"fast": "deepseek-chat", "standard": "deepseek-chat", "strong": "deepseek-chat"},
+    }
+
+    # Classificador local de primeira etapa (src/core/fast_classifier.py); sem modelo treinado fica inativo
+    FAST_CLASSIFIER_ENABLED: bool = True
+    FAST_CLASSIFIER_PATH: str = "./data/fast_classifier.npz" # Gerado por: python -m src.core.fast_classifier train
+    FAST_CLASSIFIER_MIN_CONFIDENCE: float = 0.95 # Probabilidade calibrada a partir da qual a LLM é dispensada
+    FAST_CLASSIFIER_MAX_CHARS: int = 4000 # Textos maiores sempre vão à LLM
+    FAST_CLASSIFIER_HASH_BITS: int = 18 # Tamanho da tabela de hashing (2^N features)
+    FAST_CLASSIFIER_ONLINE_LEARNING_RATE: float = 0.1 # Passo do ajuste com o feedback (comando update)
+    FAST_CLASSIFIER_ONLINE_MIN_VOTES: int = 3 # Votos autenticados mínimos no rótulo de consenso para virar exemplo
+
+    # Ensemble de provedores com quórum ponderado (src/core/verification.py)
+    ENSEMBLE_ENABLED: bool = False # Cada análise consulta vários provedores: mais chamadas por análise
+    ENSEMBLE_PROVIDERS: List[str] = ["gemini", "openai", "claude", "deepseek"] # Só os configurados participam
+    ENSEMBLE_PROVIDER_RELIABILITY: Dict[str, float] = {"gemini": 0.8, "openai": 0.8, "claude": 0.82, "deepseek": 0.75, "huggingface": 0.6}
+    ENSEMBLE_DEFAULT_RELIABILITY: float = 0.7 # Fração de acertos estimada de provedores fora da tabela
+    ENSEMBLE_QUORUM: float = 0.5 # Fração do peso total que, concordando, encerra a consulta
+    ENSEMBLE_MIN_CONFIDENCE: float = 0.5 # Pontuação mínima da classe vencedora; abaixo disso, ⚫ indefinido
+
+    # Limite de taxa dos provedores de LLM, compartilhado pelos processos via Redis (src/core/rate_limiter.py)
+    LLM_RATE_LIMIT_ENABLED: bool = True
+    # Por "provedor" ou "provedor:modelo" (os dois valem, se existirem): "rpm" requisições e "tpm" tokens por
+    # minuto; "burst_requests"/"burst_tokens" opcionais. Ex.: {"openai": {"rpm": 500, "tpm": 200000}}
+    LLM_RATE_LIMITS: Dict[str, Dict[str, float]] = {}
+    LLM_RATE_LIMIT_BURST_FRACTION: float = 0.25 # Rajada padrão: fração do limite por minuto
+    LLM_RATE_LIMIT_MAX_WAIT_SECONDS: float = 2.0 # Espera local pela cota antes de passar ao próximo provedor
+    LLM_RATE_LIMIT_LAST_RESORT_WAIT_SECONDS: float = 30.0 # Espera quando não há outro provedor para tentar
+    LLM_RATE_LIMIT_COOLDOWN_SECONDS: float = 10.0 # Pausa do provedor após um 429 sem Retry-After
+    LLM_OUTPUT_TOKENS_ESTIMATE: int = 1000 # Tokens de resposta somados ao prompt na reserva de "tpm"
+
+    # Custo por análise: tempos, tentativas, tokens, buscas e caches (src/core/cost_accounting.py)
+    COST_ACCOUNTING_ENABLED: bool = True
+    COST_BATCH_SIZE: int = 100 # Registros por gravação em lote
+    COST_FLUSH_SECONDS: float = 5.0 # Periodicidade da gravação quando o lote não enche
+    COST_MAX_BUFFERED: int = 10000 # Limite do buffer se o banco ficar fora; os mais antigos são descartados
+    # USD por 1M de tokens: "input", "output" e "cached_input" (opcional), por modelo ou por provedor.
+    # Preços de tabela dos modelos de MODEL_TIERS; confira os do seu contrato.
+    LLM_PRICES_PER_MTOK: Dict[str, Dict[str, float]] = {
+        "gemini-1.5-flash-8b": {"input": 0.0375, "output": 0.15, "cached_input": 0.01},
+        "gemini-1.5-flash": {"input": 0.075, "output": 0.30, "cached_input": 0.01875},
+        "gemini-1.5-pro": {"input": 1.25, "output": 5.00, "cached_input": 0.3125},
+        "gpt-3.5-turbo": {"input": 0.50, "output": 1.50},
+        "gpt-4o-mini": {"input": 0.15, "output": 0.60, "cached_input": 0.075},
+        "gpt-4-turbo": {"input": 10.00, "output": 30.00},
+        "claude-3-haiku-20240307": {"input": 0.25, "output": 1.25, "cached_input": 0.03},
+        "claude-3-sonnet-20240229": {"input": 3.00, "output": 15.00, "cached_input": 0.30},
+        "claude-3-opus-20240229": {"input": 15.00, "output": 75.00, "cached_input": 1.50},
+        "deepseek-chat": {"input": 0.27, "output": 1.10, "cached_input": 0.07},
+    }
+    SEARCH_PRICE_PER_1K_QUERIES: float = 5.0 # Google Custom Search
+    COST_DAILY_BUDGET_USD: Optional[float] = None # Gasto do dia (UTC) a partir do qual novas análises com LLM são recusadas (429)
+    COST_BUDGET_CHECK_SECONDS: float = 30.0 # Cache do gasto do dia em cada processo da API
+
+    # Feedback de usuários: Redis Stream -> gravação em lote pelo worker (src/core/feedback_stream.py)
+    FEEDBACK_STREAM_KEY: str = "veritas:feedback"
+    FEEDBACK_STREAM_MAX_PENDING: int = 1_000_000 # Entradas ainda não consumidas por todos os grupos; acima disso POST /feedback responde 503
+    FEEDBACK_BATCH_SIZE: int = 500 # Entradas por INSERT
+    FEEDBACK_CONSUMER_INTERVAL_SECONDS: int = 30 # Periodicidade do consumidor no Celery beat
+    FEEDBACK_CLAIM_IDLE_SECONDS: int = 300 # Entradas sem ACK há mais que isso são retomadas por outro consumidor
+    FEEDBACK_MAX_COMMENT_CHARS: int = 2000
+    FEEDBACK_DISPUTE_MIN_VOTES: int = 5 # Discordâncias mínimas para um veredito ser considerado contestado
+    FEEDBACK_DISPUTE_RATIO: float = 0.6 # ... e fração mínima de discordância entre os votos
+
+    # Ledger de vereditos: lotes de Merkle encadeados e ancorados (src/core/ledger.py)
+    LEDGER_ENABLED: bool = True
+    LEDGER_BATCH_SIZE: int = 1024 # Lote cheio é selado na próxima rodada
+    LEDGER_MAX_WAIT_SECONDS: int = 600 # ... e um lote incompleto, quando a análise mais antiga esperou isso
+    LEDGER_SEAL_INTERVAL_SECONDS: int = 60 # Periodicidade da selagem no Celery beat
+    LEDGER_LATE_SECONDS: int = 300 # Folga para análises concluídas fora de ordem
+    LEDGER_ANCHOR_BACKEND: str = "local" # "local", "none" ou "pacote.modulo:Classe" com anchor(batch) -> referência
+    LEDGER_ANCHOR_PATH: str = "./data/ledger_anchors.jsonl" # Usado pelo backend "local"
+
+    # Cache do caminho autenticado (JWT): claims por token e usuário por (id, versão do token)
+    AUTH_CACHE_ENABLED: bool = True
+    AUTH_USER_CACHE_TTL_SECONDS: int = 60 # TTL no Redis
+    AUTH_USER_CACHE_LOCAL_TTL_SECONDS: float = 5.0 # Limita a defasagem entre processos após invalidações
+    AUTH_USER_CACHE_SIZE: int = 10000 # Usuários no LRU em memória de cada processo
+    AUTH_TOKEN_CACHE_SIZE: int = 10000 # Tokens decodificados no LRU (cada um vale até o próprio exp)
+    AUTH_TOKEN_CACHE_TTL_SECONDS: float = 300.0
+
+    # SDKs dos provedores de LLM são carregados no primeiro uso; estes são pré-carregados no startup
+    # da API e de cada processo do worker (ex.: ["gemini", "openai"], "all" = todos os configurados)
+    LLM_WARMUP_PROVIDERS: List[str] = []
+
+    # Execução das análises (src/core/job_backends.py): "celery" (broker + worker) ou "embedded"
+    # (no próprio processo da API, sem Redis/Celery; para instalações pequenas e CI)
+    JOB_BACKEND: str = "celery"
+    JOB_EMBEDDED_WORKERS: int = 4 # Análises simultâneas (threads)
+    JOB_EMBEDDED_QUEUE_SIZE: int = 1000 # Jobs aguardando; acima disso POST /analysis/analyze responde 503
+    JOB_EMBEDDED_HEARTBEAT_SECONDS: float = 15.0
+    JOB_EMBEDDED_STALE_SECONDS: float = 60.0 # Sem heartbeat há mais que isso: o dono caiu, o job é retomado
+    JOB_EMBEDDED_SHUTDOWN_SECONDS: float = 30.0 # Espera pelas análises em execução ao desligar
+    JOB_MAX_ATTEMPTS: int = 3 # Execuções interrompidas antes de finalizar a análise como failed
+    # JOB_BACKEND="redis_streams": workers `python -m src.core.job_stream worker` (no REDIS_URL)
+    JOB_STREAM_KEY: str = "veritas:jobs:analysis"
+    JOB_STREAM_GROUP: str = "analysis-workers"
+    JOB_STREAM_MAX_PENDING: int = 100_000 # Jobs no stream (aguardando + em execução); acima disso POST /analysis/analyze responde 503
+    JOB_STREAM_CONCURRENCY: int = 8 # Análises simultâneas por worker (threads); também o tamanho máximo de cada leitura
+    JOB_STREAM_BLOCK_MS: int = 5000 # Espera do XREADGROUP quando o worker está ocioso
+    JOB_STREAM_CLAIM_IDLE_SECONDS: float = 600.0 # Entrada sem ACK há mais que isso: o worker caiu, outro assume (XAUTOCLAIM)
+
 settings = Settings()
@@ -0,0 +1,324 @@
+# src/core/cost_accounting.py
+#
+# Contabilidade de custo por análise. Registra:
+#   - o tempo de cada fase;
+#   - cada chamada a provedor/modelo, com os tokens de entrada/saída/cache lidos do `usage` da resposta
+#     (estimados quando o SDK não informa);
+#   - as chamadas de busca e os acertos de cache.
+# O registro da análise em andamento fica num ContextVar aberto por track(). As funções do pipeline
+# (llm_integration, long_document, url_content) anotam nele sem recebê-lo como parâmetro; fora de track()
+# as anotações não fazem nada. Ao fim da análise o registro vai para um buffer do processo. Uma thread grava
+# o buffer em lote (COST_BATCH_SIZE registros ou a cada COST_FLUSH_SECONDS) em `analysis_costs` e soma o
+# gasto aos rollups diários por provedor/modelo/fase (`cost_rollups`).
+
+import atexit
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.core.config import settings
+from src.utils import fast_json
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LLMAttempt:
+    phase: str # "query_generation" | "analysis"
+    provider: str
+    model: Optional[str]
+    outcome: str # "ok", "invalid" (JSON inválido), "error", "rate_limited" (429), "throttled" (sem cota local), "cancelled"
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    estimated: bool = False # Tokens estimados localmente (resposta sem `usage`)
+    latency_ms: float = 0.0
+    cost_usd: float = 0.0
+    billed: bool = True # False: o provedor não respondeu (sem cota local, sem cliente, falha de conexão)
+
+
+def usage_from_response(response: Any) -> Optional[Tuple[int, int, int]]:
+    """(entrada, saída, entrada em cache) do `usage` de OpenAI/DeepSeek, Anthropic ou Gemini; None se ausente."""
+    usage = getattr(response, "usage", None)
+    if usage is not None and getattr(usage, "prompt_tokens", None) is not None: # OpenAI/DeepSeek
+        details = getattr(usage, "prompt_tokens_details", None)
+        return usage.prompt_tokens or 0, usage.completion_tokens or 0, getattr(details, "cached_tokens", 0) or 0
+    if usage is not None and getattr(usage, "input_tokens", None) is not None: # Anthropic: input_tokens exclui o cache
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        return usage.input_tokens + cache_read + cache_write, usage.output_tokens or 0, cache_read
+    metadata = getattr(response, "usage_metadata", None) # Gemini
+    if metadata is not None and getattr(metadata, "prompt_token_count", None) is not None:
+        return metadata.prompt_token_count or 0, getattr(metadata, "candidates_token_count", 0) or 0, \
+            getattr(metadata, "cached_content_token_count", 0) or 0
+    return None
+
+
+def price_usd(provider: str, model: Optional[str], input_tokens: int, output_tokens: int, cached_tokens: int) -> float:
+    """Preço pela tabela LLM_PRICES_PER_MTOK (modelo, senão provedor); sem preço conhecido, 0."""
+    prices = settings.LLM_PRICES_PER_MTOK.get(model or "") or settings.LLM_PRICES_PER_MTOK.get(provider)
+    if not prices:
+        return 0.0
+    input_price = prices.get("input", 0.0)
+    return (
+        (input_tokens - cached_tokens) * input_price
+        + cached_tokens * prices.get("cached_input", input_price)
+        + output_tokens * prices.get("output", 0.0)
+    ) / 1_000_000
+
+
+class CostRecorder:
+    """Anotações de uma análise. Tarefas concorrentes da mesma análise (trechos, ensemble) anotam no mesmo objeto."""
+
+    def __init__(self, analysis_id: Any, decision_path: str = "llm"):
+        self.analysis_id = analysis_id if isinstance(analysis_id, uuid.UUID) else uuid.UUID(str(analysis_id))
+        self.decision_path = decision_path
+        self.created_at = datetime.utcnow()
+        self.provider: Optional[str] = None
+        self.phases: Dict[str, float] = defaultdict(float) # ms somados (fases paralelas somam mais que o relógio)
+        self.attempts: List[LLMAttempt] = []
+        self.search_calls: Counter = Counter()
+        self.cache_hits: Counter = Counter()
+        self.total_ms: Optional[float] = None
+        self._start = time.perf_counter()
+
+    def finish(self) -> None:
+        self.total_ms = round((time.perf_counter() - self._start) * 1000, 1)
+
+    def totals(self) -> Dict[str, Any]:
+        billed = [attempt for attempt in self.attempts if attempt.billed]
+        return {
+            "llm_calls": len(billed),
+            "failed_calls": sum(1 for attempt in billed if attempt.outcome != "ok"),
+            "input_tokens": sum(attempt.input_tokens for attempt in billed),
+            "output_tokens": sum(attempt.output_tokens for attempt in billed),
+            "cached_tokens": sum(attempt.cached_tokens for attempt in billed),
+            "search_calls": sum(self.search_calls.values()),
+            "cache_hits": sum(self.cache_hits.values()),
+            "cost_usd": sum(attempt.cost_usd for attempt in billed) + self.search_cost_usd(),
+        }
+
+    def search_cost_usd(self) -> float:
+        return self.search_calls.get("google", 0) * settings.SEARCH_PRICE_PER_1K_QUERIES / 1000
+
+    def to_row(self) -> Dict[str, Any]:
+        return {
+            "analysis_id": self.analysis_id,
+            "created_at": self.created_at,
+            "decision_path": self.decision_path,
+            "provider": self.provider,
+            "total_ms": self.total_ms,
+            **self.totals(),
+            "detail": fast_json.dumps({
+                "phases_ms": {name: round(ms, 1) for name, ms in self.phases.items()},
+                "attempts": [asdict(attempt) for attempt in self.attempts],
+                "search_calls": dict(self.search_calls),
+                "cache_hits": dict(self.cache_hits),
+            }).decode("utf-8"),
+        }
+
+    def rollup_rows(self) -> List[Dict[str, Any]]:
+        """Uma linha por chamada (e uma para a busca paga), na chave do rollup diário."""
+        day = self.created_at.replace(hour=0, minute=0, second=0, microsecond=0)
+        rows = [
+            {
+                "day": day, "provider": attempt.provider, "model": attempt.model or "", "phase": attempt.phase,
+                "calls": 1, "failed_calls": int(attempt.outcome != "ok"),
+                "input_tokens": attempt.input_tokens, "output_tokens": attempt.output_tokens,
+                "cached_tokens": attempt.cached_tokens, "cost_usd": attempt.cost_usd, "latency_sum_ms": attempt.latency_ms,
+            }
+            for attempt in self.attempts if attempt.billed
+        ]
+        if self.search_calls.get("google"):
+            rows.append({
+                "day": day, "provider": "google", "model": "custom-search", "phase": "search",
+                "calls": self.search_calls["google"], "failed_calls": 0, "input_tokens": 0, "output_tokens": 0,
+                "cached_tokens": 0, "cost_usd": self.search_cost_usd(), "latency_sum_ms": self.phases.get("retrieval", 0.0),
+            })
+        return rows
+
+
+_current: ContextVar[Optional[CostRecorder]] = ContextVar("veritas_cost_recorder", default=None)
+
+
+def current() -> Optional[CostRecorder]:
+    return _current.get()
+
+
+@contextmanager
+def track(analysis_id: Any, decision_path: str = "llm") -> Iterator[CostRecorder]:
+    """
+    Abre o registro da análise para o código executado dentro do bloco (inclusive corrotinas de um
+    asyncio.run feito ali: o contexto é copiado). Ao sair, com ou sem erro, o registro vai para o buffer.
+    """
+    recorder = CostRecorder(analysis_id, decision_path)
+    token = _current.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current.reset(token)
+        recorder.finish()
+        cost_writer.submit(recorder)
+
+
+def add_phase_time(name: str, start: float) -> float:
+    """Soma à fase o tempo desde `start` (time.perf_counter) e devolve o instante atual, início da próxima fase."""
+    now = time.perf_counter()
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.phases[name] += (now - start) * 1000
+    return now
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_phase_time(name, start)
+
+
+def record_llm_call(phase_name: str, provider: str, model: Optional[str], outcome: str, response: Any = None,
+                    latency_ms: float = 0.0, estimated_input_tokens: int = 0, estimated_output_tokens: int = 0,
+                    answered: bool = True) -> None:
+    """
+    `answered`: o provedor respondeu (resposta ou erro HTTP). Sem resposta a chamada fica registrada,
+    mas não é cobrada nem conta nos totais e rollups.
+    """
+    recorder = _current.get()
+    if recorder is None:
+        return
+    usage = usage_from_response(response) if response is not None else None
+    if usage is not None:
+        estimated = False
+    elif answered:
+        # Sem `usage` (Hugging Face, erro HTTP): tokens estimados localmente
+        usage, estimated = (estimated_input_tokens, estimated_output_tokens, 0), True
+    else:
+        usage, estimated = (0, 0, 0), False
+    recorder.attempts.append(LLMAttempt(
+        phase=phase_name, provider=provider, model=model, outcome=outcome,
+        input_tokens=usage[0], output_tokens=usage[1], cached_tokens=usage[2], estimated=estimated,
+        latency_ms=round(latency_ms, 1), cost_usd=price_usd(provider, model, *usage), billed=answered,
+    ))
+
+
+def count_search(kind: str, calls: int = 1) -> None:
+    recorder = _current.get()
+    if recorder is not None and calls:
+        recorder.search_calls[kind] += calls
+
+
+def count_cache_hit(kind: str) -> None:
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.cache_hits[kind] += 1
+
+
+def record_without_llm(analysis_id: Any, decision_path: str, cache_hit: str) -> None:
+    """Análises respondidas na própria API (reaproveitamento, classificador local): custo zero, registradas igual."""
+    with track(analysis_id, decision_path) as recorder:
+        recorder.provider = decision_path
+        recorder.cache_hits[cache_hit] += 1
+
+
+_spend_cache: Tuple[float, Optional[datetime], float] = (0.0, None, 0.0) # (instante da leitura, dia, gasto)
+
+
+async def daily_budget_exceeded(db: Any) -> bool:
+    """
+    Gasto do dia (UTC) já atingiu COST_DAILY_BUDGET_USD? Lido dos rollups no máximo a cada
+    COST_BUDGET_CHECK_SECONDS por processo; o que ainda está no buffer entra na leitura seguinte.
+    """
+    global _spend_cache
+    if settings.COST_DAILY_BUDGET_USD is None:
+        return False
+    from src.db.cost_operations import get_spend_since
+
+    now = datetime.utcnow()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    read_at, day, spend = _spend_cache
+    if day != today or time.monotonic() - read_at > settings.COST_BUDGET_CHECK_SECONDS:
+        try:
+            spend = await get_spend_since(db, today)
+        except Exception as e:
+            logger.warning(f"Falha ao ler o gasto do dia; orçamento não verificado: {e}")
+            return False
+        _spend_cache = (time.monotonic(), today, spend)
+    return spend >= settings.COST_DAILY_BUDGET_USD
+
+
+class CostWriter:
+    """
+    Buffer do processo, gravado por uma thread de fundo: a cada `flush_seconds`, ou antes, quando junta
+    `batch_size` registros. submit() nunca faz I/O (pode ser chamado do event loop da API). Se o banco
+    falhar, o lote volta ao buffer, até `max_buffered` registros; acima disso os mais antigos são descartados.
+    """
+
+    def __init__(self, batch_size: int, flush_seconds: float, max_buffered: int):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_buffered = max_buffered
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset) # Filhos do prefork começam com buffer e thread próprios
+
+    def _reset(self) -> None:
+        self._buffer: List[CostRecorder] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, recorder: CostRecorder) -> None:
+        if not settings.COST_ACCOUNTING_ENABLED:
+            return
+        with self._lock:
+            self._buffer.append(recorder)
+            if len(self._buffer) > self.max_buffered:
+                del self._buffer[: len(self._buffer) - self.max_buffered]
+            full = len(self._buffer) >= self.batch_size
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="veritas-cost-writer", daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Grava tudo o que está no buffer (também chamado no desligamento do processo)."""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if not batch:
+            return 0
+        try:
+            from src.db.cost_operations import record_costs_batch_sync
+            from src.db.database import SyncSessionLocal
+
+            with SyncSessionLocal() as db:
+                record_costs_batch_sync(db, [recorder.to_row() for recorder in batch],
+                                        [row for recorder in batch for row in recorder.rollup_rows()])
+                db.commit()
+        except Exception as e:
+            logger.error(f"Falha ao gravar {len(batch)} registros de custo; ficam para o próximo lote: {e}")
+            with self._lock:
+                self._buffer[:0] = batch[-self.max_buffered:]
+            return 0
+        return len(batch)
+
+
+cost_writer = CostWriter(settings.COST_BATCH_SIZE, settings.COST_FLUSH_SECONDS, settings.COST_MAX_BUFFERED)
+atexit.register(cost_writer.flush)
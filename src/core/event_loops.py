@@ -0,0 +1,34 @@
+# src/core/event_loops.py
+#
+# Clientes ligados a um event loop: o motor HTTP (src/utils/http_fetch.py), o cliente Redis do limite
+# de taxa e os clientes assíncronos dos provedores de LLM são criados um por loop. Código síncrono que
+# roda um loop próprio (tasks, workers de jobs, CLIs) usa run_sync, que os fecha antes de o loop acabar.
+
+import asyncio
+from typing import Any, Awaitable, TypeVar
+
+from src.core.llm_providers import close_provider_clients
+from src.core.rate_limiter import close_rate_limiter
+from src.utils.http_fetch import close_fetch_engine
+
+T = TypeVar("T")
+
+
+async def close_loop_clients() -> None:
+    """Fecha os clientes do event loop atual."""
+    await close_fetch_engine()
+    await close_rate_limiter()
+    await close_provider_clients()
+
+
+async def closing_loop_clients(coro: Awaitable[T]) -> T:
+    """Aguarda `coro` e fecha os clientes do loop, mesmo em caso de erro."""
+    try:
+        return await coro
+    finally:
+        await close_loop_clients()
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """asyncio.run de `coro` num loop próprio, fechando os clientes desse loop ao final."""
+    return asyncio.run(closing_loop_clients(coro))
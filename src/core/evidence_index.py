@@ -0,0 +1,386 @@
+# src/core/evidence_index.py
+
+import hashlib
+import importlib.util
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.core.config import settings
+from src.utils.text_search import build_fts5_query, terms_text
+from src.utils.urls import canonicalize_url, domain_of
+
+logger = logging.getLogger(__name__)
+
+# Vetores densos são opcionais: exigem sentence-transformers e EVIDENCE_EMBEDDING_MODEL configurado.
+# O pacote (e o torch) só é importado quando o primeiro vetor é calculado; aqui apenas se verifica a instalação.
+HAS_SENTENCE_TRANSFORMERS = importlib.util.find_spec("sentence_transformers") is not None
+
+RRF_K = 60 # Constante da Reciprocal Rank Fusion (BM25 + denso)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    domain TEXT NOT NULL,
+    title TEXT,
+    fingerprint TEXT NOT NULL,
+    published_at REAL,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_documents_domain ON documents (domain);
+CREATE TABLE IF NOT EXISTS passages (
+    id INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    terms TEXT NOT NULL,
+    vector BLOB
+);
+CREATE INDEX IF NOT EXISTS ix_passages_document_id ON passages (document_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5(
+    terms, content='passages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS passages_ai AFTER INSERT ON passages BEGIN
+    INSERT INTO passages_fts(rowid, terms) VALUES (new.id, new.terms);
+END;
+CREATE TRIGGER IF NOT EXISTS passages_ad AFTER DELETE ON passages BEGIN
+    INSERT INTO passages_fts(passages_fts, rowid, terms) VALUES ('delete', old.id, old.terms);
+END;
+"""
+
+
+def content_fingerprint(text: str) -> str:
+    """
+    Impressão digital do texto normalizado (espaços/caixa): detecta páginas inalteradas.
+    """
+    return hashlib.sha256(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+
+
+def chunk_text(text: str, max_words: Optional[int] = None, overlap_words: Optional[int] = None) -> List[str]:
+    """
+    Divide o texto em passagens de até max_words palavras, respeitando frases quando possível,
+    com sobreposição entre passagens vizinhas para não cortar uma evidência ao meio.
+    """
+    max_words = max_words or settings.EVIDENCE_PASSAGE_WORDS
+    overlap_words = settings.EVIDENCE_PASSAGE_OVERLAP_WORDS if overlap_words is None else overlap_words
+    sentences = []
+    for paragraph in text.split("\n"):
+        for sentence in _SENTENCE_END.split(paragraph):
+            words = sentence.split()
+            # Frase gigante (listas, tabelas): vira pedaços de max_words palavras
+            sentences.extend(words[i:i + max_words] for i in range(0, len(words), max_words))
+    passages, current, fresh = [], [], 0 # fresh: palavras ainda não emitidas em nenhuma passagem
+    for words in sentences:
+        if current and len(current) + len(words) > max_words:
+            passages.append(current)
+            current = current[-overlap_words:] if overlap_words else []
+            if len(current) + len(words) > max_words:
+                current = []
+            fresh = 0
+        current = current + words
+        fresh += len(words)
+    if fresh:
+        passages.append(current)
+    return [" ".join(words) for words in passages]
+
+
+class _Embedder:
+    """
+    Codificador denso carregado sob demanda (CPU). Vetores normalizados: produto interno = cosseno.
+    """
+
+    def __init__(self, model_name: Optional[str]):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.model_name) and HAS_SENTENCE_TRANSFORMERS
+
+    def encode(self, texts: List[str]) -> Optional[np.ndarray]:
+        if not self.enabled or not texts:
+            return None
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(self.model_name, device="cpu")
+        return np.asarray(self._model.encode(texts, normalize_embeddings=True), dtype=np.float32)
+
+
+class EvidenceIndex:
+    """
+    Índice local de evidências de portais confiáveis, num arquivo SQLite próprio:
+    passagens com índice invertido BM25 (FTS5, mesmos radicais da busca em src/utils/text_search.py)
+    e, opcionalmente, vetores densos buscados por produto interno numa matriz NumPy em memória.
+    Atualizações são incrementais por documento (sem reconstrução do índice).
+    """
+
+    def __init__(self, path: str, embedding_model: Optional[str] = None):
+        self.path = path
+        self.embedder = _Embedder(embedding_model)
+        self._local = threading.local()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+        # Matriz densa em memória, estendida incrementalmente com as passagens novas
+        self._vectors_lock = threading.Lock()
+        self._vector_ids = np.empty(0, dtype=np.int64)
+        self._vectors: Optional[np.ndarray] = None
+        self._vectors_max_id = 0
+        self._vectors_dirty = False
+
+    # --- Conexão ---
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL") # Leitores não bloqueiam o indexador
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.executescript(_SCHEMA)
+                    self._schema_ready = True
+        return conn
+
+    # --- Escrita ---
+
+    def upsert_document(
+        self, url: str, title: Optional[str], text: str, published_at: Optional[float] = None
+    ) -> bool:
+        """
+        Indexa (ou reindexa) um documento. Se o texto não mudou desde a última indexação
+        (mesma impressão digital), nada é feito. Retorna True se o índice foi alterado.
+        """
+        url = canonicalize_url(url) or url
+        fingerprint = content_fingerprint(text)
+        conn = self._connection()
+        existing = conn.execute("SELECT id, fingerprint FROM documents WHERE url = ?", (url,)).fetchone()
+        if existing is not None and existing["fingerprint"] == fingerprint:
+            return False
+
+        passages = chunk_text(text)
+        vectors = self.embedder.encode(passages) # Fora da transação: pode ser lento
+        with conn:
+            if existing is not None:
+                conn.execute("DELETE FROM passages WHERE document_id = ?", (existing["id"],))
+                conn.execute(
+                    "UPDATE documents SET title = ?, fingerprint = ?, published_at = ?, indexed_at = ? WHERE id = ?",
+                    (title, fingerprint, published_at, time.time(), existing["id"]),
+                )
+                document_id = existing["id"]
+                self._vectors_dirty = vectors is not None or self._vectors is not None
+            else:
+                document_id = conn.execute(
+                    "INSERT INTO documents (url, domain, title, fingerprint, published_at, indexed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, domain_of(url) or "", title, fingerprint, published_at, time.time()),
+                ).lastrowid
+            conn.executemany(
+                "INSERT INTO passages (document_id, position, text, terms, vector) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (document_id, position, passage, terms_text(f"{title or ''} {passage}"),
+                     vectors[position].tobytes() if vectors is not None else None)
+                    for position, passage in enumerate(passages)
+                ],
+            )
+        return True
+
+    def remove_document(self, url: str) -> bool:
+        conn = self._connection()
+        with conn:
+            deleted = conn.execute("DELETE FROM documents WHERE url = ?", (canonicalize_url(url) or url,)).rowcount
+        if deleted:
+            self._vectors_dirty = True
+        return bool(deleted)
+
+    def document_fingerprint(self, url: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT fingerprint FROM documents WHERE url = ?", (canonicalize_url(url) or url,)
+        ).fetchone()
+        return row["fingerprint"] if row else None
+
+    # --- Busca ---
+
+    def _bm25(self, query: str, limit: int) -> List[int]:
+        match = build_fts5_query(query, any_term=True)
+        if match is None:
+            return []
+        rows = self._connection().execute(
+            "SELECT rowid FROM passages_fts WHERE passages_fts MATCH ? ORDER BY rank LIMIT ?", (match, limit),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def _refresh_vectors(self) -> None:
+        """
+        Carrega na matriz só as passagens novas desde a última carga; recarrega tudo se houve remoções.
+        """
+        conn = self._connection()
+        with self._vectors_lock:
+            if self._vectors_dirty:
+                self._vector_ids, self._vectors, self._vectors_max_id = np.empty(0, dtype=np.int64), None, 0
+                self._vectors_dirty = False
+            rows = conn.execute(
+                "SELECT id, vector FROM passages WHERE id > ? AND vector IS NOT NULL ORDER BY id", (self._vectors_max_id,),
+            ).fetchall()
+            if not rows:
+                return
+            ids = np.fromiter((row["id"] for row in rows), dtype=np.int64, count=len(rows))
+            block = np.vstack([np.frombuffer(row["vector"], dtype=np.float32) for row in rows])
+            self._vector_ids = np.concatenate([self._vector_ids, ids])
+            self._vectors = block if self._vectors is None else np.vstack([self._vectors, block])
+            self._vectors_max_id = int(ids[-1])
+
+    def _dense(self, query: str, limit: int) -> List[int]:
+        query_vector = self.embedder.encode([query])
+        if query_vector is None:
+            return []
+        self._refresh_vectors()
+        if self._vectors is None:
+            return []
+        scores = self._vectors @ query_vector[0]
+        top = np.argpartition(-scores, min(limit, len(scores) - 1))[:limit]
+        return [int(self._vector_ids[i]) for i in top[np.argsort(-scores[top])]]
+
+    def search(self, query: str, k: Optional[int] = None, max_per_document: int = 2) -> List[Dict[str, Any]]:
+        """
+        Top-k passagens para a consulta: BM25 e, se houver vetores, fusão com a busca densa (RRF).
+        Limita passagens por documento para diversificar as fontes.
+        """
+        k = k or settings.EVIDENCE_TOP_K
+        candidates = k * 4
+        rankings = [self._bm25(query, candidates)]
+        if self.embedder.enabled:
+            rankings.append(self._dense(query, candidates))
+        fused: Dict[int, float] = {}
+        for ranking in rankings:
+            for rank, passage_id in enumerate(ranking):
+                fused[passage_id] = fused.get(passage_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+        if not fused:
+            return []
+
+        ordered = sorted(fused, key=fused.get, reverse=True)
+        placeholders = ",".join("?" * len(ordered))
+        rows = {
+            row["id"]: row for row in self._connection().execute(
+                f"SELECT p.id, p.document_id, p.text, d.url, d.domain, d.title, d.published_at "
+                f"FROM passages p JOIN documents d ON d.id = p.document_id WHERE p.id IN ({placeholders})",
+                ordered,
+            )
+        }
+        results, per_document = [], {}
+        for passage_id in ordered:
+            row = rows.get(passage_id)
+            if row is None or per_document.get(row["document_id"], 0) >= max_per_document:
+                continue
+            per_document[row["document_id"]] = per_document.get(row["document_id"], 0) + 1
+            results.append({
+                "url": row["url"],
+                "domain": row["domain"],
+                "title": row["title"],
+                "text": row["text"],
+                "published_at": row["published_at"],
+                "score": fused[passage_id],
+            })
+            if len(results) >= k:
+                break
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connection()
+        return {
+            "documents": conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0],
+            "passages": conn.execute("SELECT COUNT(*) FROM passages").fetchone()[0],
+            "dense": self.embedder.enabled,
+        }
+
+
+evidence_index = EvidenceIndex(settings.EVIDENCE_INDEX_PATH, settings.EVIDENCE_EMBEDDING_MODEL)
+
+
+def is_trusted_url(url: str) -> bool:
+    """
+    URL pertence a um dos portais confiáveis (o domínio ou um subdomínio dele)?
+    """
+    domain = domain_of(url)
+    return bool(domain) and any(domain == d or domain.endswith("." + d) for d in settings.TRUSTED_SOURCE_DOMAINS)
+
+
+def search_evidence(queries: Iterable[str], k: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Busca local no formato de resultados do GoogleSearchTool ([{"query", "results": [...]}]),
+    para ser usada antes ou no lugar da busca externa.
+    """
+    result_sets = []
+    for query in queries:
+        hits = evidence_index.search(query, k)
+        result_sets.append({
+            "query": query,
+            "results": [
+                {"source_title": hit["title"] or hit["domain"], "snippet": hit["text"], "url": hit["url"]}
+                for hit in hits
+            ],
+        })
+    return result_sets
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    from src.core.event_loops import run_sync
+    from src.utils.scraping import fetch_article
+
+    parser = argparse.ArgumentParser(description="Índice local de evidências (portais confiáveis).")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    add = subcommands.add_parser("add", help="Baixa e indexa URLs.")
+    add.add_argument("urls", nargs="*")
+    add.add_argument("--from-sources", action="store_true", help="Indexa URLs de portais confiáveis já citadas em análises.")
+    add.add_argument("--limit", type=int, default=500)
+    search = subcommands.add_parser("search", help="Consulta o índice.")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "search":
+        start = time.perf_counter()
+        hits = evidence_index.search(args.query, args.k)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for hit in hits:
+            print(f"[{hit['score']:.4f}] {hit['url']}\n    {hit['text'][:200]}")
+        print(f"{len(hits)} passagens em {elapsed_ms:.1f} ms ({evidence_index.stats()})")
+    else:
+        urls = list(args.urls)
+        if args.from_sources:
+            from sqlalchemy import select
+
+            from src.db.database import SyncSessionLocal
+            from src.models.source import Source
+
+            with SyncSessionLocal() as db:
+                cited = db.execute(select(Source.url).order_by(Source.first_seen_at.desc()).limit(args.limit * 10)).scalars()
+                urls += [url for url in cited if is_trusted_url(url)][: args.limit]
+
+        async def index_all():
+            articles = await asyncio.gather(*(fetch_article(url) for url in urls))
+            changed = 0
+            for url, article in zip(urls, articles):
+                if article is not None:
+                    changed += await asyncio.to_thread(
+                        evidence_index.upsert_document, article.canonical_url or url, article.title, article.text
+                    )
+            return changed
+
+        print(f"{run_sync(index_all())} documento(s) indexado(s) de {len(urls)} URL(s). {evidence_index.stats()}")
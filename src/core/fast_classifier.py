@@ -0,0 +1,417 @@
+# src/core/fast_classifier.py
+#
+# Classificador local de primeira etapa: modelo linear (regressão logística multinomial) sobre
+# n-gramas de palavras com hashing, treinado com os vereditos já gravados em `analyses`. Roda no
+# processo da API em frações de milissegundo; quando a probabilidade calibrada (temperature scaling
+# sobre um conjunto separado) passa de FAST_CLASSIFIER_MIN_CONFIDENCE, a análise é respondida sem
+# Celery nem LLM. Treino e avaliação offline: python -m src.core.fast_classifier train|evaluate;
+# ajuste online com o feedback dos usuários: python -m src.core.fast_classifier update
+
+import logging
+import math
+import os
+import re
+import unicodedata
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.core.config import settings
+from src.utils import fast_json
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ("verdadeiro", "fake_news", "sátira", "opinião", "tendencioso", "indefinido")
+MODEL_VERSION = 1
+# Vereditos que não vieram de uma LLM não entram no treino (evita o modelo aprender consigo mesmo)
+EXCLUDED_PROVIDERS = ("local", "reuse")
+
+_TOKEN = re.compile(r"\w+|!+|\?+", re.UNICODE)
+_UPPER_WORD = re.compile(r"\b[A-ZÀ-Ý]{3,}\b")
+_LINK = re.compile(r"https?://|www\.", re.IGNORECASE)
+
+
+def _normalize(token: str) -> str:
+    token = unicodedata.normalize("NFKD", token.lower())
+    return "".join(ch for ch in token if not unicodedata.combining(ch))
+
+
+def feature_names(text: str) -> List[str]:
+    """
+    Unigramas e bigramas de palavras (minúsculas, sem acento) e marcas de estilo típicas de
+    correntes e sátira: caixa alta, exclamações, links e a faixa de tamanho do texto.
+    """
+    tokens = [_normalize(token) for token in _TOKEN.findall(text)]
+    names = [f"w:{token}" for token in tokens]
+    names.extend(f"b:{first} {second}" for first, second in zip(tokens, tokens[1:]))
+    words = sum(1 for token in tokens if token[0] not in "!?")
+    names.append(f"len:{min(12, int(math.log2(words + 1)))}")
+    if len(_UPPER_WORD.findall(text)) >= 3:
+        names.append("style:caps")
+    if text.count("!") >= 3:
+        names.append("style:exclamations")
+    if _LINK.search(text):
+        names.append("style:link")
+    return names
+
+
+def hash_features(text: str, hash_bits: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vetor esparso (índices únicos, valores) com hashing com sinal e normalização L2.
+    crc32 em vez de hash(): precisa ser estável entre processos e entre treino e produção.
+    """
+    mask = (1 << hash_bits) - 1
+    counts: Counter = Counter()
+    for name in feature_names(text):
+        h = zlib.crc32(name.encode("utf-8"))
+        counts[h & mask] += 1.0 if h & 0x80000000 else -1.0
+    if not counts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    norm = float(np.linalg.norm(values))
+    return indices, values / norm if norm else values
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+class FastPrediction:
+    """
+    Classe mais provável, sua probabilidade calibrada e se basta para dispensar a LLM.
+    """
+    __slots__ = ("label", "confidence", "short_circuit")
+
+    def __init__(self, label: str, confidence: float, short_circuit: bool):
+        self.label = label
+        self.confidence = confidence
+        self.short_circuit = short_circuit
+
+
+class FastClassifier:
+    __slots__ = ("weights", "bias", "classes", "temperature", "hash_bits", "trained_at", "metrics", "feedback_cursor")
+
+    def __init__(self, classes: Sequence[str], hash_bits: int):
+        self.classes = tuple(classes)
+        self.hash_bits = hash_bits
+        self.weights = np.zeros((1 << hash_bits, len(self.classes)), dtype=np.float32)
+        self.bias = np.zeros(len(self.classes), dtype=np.float32)
+        self.temperature = 1.0
+        self.trained_at: Optional[datetime] = None
+        self.metrics: Dict[str, Any] = {}
+        self.feedback_cursor: Optional[datetime] = None # Último voto já aplicado por online_update
+
+    def logits(self, text: str) -> np.ndarray:
+        indices, values = hash_features(text, self.hash_bits)
+        return values @ self.weights[indices] + self.bias
+
+    def predict_proba(self, text: str) -> np.ndarray:
+        return _softmax(self.logits(text) / self.temperature)
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        probabilities = self.predict_proba(text)
+        best = int(probabilities.argmax())
+        return self.classes[best], float(probabilities[best])
+
+    def fit(self, texts: Sequence[str], labels: Sequence[str], epochs: int = 8, learning_rate: float = 0.5, l2: float = 1e-6) -> "FastClassifier":
+        """
+        SGD exemplo a exemplo: cada passo só toca as linhas de pesos das features presentes,
+        então o custo é proporcional ao tamanho do texto, não ao tamanho da tabela de hashing.
+        """
+        features = [hash_features(text, self.hash_bits) for text in texts]
+        targets = np.array([self.classes.index(label) for label in labels])
+        one_hot = np.eye(len(self.classes), dtype=np.float32)
+        rng = np.random.default_rng(0)
+        for epoch in range(epochs):
+            rate = learning_rate / (1 + epoch)
+            for i in rng.permutation(len(features)):
+                indices, values = features[i]
+                rows = self.weights[indices]
+                gradient = _softmax(values @ rows + self.bias) - one_hot[targets[i]]
+                self.weights[indices] = rows - rate * (np.outer(values, gradient) + l2 * rows)
+                self.bias -= rate * gradient
+        self.trained_at = datetime.utcnow()
+        return self
+
+    def calibrate(self, texts: Sequence[str], labels: Sequence[str]) -> float:
+        """
+        Temperature scaling: a temperatura que minimiza a log-verossimilhança negativa no conjunto
+        separado. Não muda a classe prevista, só o quanto as probabilidades são confiantes.
+        """
+        if not texts:
+            return self.temperature
+        logits = np.stack([self.logits(text) for text in texts])
+        targets = np.array([self.classes.index(label) for label in labels])
+        best_nll, best_temperature = math.inf, 1.0
+        for temperature in np.exp(np.linspace(math.log(0.2), math.log(5.0), 49)):
+            probabilities = _softmax(logits / temperature)
+            nll = -float(np.mean(np.log(probabilities[np.arange(len(targets)), targets] + 1e-12)))
+            if nll < best_nll:
+                best_nll, best_temperature = nll, float(temperature)
+        self.temperature = best_temperature
+        return best_temperature
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp.npz" # np.savez acrescenta .npz a nomes sem a extensão
+        np.savez_compressed(
+            tmp_path,
+            weights=self.weights, bias=self.bias, classes=np.array(self.classes),
+            temperature=self.temperature, hash_bits=self.hash_bits, version=MODEL_VERSION,
+            trained_at=(self.trained_at or datetime.utcnow()).isoformat(),
+            metrics=fast_json.dumps(self.metrics).decode("utf-8"),
+            feedback_cursor=self.feedback_cursor.isoformat() if self.feedback_cursor else "",
+        )
+        os.replace(tmp_path, path) # Processos da API nunca leem um arquivo pela metade
+
+    @classmethod
+    def load(cls, path: str) -> "FastClassifier":
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != MODEL_VERSION:
+                raise ValueError(f"Versão de modelo {int(data['version'])} incompatível (esperada {MODEL_VERSION}).")
+            model = cls([str(name) for name in data["classes"]], int(data["hash_bits"]))
+            model.weights = data["weights"]
+            model.bias = data["bias"]
+            model.temperature = float(data["temperature"])
+            model.trained_at = datetime.fromisoformat(str(data["trained_at"]))
+            model.metrics = fast_json.loads(str(data["metrics"]))
+            if "feedback_cursor" in data.files and str(data["feedback_cursor"]):
+                model.feedback_cursor = datetime.fromisoformat(str(data["feedback_cursor"]))
+        return model
+
+
+# --- Uso na API ---
+
+_loaded: Dict[str, Any] = {"model": None, "mtime": None}
+
+
+def current_model() -> Optional[FastClassifier]:
+    """
+    Modelo do arquivo FAST_CLASSIFIER_PATH, recarregado quando o arquivo muda (novo treino
+    entra em vigor sem reiniciar a API). Sem arquivo, o classificador fica inativo.
+    """
+    try:
+        mtime = os.stat(settings.FAST_CLASSIFIER_PATH).st_mtime
+    except OSError:
+        _loaded["model"] = _loaded["mtime"] = None
+        return None
+    if mtime != _loaded["mtime"]:
+        _loaded["mtime"] = mtime
+        try:
+            _loaded["model"] = FastClassifier.load(settings.FAST_CLASSIFIER_PATH)
+            logger.info(f"Classificador local carregado de {settings.FAST_CLASSIFIER_PATH}.")
+        except Exception as e:
+            logger.error(f"Falha ao carregar o classificador local: {e}")
+            _loaded["model"] = None
+    return _loaded["model"]
+
+
+def classify(content: str) -> Optional[FastPrediction]:
+    """
+    Previsão local para o texto enviado, ou None se o classificador estiver desativado, sem modelo
+    treinado ou o texto for longo demais. `indefinido` nunca dispensa a LLM: não é uma resposta.
+    """
+    if not settings.FAST_CLASSIFIER_ENABLED or len(content) > settings.FAST_CLASSIFIER_MAX_CHARS:
+        return None
+    model = current_model()
+    if model is None:
+        return None
+    label, confidence = model.predict(content)
+    short_circuit = label != "indefinido" and confidence >= settings.FAST_CLASSIFIER_MIN_CONFIDENCE
+    return FastPrediction(label, round(confidence, 4), short_circuit)
+
+
+# --- Treino e avaliação offline ---
+
+def load_labeled_texts(db, days: Optional[int] = None) -> List[Tuple[str, str, str]]:
+    """
+    (hash do conteúdo, texto, classificação) das análises concluídas por uma LLM. Conteúdo repetido
+    conta uma vez, com o veredito mais recente; URLs ficam de fora (o texto analisado era a página).
+    Vereditos contestados pelos usuários valem pela correção mais votada (inclusive os do próprio
+    classificador) ou ficam de fora se ninguém indicou a classificação certa.
+    """
+    from sqlalchemy import select
+
+    from src.db.feedback_operations import get_corrections_sync
+    from src.models.analysis import Analysis
+    from src.models.content import Content
+    from src.utils.urls import detect_submission_url
+
+    query = (
+        select(Analysis.id, Analysis.content_hash, Content.body, Analysis.legacy_content, Analysis.classification, Analysis.provider)
+        .outerjoin(Content, Content.hash == Analysis.content_hash)
+        .where(Analysis.status == "completed", Analysis.classification.in_(CATEGORIES))
+        .order_by(Analysis.created_at)
+    )
+    if days:
+        query = query.where(Analysis.created_at >= datetime.utcnow() - timedelta(days=days))
+    corrections = get_corrections_sync(db)
+    latest: Dict[str, Tuple[str, str]] = {}
+    for analysis_id, content_hash, body, legacy, classification, provider in db.execute(query):
+        if analysis_id in corrections:
+            classification = corrections[analysis_id]
+        elif provider in EXCLUDED_PROVIDERS:
+            continue
+        text = body if body is not None else legacy
+        if not classification or not text or not content_hash or detect_submission_url(text) is not None:
+            continue
+        latest[content_hash] = (text, classification)
+    return [(content_hash, text, label) for content_hash, (text, label) in latest.items()]
+
+
+def online_update(model: FastClassifier, max_entries: int = 5000) -> int:
+    """
+    Atualização online com o feedback já gravado no banco: uma passada de SGD com
+    FAST_CLASSIFIER_ONLINE_LEARNING_RATE sobre as análises com votos novos desde o último ajuste,
+    cada uma com o rótulo de consenso dos usuários autenticados (um voto por usuário, pelo menos
+    FAST_CLASSIFIER_ONLINE_MIN_VOTES no rótulo vencedor). Votos isolados nunca viram exemplo de
+    treino. Retorna quantos exemplos usou; quem chama salva o modelo (e o cursor junto).
+    """
+    from sqlalchemy import select
+
+    from src.db.database import SyncSessionLocal
+    from src.db.feedback_operations import get_consensus_labels_sync, get_voted_since_sync
+    from src.models.analysis import Analysis
+
+    with SyncSessionLocal() as db:
+        voted = get_voted_since_sync(db, model.feedback_cursor or model.trained_at, max_entries)
+        if not voted:
+            return 0
+        labels = get_consensus_labels_sync(db, [analysis_id for analysis_id, _ in voted], settings.FAST_CLASSIFIER_ONLINE_MIN_VOTES)
+        texts, targets = [], []
+        if labels:
+            for analysis in db.execute(select(Analysis).where(Analysis.id.in_(list(labels)))).scalars():
+                label = labels[analysis.id]
+                if label not in model.classes or len(analysis.content or "") > settings.FAST_CLASSIFIER_MAX_CHARS:
+                    continue
+                texts.append(analysis.content)
+                targets.append(label)
+    if texts:
+        model.fit(texts, targets, epochs=1, learning_rate=settings.FAST_CLASSIFIER_ONLINE_LEARNING_RATE)
+    model.feedback_cursor = max(last_vote for _, last_vote in voted)
+    return len(texts)
+
+
+def split_holdout(
+    rows: List[Tuple[str, str, str]], holdout: float, calibration: float = 0.0
+) -> Tuple[List[Tuple[str, str, str]], List[Tuple[str, str, str]], List[Tuple[str, str, str]]]:
+    """
+    Divisão determinística pelo hash do conteúdo em (treino, calibração, avaliação): a mesma análise
+    cai sempre do mesmo lado, então `evaluate` mede o modelo só em textos que não foram usados nem no
+    treino nem na escolha da temperatura. A fatia de avaliação não depende de `calibration`.
+    """
+    train, calibrate, test = [], [], []
+    for row in rows:
+        bucket = int(row[0][:8], 16) % 1000
+        if bucket < holdout * 1000:
+            test.append(row)
+        elif bucket < (holdout + calibration) * 1000:
+            calibrate.append(row)
+        else:
+            train.append(row)
+    return train, calibrate, test
+
+
+def evaluate(model: FastClassifier, texts: Sequence[str], labels: Sequence[str], thresholds: Sequence[float] = ()) -> Dict[str, Any]:
+    """
+    Acurácia, F1 macro, precisão/recall por classe, erro de calibração (ECE, 10 faixas) e, para cada
+    limiar, a cobertura do atalho (fração respondida sem LLM) e a acurácia dentro dela.
+    """
+    predictions = [model.predict(text) for text in texts]
+    total = len(labels)
+    correct = np.array([label == predicted for (predicted, _), label in zip(predictions, labels)], dtype=bool)
+    confidences = np.array([confidence for _, confidence in predictions])
+    per_class, f1_scores = {}, []
+    for name in model.classes:
+        predicted = sum(1 for label, _ in predictions if label == name)
+        actual = sum(1 for label in labels if label == name)
+        hits = sum(1 for (label, _), truth in zip(predictions, labels) if label == name == truth)
+        precision = hits / predicted if predicted else 0.0
+        recall = hits / actual if actual else 0.0
+        if actual:
+            f1_scores.append(2 * precision * recall / (precision + recall) if precision + recall else 0.0)
+        per_class[name] = {"support": actual, "precision": round(precision, 4), "recall": round(recall, 4)}
+
+    ece = 0.0
+    for low in np.linspace(0, 1, 11)[:-1]:
+        in_bin = (confidences > low) & (confidences <= low + 0.1)
+        if in_bin.any():
+            ece += in_bin.mean() * abs(correct[in_bin].mean() - confidences[in_bin].mean())
+
+    shortcut = []
+    for threshold in thresholds:
+        taken = np.array([label != "indefinido" and confidence >= threshold for label, confidence in predictions], dtype=bool)
+        shortcut.append({
+            "threshold": threshold,
+            "coverage": round(float(taken.mean()), 4) if total else 0.0,
+            "accuracy": round(float(correct[taken].mean()), 4) if taken.any() else None,
+        })
+    return {
+        "samples": total,
+        "accuracy": round(float(correct.mean()), 4) if total else None,
+        "macro_f1": round(float(np.mean(f1_scores)), 4) if f1_scores else None,
+        "ece": round(float(ece), 4),
+        "per_class": per_class,
+        "shortcut": shortcut,
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(f"amostras={report['samples']} acurácia={report['accuracy']} f1_macro={report['macro_f1']} ece={report['ece']}")
+    for name, row in report["per_class"].items():
+        print(f"  {name:<12} suporte={row['support']:<6} precisão={row['precision']:<7} recall={row['recall']}")
+    for row in report["shortcut"]:
+        print(f"  limiar {row['threshold']:.2f}: cobertura={row['coverage']} acurácia={row['accuracy']}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.db.database import SyncSessionLocal
+
+    parser = argparse.ArgumentParser(description="Treino, avaliação e ajuste online do classificador local de primeira etapa.")
+    parser.add_argument("command", choices=["train", "evaluate", "update"])
+    parser.add_argument("--days", type=int, default=None, help="Usar só análises dos últimos N dias.")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fração separada para avaliação.")
+    parser.add_argument("--calibration", type=float, default=0.1, help="Fração separada para calibrar a temperatura (train).")
+    parser.add_argument("--epochs", type=int, default=8)
+    parser.add_argument("--model", default=settings.FAST_CLASSIFIER_PATH, help="Arquivo do modelo (.npz).")
+    args = parser.parse_args()
+
+    if args.command == "update":
+        classifier = FastClassifier.load(args.model)
+        cursor = classifier.feedback_cursor
+        used = online_update(classifier)
+        if used or classifier.feedback_cursor != cursor:
+            classifier.save(args.model)
+        print(f"{used} exemplos de feedback aplicados ao modelo em {args.model}.")
+    else:
+        with SyncSessionLocal() as db:
+            rows = load_labeled_texts(db, args.days)
+        train_rows, calibration_rows, test_rows = split_holdout(rows, args.holdout, args.calibration)
+        test_texts, test_labels = [text for _, text, _ in test_rows], [label for _, _, label in test_rows]
+        thresholds = sorted({0.5, 0.7, 0.8, 0.9, 0.95, 0.99, settings.FAST_CLASSIFIER_MIN_CONFIDENCE})
+        print(f"{len(rows)} conteúdos rotulados: {len(train_rows)} para treino, {len(calibration_rows)} para calibração, "
+              f"{len(test_rows)} para avaliação.")
+
+        if args.command == "train":
+            if not train_rows:
+                raise SystemExit("Sem análises rotuladas para treinar.")
+            classifier = FastClassifier(CATEGORIES, settings.FAST_CLASSIFIER_HASH_BITS)
+            classifier.fit([text for _, text, _ in train_rows], [label for _, _, label in train_rows], epochs=args.epochs)
+            temperature = classifier.calibrate(
+                [text for _, text, _ in calibration_rows], [label for _, _, label in calibration_rows]
+            )
+            print(f"Temperatura de calibração: {temperature:.3f}")
+            classifier.metrics = evaluate(classifier, test_texts, test_labels, thresholds)
+            _print_report(classifier.metrics)
+            classifier.save(args.model)
+            print(f"Modelo salvo em {args.model}")
+        else:
+            _print_report(evaluate(FastClassifier.load(args.model), test_texts, test_labels, thresholds))
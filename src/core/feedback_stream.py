@@ -0,0 +1,184 @@
+# src/core/feedback_stream.py
+#
+# Ingestão de feedback em volume: POST /feedback só faz um XADD no Redis Stream (O(1), sem tocar
+# no banco) e um consumidor em segundo plano (Celery beat) grava as entradas em lote na tabela
+# `feedback`, atualizando os contadores de concordância por análise. O stream é o log de entrada:
+# outros grupos de consumidores podem ler as mesmas entradas de forma independente, cada um com
+# seu próprio cursor e ACK. Quem precisa de votos deduplicados (ex.: o ajuste online do
+# classificador local) lê do banco, não do stream.
+
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DB_GROUP = "feedback-db" # Grupo que grava no banco
+
+_async_redis = None
+
+
+class FeedbackStreamFull(Exception):
+    """O stream atingiu FEEDBACK_STREAM_MAX_PENDING entradas (a API responde 503)."""
+
+
+def encode_entry(
+    analysis_id: Any, agrees: Optional[bool], suggested_classification: Optional[str], comment: Optional[str],
+    user_id: Any,
+) -> Dict[str, str]:
+    """Campos da entrada no stream (Redis só guarda strings)."""
+    return {
+        "analysis_id": str(uuid.UUID(str(analysis_id))),
+        "user_id": str(uuid.UUID(str(user_id))),
+        "agrees": "" if agrees is None else ("1" if agrees else "0"),
+        "suggested_classification": suggested_classification or "",
+        "comment": (comment or "")[: settings.FEEDBACK_MAX_COMMENT_CHARS],
+        "created_at": datetime.utcnow().isoformat(),
+    }
+
+
+def decode_entry(stream_id: Any, fields: Dict[Any, Any]) -> Dict[str, Any]:
+    values = {
+        (key.decode() if isinstance(key, bytes) else key): (value.decode("utf-8") if isinstance(value, bytes) else value)
+        for key, value in fields.items()
+    }
+    agrees = values.get("agrees", "")
+    return {
+        "stream_id": stream_id.decode() if isinstance(stream_id, bytes) else str(stream_id),
+        "analysis_id": uuid.UUID(values["analysis_id"]),
+        "user_id": uuid.UUID(values["user_id"]) if values.get("user_id") else None, # Ausente em entradas antigas
+        "agrees": None if agrees == "" else agrees == "1",
+        "suggested_classification": values.get("suggested_classification") or None,
+        "comment": values.get("comment") or None,
+        "created_at": datetime.fromisoformat(values["created_at"]) if values.get("created_at") else None,
+    }
+
+
+async def publish_feedback(fields: Dict[str, str]) -> Optional[str]:
+    """
+    XADD sem MAXLEN: um corte por tamanho apagaria entradas que algum grupo ainda não leu. O consumidor
+    remove as já consumidas (trim_consumed); com FEEDBACK_STREAM_MAX_PENDING entradas no stream, levanta
+    FeedbackStreamFull. Retorna o ID da entrada, ou None se o Redis estiver indisponível.
+    """
+    global _async_redis
+    try:
+        if _async_redis is None:
+            import redis.asyncio as redis_asyncio
+            _async_redis = redis_asyncio.from_url(settings.REDIS_URL)
+        # Como na fila de jobs, a verificação não é atômica com o XADD: pode passar do limite por poucas entradas
+        pending = await _async_redis.xlen(settings.FEEDBACK_STREAM_KEY)
+        if pending >= settings.FEEDBACK_STREAM_MAX_PENDING:
+            raise FeedbackStreamFull(f"Stream de feedback cheio ({pending} entradas).")
+        stream_id = await _async_redis.xadd(settings.FEEDBACK_STREAM_KEY, fields)
+        return stream_id.decode() if isinstance(stream_id, bytes) else str(stream_id)
+    except FeedbackStreamFull:
+        raise
+    except Exception as e:
+        logger.warning(f"Falha ao publicar feedback no Redis Stream: {e}")
+        return None
+
+
+class FeedbackConsumer:
+    """
+    Consumidor síncrono de um grupo do stream. Entradas entregues a um consumidor que morreu antes
+    do ACK são retomadas depois de FEEDBACK_CLAIM_IDLE_SECONDS (XAUTOCLAIM).
+    """
+
+    def __init__(self, group: str, consumer: Optional[str] = None, redis_client=None):
+        import redis
+
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.stream = settings.FEEDBACK_STREAM_KEY
+        self.redis = redis_client or redis.Redis.from_url(settings.REDIS_URL)
+        self._ensure_group()
+
+    def _ensure_group(self) -> None:
+        import redis
+
+        try:
+            # id="0": um grupo novo lê também o que já está no stream
+            self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def read(self, count: int, block_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        claimed = self.redis.xautoclaim(
+            self.stream, self.group, self.consumer, settings.FEEDBACK_CLAIM_IDLE_SECONDS * 1000, "0-0", count=count
+        )
+        messages = [message for message in claimed[1] if message[1]] # Entradas apagadas do stream vêm vazias
+        if len(messages) < count:
+            for _, stream_messages in self.redis.xreadgroup(
+                self.group, self.consumer, {self.stream: ">"}, count=count - len(messages), block=block_ms
+            ) or []:
+                messages.extend(stream_messages)
+        entries = []
+        for stream_id, fields in messages:
+            try:
+                entries.append(decode_entry(stream_id, fields))
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Entrada de feedback inválida {stream_id}: {e}")
+                self.ack([stream_id]) # Nunca vai ser processável: não reentregar
+        return entries
+
+    def ack(self, stream_ids: List[Any]) -> None:
+        if stream_ids:
+            self.redis.xack(self.stream, self.group, *stream_ids)
+
+    def trim_consumed(self) -> int:
+        """
+        Remove do stream as entradas que todos os grupos já leram e confirmaram (XTRIM MINID).
+        O limite é, em cada grupo, a entrada pendente mais antiga ou o last-delivered-id; nada
+        a partir dele é apagado. Retorna o número de entradas removidas.
+        """
+        floor = None
+        for group in self.redis.xinfo_groups(self.stream):
+            name = group["name"]
+            pending = self.redis.xpending(self.stream, name)
+            group_floor = pending["min"] if pending["pending"] else group["last-delivered-id"]
+            group_floor = _parse_stream_id(group_floor)
+            floor = group_floor if floor is None else min(floor, group_floor)
+        if floor is None or floor == (0, 0):
+            return 0
+        return self.redis.xtrim(self.stream, minid=f"{floor[0]}-{floor[1]}", approximate=False)
+
+
+def _parse_stream_id(stream_id: Any) -> Tuple[int, int]:
+    text = stream_id.decode() if isinstance(stream_id, bytes) else str(stream_id)
+    milliseconds, _, sequence = text.partition("-")
+    return int(milliseconds), int(sequence or 0)
+
+
+def consume_feedback(max_batches: int = 20) -> Tuple[int, int]:
+    """
+    Grava lotes de até FEEDBACK_BATCH_SIZE entradas até esvaziar o stream (ou max_batches), com
+    ACK só depois do commit. Retorna (entradas processadas, análises que passaram a contestadas).
+    """
+    from src.core.analysis_cache import analysis_cache
+    from src.db.database import SyncSessionLocal
+    from src.db.feedback_operations import record_feedback_batch_sync
+
+    consumer = FeedbackConsumer(DB_GROUP)
+    processed = disputed = 0
+    for _ in range(max_batches):
+        entries = consumer.read(settings.FEEDBACK_BATCH_SIZE)
+        if not entries:
+            break
+        with SyncSessionLocal() as db:
+            newly_disputed = record_feedback_batch_sync(db, entries)
+            db.commit()
+        consumer.ack([entry["stream_id"] for entry in entries])
+        processed += len(entries)
+        disputed += len(newly_disputed)
+        if newly_disputed:
+            analysis_cache.invalidate_sync(newly_disputed)
+            logger.info(f"{len(newly_disputed)} vereditos passaram a ser contestados e deixam de ser reaproveitados.")
+    if processed:
+        consumer.trim_consumed()
+    return processed, disputed
@@ -0,0 +1,46 @@
+# src/core/google_search_tool.py
+
+import logging
+from typing import Any, Dict, List
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+CUSTOM_SEARCH_URL = "https://www.googleapis.com/customsearch/v1"
+TIMEOUT_SECONDS = 10.0
+
+
+class GoogleSearchTool:
+    """
+    Busca externa pela Google Custom Search JSON API. Chamada síncrona (o pipeline a executa no
+    ThreadPoolExecutor). Resultados no formato do índice local: [{"query", "results": [...]}].
+    """
+
+    def __init__(self, api_key: str, custom_search_engine_id: str, results_per_query: int = 5):
+        self.api_key = api_key
+        self.custom_search_engine_id = custom_search_engine_id
+        self.results_per_query = max(1, min(results_per_query, 10))
+
+    def search(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """Uma requisição por consulta; consultas que falharem voltam sem resultados."""
+        result_sets = []
+        with httpx.Client(timeout=TIMEOUT_SECONDS) as client:
+            for query in queries:
+                try:
+                    response = client.get(CUSTOM_SEARCH_URL, params={
+                        "key": self.api_key, "cx": self.custom_search_engine_id, "q": query, "num": self.results_per_query,
+                    })
+                    response.raise_for_status()
+                    items = response.json().get("items", [])
+                except (httpx.HTTPError, ValueError) as e:
+                    logger.warning(f"Falha na busca externa para '{query}': {e}")
+                    items = []
+                result_sets.append({
+                    "query": query,
+                    "results": [
+                        {"source_title": item.get("title"), "snippet": item.get("snippet", ""), "url": item.get("link", "")}
+                        for item in items
+                    ],
+                })
+        return result_sets
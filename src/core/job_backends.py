@@ -0,0 +1,308 @@
+# src/core/job_backends.py
+#
+# Backends de execução das análises, escolhidos por JOB_BACKEND:
+#   "celery"   (padrão) publica analyze_content_task no broker; um worker Celery executa.
+#   "embedded" executa no próprio processo da API, sem broker nem serialização. Usa uma fila asyncio
+#              limitada e um pool de workers (a análise é síncrona, então roda em threads). Os jobs
+#              pendentes ficam na tabela `pending_jobs` e são retomados se o processo cair.
+#   "redis_streams" faz um XADD por análise num stream do Redis; workers `python -m src.core.job_stream worker`
+#              consomem em grupo, sem resultado por task no Redis (ver src/core/job_stream.py).
+# Nos dois casos o status da análise segue pending -> completed/failed, gravado por tasks.analyze_content.
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from src.core.config import settings
+from src.db.database import AsyncSessionLocal
+from src.db.job_operations import (
+    add_pending_job,
+    claim_orphaned_jobs,
+    delete_pending_job,
+    mark_job_running,
+    release_jobs,
+    touch_jobs,
+)
+from src.models.analysis import TERMINAL_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """A fila do backend não aceita mais jobs agora (a API responde 503)."""
+
+
+class JobBackend:
+    """
+    Interface dos backends: enqueue_analysis() despacha uma análise já gravada como pending.
+    start()/stop() são chamados no ciclo de vida da API.
+    """
+    name = ""
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def enqueue_analysis(self, analysis_id: Any, content: str, preferred_llm: Optional[str]) -> str:
+        """Retorna o identificador do job no backend."""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class CeleryJobBackend(JobBackend):
+    name = "celery"
+
+    async def enqueue_analysis(self, analysis_id: Any, content: str, preferred_llm: Optional[str]) -> str:
+        from src.core.tasks import analyze_content_task
+
+        return analyze_content_task.delay(str(analysis_id), content, preferred_llm).id
+
+
+class RedisStreamJobBackend(JobBackend):
+    """
+    Publica no stream JOB_STREAM_KEY; o id do job é o id da entrada no stream. Sem corte por MAXLEN
+    (apagaria jobs ainda não processados): entradas só saem com o XDEL do worker, e com
+    JOB_STREAM_MAX_PENDING entradas no stream enqueue_analysis levanta JobQueueFull.
+    """
+    name = "redis_streams"
+
+    def __init__(self):
+        self._redis = None
+
+    async def enqueue_analysis(self, analysis_id: Any, content: str, preferred_llm: Optional[str]) -> str:
+        from src.core.job_stream import encode_job
+
+        if self._redis is None:
+            import redis.asyncio as redis_asyncio
+            self._redis = redis_asyncio.from_url(settings.REDIS_URL)
+        # XLEN conta os jobs aguardando e em execução (os processados já foram apagados). A verificação não
+        # é atômica com o XADD: API concorrentes podem passar do limite por poucas entradas
+        pending = await self._redis.xlen(settings.JOB_STREAM_KEY)
+        if pending >= settings.JOB_STREAM_MAX_PENDING:
+            raise JobQueueFull(f"Fila de análises cheia ({pending} jobs no stream).")
+        stream_id = await self._redis.xadd(settings.JOB_STREAM_KEY, encode_job(analysis_id, content, preferred_llm))
+        return stream_id.decode() if isinstance(stream_id, bytes) else stream_id
+
+    async def stop(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+@dataclass
+class _Job:
+    analysis_id: Any
+    content: str
+    preferred_llm: Optional[str]
+
+
+class EmbeddedJobBackend(JobBackend):
+    """
+    Fila em processo. A admissão é limitada a `queue_size` jobs esperando; acima disso,
+    enqueue_analysis levanta JobQueueFull. Cada job é gravado em `pending_jobs` antes de entrar na
+    fila e apagado ao terminar. O processo renova o heartbeat dos seus jobs a cada `heartbeat_seconds`.
+    Jobs cujo heartbeat parou há mais que `stale_seconds` (processo caiu) são assumidos por quem tiver
+    vaga. Depois de `max_attempts` execuções interrompidas, a análise é finalizada como failed.
+    """
+    name = "embedded"
+
+    def __init__(self, workers: int, queue_size: int, heartbeat_seconds: float, stale_seconds: float,
+                 max_attempts: int, shutdown_seconds: float):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = stale_seconds
+        self.max_attempts = max_attempts
+        self.shutdown_seconds = shutdown_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue: Optional[asyncio.Queue] = None
+        self._admitted = 0 # Jobs aceitos que ainda não saíram da fila (limita a admissão)
+        self._running = 0
+        self._executing = set() # Análises cuja execução já começou numa thread e ainda não terminou
+        self._tasks = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._analyze = None
+        self._mark_failed = None
+
+    async def start(self) -> None:
+        from src.core.tasks import analyze_content, mark_analysis_failed # Import tardio: carrega a integração com LLMs
+
+        self._analyze, self._mark_failed = analyze_content, mark_analysis_failed
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="veritas-job")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintenance()))
+        logger.info(f"Backend de jobs embutido iniciado: {self.workers} workers, fila de {self.queue_size} ({self.owner}).")
+
+    async def stop(self) -> None:
+        """
+        Para de aceitar jobs e espera as análises em execução por até `shutdown_seconds`. Os jobs
+        que não chegaram a começar voltam para `pending_jobs` sem dono e são assumidos na hora pelo
+        próximo processo. Os que ainda rodam após o prazo continuam com este dono: só são retomados
+        quando o heartbeat vencer (JOB_EMBEDDED_STALE_SECONDS), e não enquanto ainda executam aqui.
+        """
+        if self._queue is None:
+            return
+        self._queue = None
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(
+                loop.run_in_executor(None, lambda: self._executor.shutdown(wait=True, cancel_futures=True)),
+                timeout=self.shutdown_seconds,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"{len(self._executing)} análises ainda em execução no desligamento; "
+                f"serão retomadas por outro processo quando o heartbeat vencer."
+            )
+        try:
+            async with AsyncSessionLocal() as db:
+                released = await release_jobs(db, self.owner, keep=list(self._executing))
+                await db.commit()
+            if released:
+                logger.info(f"{released} jobs pendentes devolvidos para retomada.")
+        except Exception as e:
+            logger.error(f"Falha ao devolver os jobs pendentes: {e}")
+
+    async def enqueue_analysis(self, analysis_id: Any, content: str, preferred_llm: Optional[str]) -> str:
+        if self._queue is None:
+            raise JobQueueFull("Backend de jobs embutido não está em execução.")
+        if self._admitted >= self.queue_size:
+            raise JobQueueFull(f"Fila de análises cheia ({self.queue_size} jobs aguardando).")
+        self._admitted += 1 # Reserva a vaga antes do await: a fila nunca passa de queue_size
+        try:
+            async with AsyncSessionLocal() as db:
+                await add_pending_job(db, analysis_id, preferred_llm, self.owner)
+                await db.commit()
+        except Exception:
+            self._admitted -= 1
+            raise
+        self._queue.put_nowait(_Job(analysis_id, content, preferred_llm))
+        return str(analysis_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "owner": self.owner,
+            "workers": self.workers,
+            "queued": self._admitted,
+            "running": self._running,
+            "queue_size": self.queue_size,
+        }
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            job = await queue.get()
+            self._admitted -= 1
+            self._running += 1
+            try:
+                async with AsyncSessionLocal() as db:
+                    await mark_job_running(db, job.analysis_id)
+                    await db.commit()
+                await loop.run_in_executor(self._executor, self._run_job, job)
+                async with AsyncSessionLocal() as db:
+                    await delete_pending_job(db, job.analysis_id)
+                    await db.commit()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # A linha continua em pending_jobs; devolvida sem dono, é retomada na próxima manutenção
+                logger.error(f"Falha no job da análise {job.analysis_id}: {e}")
+                try:
+                    async with AsyncSessionLocal() as db:
+                        await release_jobs(db, self.owner, job.analysis_id)
+                        await db.commit()
+                except Exception as inner_e:
+                    logger.error(f"Falha ao devolver o job da análise {job.analysis_id}: {inner_e}")
+            finally:
+                self._running -= 1
+                queue.task_done()
+
+    def _run_job(self, job: _Job) -> None:
+        """Executa a análise na thread do executor, registrando-a como iniciada (ver stop)."""
+        self._executing.add(job.analysis_id)
+        try:
+            self._analyze(str(job.analysis_id), job.content, job.preferred_llm)
+        finally:
+            self._executing.discard(job.analysis_id)
+
+    async def _maintenance(self) -> None:
+        """Heartbeat dos jobs deste processo e retomada de jobs órfãos (também logo no início)."""
+        while True:
+            try:
+                await self._heartbeat_and_recover()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Falha na manutenção dos jobs embutidos: {e}")
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    async def _heartbeat_and_recover(self) -> None:
+        loop = asyncio.get_running_loop()
+        async with AsyncSessionLocal() as db:
+            await touch_jobs(db, self.owner)
+            free = self.queue_size - self._admitted
+            claimed = []
+            if free > 0:
+                stale_before = datetime.utcnow() - timedelta(seconds=self.stale_seconds)
+                claimed = await claim_orphaned_jobs(db, self.owner, stale_before, free)
+            await db.commit()
+
+            recovered = 0
+            for analysis_id, preferred_llm, attempts, content, analysis_status in claimed:
+                if content is None or analysis_status in TERMINAL_STATUSES:
+                    await delete_pending_job(db, analysis_id) # Já terminou (ou a análise sumiu) antes da queda
+                elif attempts >= self.max_attempts:
+                    logger.warning(f"Análise {analysis_id} interrompida {attempts} vezes; finalizando como failed.")
+                    await loop.run_in_executor(
+                        self._executor, self._mark_failed, str(analysis_id),
+                        f"Análise interrompida {attempts} vezes sem concluir."
+                    )
+                    await delete_pending_job(db, analysis_id)
+                else:
+                    self._admitted += 1
+                    self._queue.put_nowait(_Job(analysis_id, content, preferred_llm))
+                    recovered += 1
+            await db.commit()
+        if recovered:
+            logger.info(f"{recovered} jobs órfãos retomados.")
+
+
+_backend: Optional[JobBackend] = None
+
+
+def get_job_backend() -> JobBackend:
+    """Backend configurado em JOB_BACKEND (um por processo)."""
+    global _backend
+    if _backend is None:
+        if settings.JOB_BACKEND == "celery":
+            _backend = CeleryJobBackend()
+        elif settings.JOB_BACKEND == "embedded":
+            _backend = EmbeddedJobBackend(
+                workers=settings.JOB_EMBEDDED_WORKERS,
+                queue_size=settings.JOB_EMBEDDED_QUEUE_SIZE,
+                heartbeat_seconds=settings.JOB_EMBEDDED_HEARTBEAT_SECONDS,
+                stale_seconds=settings.JOB_EMBEDDED_STALE_SECONDS,
+                max_attempts=settings.JOB_MAX_ATTEMPTS,
+                shutdown_seconds=settings.JOB_EMBEDDED_SHUTDOWN_SECONDS,
+            )
+        elif settings.JOB_BACKEND == "redis_streams":
+            _backend = RedisStreamJobBackend()
+        else:
+            raise ValueError(f"JOB_BACKEND inválido: {settings.JOB_BACKEND!r}")
+    return _backend
@@ -0,0 +1,227 @@
+# src/core/job_stream.py
+#
+# Transporte das análises por Redis Streams (JOB_BACKEND="redis_streams"), alternativa ao Celery para
+# frotas grandes. A API faz um XADD por análise. Os workers leem em lote (XREADGROUP COUNT = vagas
+# livres) num grupo de consumidores e confirmam as entradas prontas com XACK + XDEL num único pipeline.
+# Não há resultado por task: o resultado já vai para a tabela `analyses`. Entradas de um worker que
+# morreu são retomadas com XAUTOCLAIM depois de JOB_STREAM_CLAIM_IDLE_SECONDS; enquanto um job roda, o worker
+# renova as próprias entradas (XCLAIM JUSTID) para que análises longas não sejam retomadas. Depois de
+# JOB_MAX_ATTEMPTS entregas, a análise é finalizada como failed.
+#
+#   python -m src.core.job_stream worker [--concurrency N]
+#   python -m src.core.job_stream info
+# Comparação com o Celery: python -m benchmarks.bench_job_transport
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def encode_job(analysis_id: Any, content: str, preferred_llm: Optional[str]) -> Dict[str, str]:
+    return {"analysis_id": str(analysis_id), "content": content, "preferred_llm": preferred_llm or ""}
+
+
+def decode_job(fields: Dict[Any, Any]) -> Tuple[str, str, Optional[str]]:
+    values = {
+        (key.decode() if isinstance(key, bytes) else key): (value.decode("utf-8") if isinstance(value, bytes) else value)
+        for key, value in fields.items()
+    }
+    return str(uuid.UUID(values["analysis_id"])), values["content"], values.get("preferred_llm") or None
+
+
+class JobStreamWorker:
+    """
+    Consumidor do stream de análises. Mantém até `concurrency` jobs em execução (threads): cada leitura
+    pede exatamente as vagas livres, e os jobs terminados são confirmados em lote. Um job que levanta
+    exceção não é confirmado; volta pelo XAUTOCLAIM.
+    """
+
+    def __init__(self, handler: Optional[Callable[..., Any]] = None, concurrency: Optional[int] = None,
+                 stream: Optional[str] = None, group: Optional[str] = None, consumer: Optional[str] = None,
+                 redis_client=None, claim_idle_seconds: Optional[float] = None, max_attempts: Optional[int] = None):
+        import redis
+
+        if handler is None:
+            from src.core.tasks import analyze_content as handler
+        self.handler = handler
+        self.concurrency = concurrency or settings.JOB_STREAM_CONCURRENCY
+        self.stream = stream or settings.JOB_STREAM_KEY
+        self.group = group or settings.JOB_STREAM_GROUP
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.redis = redis_client or redis.Redis.from_url(settings.REDIS_URL)
+        self.claim_idle_ms = int((claim_idle_seconds or settings.JOB_STREAM_CLAIM_IDLE_SECONDS) * 1000)
+        self.max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+        self.heartbeat_seconds = self.claim_idle_ms / 3000 # Três renovações por janela de ociosidade
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="veritas-stream-job")
+        self.processed = 0
+        self._next_claim = 0.0
+        self._next_heartbeat = 0.0
+        self._ensure_group()
+
+    def _ensure_group(self) -> None:
+        import redis
+
+        try:
+            self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    # --- Leitura ---
+
+    def read(self, count: int, block_ms: Optional[int]) -> List[Tuple[Any, Dict[Any, Any]]]:
+        """
+        Até `count` entradas: primeiro as abandonadas por outros consumidores (XAUTOCLAIM, no máximo a
+        cada metade do tempo de ociosidade), depois as novas (XREADGROUP, bloqueando até `block_ms`).
+        """
+        messages = []
+        if time.monotonic() >= self._next_claim:
+            self._next_claim = time.monotonic() + self.claim_idle_ms / 2000
+            claimed = self.redis.xautoclaim(self.stream, self.group, self.consumer, self.claim_idle_ms, "0-0", count=count)
+            messages = self._drop_exhausted([message for message in claimed[1] if message[1]])
+        if len(messages) < count:
+            for _, stream_messages in self.redis.xreadgroup(
+                self.group, self.consumer, {self.stream: ">"}, count=count - len(messages), block=block_ms
+            ) or []:
+                messages.extend(stream_messages)
+        return messages
+
+    def _drop_exhausted(self, messages: List[Tuple[Any, Dict[Any, Any]]]) -> List[Tuple[Any, Dict[Any, Any]]]:
+        """Entradas retomadas que já foram entregues JOB_MAX_ATTEMPTS vezes: a análise vira failed."""
+        if not messages:
+            return messages
+        deliveries = {
+            entry["message_id"]: entry["times_delivered"]
+            for entry in self.redis.xpending_range(
+                self.stream, self.group, min=messages[0][0], max=messages[-1][0], count=len(messages) * 2
+            )
+        }
+        from src.core.tasks import mark_analysis_failed
+
+        alive, exhausted = [], []
+        for stream_id, fields in messages:
+            attempts = deliveries.get(stream_id, 0)
+            if attempts <= self.max_attempts:
+                alive.append((stream_id, fields))
+                continue
+            try:
+                analysis_id = decode_job(fields)[0]
+                logger.warning(f"Análise {analysis_id} entregue {attempts} vezes sem concluir; finalizando como failed.")
+                mark_analysis_failed(analysis_id, f"Análise interrompida {attempts - 1} vezes sem concluir.")
+            except (KeyError, ValueError):
+                pass
+            exhausted.append(stream_id)
+        self.ack(exhausted)
+        return alive
+
+    def ack(self, stream_ids: List[Any]) -> None:
+        """XACK + XDEL num único round trip: nada fica guardado depois de processado."""
+        if not stream_ids:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xack(self.stream, self.group, *stream_ids)
+        pipe.xdel(self.stream, *stream_ids)
+        pipe.execute()
+
+    def heartbeat(self, stream_ids: List[Any]) -> None:
+        """
+        XCLAIM ... JUSTID das entradas em execução neste worker: zera a ociosidade delas, então uma análise
+        mais longa que JOB_STREAM_CLAIM_IDLE_SECONDS não é retomada por outro worker e executada duas vezes.
+        Com JUSTID a renovação não conta como nova entrega (não consome JOB_MAX_ATTEMPTS).
+        """
+        if stream_ids:
+            self.redis.xclaim(self.stream, self.group, self.consumer, 0, stream_ids, justid=True)
+
+    def _keep_alive(self, inflight: Dict[Any, Any]) -> None:
+        if inflight and time.monotonic() >= self._next_heartbeat:
+            self._next_heartbeat = time.monotonic() + self.heartbeat_seconds
+            self.heartbeat(list(inflight.values()))
+
+    # --- Execução ---
+
+    def run(self, stop: Optional[threading.Event] = None, max_jobs: Optional[int] = None,
+            idle_block_ms: Optional[int] = None) -> int:
+        """
+        Processa até `stop` ser sinalizado (ou `max_jobs` concluídos). Sem jobs em execução, a leitura
+        bloqueia até `idle_block_ms`; com jobs em execução, não bloqueia, para confirmar os terminados logo.
+        Retorna o número de jobs confirmados.
+        """
+        idle_block_ms = settings.JOB_STREAM_BLOCK_MS if idle_block_ms is None else idle_block_ms
+        inflight = {}
+        while not (stop is not None and stop.is_set()) and (max_jobs is None or self.processed < max_jobs):
+            free = self.concurrency - len(inflight)
+            if free > 0:
+                for stream_id, fields in self.read(free, None if inflight else idle_block_ms):
+                    try:
+                        job = decode_job(fields)
+                    except (KeyError, ValueError) as e:
+                        logger.warning(f"Entrada de job inválida {stream_id}: {e}")
+                        self.ack([stream_id]) # Nunca vai ser processável: não reentregar
+                        continue
+                    inflight[self.executor.submit(self.handler, *job)] = stream_id
+            if inflight:
+                self._collect(inflight, timeout=0.05)
+                self._keep_alive(inflight)
+        while inflight: # Desligamento: termina o que já foi lido antes de sair
+            self._collect(inflight, timeout=self.heartbeat_seconds)
+            self._keep_alive(inflight)
+        return self.processed
+
+    def _collect(self, inflight: Dict[Any, Any], timeout: Optional[float]) -> None:
+        done, _ = wait(list(inflight), timeout=timeout, return_when=FIRST_COMPLETED)
+        finished = []
+        for future in done:
+            stream_id = inflight.pop(future)
+            if future.exception() is not None:
+                logger.error(f"Job {stream_id} falhou: {future.exception()}") # Sem ACK: retomado pelo XAUTOCLAIM
+            else:
+                finished.append(stream_id)
+        self.ack(finished)
+        self.processed += len(finished)
+
+
+def stream_info(redis_client=None) -> Dict[str, Any]:
+    import redis
+
+    client = redis_client or redis.Redis.from_url(settings.REDIS_URL)
+    info = {"stream": settings.JOB_STREAM_KEY, "length": client.xlen(settings.JOB_STREAM_KEY), "groups": []}
+    for group in client.xinfo_groups(settings.JOB_STREAM_KEY):
+        info["groups"].append({
+            key: (value.decode() if isinstance(value, bytes) else value) for key, value in group.items()
+        })
+    return info
+
+
+if __name__ == "__main__":
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(description="Worker de análises via Redis Streams.")
+    parser.add_argument("command", choices=["worker", "info"])
+    parser.add_argument("--concurrency", type=int, default=None, help="Análises simultâneas (padrão: JOB_STREAM_CONCURRENCY).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "info":
+        print(stream_info())
+    else:
+        stop_event = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+        signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+        worker = JobStreamWorker(concurrency=args.concurrency)
+        if settings.LLM_WARMUP_PROVIDERS:
+            from src.core.llm_providers import warm_up
+            warm_up()
+        print(f"Worker {worker.consumer} lendo {worker.stream} (grupo {worker.group}, {worker.concurrency} simultâneas).")
+        # Bloqueio curto para perceber o sinal de parada sem esperar JOB_STREAM_BLOCK_MS inteiro
+        total = worker.run(stop_event, idle_block_ms=min(settings.JOB_STREAM_BLOCK_MS, 1000))
+        print(f"{total} análises processadas.")
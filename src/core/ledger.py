@@ -0,0 +1,154 @@
+# src/core/ledger.py
+#
+# Ledger de vereditos à prova de adulteração. Análises concluídas são agrupadas em lotes (por
+# tamanho ou por tempo de espera) e cada lote vira uma árvore de Merkle: só a raiz é encadeada no
+# log local (hash do lote anterior) e publicada no backend de âncora, e cada análise guarda uma
+# prova de inclusão de O(log n) hashes. Verificar uma análise custa log2(n) sha256 (microssegundos).
+# Selagem: task `seal_ledger_task` no Celery beat ou python -m src.core.ledger seal|verify
+
+import hashlib
+import importlib
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from src.core.config import settings
+from src.utils import merkle
+
+logger = logging.getLogger(__name__)
+
+GENESIS_HASH = "0" * 64
+
+
+def record_bytes(payload: Dict[str, Any]) -> bytes:
+    """
+    Forma canônica do registro da análise (o mesmo payload servido por GET /analysis/{id}):
+    JSON com chaves ordenadas e sem espaços, para que o hash não dependa de quem serializou.
+    """
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def record_hash(payload: Dict[str, Any]) -> str:
+    return hashlib.sha256(record_bytes(payload)).hexdigest()
+
+
+def chain_hash(sequence: int, prev_hash: str, merkle_root: str, size: int, sealed_at: datetime) -> str:
+    return hashlib.sha256(f"{sequence}|{prev_hash}|{merkle_root}|{size}|{sealed_at.isoformat()}".encode("utf-8")).hexdigest()
+
+
+# --- Backends de âncora ---
+
+class LocalFileAnchor:
+    """
+    Substituto local de uma âncora externa: acrescenta a cabeça da cadeia a um arquivo JSONL
+    (append + fsync). Para uma blockchain real, implemente `anchor(batch) -> referência` e
+    aponte LEDGER_ANCHOR_BACKEND para "pacote.modulo:Classe".
+    """
+    name = "local"
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.LEDGER_ANCHOR_PATH
+
+    def anchor(self, batch: Any) -> str:
+        line = json.dumps({
+            "sequence": batch.sequence,
+            "batch_hash": batch.batch_hash,
+            "merkle_root": batch.merkle_root,
+            "sealed_at": batch.sealed_at.isoformat(),
+        }, separators=(",", ":"))
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return f"{os.path.basename(self.path)}#{batch.sequence}"
+
+
+_backend: Dict[str, Any] = {}
+
+
+def anchor_backend() -> Optional[Any]:
+    """Backend configurado em LEDGER_ANCHOR_BACKEND ("local", "none" ou "pacote.modulo:Classe")."""
+    name = settings.LEDGER_ANCHOR_BACKEND
+    if not name or name == "none":
+        return None
+    if name not in _backend:
+        if name == "local":
+            _backend[name] = LocalFileAnchor()
+        else:
+            module_name, _, class_name = name.partition(":")
+            _backend[name] = getattr(importlib.import_module(module_name), class_name)()
+    return _backend[name]
+
+
+# --- Provas ---
+
+async def get_proof(db, analysis_id: Any) -> Optional[Dict[str, Any]]:
+    """
+    Prova de inclusão da análise, já verificada: o registro atual bate com o hash selado e a prova
+    leva à raiz do lote. None se a análise ainda não foi selada.
+    """
+    from src.core.analysis_cache import get_analysis_payload
+    from src.db.ledger_operations import get_ledger_entry
+
+    found = await get_ledger_entry(db, analysis_id)
+    if found is None:
+        return None
+    entry, batch = found
+    payload = await get_analysis_payload(db, analysis_id)
+
+    start = time.perf_counter()
+    current_hash = record_hash(payload) if payload is not None else None
+    leaf = merkle.leaf_hash(bytes.fromhex(entry.record_hash))
+    included = merkle.verify_inclusion(leaf, entry.proof, entry.proof_directions, bytes.fromhex(batch.merkle_root))
+    chained = chain_hash(batch.sequence, batch.prev_hash, batch.merkle_root, batch.size, batch.sealed_at) == batch.batch_hash
+    elapsed_us = (time.perf_counter() - start) * 1e6
+
+    siblings = [entry.proof[i:i + merkle.HASH_SIZE].hex() for i in range(0, len(entry.proof), merkle.HASH_SIZE)]
+    return {
+        "analysis_id": analysis_id,
+        "record_hash": entry.record_hash,
+        "leaf_index": entry.leaf_index,
+        "proof": [
+            {"hash": sibling, "position": "left" if entry.proof_directions >> i & 1 else "right"}
+            for i, sibling in enumerate(siblings)
+        ],
+        "batch": {
+            "sequence": batch.sequence,
+            "merkle_root": batch.merkle_root,
+            "prev_hash": batch.prev_hash,
+            "batch_hash": batch.batch_hash,
+            "size": batch.size,
+            "sealed_at": batch.sealed_at,
+            "anchor_backend": batch.anchor_backend,
+            "anchor_reference": batch.anchor_reference,
+            "anchored_at": batch.anchored_at,
+        },
+        "record_matches": current_hash == entry.record_hash,
+        "verified": included and chained and current_hash == entry.record_hash,
+        "verification_us": round(elapsed_us, 1),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.db.database import SyncSessionLocal
+    from src.db.ledger_operations import seal_pending_batches_sync, verify_chain_sync
+
+    parser = argparse.ArgumentParser(description="Ledger de vereditos (lotes de Merkle encadeados).")
+    parser.add_argument("command", choices=["seal", "verify"])
+    parser.add_argument("--force", action="store_true", help="Sela também um lote incompleto.")
+    args = parser.parse_args()
+
+    with SyncSessionLocal() as db:
+        if args.command == "seal":
+            sealed = seal_pending_batches_sync(db, force=args.force)
+            print(f"{len(sealed)} lotes selados: {sealed}")
+        else:
+            problems = verify_chain_sync(db)
+            print("Cadeia íntegra." if not problems else "\n".join(problems))
+            raise SystemExit(1 if problems else 0)
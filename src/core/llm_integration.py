@@ -2,84 +2,47 @@ import os
 import asyncio
 import json
 import re
+import time
 import traceback
 import logging
-from typing import Optional, Any, Dict, List
+from typing import Optional, Any, Dict, List, Tuple
 from concurrent.futures import ThreadPoolExecutor
 
-import google.generativeai as genai
-from openai import OpenAI
-import anthropic
-from huggingface_hub import InferenceClient
-
+from src.core import cost_accounting
+from src.core.color_decision import CLASSIFICATION_COLORS
 from src.core.config import settings
-from src.core.Google Search_tool import GoogleSearchTool # Importa a ferramenta real
+from src.core.evidence_index import search_evidence
+from src.core.llm_providers import get_client
+from src.core.model_tiering import TierDecision, choose_tier, model_for, next_tier, should_escalate
+from src.core.prompt_builder import AnalysisPrompt, build_analysis_prompt, count_tokens
+from src.core.rate_limiter import error_status_code, is_rate_limit_error, rate_limiter
+from src.core.source_reputation import rank_search_results
+from src.core.google_search_tool import GoogleSearchTool # Importa a ferramenta real
 
 # Configura o logger
 logger = logging.getLogger(__name__)
 
 # --- Configurações das LLMs ---
-
-# Gemini
-if settings.GEMINI_API_KEY:
-    genai.configure(api_key=settings.GEMINI_API_KEY)
-    logger.debug("Gemini API configurada.")
-else:
-    logger.warning("GEMINI_API_KEY não configurada no .env!")
-
-# OpenAI
-openai_client = None
-if settings.OPENAI_API_KEY:
-    openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
-    logger.debug("OpenAI API configurada.")
-else:
-    logger.warning("OPENAI_API_KEY não configurada no .env!")
-
-# Claude AI
-claude_client = None
-if settings.CLAUDE_API_KEY:
-    claude_client = anthropic.Anthropic(api_key=settings.CLAUDE_API_KEY)
-    logger.debug("Claude AI API configurada.")
-else:
-    logger.warning("CLAUDE_API_KEY não configurada no .env! Claude AI será ignorado no fallback.")
-
-# DeepSeek AI (usa o cliente OpenAI com base_url customizada)
-deepseek_client = None
-if settings.DEEPSEEK_API_KEY and settings.DEEPSEEK_BASE_URL:
-    deepseek_client = OpenAI(api_key=settings.DEEPSEEK_API_KEY, base_url=settings.DEEPSEEK_BASE_URL)
-    logger.debug("DeepSeek AI API configurada.")
-else:
-    logger.warning("DEEPSEEK_API_KEY ou DEEPSEEK_BASE_URL não configurados no .env! DeepSeek AI será ignorado no fallback.")
-
-# Hugging Face
-hf_client = None
-if settings.HUGGINGFACE_API_KEY and settings.HUGGINGFACE_MODEL_ID:
-    try:
-        hf_client = InferenceClient(model=settings.HUGGINGFACE_MODEL_ID, token=settings.HUGGINGFACE_API_KEY)
-        logger.debug(f"Hugging Face API configurada para o modelo: {settings.HUGGINGFACE_MODEL_ID}.")
-    except Exception as e:
-        logger.error(f"Falha ao inicializar o cliente Hugging Face: {e}. Verifique o modelo ou a chave.")
-        hf_client = None
-else:
-    logger.warning("HUGGINGFACE_API_KEY ou HUGGINGFACE_MODEL_ID não configurados no .env! Hugging Face será ignorado no fallback.")
+# Os SDKs e clientes de cada provedor são carregados no primeiro uso (src/core/llm_providers.py)
 
 # --- Inicialização do ThreadPoolExecutor ---
 executor = ThreadPoolExecutor(max_workers=5) # Ajuste o número de workers conforme a necessidade
 
 # --- Inicialização da Google Search Tool ---
-Google Search_tool = None
-if settings.Google Search_API_KEY and settings.Google Search_ENGINE_ID:
+google_search_tool = None
+if settings.GOOGLE_SEARCH_API_KEY and settings.GOOGLE_SEARCH_ENGINE_ID:
     try:
-        Google Search_tool = GoogleSearchTool(
-            api_key=settings.Google Search_API_KEY,
-            custom_search_engine_id=settings.Google Search_ENGINE_ID
+        google_search_tool = GoogleSearchTool(
+            api_key=settings.GOOGLE_SEARCH_API_KEY,
+            custom_search_engine_id=settings.GOOGLE_SEARCH_ENGINE_ID,
+            results_per_query=settings.GOOGLE_SEARCH_RESULTS_PER_QUERY
         )
         logger.debug("Google Search Tool configurada com sucesso.")
     except ValueError as e:
         logger.error(f"Erro ao inicializar Google Search Tool: {e}. Verifique as chaves no .env.")
-        Google Search_tool = None
+        google_search_tool = None
 else:
-    logger.warning("Google Search_API_KEY ou Google Search_ENGINE_ID não configurados no .env! A busca externa será desabilitada.")
+    logger.warning("GOOGLE_SEARCH_API_KEY ou GOOGLE_SEARCH_ENGINE_ID não configurados no .env! A busca externa será desabilitada.")
 
 
 # Função auxiliar para extrair JSON de strings (útil para LLMs que podem retornar Markdown)
@@ -100,49 +63,204 @@ def extract_json_from_text(text: str) -> dict:
         logger.error(f"Não foi possível decodificar JSON de: {json_str[:500]}...")
         raise
 
-# Lista para armazenar as fontes usadas, acessível globalmente pela função de formatação
-sources_list: List[str] = []
+def _record_attempt(phase: str, provider: str, model: Optional[str], outcome: str, raw_response: Any, start: float, input_tokens: int, response_text: Optional[str], error: Optional[BaseException] = None) -> None:
+    """
+    Anota a chamada no registro de custo da análise; os tokens estimados só valem se a resposta não trouxer
+    `usage`. Só é cobrada se o provedor respondeu: resposta, texto ou erro com status HTTP.
+    """
+    cost_accounting.record_llm_call(
+        phase, provider, model, outcome, raw_response,
+        latency_ms=(time.perf_counter() - start) * 1000,
+        estimated_input_tokens=input_tokens,
+        estimated_output_tokens=count_tokens(response_text, provider) if response_text else 0,
+        answered=raw_response is not None or response_text is not None or error_status_code(error) is not None,
+    )
+
 
-# Função para formatar os resultados da busca para o prompt da LLM
-def format_search_results(results: List[Dict[str, Any]]) -> str:
+# Cor de cada classificação (a resposta da LLM nunca decide a cor sozinha)
+async def generate_analysis(prompt: AnalysisPrompt, preferred_llm: str = "gemini", required_keys=("classification", "color", "justification"), tier: str = "standard", fallback: bool = True) -> Optional[dict]:
     """
-    Formata os resultados da busca para serem incluídos no prompt da LLM.
+    Envia o prompt à LLM preferida, com fallback para as demais configuradas (se `fallback`), até obter
+    um JSON com as chaves exigidas. Retorna o JSON (com "provider") ou None se todas falharem.
+    As instruções fixas (prompt.system) vão como mensagem de sistema, para o cache de prefixo do provedor.
+    O modelo de cada provedor vem do nível `tier` (ver src/core/model_tiering.py).
     """
-    formatted_output = []
-    if not results:
-        return "Nenhum resultado de busca relevante encontrado."
-
-    for i, result_set in enumerate(results):
-        query = result_set.get("query", "Consulta desconhecida")
-        snippets = []
-        for j, item in enumerate(result_set.get("results", [])):
-            title = item.get("source_title", "Sem título")
-            snippet = item.get("snippet", "Sem snippet.")
-            url = item.get("url", "#")
-            snippets.append(f"  {j+1}. Título: {title}\n    Snippet: {snippet}\n    URL: {url}")
+    # LLMs para a fase final de análise (priorize as que você tem acesso e que performam bem)
+    analysis_llm_options = [preferred_llm] # Começa com a preferida
+    # Adicione outras LLMs na ordem de preferência para fallback, se a primeira falhar
+    if fallback:
+        if "gemini" not in analysis_llm_options and settings.GEMINI_API_KEY: analysis_llm_options.append("gemini")
+        if "openai" not in analysis_llm_options and settings.OPENAI_API_KEY: analysis_llm_options.append("openai")
+        if "deepseek" not in analysis_llm_options and settings.DEEPSEEK_API_KEY: analysis_llm_options.append("deepseek")
+        if "claude" not in analysis_llm_options and settings.CLAUDE_API_KEY: analysis_llm_options.append("claude")
+        if "huggingface" not in analysis_llm_options and settings.HUGGINGFACE_API_KEY: analysis_llm_options.append("huggingface")
+
+
+    for position, current_llm in enumerate(analysis_llm_options):
+        # Cota compartilhada do provedor (src/core/rate_limiter.py): sem cota a tempo, tenta o próximo;
+        # o último da lista espera mais, já que não há para onde desviar
+        last_option = position == len(analysis_llm_options) - 1
+        model_name = model_for(current_llm, tier)
+        call_start = time.perf_counter()
+        raw_response, response_text = None, None # Resposta do SDK (com `usage`) e texto, para o registro de custo
+        if not await rate_limiter.acquire(
+            current_llm, model_name, prompt.tokens + settings.LLM_OUTPUT_TOKENS_ESTIMATE,
+            settings.LLM_RATE_LIMIT_LAST_RESORT_WAIT_SECONDS if last_option else settings.LLM_RATE_LIMIT_MAX_WAIT_SECONDS,
+        ):
+            logger.warning(f"{current_llm} sem cota no limite de taxa; pulando para o próximo provedor.")
+            _record_attempt("analysis", current_llm, model_name, "throttled", None, call_start, prompt.tokens, None)
+            continue
+        call_start = time.perf_counter() # A espera pela cota não conta como latência do provedor
+        try:
+            logger.info(f"Tentando análise final com LLM: {current_llm}")
+            client = get_client(current_llm)
+            
+            if current_llm == "gemini" and client:
+                model = client.GenerativeModel(
+                    model_for("gemini", tier),
+                    system_instruction=prompt.system
+                )
+                response_obj = raw_response = await asyncio.get_running_loop().run_in_executor(
+                    executor,
+                    lambda: model.generate_content(prompt.user)
+                )
+                response_text = response_obj.text
+            
+            elif current_llm == "openai" and client:
+                chat_completion = raw_response = await client.chat.completions.create(
+                    model=model_for("openai", tier),
+                    messages=[{"role": "system", "content": prompt.system}, {"role": "user", "content": prompt.user}]
+                )
+                response_text = chat_completion.choices[0].message.content
+            
+            elif current_llm == "claude" and client:
+                response = raw_response = await client.messages.create(
+                    model=model_for("claude", tier),
+                    max_tokens=1000,
+                    # Prefixo fixo marcado para o prompt caching da Anthropic
+                    system=[{"type": "text", "text": prompt.system, "cache_control": {"type": "ephemeral"}}],
+                    messages=[
+                        {"role": "user", "content": prompt.user}
+                    ]
+                )
+                response_text = response.content[0].text 
+            
+            elif current_llm == "deepseek" and client:
+                chat_completion = raw_response = await client.chat.completions.create(
+                    model=model_for("deepseek", tier),
+                    messages=[{"role": "system", "content": prompt.system}, {"role": "user", "content": prompt.user}]
+                )
+                response_text = chat_completion.choices[0].message.content
+
+            elif current_llm == "huggingface" and client:
+                # Hugging Face InferenceClient pode ser mais complexo para estruturar prompts conversacionais/JSON
+                response_text = client.text_generation(prompt.text, max_new_tokens=1000)
+
+            else:
+                raise ValueError(f"LLM {current_llm} não configurada ou não suportada para análise final.")
+
+            # Tenta extrair e validar o JSON da resposta da LLM
+            parsed_response = extract_json_from_text(response_text)
             
-            # Adicionar a URL à lista de fontes global, se ela não estiver lá
-            if url and url != "#" and url not in sources_list: 
-                global sources_list 
-                sources_list.append(url)
+            # Validação das chaves esperadas no JSON
+            if all(key in parsed_response for key in required_keys):
+                parsed_response["provider"] = current_llm # Usado nas estatísticas por provedor
+                _record_attempt("analysis", current_llm, model_name, "ok", raw_response, call_start, prompt.tokens, response_text)
+                logger.info(f"Análise final obtida com sucesso usando {current_llm} (nível {tier}).")
+                return parsed_response
+            else:
+                logger.warning(f"LLM {current_llm} retornou JSON inválido/incompleto. Response: {response_text[:500]}...")
+                _record_attempt("analysis", current_llm, model_name, "invalid", raw_response, call_start, prompt.tokens, response_text)
         
-        if snippets:
-            formatted_output.append(f"Resultados para a consulta '{query}':\n" + "\n".join(snippets))
-        else:
-            formatted_output.append(f"Resultados para a consulta '{query}': Nenhum snippet encontrado.")
+        except asyncio.CancelledError:
+            # Ensemble que já atingiu o quórum cancela as consultas restantes (cobrada só se já havia resposta)
+            _record_attempt("analysis", current_llm, model_name, "cancelled", raw_response, call_start, prompt.tokens, response_text)
+            raise
+        except Exception as e:
+            if is_rate_limit_error(e):
+                await rate_limiter.penalize(current_llm, e) # Os demais processos também param de chamar
+                outcome = "rate_limited"
+            else:
+                outcome = "invalid" if response_text is not None else "error" # Com texto: o JSON não decodificou
+            _record_attempt("analysis", current_llm, model_name, outcome, raw_response, call_start, prompt.tokens, response_text, e)
+            logger.error(f"Falha na análise final com {current_llm}: {e}")
+            traceback.print_exc()
 
-    return "\n\n".join(formatted_output)
+    return None
+
+
+async def generate_tiered_analysis(prompt: AnalysisPrompt, preferred_llm: str, decision: TierDecision, required_keys=("classification", "color", "justification")) -> Optional[dict]:
+    """
+    generate_analysis no nível escolhido; respostas inconclusivas sobem para o próximo nível.
+    Acrescenta à resposta o nível final, o número de escalonamentos e a latência das chamadas à LLM.
+    """
+    start = time.perf_counter()
+    tier, escalations = decision.tier, 0
+    response = await generate_analysis(prompt, preferred_llm, required_keys, tier=tier)
+    while should_escalate(response, tier, decision):
+        tier = next_tier(tier)
+        escalations += 1
+        logger.info(f"Resposta inconclusiva; escalonando para o nível {tier}.")
+        escalated = await generate_analysis(prompt, preferred_llm, required_keys, tier=tier)
+        response = escalated or response
+    if response is not None:
+        response["model_tier"] = tier
+        response["tier_escalations"] = escalations
+        response["complexity_score"] = decision.score
+        response["llm_latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return response
+
+
+async def retrieve_evidence(local_queries: List[str], external_queries: List[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Busca de evidências conforme EVIDENCE_RETRIEVAL: índice local, Google ou os dois (hybrid: Google
+    só quando o índice traz menos de EVIDENCE_MIN_LOCAL_HITS passagens). Usada pela análise curta e
+    pelos trechos de documentos longos. Retorna os conjuntos de resultados e, se a busca externa era
+    necessária mas não está configurada e nada foi encontrado, a nota para o prompt.
+    """
+    results: List[Dict[str, Any]] = []
+    local_hits = 0
+    # Índice local de evidências (portais confiáveis), sem rede
+    if settings.EVIDENCE_RETRIEVAL in ("local", "hybrid"):
+        results = await asyncio.get_running_loop().run_in_executor(executor, search_evidence, local_queries)
+        cost_accounting.count_search("local", len(local_queries))
+        results = [result_set for result_set in results if result_set["results"]]
+        local_hits = sum(len(result_set["results"]) for result_set in results)
+        logger.info(f"Índice local de evidências: {local_hits} passagens.")
+
+    # Busca externa com a ferramenta real `Google Search` (no modo hybrid, só se o índice local trouxe pouco)
+    needs_external = settings.EVIDENCE_RETRIEVAL == "google" or (
+        settings.EVIDENCE_RETRIEVAL == "hybrid" and local_hits < settings.EVIDENCE_MIN_LOCAL_HITS
+    )
+    if not (external_queries and needs_external):
+        return results, None
+    if not google_search_tool: # Verifica se a ferramenta foi inicializada com sucesso
+        logger.warning("Google Search Tool não está configurada. Pulando a execução da busca.")
+        if results:
+            return results, None
+        return results, "A ferramenta de busca externa não está configurada, então a análise não pôde usar informações da internet."
+    logger.info(f"Executando busca com Google Search para queries: {external_queries}")
+    external_results = await asyncio.get_running_loop().run_in_executor(
+        executor,
+        lambda: google_search_tool.search(queries=external_queries)
+    )
+    cost_accounting.count_search("google", len(external_queries)) # Uma consulta paga por query
+    return results + external_results, None
 
 
 # Função principal para análise de conteúdo com LLM (ASSÍNCROMA)
 async def analyze_content_with_llm(content: str, preferred_llm: str = "gemini") -> dict:
-    global sources_list 
-    sources_list = [] # Limpa a lista de fontes para cada nova análise
+    # Documentos longos: verificação por trechos em paralelo (map-reduce), ver src/core/long_document.py
+    if settings.LONG_DOC_ENABLED and len(content) > settings.LONG_DOC_THRESHOLD_CHARS:
+        from src.core.long_document import analyze_long_document # Import tardio: o módulo usa as funções daqui
+        return await analyze_long_document(content, preferred_llm)
 
-    search_results_context = ""
+    search_results_context = "Nenhum resultado de busca relevante encontrado." # Usado quando não há evidências
+    raw_search_results: List[Dict[str, Any]] = []
     queries_to_execute: List[str] = []
     query_gen_error: Optional[str] = None
 
+    phase_mark = time.perf_counter()
     try:
         # FASE 1: LLM gera as consultas de busca usando a ferramenta `Google Search`
         logger.info("Solicitando à LLM que gere consultas de busca para RAG...")
@@ -200,13 +318,25 @@ async def analyze_content_with_llm(content: str, preferred_llm: str = "gemini")
         if settings.OPENAI_API_KEY: query_gen_llm_options.append("openai")
         if settings.DEEPSEEK_API_KEY and settings.DEEPSEEK_BASE_URL: query_gen_llm_options.append("deepseek")
 
+        query_gen_models = {"gemini": "gemini-1.5-flash", "openai": "gpt-3.5-turbo", "deepseek": "deepseek-chat"}
         for q_llm in query_gen_llm_options:
+            # As consultas são opcionais: provedor sem cota passa a vez sem esperar muito
+            query_tokens = count_tokens(chat_history_for_queries[0]["parts"][0], q_llm) + 200
+            query_start = time.perf_counter()
+            query_raw_response = None
+            if not await rate_limiter.acquire(q_llm, query_gen_models[q_llm], query_tokens, settings.LLM_RATE_LIMIT_MAX_WAIT_SECONDS):
+                query_gen_error = f"{q_llm} sem cota no limite de taxa."
+                _record_attempt("query_generation", q_llm, query_gen_models[q_llm], "throttled", None, query_start, query_tokens, None)
+                continue
+            query_start = time.perf_counter()
             try:
                 current_llm_for_query_gen = q_llm
                 if q_llm == "gemini":
                     # Certifique-se de que o modelo Gemini é configurado para responder com tool_calls
-                    query_model = genai.GenerativeModel('gemini-1.5-flash', tools=tool_definitions)
-                    query_response_obj = await asyncio.get_running_loop().run_in_executor(
+                    genai = get_client("gemini")
+                    if not genai: raise ValueError(f"{q_llm} client not initialized.")
+                    query_model = genai.GenerativeModel(query_gen_models[q_llm], tools=tool_definitions)
+                    query_response_obj = query_raw_response = await asyncio.get_running_loop().run_in_executor(
                         executor,
                         lambda: query_model.generate_content(chat_history_for_queries, tools=tool_definitions, tool_choice={"function": "search"})
                     )
@@ -217,6 +347,7 @@ async def analyze_content_with_llm(content: str, preferred_llm: str = "gemini")
                         if hasattr(part, 'function_call') and part.function_call and part.function_call.name == "search":
                             queries_to_execute = part.function_call.args.get("queries", [])
                             logger.info(f"Queries geradas por {q_llm}: {queries_to_execute}")
+                            _record_attempt("query_generation", q_llm, query_gen_models[q_llm], "ok", query_raw_response, query_start, query_tokens, None)
                             break # Queries geradas com sucesso
                         else:
                             logger.warning(f"{q_llm} não gerou chamada de ferramenta 'search' ou formato inesperado. Parte: {part}")
@@ -226,12 +357,12 @@ async def analyze_content_with_llm(content: str, preferred_llm: str = "gemini")
                         query_gen_error = f"{q_llm} não gerou resposta esperada."
 
                 elif q_llm == "openai" or q_llm == "deepseek":
-                    client_to_use = openai_client if q_llm == "openai" else deepseek_client
+                    client_to_use = get_client(q_llm)
                     if not client_to_use: raise ValueError(f"{q_llm} client not initialized.")
 
-                    chat_completion = await client_to_use.chat.completions.create(
-                        model="gpt-3.5-turbo" if q_llm == "openai" else "deepseek-chat", # Escolha o modelo apropriado
-                        messages=[{"role": "user", "content": chat_history_for_queries[0]["parts"][0]["text"]}],
+                    chat_completion = query_raw_response = await client_to_use.chat.completions.create(
+                        model=query_gen_models[q_llm],
+                        messages=[{"role": "user", "content": chat_history_for_queries[0]["parts"][0]}],
                         tools=[
                             {
                                 "type": "function",
@@ -258,169 +389,89 @@ async def analyze_content_with_llm(content: str, preferred_llm: str = "gemini")
                     if tool_calls and tool_calls[0].function.name == "search":
                         queries_to_execute = json.loads(tool_calls[0].function.arguments).get("queries", [])
                         logger.info(f"Queries geradas por {q_llm}: {queries_to_execute}")
+                        _record_attempt("query_generation", q_llm, query_gen_models[q_llm], "ok", query_raw_response, query_start, query_tokens, None)
                         break # Queries geradas com sucesso
                     else:
                         logger.warning(f"{q_llm} não gerou chamada de ferramenta 'search'.")
                         query_gen_error = f"{q_llm} não gerou chamada de ferramenta 'search' esperada."
+                _record_attempt("query_generation", q_llm, query_gen_models[q_llm], "invalid", query_raw_response, query_start, query_tokens, None)
                 
             except Exception as e:
+                rate_limited = is_rate_limit_error(e)
+                if rate_limited:
+                    await rate_limiter.penalize(q_llm, e)
+                _record_attempt("query_generation", q_llm, query_gen_models[q_llm], "rate_limited" if rate_limited else "error",
+                                query_raw_response, query_start, query_tokens, None, e)
                 query_gen_error = f"Erro ao gerar queries com {q_llm}: {str(e)}"
                 logger.warning(f"{query_gen_error}")
                 traceback.print_exc()
                 queries_to_execute = [] # Garante que queries_to_execute é redefinido em caso de erro
 
         if not queries_to_execute:
-            logger.warning("Nenhuma consulta de busca foi gerada ou as LLMs de geração de consulta falharam. Prosseguindo sem contexto de busca.")
-            # Se não houver queries, a search_results_context permanece vazia
-        else:
-            # FASE 2: Executa as consultas de busca usando a ferramenta real `Google Search`
-            if Google Search_tool: # Verifica se a ferramenta foi inicializada com sucesso
-                logger.info(f"Executando busca com Google Search para queries: {queries_to_execute}")
-                
-                # Aqui, você invoca a ferramenta `GoogleSearchTool` real.
-                raw_search_results = await asyncio.get_running_loop().run_in_executor(
-                    executor,
-                    lambda: Google Search_tool.search(queries=queries_to_execute)
-                )
-                logger.info(f"Resultados brutos da busca recebidos.")
-                search_results_context = format_search_results(raw_search_results)
-                logger.info("Contexto de busca formatado para LLM.")
-            else:
-                logger.warning("Google Search Tool não está configurada. Pulando a execução da busca.")
-                search_results_context = "A ferramenta de busca externa não está configurada, então a análise não pôde usar informações da internet."
+            logger.warning("Nenhuma consulta de busca foi gerada ou as LLMs de geração de consulta falharam.")
+        phase_mark = cost_accounting.add_phase_time("query_generation", phase_mark)
+
+        # FASE 2: Evidências conforme EVIDENCE_RETRIEVAL. Sem consultas geradas, o próprio conteúdo
+        # serve de consulta ao índice local (o BM25 ordena as passagens pela cobertura dos termos).
+        raw_search_results, retrieval_note = await retrieve_evidence(queries_to_execute or [content[:1000]], queries_to_execute)
+        if retrieval_note:
+            search_results_context = retrieval_note
+
+        if raw_search_results:
+            # Prioriza domínios que historicamente trouxeram evidências conclusivas (domain_stats)
+            raw_search_results = await asyncio.get_running_loop().run_in_executor(
+                executor,
+                rank_search_results,
+                raw_search_results
+            )
 
     except Exception as e:
         logger.error(f"Erro durante a fase de geração/execução de busca: {e}")
         traceback.print_exc()
         search_results_context = "Erro ao buscar informações externas. A análise pode ser limitada."
         # Ainda tenta analisar o conteúdo, mesmo que sem busca externa.
+    phase_mark = cost_accounting.add_phase_time("retrieval", phase_mark)
 
     # FASE 3: LLM gera a análise final usando o conteúdo original e o contexto de busca (RAG)
     logger.info("Solicitando à LLM que analise o conteúdo com o contexto de busca...")
     
-    # Prompt para a LLM fazer a verificação de fatos e classificação
-    rag_prompt = f"""
-    Você é a **Veritas API**, um sistema avançado de verificação de fatos. Sua tarefa é analisar o "Conteúdo para Análise" e, usando o "Contexto de Busca" fornecido, classificá-lo em uma das seguintes categorias.
-
-    Sua resposta DEVE ser um objeto JSON com as chaves `classification`, `color` e `justification`.
-
-    **Categorias e Cores:**
-    * 🟢 **Verde**: `verdadeiro` - Conteúdo factual, verificável e preciso, baseado em evidências ou dados confirmados.
-    * 🔴 **Vermelho**: `fake_news` - Conteúdo comprovadamente falso ou enganoso, criado para manipular.
-    * ⚪ **Branco/Cinzento**: `sátira` - Conteúdo humorístico, irônico ou que utiliza o exagero e a paródia. Não tem intenção de enganar, mas de divertir ou criticar de forma cômica.
-    * 🔵 **Azul**: `opinião` - Expressão de um ponto de vista pessoal, crença ou interpretação. Geralmente se declara como tal e não busca disfarçar sua natureza subjetiva.
-    * 🟠 **Laranja**: `tendencioso` - Conteúdo que apresenta um viés claro, favorecendo ou desfavorecendo um lado, uma ideia ou um grupo. Pode usar linguagem carregada e tenta parecer objetivo ou neutro, mas não é.
-    * ⚫ **Preto**: `indefinido` - Conteúdo ambíguo, sem contexto, com informações insuficientes para uma classificação clara, ou quando ocorre um erro técnico na análise.
-
-    **Instruções para Classificação:**
-    1.  Leia cuidadosamente o "Conteúdo para Análise".
-    2.  Considere o "Contexto de Busca" como sua fonte primária de verdade externa. Compare as afirmações do conteúdo com as informações do contexto.
-    3.  Se o contexto refutar claramente uma afirmação chave, considere `fake_news`.
-    4.  Se o contexto corroborar fortemente as afirmações, considere `verdadeiro`.
-    5.  Se o conteúdo parecer humorístico e não pretender enganar, é `sátira`.
-    6.  Se for um ponto de vista pessoal e não factual, é `opinião`.
-    7.  Se apresentar apenas um lado da história ou usar linguagem carregada para influenciar, é `parcial`.
-    8.  Se, mesmo com o contexto, ainda houver ambiguidade ou falta de informação conclusiva, é `indefinido`.
-    9.  Forneça uma `justification` clara e concisa, mencionando fatos do contexto de busca quando aplicável.
-
-    ---
-    Conteúdo para Análise:
-    "{content}"
-
-    ---
-    Contexto de Busca (informações relevantes da internet):
-    "{search_results_context}"
-
-    ---
-    Sua resposta JSON:
-    """
-
-    llm_response = {"classification": "indefinido", "color": "⚫", "justification": "Não foi possível realizar a análise completa devido a um erro interno ou falta de contexto."}
-    
-    # LLMs para a fase final de análise (priorize as que você tem acesso e que performam bem)
-    analysis_llm_options = [preferred_llm] # Começa com a preferida
-    # Adicione outras LLMs na ordem de preferência para fallback, se a primeira falhar
-    if "gemini" not in analysis_llm_options and settings.GEMINI_API_KEY: analysis_llm_options.append("gemini")
-    if "openai" not in analysis_llm_options and settings.OPENAI_API_KEY: analysis_llm_options.append("openai")
-    if "deepseek" not in analysis_llm_options and settings.DEEPSEEK_API_KEY: analysis_llm_options.append("deepseek")
-    if "claude" not in analysis_llm_options and settings.CLAUDE_API_KEY: analysis_llm_options.append("claude")
-    if "huggingface" not in analysis_llm_options and settings.HUGGINGFACE_API_KEY: analysis_llm_options.append("huggingface")
-
-
-    for current_llm in analysis_llm_options:
-        try:
-            logger.info(f"Tentando análise final com LLM: {current_llm}")
-            
-            if current_llm == "gemini" and settings.GEMINI_API_KEY:
-                model = genai.GenerativeModel('gemini-1.5-pro' if 'pro' in preferred_llm else 'gemini-1.5-flash') # Use o modelo apropriado
-                response_obj = await asyncio.get_running_loop().run_in_executor(
-                    executor,
-                    lambda: model.generate_content(rag_prompt)
-                )
-                response_text = response_obj.text
-            
-            elif current_llm == "openai" and openai_client:
-                chat_completion = await openai_client.chat.completions.create(
-                    model="gpt-4-turbo" if 'gpt-4' in preferred_llm else "gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": rag_prompt}]
-                )
-                response_text = chat_completion.choices[0].message.content
-            
-            elif current_llm == "claude" and claude_client:
-                response = await claude_client.messages.create(
-                    model="claude-3-opus-20240229" if 'opus' in preferred_llm else "claude-3-sonnet-20240229", 
-                    max_tokens=1000,
-                    messages=[
-                        {"role": "user", "content": rag_prompt}
-                    ]
-                )
-                response_text = response.content[0].text 
-            
-            elif current_llm == "deepseek" and deepseek_client:
-                chat_completion = await deepseek_client.chat.completions.create(
-                    model="deepseek-chat", 
-                    messages=[{"role": "user", "content": rag_prompt}]
-                )
-                response_text = chat_completion.choices[0].message.content
-
-            elif current_llm == "huggingface" and hf_client:
-                # Hugging Face InferenceClient pode ser mais complexo para estruturar prompts conversacionais/JSON
-                response_text = hf_client.text_generation(rag_prompt, max_new_tokens=1000)
-
-            else:
-                raise ValueError(f"LLM {current_llm} não configurada ou não suportada para análise final.")
-
-            # Tenta extrair e validar o JSON da resposta da LLM
-            parsed_response = extract_json_from_text(response_text)
-            
-            # Validação das chaves esperadas no JSON
-            if all(key in parsed_response for key in ["classification", "color", "justification"]):
-                llm_response = parsed_response
-                logger.info(f"Análise final obtida com sucesso usando {current_llm}.")
-                break 
-            else:
-                logger.warning(f"LLM {current_llm} retornou JSON inválido/incompleto. Response: {response_text[:500]}...")
-        
-        except Exception as e:
-            logger.error(f"Falha na análise final com {current_llm}: {e}")
-            traceback.print_exc()
+    # Evidências deduplicadas, ordenadas por relevância e cortadas no orçamento de tokens (src/core/prompt_builder.py)
+    rag_prompt = build_analysis_prompt(content, raw_search_results, preferred_llm, empty_context=search_results_context)
+    logger.info(f"Prompt montado: ~{rag_prompt.tokens} tokens, {len(rag_prompt.sources)} evidências.")
+
+    # Porte do modelo pela complexidade do conteúdo e pela concordância das evidências
+    tier_decision = choose_tier(content, raw_search_results, preferred_llm)
+    logger.info(f"Complexidade {tier_decision.score:.2f}: nível {tier_decision.tier}.")
+
+    if settings.ENSEMBLE_ENABLED:
+        # Vários provedores em paralelo, com parada no quórum ponderado (src/core/verification.py)
+        from src.core.verification import Verification # Import tardio: o módulo usa generate_analysis daqui
+        llm_response = await Verification().verify(rag_prompt, tier_decision.tier)
+    else:
+        llm_response = await generate_tiered_analysis(rag_prompt, preferred_llm, tier_decision)
+    cost_accounting.add_phase_time("analysis", phase_mark)
+    llm_response = llm_response or {"classification": "indefinido", "color": "⚫", "justification": "Não foi possível realizar a análise completa devido a um erro interno ou falta de contexto."}
 
     # Mapeamento final para garantir a cor correta
-    color_map = {
-        "verdadeiro": "🟢",
-        "fake_news": "🔴",
-        "sátira": "⚪",
-        "opinião": "🔵",
-        "tendencioso": "🟠",
-        "indefinido": "⚫"
-    }
-    llm_response["color"] = color_map.get(llm_response["classification"], "⚫")
+    llm_response["color"] = CLASSIFICATION_COLORS.get(llm_response["classification"], "⚫")
     
     # Adiciona as fontes utilizadas na resposta final
-    llm_response["sources"] = sources_list 
+    llm_response["sources"] = rag_prompt.sources
 
     return llm_response
 
+def analyze_content_sync(content: str, preferred_llm: str = "gemini") -> dict:
+    """
+    Versão síncrona para as tasks (Celery, backends de jobs): roda a análise num event loop próprio
+    e fecha os clientes desse loop ao final. "message" recebe a justificativa da LLM.
+    """
+    from src.core.event_loops import run_sync # Import tardio: carrega o motor HTTP
+
+    result = run_sync(analyze_content_with_llm(content, preferred_llm))
+    result.setdefault("message", result.get("justification", ""))
+    return result
+
+
 # Exemplo de uso (apenas para teste direto do script)
 async def main():
     test_content_true = "A Terra é redonda e orbita o Sol. Isso é comprovado por séculos de observações científicas."
@@ -459,8 +510,8 @@ if __name__ == "__main__":
     # DEEPSEEK_BASE_URL="https://api.deepseek.com/v1"
     # HUGGINGFACE_API_KEY="SUA_CHAVE_HF"
     # HUGGINGFACE_MODEL_ID="google/flan-t5-large" # Exemplo, escolha um modelo de texto apropriado
-    # Google Search_API_KEY="SUA_CHAVE_DE_API_DO_GOOGLE_CLOUD"
-    # Google Search_ENGINE_ID="SEU_ID_DO_MECANISMO_DE_BUSCA_PROGRAMAVEL"
+    # GOOGLE_SEARCH_API_KEY="SUA_CHAVE_DE_API_DO_GOOGLE_CLOUD"
+    # GOOGLE_SEARCH_ENGINE_ID="SEU_ID_DO_MECANISMO_DE_BUSCA_PROGRAMAVEL"
     
     # Configure logging para ver as mensagens de DEBUG/INFO/WARNING
     logging.basicConfig(level=logging.INFO) # Mude para logging.DEBUG para mais detalhes
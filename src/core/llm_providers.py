@@ -0,0 +1,199 @@
+# src/core/llm_providers.py
+#
+# Adaptadores dos provedores de LLM. Nenhum SDK é importado junto com este módulo: cada adaptador
+# importa o seu (google.generativeai, openai, anthropic, huggingface_hub) e constrói o cliente na
+# primeira chamada. Assim a API e o worker sobem sem pagar o import de SDKs que talvez nem usem.
+# warm_up() antecipa esse custo para os provedores de LLM_WARMUP_PROVIDERS (startup da API e do worker).
+# Medição: python -m benchmarks.bench_startup
+
+import asyncio
+import importlib
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Dict, Iterable, Optional
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderAdapter:
+    """
+    Cliente de um provedor, criado sob demanda (seguro para threads). O SDK é importado uma única vez
+    por processo; clientes assíncronos (`per_loop`) têm um pool httpx ligado ao event loop que os criou,
+    então há um por loop, como o motor de src/utils/http_fetch.py: feche com close_provider_clients().
+    client() devolve None se o provedor não estiver configurado ou o cliente não puder ser criado.
+    """
+    name = ""
+    sdk = "" # Módulo importado só no primeiro uso
+    per_loop = False
+
+    def __init__(self):
+        self._sdk = None
+        self._client = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+    def configured(self) -> bool:
+        raise NotImplementedError
+
+    def build(self, sdk: Any) -> Any:
+        raise NotImplementedError
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self) -> None:
+        """Importa o SDK (e cria o cliente, se não for por loop) uma única vez."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._sdk = self._import()
+                    if self._sdk is not None and not self.per_loop:
+                        self._client = self._build()
+                    self._loaded = True
+
+    def client(self) -> Optional[Any]:
+        self.load()
+        if not self.per_loop or self._sdk is None:
+            return self._client
+        loop = asyncio.get_running_loop()
+        if loop not in self._loop_clients:
+            self._loop_clients[loop] = self._build()
+        return self._loop_clients[loop]
+
+    async def aclose(self) -> None:
+        """Fecha o cliente do event loop atual, se houver."""
+        client = self._loop_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"Falha ao fechar o cliente {self.name}: {e}")
+
+    def _import(self) -> Optional[Any]:
+        if not self.configured():
+            logger.warning(f"{self.name}: credenciais não configuradas no .env; provedor ignorado.")
+            return None
+        start = time.perf_counter()
+        try:
+            sdk = importlib.import_module(self.sdk)
+        except Exception as e:
+            logger.error(f"Falha ao importar o SDK de {self.name}: {e}")
+            return None
+        logger.debug(f"SDK de {self.name} importado em {(time.perf_counter() - start) * 1000:.0f} ms.")
+        return sdk
+
+    def _build(self) -> Optional[Any]:
+        try:
+            return self.build(self._sdk)
+        except Exception as e:
+            logger.error(f"Falha ao inicializar o cliente {self.name}: {e}")
+            return None
+
+
+class GeminiProvider(ProviderAdapter):
+    """O "cliente" é o próprio módulo google.generativeai, já configurado (GenerativeModel por chamada)."""
+    name = "gemini"
+    sdk = "google.generativeai"
+
+    def configured(self) -> bool:
+        return bool(settings.GEMINI_API_KEY)
+
+    def build(self, sdk: Any) -> Any:
+        sdk.configure(api_key=settings.GEMINI_API_KEY)
+        return sdk
+
+
+class OpenAIProvider(ProviderAdapter):
+    name = "openai"
+    sdk = "openai"
+    per_loop = True
+
+    def configured(self) -> bool:
+        return bool(settings.OPENAI_API_KEY)
+
+    def build(self, sdk: Any) -> Any:
+        return sdk.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+
+
+class DeepSeekProvider(ProviderAdapter):
+    """Usa o cliente da OpenAI com base_url própria."""
+    name = "deepseek"
+    sdk = "openai"
+    per_loop = True
+
+    def configured(self) -> bool:
+        return bool(settings.DEEPSEEK_API_KEY and settings.DEEPSEEK_BASE_URL)
+
+    def build(self, sdk: Any) -> Any:
+        return sdk.AsyncOpenAI(api_key=settings.DEEPSEEK_API_KEY, base_url=settings.DEEPSEEK_BASE_URL)
+
+
+class ClaudeProvider(ProviderAdapter):
+    name = "claude"
+    sdk = "anthropic"
+    per_loop = True
+
+    def configured(self) -> bool:
+        return bool(settings.CLAUDE_API_KEY)
+
+    def build(self, sdk: Any) -> Any:
+        return sdk.AsyncAnthropic(api_key=settings.CLAUDE_API_KEY)
+
+
+class HuggingFaceProvider(ProviderAdapter):
+    name = "huggingface"
+    sdk = "huggingface_hub"
+
+    def configured(self) -> bool:
+        return bool(settings.HUGGINGFACE_API_KEY and settings.HUGGINGFACE_MODEL_ID)
+
+    def build(self, sdk: Any) -> Any:
+        return sdk.InferenceClient(model=settings.HUGGINGFACE_MODEL_ID, token=settings.HUGGINGFACE_API_KEY)
+
+
+PROVIDERS: Dict[str, ProviderAdapter] = {
+    adapter.name: adapter
+    for adapter in (GeminiProvider(), OpenAIProvider(), DeepSeekProvider(), ClaudeProvider(), HuggingFaceProvider())
+}
+
+
+def get_client(name: str) -> Optional[Any]:
+    """
+    Cliente do provedor `name` (criado no primeiro uso; os assíncronos, no event loop atual),
+    ou None se indisponível.
+    """
+    adapter = PROVIDERS.get(name)
+    return adapter.client() if adapter is not None else None
+
+
+async def close_provider_clients() -> None:
+    """Fecha os clientes assíncronos do event loop atual (ex.: ao final de um asyncio.run em código síncrono)."""
+    for adapter in PROVIDERS.values():
+        await adapter.aclose()
+
+
+def warm_up(names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """
+    Importa o SDK (e cria os clientes que não são por loop) dos provedores indicados (padrão:
+    LLM_WARMUP_PROVIDERS; "all" = todos os configurados). Retorna o tempo gasto por provedor, em ms.
+    """
+    names = list(settings.LLM_WARMUP_PROVIDERS if names is None else names)
+    if "all" in names:
+        names = [name for name, adapter in PROVIDERS.items() if adapter.configured()]
+    timings = {}
+    for name in names:
+        if name not in PROVIDERS:
+            logger.warning(f"Provedor desconhecido em LLM_WARMUP_PROVIDERS: {name}")
+            continue
+        start = time.perf_counter()
+        PROVIDERS[name].load()
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    if timings:
+        logger.info(f"Provedores de LLM pré-carregados: {timings}")
+    return timings
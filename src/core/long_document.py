@@ -0,0 +1,238 @@
+# src/core/long_document.py
+#
+# Modo documento longo (map-reduce): o texto é dividido em trechos coerentes (parágrafos inteiros),
+# cada trecho é verificado em paralelo com sua própria busca de evidências (EVIDENCE_RETRIEVAL), e uma
+# redução determinística (sem nova chamada à LLM) produz a classificação final. Vereditos por trecho
+# ficam em cache no Redis, então reenvios e matérias que compartilham trechos não pagam de novo.
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from src.core import cost_accounting
+from src.core.config import settings
+from src.core.llm_integration import CLASSIFICATION_COLORS, generate_tiered_analysis, retrieve_evidence
+from src.core.model_tiering import TIERS, choose_tier
+from src.core.prompt_builder import build_analysis_prompt
+from src.utils import fast_json
+
+logger = logging.getLogger(__name__)
+
+CHUNK_PROMPT_VERSION = "3" # Mude ao alterar o prompt por trecho: invalida o cache de vereditos
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n|\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"\S+")
+EXTERNAL_QUERY_MAX_WORDS = 32 # Limite de palavras por consulta da Google Custom Search
+# Empate na votação: a classificação mais grave vence
+_SEVERITY = ["tendencioso", "opinião", "sátira", "verdadeiro"]
+
+
+def _pack(pieces: List[str], max_chars: int, separator: str) -> List[str]:
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + len(separator) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}{separator}{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_search_query(chunk: str, heading: str = "") -> str:
+    """
+    Consulta à busca externa para um trecho (o índice local recebe o trecho em si): o título do
+    documento, se houver, seguido do início do trecho, até EXTERNAL_QUERY_MAX_WORDS palavras.
+    """
+    body = chunk.strip()
+    if heading and body.startswith(heading):
+        body = body[len(heading):] # O primeiro trecho começa pela própria linha de título
+    title = heading[len("Título:"):].strip() if heading.startswith("Título:") else heading
+    return " ".join(_WORD.findall(f"{title} {body[:1000]}")[:EXTERNAL_QUERY_MAX_WORDS])
+
+
+def split_into_chunks(text: str, max_chars: Optional[int] = None) -> List[str]:
+    """
+    Divide o texto em trechos de até max_chars sem quebrar parágrafos; parágrafos maiores
+    que o limite são divididos por frases. No máximo LONG_DOC_MAX_CHUNKS trechos (o tamanho
+    de cada um cresce para caber o documento inteiro).
+    """
+    max_chars = max_chars or settings.LONG_DOC_CHUNK_CHARS
+    max_chars = max(max_chars, len(text) // settings.LONG_DOC_MAX_CHUNKS + 1)
+    pieces: List[str] = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence_group in _pack(_SENTENCE_END.split(paragraph), max_chars, " "):
+            # Frase maior que o trecho inteiro (tabelas, listas sem pontuação): corte seco
+            pieces.extend(sentence_group[i:i + max_chars] for i in range(0, len(sentence_group), max_chars))
+    return _pack(pieces, max_chars, "\n\n")
+
+
+class ChunkVerdictCache:
+    """
+    Vereditos por trecho no Redis, por hash do trecho + LLM + modo de busca de evidências + versão do prompt.
+    O cliente assíncrono pertence ao event loop da análise: feche com aclose().
+    Falhas do Redis são tratadas como cache miss.
+    """
+
+    def __init__(self, redis_url: str, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._redis = None
+        if ttl_seconds > 0:
+            import redis.asyncio as redis_asyncio
+            self._redis = redis_asyncio.from_url(redis_url)
+
+    @staticmethod
+    def key(chunk: str, preferred_llm: str) -> str:
+        digest = hashlib.sha256(
+            f"{CHUNK_PROMPT_VERSION}\0{preferred_llm}\0{settings.EVIDENCE_RETRIEVAL}\0{chunk}".encode("utf-8")
+        ).hexdigest()
+        return f"veritas:chunk:{digest}"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self._redis is None:
+            return None
+        try:
+            raw = await self._redis.get(key)
+            return fast_json.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning(f"Falha ao ler veredito de trecho no Redis: {e}")
+            return None
+
+    async def set(self, key: str, verdict: Dict[str, Any]) -> None:
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(key, fast_json.dumps(verdict), ex=self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Falha ao gravar veredito de trecho no Redis: {e}")
+
+    async def aclose(self) -> None:
+        if self._redis is not None:
+            try:
+                await self._redis.aclose()
+            except Exception:
+                pass
+
+
+async def _verify_chunk(
+    index: int, total: int, chunk: str, heading: str, document_heading: str, preferred_llm: str,
+    semaphore: asyncio.Semaphore, cache: ChunkVerdictCache
+) -> Dict[str, Any]:
+    key = ChunkVerdictCache.key(chunk, preferred_llm)
+    cached = await cache.get(key)
+    if cached is not None:
+        cost_accounting.count_cache_hit("chunk_verdict")
+        return cached
+
+    async with semaphore:
+        # Busca direcionada ao trecho, pelo mesmo seletor da análise curta (local, hybrid ou google)
+        results, retrieval_note = await retrieve_evidence([chunk[:1000]], [chunk_search_query(chunk, document_heading)])
+        prompt = build_analysis_prompt(
+            chunk,
+            results,
+            preferred_llm,
+            **({"empty_context": retrieval_note} if retrieval_note else {}),
+            content_note=f"[Trecho {index + 1} de {total} de um documento longo{' — ' + heading if heading else ''}. "
+                         f"Classifique apenas as afirmações deste trecho.]",
+        )
+        # Cada trecho escolhe o próprio nível: trechos simples vão ao modelo rápido
+        decision = choose_tier(chunk, results, preferred_llm)
+        response = await generate_tiered_analysis(prompt, preferred_llm, decision, required_keys=("classification", "justification"))
+
+    if response is None:
+        return {"classification": "indefinido", "justification": "Falha na análise do trecho.", "provider": None, "sources": []}
+    verdict = {
+        "classification": response["classification"] if response["classification"] in CLASSIFICATION_COLORS else "indefinido",
+        "justification": str(response.get("justification", "")),
+        "provider": response.get("provider"),
+        "sources": prompt.sources,
+        "model_tier": response.get("model_tier"),
+        "tier_escalations": response.get("tier_escalations", 0),
+        "llm_latency_ms": response.get("llm_latency_ms"),
+    }
+    await cache.set(key, verdict)
+    return verdict
+
+
+def reduce_chunk_verdicts(verdicts: List[Dict[str, Any]], weights: List[int]) -> Dict[str, Any]:
+    """
+    Classificação do documento a partir dos trechos: uma afirmação-chave refutada (algum trecho
+    `fake_news`) basta para `fake_news`, como no prompt; senão vence a classificação com mais texto
+    (trechos `indefinido` não votam), com empate decidido pela mais grave.
+    """
+    decided = [(verdict, weight) for verdict, weight in zip(verdicts, weights) if verdict["classification"] != "indefinido"]
+    if not decided:
+        classification = "indefinido"
+    elif any(verdict["classification"] == "fake_news" for verdict, _ in decided):
+        classification = "fake_news"
+    else:
+        votes: Counter = Counter()
+        for verdict, weight in decided:
+            votes[verdict["classification"]] += weight
+        classification = max(votes, key=lambda c: (votes[c], -_SEVERITY.index(c) if c in _SEVERITY else -len(_SEVERITY)))
+
+    supporting = [
+        f"Trecho {i + 1}: {verdict['justification']}"
+        for i, verdict in enumerate(verdicts) if verdict["classification"] == classification and verdict["justification"]
+    ]
+    counts = Counter(verdict["classification"] for verdict in verdicts)
+    summary = ", ".join(f"{count} {name}" for name, count in counts.most_common())
+    justification = f"Documento analisado em {len(verdicts)} trechos ({summary}). " + " ".join(supporting[:3])
+    providers = Counter(verdict["provider"] for verdict in verdicts if verdict.get("provider"))
+    return {
+        "classification": classification,
+        "color": CLASSIFICATION_COLORS.get(classification, "⚫"),
+        "justification": justification.strip(),
+        "provider": providers.most_common(1)[0][0] if providers else None,
+        "sources": list(dict.fromkeys(url for verdict in verdicts for url in verdict.get("sources", []))),
+    }
+
+
+async def analyze_long_document(content: str, preferred_llm: str = "gemini") -> Dict[str, Any]:
+    """
+    Map-reduce: trechos verificados em paralelo (no máximo LONG_DOC_MAX_CONCURRENCY por vez),
+    então a latência total fica próxima à de um trecho. Mesmo formato de analyze_content_with_llm.
+    """
+    chunks = split_into_chunks(content)
+    first_line = content.strip().split("\n", 1)[0]
+    heading = first_line[:200] if first_line.startswith("Título:") else "" # Vindo de format_article_for_llm
+    logger.info(f"Documento longo ({len(content)} caracteres) dividido em {len(chunks)} trechos.")
+    semaphore = asyncio.Semaphore(settings.LONG_DOC_MAX_CONCURRENCY)
+    cache = ChunkVerdictCache(settings.REDIS_URL, settings.LONG_DOC_CHUNK_CACHE_TTL_SECONDS)
+    start = time.perf_counter()
+    try:
+        verdicts = await asyncio.gather(*(
+            _verify_chunk(i, len(chunks), chunk, heading if i else "", heading, preferred_llm, semaphore, cache)
+            for i, chunk in enumerate(chunks)
+        ))
+    finally:
+        await cache.aclose()
+    result = reduce_chunk_verdicts(list(verdicts), [len(chunk) for chunk in chunks])
+    # Nível e escalonamentos vêm do mesmo trecho (o que chegou ao nível mais alto), para que
+    # final - escalonamentos continue sendo o nível em que ele começou; latência de relógio das
+    # chamadas (os trechos rodam em paralelo). O nível de cada trecho fica em "chunks".
+    tiered = [verdict for verdict in verdicts if verdict.get("model_tier") in TIERS]
+    top = max(tiered, key=lambda verdict: (TIERS.index(verdict["model_tier"]), verdict.get("tier_escalations") or 0), default=None)
+    result["model_tier"] = top["model_tier"] if top else None
+    result["tier_escalations"] = (top.get("tier_escalations") or 0) if top else None
+    result["llm_latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    result["chunks"] = [
+        {
+            "classification": verdict["classification"],
+            "justification": verdict["justification"],
+            "model_tier": verdict.get("model_tier"),
+            "tier_escalations": verdict.get("tier_escalations"),
+        }
+        for verdict in verdicts
+    ]
+    return result
@@ -0,0 +1,130 @@
+# src/core/model_tiering.py
+#
+# Escolha do porte do modelo por complexidade do conteúdo. Sinais locais e baratos (tamanho,
+# número de afirmações verificáveis, densidade numérica, idioma e concordância das evidências
+# recuperadas) viram uma nota em [0, 1]: casos fáceis vão ao modelo mais rápido/barato e só os
+# difíceis ou disputados sobem de nível. Respostas inconclusivas são repetidas no nível seguinte.
+
+import math
+import re
+from typing import Any, Dict, List, Optional
+
+from src.core.config import settings
+from src.utils.text_search import STOPWORDS
+
+TIERS = ("fast", "standard", "strong")
+
+# Peso de cada sinal na nota de complexidade (somam 1)
+FEATURE_WEIGHTS = {
+    "length": 0.25,
+    "claims": 0.25,
+    "numeric_density": 0.15,
+    "foreign_language": 0.10,
+    "evidence_disagreement": 0.25,
+}
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+_NUMBER = re.compile(r"\d")
+# Verbos/expressões típicos de afirmações checáveis (atribuição, comprovação, números oficiais)
+_CLAIM_CUE = re.compile(
+    r"\b(afirm\w*|diz|disse|declar\w*|segundo|conforme|comprov\w*|confirm\w*|revel\w*|estudo\w*|pesquisa\w*|"
+    r"dados|aument\w*|diminu\w*|caiu|subiu|milh(ão|ões)|bilh(ão|ões)|por cento|aprov\w*|decret\w*|lei)\b",
+    re.IGNORECASE,
+)
+# Evidência que desmente (checagens, "é falso") versus a que confirma
+_DEBUNK_CUE = re.compile(
+    r"\b(fals[oa]s?|boatos?|fake|enganos[oa]s?|desment\w*|mentira\w*|não é verdade|sem comprovação|checagem)\b",
+    re.IGNORECASE,
+)
+# Modelos pedidos explicitamente em preferred_llm (comportamento anterior) fixam o nível mais alto
+_PINNED_STRONG = ("pro", "gpt-4", "opus")
+
+
+class TierDecision:
+    """
+    Nível escolhido, a nota de complexidade e os sinais que a compõem (registrados na análise).
+    """
+    __slots__ = ("tier", "score", "features", "pinned")
+
+    def __init__(self, tier: str, score: float, features: Dict[str, float], pinned: bool = False):
+        self.tier = tier
+        self.score = score
+        self.features = features
+        self.pinned = pinned
+
+
+def extract_features(content: str, results: Optional[List[Dict[str, Any]]] = None) -> Dict[str, float]:
+    """
+    Sinais normalizados em [0, 1]. Sem evidências, a discordância fica neutra (0.5).
+    """
+    words = _WORD.findall(content)
+    word_count = len(words)
+    sentences = [s for s in _SENTENCE_END.split(content) if s.strip()]
+    claims = sum(1 for s in sentences if _NUMBER.search(s) or _CLAIM_CUE.search(s))
+    numeric = sum(1 for w in words if _NUMBER.search(w))
+    stopword_ratio = sum(1 for w in words if w.lower() in STOPWORDS) / word_count if word_count else 1.0
+
+    snippets = [
+        f"{item.get('source_title') or ''} {item.get('snippet') or ''}"
+        for result_set in results or [] for item in result_set.get("results", [])
+    ]
+    if snippets:
+        debunk_share = sum(1 for snippet in snippets if _DEBUNK_CUE.search(snippet)) / len(snippets)
+        disagreement = 1.0 - abs(2 * debunk_share - 1) # 0: todas no mesmo sentido; 1: metade/metade
+    else:
+        disagreement = 0.5
+
+    return {
+        "length": min(1.0, math.log1p(word_count) / math.log1p(1500)),
+        "claims": min(1.0, claims / 10),
+        "numeric_density": min(1.0, 10 * numeric / word_count) if word_count else 0.0,
+        # Textos curtos quase não têm stopwords; só conta como estrangeiro a partir de 8 palavras
+        "foreign_language": 1.0 if word_count >= 8 and stopword_ratio < 0.08 else 0.0,
+        "evidence_disagreement": disagreement,
+    }
+
+
+def complexity_score(features: Dict[str, float]) -> float:
+    return round(sum(FEATURE_WEIGHTS[name] * features.get(name, 0.0) for name in FEATURE_WEIGHTS), 4)
+
+
+def choose_tier(content: str, results: Optional[List[Dict[str, Any]]] = None, preferred_llm: str = "gemini") -> TierDecision:
+    """
+    Nível do modelo para a análise. Com o tiering desativado, usa sempre "standard"
+    (os modelos padrão de antes); modelos grandes pedidos por nome continuam valendo.
+    """
+    features = extract_features(content, results)
+    score = complexity_score(features)
+    if any(marker in (preferred_llm or "") for marker in _PINNED_STRONG):
+        return TierDecision("strong", score, features, pinned=True)
+    if not settings.MODEL_TIERING_ENABLED:
+        return TierDecision("standard", score, features, pinned=True)
+    fast_below, standard_below = settings.MODEL_TIER_THRESHOLDS
+    tier = "fast" if score < fast_below else "standard" if score < standard_below else "strong"
+    return TierDecision(tier, score, features)
+
+
+def model_for(provider: str, tier: str) -> Optional[str]:
+    """
+    Nome do modelo do provedor para o nível (MODEL_TIERS), ou None se o provedor não tiver tabela.
+    """
+    models = settings.MODEL_TIERS.get(provider)
+    if not models:
+        return None
+    return models.get(tier) or models.get("standard")
+
+
+def next_tier(tier: str) -> Optional[str]:
+    index = TIERS.index(tier)
+    return TIERS[index + 1] if index + 1 < len(TIERS) else None
+
+
+def should_escalate(response: Optional[Dict[str, Any]], tier: str, decision: TierDecision) -> bool:
+    """
+    Resposta inconclusiva num nível abaixo do máximo: vale tentar o modelo maior.
+    (Sem resposta nenhuma, todos os provedores falharam; repetir com modelo maior não ajuda.)
+    """
+    if response is None or not settings.MODEL_TIER_ESCALATION or decision.pinned or next_tier(tier) is None:
+        return False
+    return response.get("classification") == "indefinido"
@@ -0,0 +1,211 @@
+# src/core/prompt_builder.py
+#
+# Montagem do prompt de análise com orçamento de tokens. As instruções fixas vêm primeiro e são
+# idênticas byte a byte entre requisições (prefixo cacheável pelos provedores: cache automático de
+# prefixo da OpenAI/DeepSeek, cache_control da Anthropic, system_instruction do Gemini). Depois vêm
+# o conteúdo e as evidências: sem duplicatas quase idênticas entre consultas, ordenadas pela
+# relevância ao conteúdo (BM25 sobre os radicais) e cortadas para caber no orçamento.
+
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set
+
+from src.core.config import settings
+from src.utils.text_search import analyze_terms
+from src.utils.urls import canonicalize_url, domain_of
+
+# Contagem exata para os modelos da OpenAI (e DeepSeek, de tokenizador parecido) com tiktoken;
+# sem ele, e para os demais provedores, estimativa por caracteres.
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - depende do ambiente
+    tiktoken = None
+
+# Caracteres por token (média em português; acentos e palavras longas rendem menos que em inglês)
+CHARS_PER_TOKEN = {"openai": 3.6, "deepseek": 3.4, "claude": 3.3, "gemini": 3.8, "huggingface": 3.2}
+BM25_K1 = 1.2
+BM25_B = 0.75
+_WHITESPACE = re.compile(r"\s+")
+
+ANALYSIS_INSTRUCTIONS = """Você é a **Veritas API**, um sistema avançado de verificação de fatos. Sua tarefa é analisar o "Conteúdo para Análise" e, usando o "Contexto de Busca" fornecido, classificá-lo em uma das seguintes categorias.
+
+Sua resposta DEVE ser um objeto JSON com as chaves `classification`, `color` e `justification`.
+
+**Categorias e Cores:**
+* 🟢 **Verde**: `verdadeiro` - Conteúdo factual, verificável e preciso, baseado em evidências ou dados confirmados.
+* 🔴 **Vermelho**: `fake_news` - Conteúdo comprovadamente falso ou enganoso, criado para manipular.
+* ⚪ **Branco/Cinzento**: `sátira` - Conteúdo humorístico, irônico ou que utiliza o exagero e a paródia. Não tem intenção de enganar, mas de divertir ou criticar de forma cômica.
+* 🔵 **Azul**: `opinião` - Expressão de um ponto de vista pessoal, crença ou interpretação. Geralmente se declara como tal e não busca disfarçar sua natureza subjetiva.
+* 🟠 **Laranja**: `tendencioso` - Conteúdo que apresenta um viés claro, favorecendo ou desfavorecendo um lado, uma ideia ou um grupo. Pode usar linguagem carregada e tenta parecer objetivo ou neutro, mas não é.
+* ⚫ **Preto**: `indefinido` - Conteúdo ambíguo, sem contexto, com informações insuficientes para uma classificação clara, ou quando ocorre um erro técnico na análise.
+
+**Instruções para Classificação:**
+1.  Leia cuidadosamente o "Conteúdo para Análise".
+2.  Considere o "Contexto de Busca" como sua fonte primária de verdade externa. Compare as afirmações do conteúdo com as informações do contexto.
+3.  Se o contexto refutar claramente uma afirmação chave, considere `fake_news`.
+4.  Se o contexto corroborar fortemente as afirmações, considere `verdadeiro`.
+5.  Se o conteúdo parecer humorístico e não pretender enganar, é `sátira`.
+6.  Se for um ponto de vista pessoal e não factual, é `opinião`.
+7.  Se apresentar apenas um lado da história ou usar linguagem carregada para influenciar, é `parcial`.
+8.  Se, mesmo com o contexto, ainda houver ambiguidade ou falta de informação conclusiva, é `indefinido`.
+9.  Forneça uma `justification` clara e concisa, mencionando fatos do contexto de busca quando aplicável.
+
+O Contexto de Busca lista as evidências como "[n] título — domínio", seguido do trecho e da URL."""
+
+_encodings: Dict[str, Any] = {}
+
+
+def count_tokens(text: str, provider: str = "gemini") -> int:
+    """
+    Tokens do texto para o provedor (exato com tiktoken para openai/deepseek; estimado nos demais).
+    """
+    if not text:
+        return 0
+    if tiktoken is not None and provider in ("openai", "deepseek"):
+        encoding = _encodings.get("cl100k_base")
+        if encoding is None:
+            encoding = _encodings["cl100k_base"] = tiktoken.get_encoding("cl100k_base")
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN.get(provider, 3.5))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, provider: str = "gemini") -> str:
+    """
+    Corta o texto para caber em max_tokens, preferindo um limite de palavra.
+    """
+    if count_tokens(text, provider) <= max_tokens:
+        return text
+    cut = text[: int(max_tokens * CHARS_PER_TOKEN.get(provider, 3.5))]
+    while cut and count_tokens(cut + " […]", provider) > max_tokens:
+        cut = cut[: int(len(cut) * 0.9)]
+    space = cut.rfind(" ")
+    return (cut[:space] if space > len(cut) * 0.6 else cut).rstrip() + " […]"
+
+
+class Evidence:
+    __slots__ = ("url", "title", "snippet", "query", "terms", "score")
+
+    def __init__(self, url: str, title: str, snippet: str, query: str):
+        self.url = url
+        self.title = title
+        self.snippet = snippet
+        self.query = query
+        self.terms = analyze_terms(f"{title} {snippet}")
+        self.score = 0.0
+
+
+def collect_evidence(results: List[Dict[str, Any]]) -> List[Evidence]:
+    """
+    Achata os resultados de todas as consultas (na ordem recebida, já priorizada pela reputação)
+    e remove repetições: a mesma URL em mais de uma consulta e trechos quase idênticos
+    (Jaccard dos conjuntos de radicais >= PROMPT_DEDUP_SIMILARITY), comuns em republicações
+    de agências, mesmo com frases reordenadas.
+    """
+    kept: List[Evidence] = []
+    kept_terms: List[Set[str]] = []
+    seen_urls: Set[str] = set()
+    for result_set in results or []:
+        for item in result_set.get("results", []):
+            url = item.get("url") or ""
+            key = canonicalize_url(url) or url
+            if key and key in seen_urls:
+                continue
+            snippet = _WHITESPACE.sub(" ", item.get("snippet") or "").strip()
+            evidence = Evidence(url, (item.get("source_title") or "Sem título").strip(), snippet, result_set.get("query", ""))
+            if not evidence.terms:
+                continue
+            terms = set(evidence.terms)
+            if any(
+                len(terms & other) / len(terms | other) >= settings.PROMPT_DEDUP_SIMILARITY
+                for other in kept_terms
+            ):
+                continue
+            if key:
+                seen_urls.add(key)
+            kept.append(evidence)
+            kept_terms.append(terms)
+    return kept
+
+
+def rank_evidence(content: str, evidence: List[Evidence]) -> List[Evidence]:
+    """
+    Ordena as evidências pela relevância ao conteúdo: BM25 com os radicais do conteúdo como consulta
+    e as próprias evidências como coleção. Empates mantêm a ordem de reputação; evidências sem
+    nenhum termo em comum com o conteúdo são descartadas.
+    """
+    query_terms = set(analyze_terms(content))
+    if not evidence or not query_terms:
+        return evidence
+    document_frequency: Counter = Counter()
+    for item in evidence:
+        document_frequency.update(set(item.terms))
+    total = len(evidence)
+    average_length = sum(len(item.terms) for item in evidence) / total
+    for item in evidence:
+        frequencies = Counter(item.terms)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(item.terms) / average_length)
+        item.score = sum(
+            math.log(1 + (total - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+            * frequencies[term] * (BM25_K1 + 1) / (frequencies[term] + norm)
+            for term in query_terms & frequencies.keys()
+        )
+    return sorted((item for item in evidence if item.score > 0), key=lambda item: item.score, reverse=True) # sorted é estável
+
+
+def format_evidence(index: int, item: Evidence) -> str:
+    # URL canônica: sem parâmetros de rastreamento, que só gastam tokens
+    return f"[{index}] {item.title} — {domain_of(item.url) or 'fonte desconhecida'}\n{item.snippet}\n{canonicalize_url(item.url) or item.url}"
+
+
+class AnalysisPrompt:
+    """
+    Prompt em duas partes: `system` (instruções fixas, prefixo cacheável) e `user` (conteúdo + evidências).
+    `sources` são as URLs das evidências que couberam no orçamento.
+    """
+    __slots__ = ("system", "user", "sources", "tokens")
+
+    def __init__(self, system: str, user: str, sources: List[str], tokens: int):
+        self.system = system
+        self.user = user
+        self.sources = sources
+        self.tokens = tokens
+
+    @property
+    def text(self) -> str:
+        """Prompt em uma só string, para provedores sem mensagem de sistema."""
+        return f"{self.system}\n\n---\n{self.user}"
+
+
+def build_analysis_prompt(
+    content: str,
+    results: Optional[List[Dict[str, Any]]],
+    provider: str = "gemini",
+    empty_context: str = "Nenhum resultado de busca relevante encontrado.",
+    content_note: Optional[str] = None,
+) -> AnalysisPrompt:
+    """
+    Monta o prompt dentro de PROMPT_TOKEN_BUDGET: as evidências (deduplicadas e ordenadas por
+    relevância, cada trecho com até PROMPT_MAX_SNIPPET_TOKENS) entram enquanto couberem em
+    PROMPT_EVIDENCE_TOKEN_BUDGET e no que sobrar do orçamento total.
+    """
+    content_block = f'Conteúdo para Análise:\n{content_note + chr(10) if content_note else ""}"{content}"'
+    fixed_tokens = (
+        count_tokens(ANALYSIS_INSTRUCTIONS, provider) + count_tokens(content_block, provider) + 40 # Cabeçalhos e separadores
+    )
+    budget = max(0, min(settings.PROMPT_EVIDENCE_TOKEN_BUDGET, settings.PROMPT_TOKEN_BUDGET - fixed_tokens))
+
+    blocks, sources, used = [], [], 0
+    for item in rank_evidence(content, collect_evidence(results)):
+        item.snippet = truncate_to_tokens(item.snippet, settings.PROMPT_MAX_SNIPPET_TOKENS, provider)
+        block = format_evidence(len(blocks) + 1, item)
+        tokens = count_tokens(block, provider) + 1
+        if used + tokens > budget:
+            continue # Um trecho menor mais abaixo ainda pode caber
+        blocks.append(block)
+        sources.append(item.url)
+        used += tokens
+
+    context = "\n\n".join(blocks) if blocks else empty_context
+    user = f"{content_block}\n\n---\nContexto de Busca (informações relevantes da internet):\n{context}\n\n---\nSua resposta JSON:"
+    return AnalysisPrompt(ANALYSIS_INSTRUCTIONS, user, sources, fixed_tokens + used)
@@ -0,0 +1,191 @@
+# src/core/rate_limiter.py
+#
+# Limite de taxa dos provedores de LLM compartilhado por todos os processos (API, workers Celery e de
+# stream), no Redis. Cada limite de LLM_RATE_LIMITS ("provedor" ou "provedor:modelo", com "rpm" e/ou
+# "tpm") é um GCRA: uma chave guarda o instante teórico de chegada (TAT), e um único script Lua verifica
+# e reserva todos os limites da chamada (requisições e tokens estimados) de uma vez, com o relógio do Redis.
+# Um 429 que escape dos limites (configuração otimista, outro cliente na mesma chave) abre um período de
+# espera para o provedor inteiro, respeitado por todos os processos.
+# Quem passa do limite espera localmente até LLM_RATE_LIMIT_MAX_WAIT_SECONDS; depois disso a chamada vai
+# para o próximo provedor do fallback (ver generate_analysis em src/core/llm_integration.py).
+# Falhas do Redis nunca bloqueiam chamadas: sem Redis, não há limite. O script lê TIME antes de gravar,
+# o que exige a replicação por efeitos (padrão desde o Redis 5).
+
+import asyncio
+import logging
+import random
+import weakref
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "veritas:ratelimit:"
+
+# KEYS[1]: chave de espera (429) do provedor; KEYS[2..]: TAT de cada limite
+# ARGV: intervalo (ms por unidade), tolerância de rajada (ms) e custo (unidades) de cada limite
+# Retorna "0" se reservou tudo, ou os ms até a chamada caber (nada é reservado nesse caso).
+# O custo é sempre cobrado inteiro; uma chamada maior que a rajada só passa com o limite ocioso (TAT <= agora)
+ACQUIRE_SCRIPT = """
+local cooldown = redis.call('PTTL', KEYS[1])
+if cooldown > 0 then return tostring(cooldown) end
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + tonumber(time[2]) / 1000
+local wait = 0
+local tats = {}
+for i = 2, #KEYS do
+    local j = (i - 2) * 3
+    local interval, burst, cost = tonumber(ARGV[j + 1]), tonumber(ARGV[j + 2]), tonumber(ARGV[j + 3])
+    local tat = tonumber(redis.call('GET', KEYS[i]) or now)
+    if tat < now then tat = now end
+    local charge = interval * cost
+    if charge > burst then
+        -- Maior que a rajada: só passa com o limite ocioso e cobra inteira (o TAT vai para o futuro)
+        if tat > now then wait = math.max(wait, tat - now) end
+    elseif tat + charge - burst > now then
+        wait = math.max(wait, tat + charge - burst - now)
+    end
+    tats[i] = tat + charge
+end
+if wait > 0 then return tostring(wait) end
+for i = 2, #KEYS do
+    redis.call('SET', KEYS[i], tostring(tats[i]), 'PX', math.ceil(tats[i] - now) + 1000)
+end
+return '0'
+"""
+
+_UNITS = {"rpm": "requests", "tpm": "tokens"}
+
+
+@dataclass(frozen=True)
+class _Limit:
+    key: str
+    interval_ms: float # Tempo "gasto" por unidade (60000 / limite por minuto)
+    burst_ms: float # Quanto adiantado o TAT pode estar: a rajada permitida
+    units: str
+
+
+def _limits_for(provider: str, model: Optional[str]) -> List[_Limit]:
+    limits = []
+    for scope in ([f"{provider}:{model}"] if model else []) + [provider]:
+        config = settings.LLM_RATE_LIMITS.get(scope)
+        if not config:
+            continue
+        for name, units in _UNITS.items():
+            per_minute = config.get(name)
+            if not per_minute:
+                continue
+            interval_ms = 60000 / per_minute
+            # Rajada padrão: LLM_RATE_LIMIT_BURST_FRACTION do limite por minuto (ao menos uma unidade)
+            burst = config.get(f"burst_{units}") or max(per_minute * settings.LLM_RATE_LIMIT_BURST_FRACTION, 1)
+            limits.append(_Limit(f"{KEY_PREFIX}{scope}:{units}", interval_ms, interval_ms * burst, units))
+    return limits
+
+
+def error_status_code(error: Optional[BaseException]) -> Optional[int]:
+    """
+    Status HTTP da resposta de erro do provedor (openai/anthropic: status_code; google: code;
+    huggingface: response), ou None se a requisição nem chegou a ter resposta.
+    """
+    for status in (getattr(error, "status_code", None), getattr(getattr(error, "response", None), "status_code", None),
+                   getattr(error, "code", None)):
+        if isinstance(status, int) and not isinstance(status, bool):
+            return status
+    return None
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """429 dos SDKs (openai/anthropic: status_code; google: ResourceExhausted; huggingface: response)."""
+    if error_status_code(error) == 429:
+        return True
+    return type(error).__name__ in ("RateLimitError", "ResourceExhausted", "TooManyRequests")
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Aquisição de cota por chamada. O cliente assíncrono do Redis pertence ao event loop de quem chama
+    (um por loop, como o motor de src/utils/http_fetch.py): feche com close_rate_limiter().
+    """
+
+    def __init__(self, redis_url: str, enabled: bool = True):
+        self.redis_url = redis_url
+        self.enabled = enabled
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+    def _client(self):
+        """(cliente, script registrado) do event loop atual."""
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(loop)
+        if entry is None:
+            import redis.asyncio as redis_asyncio
+            client = redis_asyncio.from_url(self.redis_url)
+            entry = self._clients[loop] = (client, client.register_script(ACQUIRE_SCRIPT))
+        return entry
+
+    async def try_acquire(self, provider: str, model: Optional[str], tokens: int) -> float:
+        """Reserva 1 requisição e `tokens` tokens; retorna 0.0, ou os segundos até caber (sem reservar)."""
+        if not self.enabled:
+            return 0.0
+        limits = _limits_for(provider, model) # Sem limites configurados, só a espera de 429 é verificada
+        args = []
+        for limit in limits:
+            args += [limit.interval_ms, limit.burst_ms, 1 if limit.units == "requests" else max(tokens, 1)]
+        try:
+            wait_ms = float(await self._client()[1](keys=[f"{KEY_PREFIX}{provider}:cooldown"] + [limit.key for limit in limits], args=args))
+        except Exception as e:
+            logger.warning(f"Falha no limite de taxa no Redis ({provider}); seguindo sem limite: {e}")
+            return 0.0
+        return wait_ms / 1000
+
+    async def acquire(self, provider: str, model: Optional[str], tokens: int, max_wait: float) -> bool:
+        """
+        Espera localmente pela cota por até `max_wait` segundos. False: o chamador deve usar outro provedor
+        (ou desistir). A espera tem um pouco de jitter, para os processos não voltarem todos juntos.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_wait
+        while True:
+            wait = await self.try_acquire(provider, model, tokens)
+            if wait <= 0:
+                return True
+            if loop.time() + wait > deadline:
+                logger.info(f"Limite de taxa de {provider} ({model}): cota livre só em {wait:.1f}s.")
+                return False
+            await asyncio.sleep(wait * random.uniform(1.0, 1.1))
+
+    async def penalize(self, provider: str, error: Optional[BaseException] = None) -> None:
+        """Depois de um 429: ninguém chama `provider` até o Retry-After (ou LLM_RATE_LIMIT_COOLDOWN_SECONDS)."""
+        if not self.enabled:
+            return
+        seconds = (retry_after_seconds(error) if error is not None else None) or settings.LLM_RATE_LIMIT_COOLDOWN_SECONDS
+        try:
+            await self._client()[0].set(f"{KEY_PREFIX}{provider}:cooldown", 1, px=max(int(seconds * 1000), 1))
+            logger.warning(f"{provider} respondeu 429; chamadas suspensas por {seconds:.0f}s em todos os processos.")
+        except Exception as e:
+            logger.warning(f"Falha ao registrar a espera de {provider} no Redis: {e}")
+
+    async def aclose(self) -> None:
+        entry = self._clients.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            try:
+                await entry[0].aclose()
+            except Exception:
+                pass
+
+
+rate_limiter = RateLimiter(settings.REDIS_URL, enabled=settings.LLM_RATE_LIMIT_ENABLED)
+
+
+async def close_rate_limiter() -> None:
+    """Fecha o cliente do event loop atual (ex.: ao final de um asyncio.run em código síncrono)."""
+    await rate_limiter.aclose()
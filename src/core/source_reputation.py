@@ -0,0 +1,38 @@
+# src/core/source_reputation.py
+
+import logging
+from typing import Any, Dict, List
+
+from src.db.database import SyncSessionLocal
+from src.db.source_operations import get_domain_reliability_sync
+from src.utils.urls import domain_of
+
+logger = logging.getLogger(__name__)
+
+# Score de um domínio sem histórico: o mesmo valor do prior de Laplace com zero observações
+UNKNOWN_DOMAIN_SCORE = 0.5
+
+
+def rank_search_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Reordena os itens de cada consulta de busca pelo reliability_score do domínio (domain_stats),
+    mantendo a ordem original do buscador entre domínios empatados.
+    Em caso de falha no banco, devolve os resultados sem alteração.
+    """
+    urls = [item.get("url", "") for result_set in results for item in result_set.get("results", [])]
+    domains = {domain_of(url) for url in urls if url}
+    try:
+        with SyncSessionLocal() as db:
+            scores = get_domain_reliability_sync(db, domains)
+    except Exception as e:
+        logger.warning(f"Não foi possível consultar a reputação dos domínios: {e}")
+        return results
+
+    for result_set in results:
+        items = result_set.get("results", [])
+        result_set["results"] = sorted(
+            items,
+            key=lambda item: scores.get(domain_of(item.get("url", "")), UNKNOWN_DOMAIN_SCORE),
+            reverse=True,
+        )
+    return results
@@ -1,42 +1,70 @@
 # src/core/tasks.py
 
+import json
+from datetime import datetime, timedelta
+
 from src.celery_utils import celery_app
 from src.db.database import SyncSessionLocal
-from src.models.analysis import Analysis # Corrigido para src.models.analysis
+from src.models.analysis import Analysis, TERMINAL_STATUSES # Corrigido para src.models.analysis
 from src.core.llm_integration import analyze_content_sync
 from src.core.config import settings
+from src.core import cost_accounting
 from src.utils.colors import get_color_from_classification # Assumindo que este arquivo existe
+from src.core.analysis_cache import analysis_cache
+from src.db.source_operations import record_analysis_sources_sync
+from src.db.stats_operations import record_analysis_rollup_sync
+from src.core.url_content import prepare_llm_content_sync
+import src.db.search_operations  # noqa: F401 - registra a indexação de busca no flush
 
 print("DEBUG_TASK: src/core/tasks.py carregado.")
 
-@celery_app.task
-def analyze_content_task(analysis_id: str, content: str, preferred_llm: str):
+def analyze_content(analysis_id: str, content: str, preferred_llm: str):
+    """
+    Processa uma análise pendente: LLM e gravação do resultado (status completed/failed).
+    Executada pela task Celery ou, com JOB_BACKEND="embedded", dentro do processo da API.
+    """
     print(f"CELERY_TASK ▶️ Iniciando análise para ID: {analysis_id} com LLM: {preferred_llm}")
 
     try:
-        with SyncSessionLocal() as db:
+        # Tempos, tokens e custo desta execução (src/core/cost_accounting.py), gravados em lote ao final
+        with SyncSessionLocal() as db, cost_accounting.track(analysis_id) as cost:
+            # URLs enviadas: a LLM recebe o texto principal da página, não a URL literal
+            with cost_accounting.phase("prepare_content"):
+                llm_content = prepare_llm_content_sync(db, content)
+
             # Chama função síncrona que faz análise via LLM
-            llm_result = analyze_content_sync(content, preferred_llm)
+            llm_result = analyze_content_sync(llm_content, preferred_llm)
 
             # Extrair resultados do LLM. Certifique-se que analyze_content_sync retorna isso.
             classification = llm_result.get("classification", "error")
             message = llm_result.get("message", "Erro desconhecido na análise LLM.")
-            # Se você espera fontes, pode adicionar aqui também:
-            # sources = llm_result.get("sources", "") 
+            sources = llm_result.get("sources") or []
 
             color = get_color_from_classification(classification)
+            cost.provider = llm_result.get("provider")
 
             analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
 
             if analysis:
+                already_finished = analysis.status in TERMINAL_STATUSES # Re-tentativa: não contar de novo
                 analysis.status = "completed" if classification != "error" else "failed"
                 analysis.classification = classification
                 analysis.message = message # ATUALIZADO: Usando o campo 'message'
                 analysis.color = color
-                # analysis.sources = sources # Se você adicionar o campo sources aqui
+                analysis.sources = json.dumps(sources)
+                analysis.provider = llm_result.get("provider")
+                analysis.model_tier = llm_result.get("model_tier")
+                analysis.tier_escalations = llm_result.get("tier_escalations")
+                analysis.llm_latency_ms = llm_result.get("llm_latency_ms")
+                analysis.completed_at = datetime.utcnow()
+                # Tabelas normalizadas de fontes + agregado por domínio, na mesma transação
+                record_analysis_sources_sync(db, analysis.id, sources, classification)
+                if not already_finished:
+                    record_analysis_rollup_sync(db, analysis)
 
                 db.commit()
                 db.refresh(analysis)
+                analysis_cache.store_sync(analysis) # Resultado final: popula o cache de leitura
 
                 print(f"CELERY_TASK ✅ Análise {analysis_id} concluída: {classification} {color}")
             else:
@@ -46,15 +74,121 @@ def analyze_content_task(analysis_id: str, content: str, preferred_llm: str):
         print(f"CELERY_TASK ❌ Erro durante análise {analysis_id}: {e}")
 
         # Tenta atualizar a análise para status de erro (se ainda possível)
-        try:
-            with SyncSessionLocal() as db:
-                analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
-                if analysis:
-                    analysis.status = "failed"
-                    analysis.classification = "error"
-                    analysis.message = f"Erro interno durante análise: {e}" # ATUALIZADO: Usando o campo 'message'
-                    analysis.color = get_color_from_classification("error")
-                    db.commit()
-                    db.refresh(analysis)
-        except Exception as inner_e:
-            print(f"CELERY_TASK ❗ Erro ao salvar fallback de erro no BD: {inner_e}") 
+        mark_analysis_failed(analysis_id, f"Erro interno durante análise: {e}")
+
+
+def mark_analysis_failed(analysis_id: str, message: str):
+    """
+    Finaliza a análise como failed (classificação "error"), contando-a nos rollups uma única vez.
+    """
+    try:
+        with SyncSessionLocal() as db:
+            analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
+            if analysis:
+                already_finished = analysis.status in TERMINAL_STATUSES
+                analysis.status = "failed"
+                analysis.classification = "error"
+                analysis.message = message # ATUALIZADO: Usando o campo 'message'
+                analysis.color = get_color_from_classification("error")
+                analysis.completed_at = datetime.utcnow()
+                if not already_finished:
+                    record_analysis_rollup_sync(db, analysis)
+                db.commit()
+                db.refresh(analysis)
+                analysis_cache.store_sync(analysis)
+    except Exception as inner_e:
+        print(f"CELERY_TASK ❗ Erro ao salvar fallback de erro no BD: {inner_e}")
+
+
+@celery_app.task
+def analyze_content_task(analysis_id: str, content: str, preferred_llm: str):
+    analyze_content(analysis_id, content, preferred_llm)
+
+
+@celery_app.task
+def compress_analyses_task(batch_size: int = 200, pause_seconds: float = 0.5):
+    """
+    Migração em segundo plano: comprime as análises antigas em lotes (ver src/db/compression_migration.py).
+    """
+    from src.db.compression_migration import compress_existing_analyses_sync, ensure_compression_schema
+    from src.db.database import sync_engine
+
+    ensure_compression_schema(sync_engine)
+    with SyncSessionLocal() as db:
+        total = compress_existing_analyses_sync(db, batch_size=batch_size, pause_seconds=pause_seconds)
+    print(f"CELERY_TASK 🗜️ {total} análises reescritas com compressão.")
+    return total
+
+
+
+@celery_app.task
+def reconcile_stats_task(days: int = 2):
+    """
+    Recalcula os rollups dos últimos `days` dias a partir de `analyses`, corrigindo desvios
+    da contagem incremental (re-tentativas, exclusões). Agendado pelo Celery beat.
+    """
+    from src.db.stats_operations import reconcile_rollups_sync
+
+    with SyncSessionLocal() as db:
+        total = reconcile_rollups_sync(db, datetime.utcnow() - timedelta(days=days))
+    print(f"CELERY_TASK 📊 {total} linhas de rollup reconciliadas.")
+    return total
+
+
+@celery_app.task
+def archive_analyses_task(older_than_days: int = None, pause_seconds: float = 0.5):
+    """
+    Retenção: move análises antigas da tabela quente para o arquivo frio em Parquet
+    (ver src/db/archive_operations.py). Agendado pelo Celery beat.
+    """
+    from src.db.archive_operations import archive_old_analyses_sync
+
+    with SyncSessionLocal() as db:
+        total = archive_old_analyses_sync(db, older_than_days=older_than_days, pause_seconds=pause_seconds)
+    print(f"CELERY_TASK 🧊 {total} análises movidas para o arquivo frio.")
+    return total
+
+
+@celery_app.task
+def crawl_evidence_task(domains: list = None):
+    """
+    Rodada do crawler incremental: matérias novas/alteradas dos portais confiáveis entram
+    no índice local de evidências (ver src/core/crawler.py). Agendado pelo Celery beat.
+    """
+    from src.core.crawler import crawl_once
+    from src.core.event_loops import run_sync
+
+    counters = run_sync(crawl_once(domains))
+    for domain, counts in sorted(counters.items()):
+        print(f"CELERY_TASK 🕷️ {domain}: {counts}")
+    return counters
+
+
+@celery_app.task
+def consume_feedback_task(max_batches: int = 20):
+    """
+    Grava em lote o feedback enfileirado no Redis Stream e atualiza os contadores de
+    concordância por análise (ver src/core/feedback_stream.py). Agendado pelo Celery beat.
+    """
+    from src.core.feedback_stream import consume_feedback
+
+    processed, disputed = consume_feedback(max_batches)
+    print(f"CELERY_TASK 🗳️ {processed} feedbacks gravados; {disputed} vereditos passaram a contestados.")
+    return processed
+
+
+@celery_app.task
+def seal_ledger_task(force: bool = False):
+    """
+    Sela as análises concluídas em lotes de Merkle encadeados e publica as raízes no backend
+    de âncora (ver src/core/ledger.py). Agendado pelo Celery beat.
+    """
+    if not settings.LEDGER_ENABLED:
+        return []
+    from src.db.ledger_operations import seal_pending_batches_sync
+
+    with SyncSessionLocal() as db:
+        sealed = seal_pending_batches_sync(db, force=force)
+    if sealed:
+        print(f"CELERY_TASK 🔗 Lotes do ledger selados: {sealed}")
+    return sealed
@@ -0,0 +1,54 @@
+# src/core/url_content.py
+
+import logging
+from typing import Optional
+
+from sqlalchemy.orm import Session as SyncSession
+
+from src.core import cost_accounting
+from src.core.config import settings
+from src.db.url_operations import get_url_extraction_sync, store_url_extraction_sync
+from src.utils.article import truncate_text
+from src.utils.scraping import analisar_url
+from src.utils.urls import canonicalize_url, detect_submission_url
+
+logger = logging.getLogger(__name__)
+
+
+def format_article_for_llm(url: str, title: Optional[str], text: str) -> str:
+    """
+    Conteúdo enviado à LLM no lugar da URL: título, endereço e o corpo da matéria (com teto de tamanho;
+    maior no modo documento longo, que analisa por trechos).
+    """
+    header = [f"Título: {title}"] if title else []
+    header.append(f"URL: {url}")
+    max_chars = settings.LONG_DOC_MAX_CHARS if settings.LONG_DOC_ENABLED else settings.URL_ARTICLE_MAX_CHARS
+    return "\n".join(header) + "\n\n" + truncate_text(text, max_chars)
+
+
+def prepare_llm_content_sync(db: SyncSession, content: str) -> str:
+    """
+    Se o conteúdo enviado for uma URL, substitui-o pelo texto principal da página (via cache
+    por URL canônica ou download + extração). Para texto comum, ou se a extração falhar,
+    devolve o conteúdo original.
+    """
+    url = detect_submission_url(content)
+    if url is None:
+        return content
+    key = canonicalize_url(url)
+    extraction = get_url_extraction_sync(
+        db, key, settings.URL_EXTRACTION_TTL_SECONDS, settings.URL_EXTRACTION_FAILURE_TTL_SECONDS
+    )
+    if extraction is None:
+        article = analisar_url(url)
+        store_url_extraction_sync(db, key, article)
+        if article is None:
+            logger.warning(f"Não foi possível extrair o texto de {url}; a URL será analisada como texto.")
+            return content
+        title, text, page_url = article.title, article.text, article.canonical_url or article.final_url or url
+    else:
+        cost_accounting.count_cache_hit("url_extraction")
+        if not extraction.text:
+            return content # Falha recente em cache
+        title, text, page_url = extraction.title, extraction.text, extraction.canonical_url or extraction.final_url or url
+    return format_article_for_llm(page_url, title, text)
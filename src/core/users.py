@@ -4,16 +4,18 @@ from fastapi import Depends
 # REMOVIDO 'schemas' daqui, pois causa importação circular interna do fastapi_users
 from fastapi_users import FastAPIUsers, BaseUserManager, exceptions, models 
 
+import uuid
 from typing import Optional
 
 from src.models.user import User, get_user_db # Importa seu modelo de usuário e a dependência de banco de dados
 from src.core.auth import auth_backend # Importa o backend de autenticação
+from src.core.auth_cache import auth_cache
 
 # Importa os schemas de usuário para o UserManager
 from src.schemas.user_schemas import UserRead, UserCreate, UserUpdate
 
 # Define um UserManager customizado
-class UserManager(BaseUserManager[User, int]):
+class UserManager(BaseUserManager[User, uuid.UUID]):
     # Se precisar enviar emails de verificação/reset, configure aqui
     # reset_password_token_secret = SECRET
     # verification_token_secret = SECRET
@@ -21,6 +23,29 @@ class UserManager(BaseUserManager[User, int]):
     async def on_after_register(self, user: User, request: Optional[dict] = None):
         print(f"User {user.id} has registered.")
 
+    # Invalidação do cache de autenticação (src/core/auth_cache.py)
+
+    async def _revoke_tokens(self, user: User):
+        """Incrementa token_version: os JWTs já emitidos deixam de ser aceitos."""
+        old_version = user.token_version or 0
+        await self.user_db.update(user, {"token_version": old_version + 1})
+        await auth_cache.invalidate_user(user.id, old_version)
+
+    async def on_after_update(self, user: User, update_dict: dict, request: Optional[dict] = None):
+        if "password" in update_dict or update_dict.get("is_active") is False:
+            await self._revoke_tokens(user)
+        else:
+            await auth_cache.invalidate_user(user.id, user.token_version or 0)
+
+    async def on_after_reset_password(self, user: User, request: Optional[dict] = None):
+        await self._revoke_tokens(user)
+
+    async def on_after_verify(self, user: User, request: Optional[dict] = None):
+        await auth_cache.invalidate_user(user.id, user.token_version or 0)
+
+    async def on_before_delete(self, user: User, request: Optional[dict] = None):
+        await auth_cache.invalidate_user(user.id, user.token_version or 0)
+
     async def on_after_forgot_password(
         self, user: User, token: str, request: Optional[dict] = None
     ):
@@ -32,13 +57,13 @@ class UserManager(BaseUserManager[User, int]):
         print(f"Verification requested for user {user.id}. Verification token: {token}")
 
     # ESSENCIAL: Implementar parse_id para FastAPI-Users 11+
-    # Ele converte o ID do token (string) para o tipo do seu ID de usuário (int)
-    # Note: Seu User.id é int, mas se fosse UUID, seria PyUUID(s)
+    # Ele converte o ID do token (string) para o tipo do seu ID de usuário
+    # Note: User.id é UUID (SQLAlchemyBaseUserTableUUID)
     def parse_id(self, s: str) -> models.ID: # models.ID é o tipo genérico do fastapi_users para IDs
         try:
-            return int(s)
+            return uuid.UUID(str(s))
         except ValueError:
-            raise exceptions.InvalidIDException()
+            raise exceptions.InvalidID()
 
 
 # Dependência para obter a instância do UserManager
@@ -47,7 +72,7 @@ async def get_user_manager(user_db=Depends(get_user_db)):
 
 
 # Inicializa a instância do FastAPIUsers
-fastapi_users = FastAPIUsers[User, int](
+fastapi_users = FastAPIUsers[User, uuid.UUID](
     get_user_manager, # <-- Use a nova dependência do UserManager
     [auth_backend],
 )
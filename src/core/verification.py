@@ -1,37 +1,250 @@
-from typing import List, Dict, Any
-import requests
+# src/core/verification.py
+#
+# Verificação por conjunto (ensemble) de LLMs. Os provedores configurados recebem o mesmo prompt
+# ao mesmo tempo; cada veredito vira um vetor de pontuações calibrado pela confiabilidade do
+# provedor, e assim que um quórum ponderado concorda as chamadas restantes são canceladas.
+# A cor sai das pontuações agregadas (determine_color). Também agrega muitas análises de uma vez
+# (vetorizado com NumPy), para reprocessar vereditos já gravados.
+
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.core.color_decision import CATEGORIES, determine_color, determine_colors, top_classification
+from src.core.config import settings
+from src.core.llm_providers import PROVIDERS
+from src.core.prompt_builder import AnalysisPrompt
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_INDEX = {name: index for index, name in enumerate(CATEGORIES)}
+
+
+def configured_providers(candidates: Optional[Sequence[str]] = None) -> List[str]:
+    return [
+        provider for provider in (candidates or settings.ENSEMBLE_PROVIDERS)
+        if provider in PROVIDERS and PROVIDERS[provider].configured()
+    ]
+
+
+def verdict_scores(classification: str, reliability: float) -> np.ndarray:
+    """
+    Vetor de pontuações de um veredito: a confiabilidade do provedor na classe respondida e o resto
+    dividido igualmente entre as demais (matriz de confusão simétrica). `indefinido` ou uma
+    classe desconhecida é abstenção: vetor uniforme.
+    """
+    size = len(CATEGORIES)
+    index = CATEGORY_INDEX.get(classification)
+    if index is None or classification == "indefinido":
+        return np.full(size, 1.0 / size)
+    vector = np.full(size, (1.0 - reliability) / (size - 1))
+    vector[index] = reliability
+    return vector
+
+
+def reliability_weight(reliability: float) -> float:
+    """
+    Peso de voto ótimo para a maioria ponderada com confusão simétrica: log-odds do acerto
+    contra uma classe errada específica. Provedor que não supera o acaso não vota.
+    """
+    size = len(CATEGORIES)
+    reliability = min(max(reliability, 1e-6), 1 - 1e-6)
+    return max(0.0, math.log(reliability * (size - 1) / (1 - reliability)))
+
+
+def aggregate_scores(vectors: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Média ponderada dos vetores (uma linha por provedor); sem peso algum, vetor uniforme."""
+    total = float(np.sum(weights))
+    if not len(vectors) or total <= 0:
+        return np.full(len(CATEGORIES), 1.0 / len(CATEGORIES))
+    return np.asarray(weights, dtype=float) @ np.asarray(vectors, dtype=float) / total
+
+
+def aggregate_batch(scores: np.ndarray, weights: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    aggregate_scores para n análises de uma vez: scores (n, provedores, classes), weights
+    (provedores,) ou (n, provedores) e mask (n, provedores) marcando quem respondeu.
+    """
+    effective = np.broadcast_to(weights, mask.shape) * mask
+    totals = effective.sum(axis=1, keepdims=True)
+    pooled = np.einsum("np,npk->nk", effective, scores)
+    uniform = np.full_like(pooled, 1.0 / len(CATEGORIES))
+    return np.divide(pooled, totals, out=uniform, where=totals > 0)
+
+
+class ProviderVote:
+    __slots__ = ("provider", "classification", "justification", "scores", "weight", "latency_ms")
+
+    def __init__(self, provider: str, classification: str, justification: str, scores: np.ndarray, weight: float, latency_ms: float):
+        self.provider = provider
+        self.classification = classification
+        self.justification = justification
+        self.scores = scores
+        self.weight = weight
+        self.latency_ms = latency_ms
+
+    @property
+    def abstained(self) -> bool:
+        return self.classification == "indefinido" or self.classification not in CATEGORY_INDEX
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "classification": self.classification,
+            "weight": round(self.weight, 4),
+            "latency_ms": self.latency_ms,
+        }
+
 
 class Verification:
-    def __init__(self, content: str):
-        self.content = content
-        self.veracity_score = 0.0
-        self.sources_checked = []
-
-    def analyze_content(self) -> Dict[str, Any]:
-        # Placeholder for content analysis logic
-        self.sources_checked = self.check_sources()
-        self.veracity_score = self.calculate_veracity_score()
+    """
+    Motor de pontuação do ensemble. Provedores, confiabilidades e quórum vêm das configurações
+    ENSEMBLE_* quando não informados.
+    """
+
+    def __init__(
+        self,
+        providers: Optional[Sequence[str]] = None,
+        reliability: Optional[Dict[str, float]] = None,
+        quorum: Optional[float] = None,
+    ):
+        self.providers = list(providers) if providers is not None else configured_providers()
+        self.reliability = dict(settings.ENSEMBLE_PROVIDER_RELIABILITY)
+        self.reliability.update(reliability or {})
+        self.quorum = settings.ENSEMBLE_QUORUM if quorum is None else quorum
+
+    def reliability_of(self, provider: str) -> float:
+        return self.reliability.get(provider, settings.ENSEMBLE_DEFAULT_RELIABILITY)
+
+    def weight_of(self, provider: str) -> float:
+        return reliability_weight(self.reliability_of(provider))
+
+    def quorum_reached(self, votes: List[ProviderVote]) -> Optional[str]:
+        """
+        Classe cujo peso de votos já passa de `quorum` do peso de todos os provedores consultados:
+        nenhuma combinação das respostas que faltam consegue virar o resultado. Abstenções não contam.
+        """
+        total = sum(self.weight_of(provider) for provider in self.providers)
+        if total <= 0:
+            return None
+        agreeing: Dict[str, float] = {}
+        for vote in votes:
+            if not vote.abstained:
+                agreeing[vote.classification] = agreeing.get(vote.classification, 0.0) + vote.weight
+        for classification, weight in agreeing.items():
+            if weight / total > self.quorum:
+                return classification
+        return None
+
+    def vote(self, provider: str, classification: str, justification: str = "", latency_ms: float = 0.0) -> ProviderVote:
+        return ProviderVote(
+            provider, classification, justification,
+            verdict_scores(classification, self.reliability_of(provider)), self.weight_of(provider), latency_ms,
+        )
+
+    async def _ask(self, provider: str, prompt: AnalysisPrompt, tier: str) -> Optional[ProviderVote]:
+        from src.core.llm_integration import generate_analysis # Import tardio: llm_integration usa este módulo
+
+        start = time.perf_counter()
+        response = await generate_analysis(prompt, provider, ("classification", "justification"), tier=tier, fallback=False)
+        if response is None:
+            return None
+        return self.vote(provider, str(response["classification"]), str(response.get("justification", "")),
+                         round((time.perf_counter() - start) * 1000, 1))
+
+    async def verify(self, prompt: AnalysisPrompt, tier: str = "standard") -> Optional[Dict[str, Any]]:
+        """
+        Consulta os provedores em paralelo e para no quórum, cancelando as chamadas pendentes
+        (chamadas síncronas já em execução no executor terminam, mas o resultado é descartado).
+        Mesmo formato de resposta de generate_analysis, com o detalhe em "ensemble"; None se ninguém respondeu.
+        """
+        if not self.providers:
+            return None
+        start = time.perf_counter()
+        tasks = {asyncio.create_task(self._ask(provider, prompt, tier)): provider for provider in self.providers}
+        votes: List[ProviderVote] = []
+        decided: Optional[str] = None
+        try:
+            for next_vote in asyncio.as_completed(tasks):
+                try:
+                    vote = await next_vote
+                except Exception as e:
+                    logger.warning(f"Provedor falhou no ensemble: {e}")
+                    continue
+                if vote is not None:
+                    votes.append(vote)
+                    decided = self.quorum_reached(votes)
+                    if decided:
+                        break
+        finally:
+            cancelled = [provider for task, provider in tasks.items() if not task.done()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if not votes:
+            return None
+
+        scores = aggregate_scores(np.stack([vote.scores for vote in votes]), np.array([0.0 if vote.abstained else vote.weight for vote in votes]))
+        classification, confidence = top_classification(scores)
+        supporting = sorted((vote for vote in votes if vote.classification == classification), key=lambda vote: vote.weight, reverse=True)
+        justification = supporting[0].justification if supporting else (
+            "Os provedores consultados divergiram: " + ", ".join(f"{vote.provider}: {vote.classification}" for vote in votes) + "."
+        )
+        if cancelled:
+            logger.info(f"Quórum atingido ({classification}); chamadas canceladas: {', '.join(cancelled)}.")
         return {
-            "content": self.content,
-            "veracity_score": self.veracity_score,
-            "sources_checked": self.sources_checked
+            "classification": classification,
+            "color": determine_color(scores),
+            "justification": justification,
+            "provider": "ensemble",
+            "model_tier": tier,
+            "tier_escalations": 0,
+            "llm_latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "ensemble": {
+                "scores": {name: round(float(score), 4) for name, score in zip(CATEGORIES, scores)},
+                "confidence": round(confidence, 4),
+                "quorum_reached": decided is not None,
+                "votes": [vote.as_dict() for vote in votes],
+                "cancelled": cancelled,
+            },
         }
 
-    def check_sources(self) -> List[str]:
-        # Placeholder for source checking logic
-        sources = ["source1.com", "source2.com"]  # Example sources
-        return sources
-
-    def calculate_veracity_score(self) -> float:
-        # Placeholder for score calculation logic
-        return 0.85  # Example score
-
-    def classify_content(self) -> str:
-        if self.veracity_score >= 0.8:
-            return "🟢 Verde"
-        elif self.veracity_score < 0.4:
-            return "🔴 Vermelho"
-        elif self.veracity_score < 0.8 and self.veracity_score >= 0.4:
-            return "⚪ Cinza"
-        else:
-            return "🔵 Azul"
\ No newline at end of file
+    def score_batch(self, verdicts: Sequence[Sequence[Tuple[str, str]]]) -> List[Dict[str, Any]]:
+        """
+        Pontua muitas análises de uma vez a partir dos vereditos já obtidos, uma lista de
+        (provedor, classificação) por análise. Uma única agregação matricial para o lote todo.
+        """
+        providers = sorted({provider for row in verdicts for provider, _ in row})
+        column = {provider: index for index, provider in enumerate(providers)}
+        size = len(CATEGORIES)
+        reliability = np.array([self.reliability_of(provider) for provider in providers])
+        weights = np.array([self.weight_of(provider) for provider in providers])
+
+        labels = np.full((len(verdicts), len(providers)), -1, dtype=np.int64)
+        for row_index, row in enumerate(verdicts):
+            for provider, classification in row:
+                labels[row_index, column[provider]] = CATEGORY_INDEX.get(classification, -1)
+        answered = labels >= 0
+        # Vetores de verdict_scores em bloco: confusão simétrica por provedor; indefinido/desconhecido = uniforme
+        scores = np.broadcast_to(((1.0 - reliability) / (size - 1))[None, :, None], labels.shape + (size,)).copy()
+        rows, cols = np.nonzero(answered)
+        scores[rows, cols, labels[rows, cols]] = reliability[cols]
+        abstained = ~answered | (labels == CATEGORY_INDEX["indefinido"])
+        scores[abstained] = 1.0 / size
+
+        pooled = aggregate_batch(scores, weights, (answered & ~abstained).astype(float))
+        colors = determine_colors(pooled)
+        results = []
+        for vector, color in zip(pooled, colors):
+            classification, confidence = top_classification(vector)
+            results.append({
+                "classification": classification,
+                "color": color,
+                "confidence": round(confidence, 4),
+                "scores": {name: round(float(score), 4) for name, score in zip(CATEGORIES, vector)},
+            })
+        return results
@@ -0,0 +1,225 @@
+# src/db/archive_operations.py
+
+import asyncio
+import os
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as SyncSession
+
+from src.core.config import settings
+from src.models.analysis import Analysis, TERMINAL_STATUSES
+from src.models.archive import ArchivedAnalysis
+from src.models.source import AnalysisSource
+
+# pyarrow é opcional: sem ele o arquivamento fica desativado e o fallback de leitura não encontra nada.
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = pq = None
+
+# Layout: ARCHIVE_DIR/month=AAAA-MM/part-<hex>.parquet (particionamento estilo Hive, legível por DuckDB/Spark/pandas)
+ARCHIVE_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("content", pa.string()),
+    ("content_hash", pa.string()),
+    ("classification", pa.string()),
+    ("color", pa.string()),
+    ("status", pa.string()),
+    ("sources", pa.string()),
+    ("message", pa.string()),
+    ("provider", pa.string()),
+    ("created_at", pa.timestamp("us")),
+    ("completed_at", pa.timestamp("us")),
+]) if pa is not None else None
+
+
+def _require_pyarrow() -> None:
+    if pq is None:
+        raise RuntimeError("O arquivo frio requer o pacote 'pyarrow'.")
+
+
+def _id_str(analysis_id: Any) -> str:
+    return str(uuid.UUID(str(analysis_id)))
+
+
+def month_of(moment: datetime) -> str:
+    return moment.strftime("%Y-%m")
+
+
+def archive_path(relative: str) -> str:
+    return os.path.join(settings.ARCHIVE_DIR, relative)
+
+
+def _archive_row(analysis: Analysis) -> Dict[str, Any]:
+    return {
+        "id": _id_str(analysis.id),
+        "content": analysis.content,
+        "content_hash": analysis.content_hash,
+        "classification": analysis.classification,
+        "color": analysis.color,
+        "status": analysis.status,
+        "sources": analysis.sources,
+        "message": analysis.message,
+        "provider": analysis.provider,
+        "created_at": analysis.created_at,
+        "completed_at": analysis.completed_at,
+    }
+
+
+def _write_parquet(rows: List[Dict[str, Any]], relative: str) -> None:
+    """
+    Grava o arquivo de forma atômica (arquivo temporário + rename): um arquivo visível está sempre completo.
+    """
+    path = archive_path(relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    pq.write_table(pa.Table.from_pylist(rows, schema=ARCHIVE_SCHEMA), tmp_path, compression=settings.ARCHIVE_COMPRESSION)
+    os.replace(tmp_path, path)
+
+
+# --- Job de retenção (worker) ---
+
+def archive_old_analyses_sync(
+    db: SyncSession,
+    older_than_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    pause_seconds: float = 0.0,
+) -> int:
+    """
+    Move, em lotes, as análises finalizadas mais antigas que `older_than_days` para arquivos
+    Parquet mensais. Cada lote grava seus arquivos antes de, numa única transação, registrar o
+    índice e apagar as linhas quentes; se a transação falhar os arquivos do lote são removidos.
+    Arquivos órfãos de uma queda no meio do lote são ignorados (a leitura passa pelo índice).
+    Retorna quantas análises foram arquivadas.
+    """
+    _require_pyarrow()
+    days = settings.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    archived = 0
+    while True:
+        batch = db.execute(
+            select(Analysis)
+            .where(Analysis.created_at < cutoff, Analysis.status.in_(TERMINAL_STATUSES))
+            .order_by(Analysis.created_at, Analysis.id)
+            .limit(batch_size)
+        ).unique().scalars().all()
+        if not batch:
+            return archived
+
+        by_month = defaultdict(list)
+        for analysis in batch:
+            by_month[month_of(analysis.created_at)].append(analysis)
+
+        written = []
+        now = datetime.utcnow()
+        try:
+            for month, analyses in by_month.items():
+                relative = f"month={month}/part-{uuid.uuid4().hex}.parquet"
+                _write_parquet([_archive_row(a) for a in analyses], relative)
+                written.append(relative)
+                db.execute(ArchivedAnalysis.__table__.insert(), [
+                    {"analysis_id": a.id, "archive_file": relative, "month": month, "created_at": a.created_at, "archived_at": now}
+                    for a in analyses
+                ])
+            db.execute(delete(AnalysisSource).where(AnalysisSource.analysis_id.in_([a.id for a in batch])))
+            for analysis in batch:
+                db.delete(analysis) # O flush libera `contents` e remove o documento de busca
+            db.commit()
+        except Exception:
+            db.rollback()
+            for relative in written:
+                try:
+                    os.remove(archive_path(relative))
+                except OSError:
+                    pass
+            raise
+
+        archived += len(batch)
+        if pause_seconds:
+            time.sleep(pause_seconds) # Alivia a carga no banco entre lotes
+
+
+# --- Leitura (API) ---
+
+def read_archived_row(relative: str, analysis_id: Any) -> Optional[Dict[str, Any]]:
+    table = pq.read_table(archive_path(relative), filters=[("id", "==", _id_str(analysis_id))])
+    rows = table.to_pylist()
+    return rows[0] if rows else None
+
+
+async def get_archived_analysis(db: AsyncSession, analysis_id: Any) -> Optional[Dict[str, Any]]:
+    """
+    Busca uma análise no arquivo frio: consulta o índice e lê só o arquivo Parquet correspondente.
+    """
+    if pq is None:
+        return None
+    relative = (await db.execute(
+        select(ArchivedAnalysis.archive_file).where(ArchivedAnalysis.analysis_id == analysis_id)
+    )).scalar()
+    if relative is None:
+        return None
+    return await asyncio.to_thread(read_archived_row, relative, analysis_id)
+
+
+def _read_file_rows(relative: str, since: Optional[datetime], until: Optional[datetime]) -> List[Dict[str, Any]]:
+    filters = []
+    if since is not None:
+        filters.append(("created_at", ">=", since))
+    if until is not None:
+        filters.append(("created_at", "<", until))
+    return pq.read_table(archive_path(relative), filters=filters or None).to_pylist()
+
+
+async def iter_archived_analyses(
+    db: AsyncSession, since: Optional[datetime] = None, until: Optional[datetime] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Percorre as análises arquivadas no intervalo, arquivo por arquivo, pulando meses fora dele.
+    Linhas removidas do índice (exclusões) ou de arquivos órfãos não são devolvidas.
+    """
+    if pq is None:
+        return
+    query = select(ArchivedAnalysis.archive_file).distinct().order_by(ArchivedAnalysis.archive_file)
+    if since is not None:
+        query = query.where(ArchivedAnalysis.month >= month_of(since))
+    if until is not None:
+        query = query.where(ArchivedAnalysis.month <= month_of(until))
+    files = (await db.execute(query)).scalars().all()
+    for relative in files:
+        indexed_ids = {
+            _id_str(analysis_id) for analysis_id in (await db.execute(
+                select(ArchivedAnalysis.analysis_id).where(ArchivedAnalysis.archive_file == relative)
+            )).scalars()
+        }
+        for row in await asyncio.to_thread(_read_file_rows, relative, since, until):
+            if row["id"] in indexed_ids:
+                yield row
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.db.database import Base, SyncSessionLocal, sync_engine
+    from src.db.stats_operations import ensure_stats_schema
+    from src.models.analysis import ensure_analysis_schema
+
+    parser = argparse.ArgumentParser(description="Move análises antigas para o arquivo frio (Parquet).")
+    parser.add_argument("--days", type=int, default=settings.ARCHIVE_AFTER_DAYS, help="Idade mínima (dias) para arquivar.")
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=0.0, help="Pausa (s) entre lotes.")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=sync_engine)
+    ensure_stats_schema(sync_engine)
+    ensure_analysis_schema(sync_engine)
+    with SyncSessionLocal() as session:
+        total = archive_old_analyses_sync(session, args.days, args.batch_size, args.pause)
+    print(f"{total} análises movidas para {settings.ARCHIVE_DIR}.")
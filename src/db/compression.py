@@ -0,0 +1,184 @@
+# src/db/compression.py
+
+import logging
+import os
+import struct
+import threading
+import zlib
+from typing import Dict, Optional
+
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# zstandard é opcional: sem ele, a compressão usa zlib (stdlib).
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depende do ambiente
+    zstandard = None
+
+# Formato armazenado:
+#   texto UTF-8 puro (valores pequenos e linhas antigas, ainda não migradas)
+#   b"\x00p" + UTF-8                                  -> texto puro que começa com NUL (escapado)
+#   b"\x00z" + zlib                                   -> zlib
+#   b"\x00s" + dict_id (uint32 big-endian) + zstd     -> zstd (dict_id 0 = sem dicionário)
+# Texto puro que começaria com NUL é sempre escapado, então o prefixo distingue os formatos sem ambiguidade.
+MAGIC = b"\x00"
+CODEC_PLAIN = b"p"
+CODEC_ZLIB = b"z"
+CODEC_ZSTD = b"s"
+_DICT_ID = struct.Struct(">I")
+
+
+class _ZstdDictionaries:
+    """
+    Carrega sob demanda os dicionários zstd (*.zdict) de COMPRESSION_ZSTD_DICT_DIR.
+    Todos ficam disponíveis para leitura; o arquivo mais recente é usado para escrita.
+    """
+
+    def __init__(self, directory: Optional[str]):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.by_id: Dict[int, "zstandard.ZstdCompressionDict"] = {}
+        self.current: Optional["zstandard.ZstdCompressionDict"] = None
+
+    def load(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if zstandard is not None and self.directory and os.path.isdir(self.directory):
+                paths = sorted(
+                    (os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".zdict")),
+                    key=os.path.getmtime,
+                )
+                for path in paths:
+                    with open(path, "rb") as f:
+                        dictionary = zstandard.ZstdCompressionDict(f.read())
+                    self.by_id[dictionary.dict_id()] = dictionary
+                    self.current = dictionary
+                if paths:
+                    logger.debug(f"{len(paths)} dicionário(s) zstd carregado(s) de {self.directory}.")
+            self._loaded = True
+
+    def reload(self) -> None:
+        with self._lock:
+            self._loaded = False
+            self.by_id.clear()
+            self.current = None
+        self.load()
+
+
+zstd_dictionaries = _ZstdDictionaries(settings.COMPRESSION_ZSTD_DICT_DIR)
+_local = threading.local() # (De)compressores zstd não são thread-safe: um por thread
+
+
+def _zstd_compressor(dictionary) -> "zstandard.ZstdCompressor":
+    key = ("c", dictionary.dict_id() if dictionary is not None else 0)
+    cache = _local.__dict__.setdefault("zstd", {})
+    if key not in cache:
+        cache[key] = zstandard.ZstdCompressor(level=settings.COMPRESSION_LEVEL, dict_data=dictionary)
+    return cache[key]
+
+
+def _zstd_decompressor(dict_id: int) -> "zstandard.ZstdDecompressor":
+    key = ("d", dict_id)
+    cache = _local.__dict__.setdefault("zstd", {})
+    if key not in cache:
+        dictionary = None
+        if dict_id:
+            zstd_dictionaries.load()
+            dictionary = zstd_dictionaries.by_id.get(dict_id)
+            if dictionary is None:
+                raise ValueError(f"Dicionário zstd {dict_id} não encontrado em COMPRESSION_ZSTD_DICT_DIR.")
+        cache[key] = zstandard.ZstdDecompressor(dict_data=dictionary)
+    return cache[key]
+
+
+def _plain(raw: bytes) -> bytes:
+    """UTF-8 puro; um NUL inicial seria lido como prefixo de formato, então o valor é escapado."""
+    return MAGIC + CODEC_PLAIN + raw if raw.startswith(MAGIC) else raw
+
+
+def compress_text(value: str, min_bytes: Optional[int] = None) -> bytes:
+    """
+    Codifica o texto para armazenamento. Valores abaixo do limite (ou que não diminuem)
+    ficam em UTF-8 puro; os demais usam zstd (com dicionário, se houver) ou zlib.
+    """
+    raw = value.encode("utf-8")
+    threshold = settings.COMPRESSION_MIN_BYTES if min_bytes is None else min_bytes
+    if len(raw) < threshold:
+        return _plain(raw)
+    if zstandard is not None:
+        zstd_dictionaries.load()
+        dictionary = zstd_dictionaries.current
+        dict_id = dictionary.dict_id() if dictionary is not None else 0
+        encoded = MAGIC + CODEC_ZSTD + _DICT_ID.pack(dict_id) + _zstd_compressor(dictionary).compress(raw)
+    else:
+        encoded = MAGIC + CODEC_ZLIB + zlib.compress(raw, settings.COMPRESSION_LEVEL)
+    return encoded if len(encoded) < len(raw) else _plain(raw)
+
+
+def decompress_text(data) -> str:
+    """
+    Operação inversa de compress_text. Aceita também texto legado (str ou bytes UTF-8).
+    """
+    if isinstance(data, str):
+        return data
+    data = bytes(data)
+    if not data.startswith(MAGIC):
+        return data.decode("utf-8")
+    codec = data[1:2]
+    if codec == CODEC_PLAIN:
+        return data[2:].decode("utf-8")
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data[2:]).decode("utf-8")
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Valor comprimido com zstd, mas o pacote 'zstandard' não está instalado.")
+        (dict_id,) = _DICT_ID.unpack_from(data, 2)
+        return _zstd_decompressor(dict_id).decompress(data[6:]).decode("utf-8")
+    raise ValueError(f"Codec de compressão desconhecido: {codec!r}")
+
+
+def is_compressed(data) -> bool:
+    return isinstance(data, (bytes, bytearray, memoryview)) and bytes(data[:2]) in (MAGIC + CODEC_ZLIB, MAGIC + CODEC_ZSTD)
+
+
+class CompressedText(TypeDecorator):
+    """
+    Coluna de texto comprimida de forma transparente: a aplicação lê e escreve `str`,
+    o banco armazena bytes (BLOB/BYTEA). Lê também valores legados não comprimidos.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, min_bytes: Optional[int] = None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.min_bytes = min_bytes
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, (bytes, bytearray)):
+            return bytes(value)
+        return compress_text(str(value), self.min_bytes)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
+
+
+def train_dictionary(samples, dict_size: int = 112_640) -> "zstandard.ZstdCompressionDict":
+    """
+    Treina um dicionário zstd a partir de amostras de texto (ex.: conteúdos já armazenados).
+    """
+    if zstandard is None:
+        raise RuntimeError("O treino de dicionário requer o pacote 'zstandard'.")
+    encoded = [s.encode("utf-8") for s in samples if s]
+    return zstandard.train_dictionary(dict_size, encoded)
@@ -0,0 +1,117 @@
+# src/db/compression_migration.py
+
+import argparse
+import os
+import time
+
+from sqlalchemy import LargeBinary, inspect, select, text, type_coerce
+from sqlalchemy.orm import Session as SyncSession
+from sqlalchemy.orm.attributes import flag_modified
+
+from src.core.config import settings
+from src.db.compression import is_compressed, train_dictionary, zstd_dictionaries
+from src.models.analysis import Analysis, CONTENT_PREVIEW_CHARS
+from src.models.content import Content
+
+COMPRESSED_COLUMNS = ("content", "message", "sources")
+
+
+def ensure_compression_schema(engine) -> None:
+    """
+    Ajusta tabelas criadas antes da compressão: adiciona `content_preview` e, no PostgreSQL,
+    converte as colunas de texto para BYTEA. No SQLite nenhuma conversão é necessária
+    (a coluna aceita BLOBs e as linhas antigas continuam legíveis como texto).
+    """
+    columns = {c["name"]: c for c in inspect(engine).get_columns("analyses")}
+    with engine.begin() as conn:
+        if "content_preview" not in columns:
+            conn.execute(text("ALTER TABLE analyses ADD COLUMN content_preview VARCHAR"))
+        if engine.dialect.name == "postgresql":
+            for name in COMPRESSED_COLUMNS:
+                if columns[name]["type"].python_type is str:
+                    conn.execute(text(
+                        f"ALTER TABLE analyses ALTER COLUMN {name} TYPE BYTEA USING convert_to({name}, 'UTF8')"
+                    ))
+
+
+def _needs_rewrite(raw) -> bool:
+    """
+    Linhas antigas voltam do banco como str (coluna TEXT); valores já regravados voltam como bytes
+    e só precisam de nova escrita se estiverem em texto puro acima do limite de compressão.
+    """
+    if raw is None:
+        return False
+    if isinstance(raw, str):
+        return True
+    return not is_compressed(raw) and len(raw) >= settings.COMPRESSION_MIN_BYTES
+
+
+def compress_existing_analyses_sync(db: SyncSession, batch_size: int = 200, pause_seconds: float = 0.0) -> int:
+    """
+    Reescreve as análises existentes em lotes: comprime content/message/sources que ainda
+    estão em texto puro e preenche content_preview. Pode ser interrompida e retomada
+    (linhas já migradas não são reescritas). Retorna quantas linhas foram reescritas.
+    """
+    rewritten = 0
+    last_id = None
+    table = Analysis.__table__
+    # type_coerce lê os bytes crus (sem o TypeDecorator) para saber o que ainda não foi comprimido
+    raw_columns = [type_coerce(table.c[name], LargeBinary).label(name) for name in COMPRESSED_COLUMNS]
+    while True:
+        query = select(table.c.id, table.c.content_preview, *raw_columns).order_by(table.c.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(table.c.id > last_id)
+        batch = db.execute(query).all()
+        if not batch:
+            return rewritten
+
+        pending_ids = [
+            row.id for row in batch
+            if row.content_preview is None or any(_needs_rewrite(getattr(row, name)) for name in COMPRESSED_COLUMNS)
+        ]
+        if pending_ids:
+            for analysis in db.execute(select(Analysis).where(Analysis.id.in_(pending_ids))).scalars():
+                # Marcar como modificado força a regravação pelo CompressedText
+                for name in COMPRESSED_COLUMNS:
+                    flag_modified(analysis, Analysis.__mapper__.get_property_by_column(table.c[name]).key)
+                analysis.content_preview = (analysis.content or "")[:CONTENT_PREVIEW_CHARS]
+            db.commit()
+            rewritten += len(pending_ids)
+        last_id = batch[-1].id
+        if pause_seconds:
+            time.sleep(pause_seconds) # Alivia a carga no banco entre lotes
+
+
+def train_dictionary_from_analyses(db: SyncSession, output_dir: str, sample_size: int = 2000) -> str:
+    """
+    Treina um dicionário zstd com os conteúdos mais recentes e o grava em
+    `<output_dir>/<dict_id>.zdict`. Retorna o caminho do arquivo.
+    """
+    samples = db.execute(
+        select(Content.body).order_by(Content.last_seen_at.desc()).limit(sample_size)
+    ).scalars().all()
+    dictionary = train_dictionary(samples)
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{dictionary.dict_id()}.zdict")
+    with open(path, "wb") as f:
+        f.write(dictionary.as_bytes())
+    zstd_dictionaries.reload()
+    return path
+
+
+if __name__ == "__main__":
+    from src.db.database import Base, SyncSessionLocal, sync_engine
+
+    parser = argparse.ArgumentParser(description="Migração de compressão da tabela analyses.")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--pause", type=float, default=0.0, help="Pausa (s) entre lotes.")
+    parser.add_argument("--train-dict", metavar="DIR", help="Treina um dicionário zstd e o grava em DIR antes de migrar.")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=sync_engine)
+    ensure_compression_schema(sync_engine)
+    with SyncSessionLocal() as session:
+        if args.train_dict:
+            print(f"Dicionário zstd gravado em {train_dictionary_from_analyses(session, args.train_dict)}")
+        total = compress_existing_analyses_sync(session, batch_size=args.batch_size, pause_seconds=args.pause)
+    print(f"{total} análises reescritas com compressão.")
@@ -0,0 +1,93 @@
+# src/db/content_operations.py
+
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as SyncSession
+
+from src.models.analysis import Analysis
+from src.models.content import Content
+from src.models.feedback import AnalysisFeedback
+
+
+def ensure_content_schema(engine) -> None:
+    """
+    Adiciona a coluna `content_hash` (e seu índice) em tabelas `analyses` criadas antes do
+    armazenamento por hash. A tabela `contents` em si é criada pelo create_all.
+    """
+    columns = {c["name"] for c in inspect(engine).get_columns("analyses")}
+    if "content_hash" in columns:
+        return
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE analyses ADD COLUMN content_hash VARCHAR(64) REFERENCES contents (hash)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_analyses_content_hash ON analyses (content_hash)"))
+
+
+def migrate_legacy_contents_sync(db: SyncSession, batch_size: int = 200) -> int:
+    """
+    Move o texto de análises antigas (coluna `analyses.content`) para `contents`, em lotes.
+    Textos repetidos passam a ocupar uma única linha. Retorna quantas análises foram migradas.
+    """
+    migrated = 0
+    while True:
+        batch = db.execute(
+            select(Analysis).where(Analysis.content_hash.is_(None)).limit(batch_size)
+        ).unique().scalars().all()
+        if not batch:
+            return migrated
+        for analysis in batch:
+            analysis.content = analysis.legacy_content # O flush grava em `contents` e ajusta ref_count
+            analysis.legacy_content = ""
+        db.commit()
+        migrated += len(batch)
+
+
+# --- Consultas assíncronas (API) ---
+
+async def find_reusable_verdict(db: AsyncSession, hash_: str, max_age_seconds: int) -> Optional[Row]:
+    """
+    Veredito concluído mais recente para o mesmo conteúdo (mesmo hash), se não for mais antigo que max_age_seconds.
+    Vereditos contestados pelos usuários (ver src/db/feedback_operations.py) não são reaproveitados.
+    """
+    if max_age_seconds <= 0:
+        return None
+    result = await db.execute(
+        select(Analysis.id, Analysis.classification, Analysis.color, Analysis.sources, Analysis.message)
+        .outerjoin(AnalysisFeedback, AnalysisFeedback.analysis_id == Analysis.id)
+        .where(
+            Analysis.content_hash == hash_,
+            Analysis.status == "completed",
+            Analysis.created_at >= datetime.utcnow() - timedelta(seconds=max_age_seconds),
+            AnalysisFeedback.disputed.isnot(True),
+        )
+        .order_by(Analysis.created_at.desc())
+        .limit(1)
+    )
+    return result.first()
+
+
+async def get_top_duplicates(db: AsyncSession, min_count: int = 2, skip: int = 0, limit: int = 50) -> List[Row]:
+    """
+    Conteúdos mais reenviados, direto de `contents.ref_count` (sem varrer analyses).
+    """
+    result = await db.execute(
+        select(Content.hash, Content.preview, Content.ref_count, Content.first_seen_at, Content.last_seen_at)
+        .where(Content.ref_count >= min_count)
+        .order_by(Content.ref_count.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return result.all()
+
+
+if __name__ == "__main__":
+    from src.db.database import Base, SyncSessionLocal, sync_engine
+
+    Base.metadata.create_all(bind=sync_engine)
+    ensure_content_schema(sync_engine)
+    with SyncSessionLocal() as session:
+        total = migrate_legacy_contents_sync(session)
+    print(f"{total} análises migradas para o armazenamento por hash.")
@@ -0,0 +1,135 @@
+# src/db/cost_operations.py
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as SyncSession
+
+from src.db.upsert import insert_for
+from src.models.cost import AnalysisCost, CostRollup
+from src.utils import fast_json
+
+_SUMMED = ("llm_calls", "failed_calls", "input_tokens", "output_tokens", "cached_tokens", "search_calls", "cache_hits", "cost_usd")
+_ROLLUP_KEY = ("day", "provider", "model", "phase")
+_ROLLUP_SUMMED = ("calls", "failed_calls", "input_tokens", "output_tokens", "cached_tokens", "cost_usd", "latency_sum_ms")
+
+
+def _merge(rows: List[Dict[str, Any]], key, summed) -> List[Dict[str, Any]]:
+    """
+    Uma linha por chave: o ON CONFLICT DO UPDATE de um INSERT com várias linhas não pode atingir
+    a mesma linha duas vezes. Colunas somadas acumulam; as demais ficam com o último valor.
+    """
+    merged: Dict[Tuple, Dict[str, Any]] = {}
+    for row in rows:
+        row_key = tuple(row[name] for name in key)
+        if row_key not in merged:
+            merged[row_key] = dict(row)
+        else:
+            previous = merged[row_key]
+            merged[row_key] = {**row, **{name: previous[name] + row[name] for name in summed}}
+    return list(merged.values())
+
+
+def record_costs_batch_sync(db: SyncSession, cost_rows: List[Dict[str, Any]], rollup_rows: List[Dict[str, Any]]) -> None:
+    """
+    Grava um lote de registros de custo (um INSERT por tabela). Re-tentativas de uma análise já
+    registrada somam tokens e custo à linha existente. Não faz commit.
+    """
+    insert = insert_for(db)
+    if cost_rows:
+        stmt = insert(AnalysisCost).values(_merge(cost_rows, ("analysis_id",), _SUMMED))
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["analysis_id"],
+            set_={
+                **{name: getattr(AnalysisCost, name) + stmt.excluded[name] for name in _SUMMED},
+                "decision_path": stmt.excluded.decision_path,
+                "provider": stmt.excluded.provider,
+                "total_ms": stmt.excluded.total_ms,
+                "detail": stmt.excluded.detail,
+            },
+        ))
+    if rollup_rows:
+        stmt = insert(CostRollup).values(_merge(rollup_rows, _ROLLUP_KEY, _ROLLUP_SUMMED))
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=list(_ROLLUP_KEY),
+            set_={name: getattr(CostRollup, name) + stmt.excluded[name] for name in _ROLLUP_SUMMED},
+        ))
+
+
+async def get_analysis_cost(db: AsyncSession, analysis_id: Any) -> Optional[Dict[str, Any]]:
+    row = await db.get(AnalysisCost, analysis_id)
+    if row is None:
+        return None
+    detail = fast_json.loads(row.detail) if row.detail else {}
+    return {
+        "analysis_id": row.analysis_id,
+        "created_at": row.created_at,
+        "decision_path": row.decision_path,
+        "provider": row.provider,
+        "total_ms": row.total_ms,
+        **{name: getattr(row, name) for name in _SUMMED},
+        "phases_ms": detail.get("phases_ms", {}),
+        "attempts": detail.get("attempts", []),
+        "search_calls_by_kind": detail.get("search_calls", {}),
+        "cache_hits_by_kind": detail.get("cache_hits", {}),
+    }
+
+
+async def get_spend_since(db: AsyncSession, since: datetime) -> float:
+    """Gasto somado nos rollups a partir do dia de `since` (orçamento diário)."""
+    day = since.replace(hour=0, minute=0, second=0, microsecond=0)
+    return float((await db.execute(select(func.coalesce(func.sum(CostRollup.cost_usd), 0.0)).where(CostRollup.day >= day))).scalar())
+
+
+async def get_cost_stats(db: AsyncSession, since: datetime, until: datetime, top: int = 10) -> Dict[str, Any]:
+    """
+    Gasto por dia e por provedor/modelo/fase (dos rollups) e as análises mais caras do intervalo.
+    """
+    rollups = (await db.execute(
+        select(CostRollup).where(
+            CostRollup.day >= since.replace(hour=0, minute=0, second=0, microsecond=0),
+            CostRollup.day < until,
+        ).order_by(CostRollup.day)
+    )).scalars().all()
+
+    days: Dict[datetime, Dict[str, Any]] = {}
+    breakdown: Dict[Tuple[str, str, str], Dict[str, Any]] = defaultdict(lambda: {name: 0 for name in _ROLLUP_SUMMED})
+    for rollup in rollups:
+        day = days.setdefault(rollup.day, {"day": rollup.day, "cost_usd": 0.0, "calls": 0, "input_tokens": 0, "output_tokens": 0, "by_provider": defaultdict(float)})
+        day["cost_usd"] += rollup.cost_usd
+        day["calls"] += rollup.calls
+        day["input_tokens"] += rollup.input_tokens
+        day["output_tokens"] += rollup.output_tokens
+        day["by_provider"][rollup.provider] += rollup.cost_usd
+        entry = breakdown[(rollup.provider, rollup.model, rollup.phase)]
+        for name in _ROLLUP_SUMMED:
+            entry[name] += getattr(rollup, name)
+
+    expensive = (await db.execute(
+        select(AnalysisCost.analysis_id, AnalysisCost.created_at, AnalysisCost.provider, AnalysisCost.llm_calls,
+               AnalysisCost.input_tokens, AnalysisCost.output_tokens, AnalysisCost.cost_usd, AnalysisCost.total_ms)
+        .where(AnalysisCost.created_at >= since, AnalysisCost.created_at < until)
+        .order_by(AnalysisCost.cost_usd.desc())
+        .limit(top)
+    )).all()
+
+    return {
+        "since": since,
+        "until": until,
+        "total_cost_usd": sum(day["cost_usd"] for day in days.values()),
+        "days": [{**day, "by_provider": dict(day["by_provider"])} for day in days.values()],
+        "breakdown": sorted(
+            (
+                {
+                    "provider": provider, "model": model, "phase": phase, **totals,
+                    "avg_latency_ms": totals["latency_sum_ms"] / totals["calls"] if totals["calls"] else None,
+                }
+                for (provider, model, phase), totals in breakdown.items()
+            ),
+            key=lambda entry: entry["cost_usd"], reverse=True,
+        ),
+        "most_expensive": [dict(row._mapping) for row in expensive],
+    }
@@ -1,12 +1,17 @@
 # src/db/crud_operations.py
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, update, func
+from sqlalchemy.engine import Row
 from uuid import UUID
 from datetime import datetime
 from typing import List, Optional
 
 from src.models.analysis import Analysis  # ORM do banco - CORRIGIDO para Analysis
+from src.models.content import release_content_statements
+from src.models.archive import ArchivedAnalysis
+from src.db.source_operations import remove_analysis_sources
+from src.db.search_operations import reindex_analysis_sync, unindex_analysis_statement
 # from src.schemas.analysis_schemas import AnalysisResult # Pydantic schema (para validação) - Descomentar se precisar usar um schema aqui
 
 async def get_all_analyses(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Analysis]:
@@ -25,6 +30,54 @@ async def get_analysis_by_id(db: AsyncSession, analysis_id: UUID) -> Optional[An
     result = await db.execute(select(Analysis).filter(Analysis.id == analysis_id))
     return result.scalars().first()
 
+async def get_analysis_status_by_id(db: AsyncSession, analysis_id: UUID) -> Optional[Row]:
+    """
+    Retorna apenas as colunas de status de uma análise (id, status, classification, color).
+    Evita carregar `content`, `message` e `sources`, que podem ser grandes, no polling de status.
+    """
+    result = await db.execute(
+        select(Analysis.id, Analysis.status, Analysis.classification, Analysis.color)
+        .where(Analysis.id == analysis_id)
+    )
+    return result.first()
+
+async def get_history_page(
+    db: AsyncSession, skip: int = 0, limit: int = 100, preview_chars: int = 200
+) -> List[Row]:
+    """
+    Retorna uma página do histórico com colunas projetadas.
+    Usa a coluna content_preview (texto puro), então o conteúdo completo e comprimido nunca é transferido.
+    """
+    result = await db.execute(
+        select(
+            Analysis.id,
+            Analysis.status,
+            Analysis.classification,
+            Analysis.color,
+            Analysis.created_at,
+            func.substr(Analysis.content_preview, 1, preview_chars).label("content_preview"),
+        )
+        .order_by(Analysis.created_at.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return result.all()
+
+async def update_analysis_message(db: AsyncSession, analysis_id: UUID, message: str) -> Optional[Row]:
+    """
+    Atualiza a mensagem de uma análise e retorna suas colunas de status.
+    """
+    result = await db.execute(
+        update(Analysis).where(Analysis.id == analysis_id).values(message=message)
+    )
+    if result.rowcount == 0:
+        await db.commit()
+        return None
+    # O UPDATE direto não passa pelo flush do ORM: o índice de busca é atualizado aqui
+    await db.run_sync(reindex_analysis_sync, analysis_id)
+    await db.commit()
+    return await get_analysis_status_by_id(db, analysis_id)
+
 async def create_analysis_entry(
     db: AsyncSession,
     id: UUID,
@@ -58,6 +111,18 @@ async def delete_analysis_by_id(db: AsyncSession, analysis_id: UUID) -> bool: #
     """
     Deleta uma análise pelo ID. Retorna True se algo foi deletado, False caso contrário.
     """
+    row = (await db.execute(select(Analysis.content_hash, Analysis.classification).where(Analysis.id == analysis_id))).first()
+    hash_ = row.content_hash if row else None
+    # Fontes e domain_stats (contados quando a análise terminou), na mesma transação da exclusão
+    await remove_analysis_sources(db, analysis_id, row.classification if row else None)
+    await db.execute(unindex_analysis_statement(analysis_id))
     result = await db.execute(delete(Analysis).where(Analysis.id == analysis_id))
+    if result.rowcount and hash_:
+        # Libera a referência ao texto em `contents` (removido quando ninguém mais o usa)
+        for stmt in release_content_statements(hash_):
+            await db.execute(stmt)
+    if not result.rowcount:
+        # Análise já arquivada: sai do índice e deixa de ser servida/exportada
+        result = await db.execute(delete(ArchivedAnalysis).where(ArchivedAnalysis.analysis_id == analysis_id))
     await db.commit()
     return result.rowcount > 0 
\ No newline at end of file
@@ -0,0 +1,203 @@
+# src/db/feedback_operations.py
+
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, func, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as SyncSession
+
+from src.core.config import settings
+from src.db.upsert import insert_for
+from src.models.analysis import Analysis
+from src.models.archive import ArchivedAnalysis
+from src.models.feedback import AnalysisFeedback, Feedback
+
+
+def ensure_feedback_schema(engine) -> None:
+    """
+    Adiciona `user_id` e o índice único (análise, usuário) a tabelas `feedback` criadas antes deles.
+    """
+    table = Feedback.__tablename__
+    if not inspect(engine).has_table(table):
+        return
+    columns = {c["name"] for c in inspect(engine).get_columns(table)}
+    with engine.begin() as conn:
+        if "user_id" not in columns:
+            conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN user_id {Feedback.__table__.c.user_id.type.compile(dialect=engine.dialect)}'))
+        conn.execute(text(f'CREATE UNIQUE INDEX IF NOT EXISTS ux_feedback_analysis_user ON "{table}" (analysis_id, user_id)'))
+
+
+def is_disputed(agree_count: int, disagree_count: int) -> bool:
+    total = agree_count + disagree_count
+    return disagree_count >= settings.FEEDBACK_DISPUTE_MIN_VOTES and disagree_count >= settings.FEEDBACK_DISPUTE_RATIO * total
+
+
+def record_feedback_batch_sync(db: SyncSession, entries: List[Dict[str, Any]]) -> List[Any]:
+    """
+    Grava um lote de entradas do stream e recalcula os contadores das análises afetadas.
+    Cada usuário tem um único voto por análise: um voto novo substitui o anterior (o mais recente
+    pelo `created_at` vence, mesmo com entradas fora de ordem), e reentregas não contam de novo.
+    Entradas antigas sem `user_id` ficam registradas, mas não entram nos contadores.
+    Sem `agrees`, a concordância é deduzida comparando a sugestão com o veredito da análise.
+    Não faz commit; retorna os IDs das análises que passaram a ser contestadas.
+    """
+    if not entries:
+        return []
+    classifications = dict(db.execute(
+        select(Analysis.id, Analysis.classification).where(Analysis.id.in_({entry["analysis_id"] for entry in entries}))
+    ).all())
+    votes: Dict[Any, Dict[str, Any]] = {}
+    anonymous = []
+    for entry in entries:
+        agrees = entry.get("agrees")
+        suggested = entry.get("suggested_classification")
+        current = classifications.get(entry["analysis_id"])
+        if agrees is None and suggested and current:
+            agrees = suggested == current
+        row = {
+            "stream_id": entry["stream_id"],
+            "analysis_id": entry["analysis_id"],
+            "user_id": entry.get("user_id"),
+            "agrees": agrees,
+            "suggested_classification": suggested,
+            "comment": entry.get("comment"),
+            "created_at": entry.get("created_at") or datetime.utcnow(),
+        }
+        if row["user_id"] is None:
+            anonymous.append(row)
+            continue
+        # Um upsert multi-linha não aceita a mesma chave duas vezes: fica o voto mais recente do lote
+        key = (row["analysis_id"], row["user_id"])
+        if key not in votes or row["created_at"] >= votes[key]["created_at"]:
+            votes[key] = row
+
+    insert = insert_for(db)
+    if anonymous:
+        db.execute(insert(Feedback).values(anonymous).on_conflict_do_nothing(index_elements=["stream_id"]))
+    if votes:
+        stmt = insert(Feedback).values(list(votes.values()))
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["analysis_id", "user_id"],
+            set_={
+                column: stmt.excluded[column]
+                for column in ("stream_id", "agrees", "suggested_classification", "comment", "created_at")
+            },
+            where=stmt.excluded.created_at >= Feedback.created_at, # Entrada reentregue/atrasada não desfaz voto novo
+        ))
+
+    # Contadores absolutos a partir dos votos gravados: idempotente e sem contar o mesmo usuário duas vezes
+    analysis_ids = list({analysis_id for analysis_id, _ in votes})
+    if not analysis_ids:
+        return []
+    totals = db.execute(
+        select(
+            Feedback.analysis_id,
+            func.sum(case((Feedback.agrees.is_(True), 1), else_=0)),
+            func.sum(case((Feedback.agrees.is_(False), 1), else_=0)),
+            func.max(Feedback.created_at),
+        )
+        .where(Feedback.analysis_id.in_(analysis_ids), Feedback.user_id.is_not(None), Feedback.agrees.is_not(None))
+        .group_by(Feedback.analysis_id)
+    ).all()
+    if not totals:
+        return [] # Só sugestões para análises desconhecidas: ficam registradas, mas não contam
+
+    # Um único upsert multi-linha para os contadores do lote
+    stmt = insert(AnalysisFeedback).values([
+        {
+            "analysis_id": analysis_id,
+            "agree_count": int(agree_count or 0),
+            "disagree_count": int(disagree_count or 0),
+            "disputed": False,
+            "last_feedback_at": last_feedback_at,
+        }
+        for analysis_id, agree_count, disagree_count, last_feedback_at in totals
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["analysis_id"],
+        set_={
+            "agree_count": stmt.excluded.agree_count,
+            "disagree_count": stmt.excluded.disagree_count,
+            "last_feedback_at": stmt.excluded.last_feedback_at,
+        },
+    ))
+
+    newly_disputed = []
+    counted = [row[0] for row in totals]
+    for counter in db.execute(select(AnalysisFeedback).where(AnalysisFeedback.analysis_id.in_(counted))).scalars():
+        disputed = is_disputed(counter.agree_count, counter.disagree_count)
+        if disputed and not counter.disputed:
+            newly_disputed.append(counter.analysis_id)
+        counter.disputed = disputed # Volta a valer se a concordância se recuperar
+    return newly_disputed
+
+
+async def analysis_exists(db: AsyncSession, analysis_id: Any) -> bool:
+    """A análise está em `analyses` ou no arquivo frio."""
+    for column in (Analysis.id, ArchivedAnalysis.analysis_id):
+        if (await db.execute(select(column).where(column == analysis_id).limit(1))).first() is not None:
+            return True
+    return False
+
+
+async def get_analysis_feedback(db: AsyncSession, analysis_id: Any) -> Optional[AnalysisFeedback]:
+    result = await db.execute(select(AnalysisFeedback).where(AnalysisFeedback.analysis_id == analysis_id))
+    return result.scalars().first()
+
+
+def get_corrections_sync(db: SyncSession, analysis_ids: Optional[Iterable[Any]] = None) -> Dict[Any, Optional[str]]:
+    """
+    Análises contestadas → classificação corrigida (a sugestão mais votada entre as discordâncias),
+    ou None quando os usuários discordam sem indicar uma classificação. Usado no re-treino.
+    """
+    query = (
+        select(Feedback.analysis_id, Feedback.suggested_classification)
+        .join(AnalysisFeedback, AnalysisFeedback.analysis_id == Feedback.analysis_id)
+        .where(AnalysisFeedback.disputed.is_(True), Feedback.agrees.is_(False), Feedback.user_id.is_not(None))
+    )
+    if analysis_ids is not None:
+        query = query.where(Feedback.analysis_id.in_(list(analysis_ids)))
+    suggestions: Dict[Any, Counter] = defaultdict(Counter)
+    for analysis_id, suggested in db.execute(query):
+        suggestions[analysis_id][suggested] += 0 if suggested is None else 1
+    return {
+        analysis_id: (counter.most_common(1)[0][0] if sum(counter.values()) else None)
+        for analysis_id, counter in suggestions.items()
+    }
+
+
+def get_voted_since_sync(db: SyncSession, since: Optional[datetime], limit: int) -> List[Tuple[Any, datetime]]:
+    """
+    (análise, último voto) das análises com votos de usuários autenticados depois de `since`,
+    do mais antigo para o mais recente. Leitura incremental para o ajuste online do classificador.
+    """
+    last_vote = func.max(Feedback.created_at)
+    query = select(Feedback.analysis_id, last_vote).where(Feedback.user_id.is_not(None), Feedback.agrees.is_not(None))
+    if since is not None:
+        query = query.where(Feedback.created_at > since)
+    return [tuple(row) for row in db.execute(query.group_by(Feedback.analysis_id).order_by(last_vote).limit(limit))]
+
+
+def get_consensus_labels_sync(db: SyncSession, analysis_ids: Iterable[Any], min_votes: int) -> Dict[Any, str]:
+    """
+    Análise → classificação apontada pela maioria dos votos autenticados (um por usuário): quem
+    concorda vota no veredito atual, quem discorda na classificação sugerida. Fica de fora a
+    análise sem maioria absoluta ou com menos de `min_votes` votos no rótulo vencedor.
+    """
+    query = (
+        select(Feedback.analysis_id, Feedback.agrees, Feedback.suggested_classification, Analysis.classification)
+        .join(Analysis, Analysis.id == Feedback.analysis_id)
+        .where(Feedback.analysis_id.in_(list(analysis_ids)), Feedback.user_id.is_not(None), Feedback.agrees.is_not(None))
+    )
+    votes: Dict[Any, Counter] = defaultdict(Counter)
+    for analysis_id, agrees, suggested, current in db.execute(query):
+        votes[analysis_id][current if agrees else suggested] += 1 # Discordância sem sugestão: None, só pesa no total
+    labels = {}
+    for analysis_id, counter in votes.items():
+        ranked = [(label, count) for label, count in counter.most_common() if label is not None]
+        if ranked and ranked[0][1] >= min_votes and ranked[0][1] * 2 > sum(counter.values()):
+            labels[analysis_id] = ranked[0][0]
+    return labels
+
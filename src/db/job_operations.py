@@ -0,0 +1,91 @@
+# src/db/job_operations.py
+
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.analysis import Analysis
+from src.models.job import PendingJob
+
+
+async def add_pending_job(db: AsyncSession, analysis_id: Any, preferred_llm: Optional[str], owner: str) -> None:
+    db.add(PendingJob(
+        analysis_id=analysis_id,
+        preferred_llm=preferred_llm,
+        status="queued",
+        owner=owner,
+        heartbeat_at=datetime.utcnow(),
+        enqueued_at=datetime.utcnow(),
+    ))
+
+
+async def claim_orphaned_jobs(db: AsyncSession, owner: str, stale_before: datetime, limit: int) -> List[Tuple[Any, Optional[str], int, Optional[str], Optional[str]]]:
+    """
+    Assume até `limit` jobs sem dono ou cujo heartbeat parou antes de `stale_before` (processo que caiu).
+    O UPDATE repete a condição: dois processos disputando a mesma linha não a assumem os dois.
+    Retorna (analysis_id, preferred_llm, attempts, content, status da análise), na ordem de chegada.
+    """
+    orphaned = or_(PendingJob.heartbeat_at.is_(None), PendingJob.heartbeat_at < stale_before)
+    ids = (await db.execute(
+        select(PendingJob.analysis_id).where(orphaned).order_by(PendingJob.enqueued_at).limit(limit)
+    )).scalars().all()
+    if not ids:
+        return []
+    claimed = (await db.execute(
+        update(PendingJob)
+        .where(PendingJob.analysis_id.in_(ids), orphaned)
+        .values(owner=owner, heartbeat_at=datetime.utcnow())
+        .returning(PendingJob.analysis_id, PendingJob.preferred_llm, PendingJob.attempts, PendingJob.enqueued_at)
+    )).all()
+    if not claimed:
+        return []
+    analyses = {
+        analysis.id: analysis for analysis in (await db.execute(
+            select(Analysis).where(Analysis.id.in_([row[0] for row in claimed]))
+        )).unique().scalars().all()
+    }
+    jobs = []
+    for analysis_id, preferred_llm, attempts, _ in sorted(claimed, key=lambda row: row[3]):
+        analysis = analyses.get(analysis_id)
+        jobs.append((
+            analysis_id, preferred_llm, attempts,
+            analysis.content if analysis else None,
+            analysis.status if analysis else None,
+        ))
+    return jobs
+
+
+async def mark_job_running(db: AsyncSession, analysis_id: Any) -> None:
+    await db.execute(
+        update(PendingJob)
+        .where(PendingJob.analysis_id == analysis_id)
+        .values(status="running", attempts=PendingJob.attempts + 1, started_at=datetime.utcnow())
+    )
+
+
+async def delete_pending_job(db: AsyncSession, analysis_id: Any) -> None:
+    await db.execute(delete(PendingJob).where(PendingJob.analysis_id == analysis_id))
+
+
+async def touch_jobs(db: AsyncSession, owner: str) -> int:
+    """Renova o heartbeat de todos os jobs do processo (uma única instrução)."""
+    result = await db.execute(update(PendingJob).where(PendingJob.owner == owner).values(heartbeat_at=datetime.utcnow()))
+    return result.rowcount
+
+
+async def release_jobs(db: AsyncSession, owner: str, analysis_id: Optional[Any] = None, keep: Iterable[Any] = ()) -> int:
+    """
+    Devolve os jobs do processo (todos, no desligamento, ou só `analysis_id`): ficam disponíveis
+    na hora para o próximo que buscar jobs órfãos. Os de `keep` (ainda em execução) continuam com o
+    dono e só são retomados quando o heartbeat deles vencer.
+    """
+    query = update(PendingJob).where(PendingJob.owner == owner)
+    if analysis_id is not None:
+        query = query.where(PendingJob.analysis_id == analysis_id)
+    keep = list(keep)
+    if keep:
+        query = query.where(PendingJob.analysis_id.not_in(keep))
+    result = await db.execute(query.values(owner=None, heartbeat_at=None, status="queued"))
+    return result.rowcount
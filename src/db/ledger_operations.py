@@ -0,0 +1,138 @@
+# src/db/ledger_operations.py
+
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import exists, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as SyncSession
+
+from src.core.config import settings
+from src.core.ledger import GENESIS_HASH, anchor_backend, chain_hash, record_hash
+from src.models.analysis import Analysis
+from src.models.ledger import LedgerBatch, LedgerEntry
+from src.utils import merkle
+
+
+def ensure_ledger_schema(engine) -> None:
+    """
+    Índice em analyses.completed_at: a busca por análises ainda não seladas parte da marca
+    d'água do último lote em vez de varrer a tabela. As tabelas do ledger vêm do create_all.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_analyses_completed_at ON analyses (completed_at)"))
+
+
+def _pending_query(last: Optional[LedgerBatch], limit: int):
+    query = (
+        select(Analysis)
+        .where(
+            Analysis.status == "completed",
+            ~exists().where(LedgerEntry.analysis_id == Analysis.id),
+        )
+        .order_by(Analysis.completed_at, Analysis.created_at)
+        .limit(limit)
+    )
+    if last is not None and last.last_completed_at is not None:
+        # Folga para análises gravadas fora de ordem (workers concorrentes, relógios)
+        query = query.where(Analysis.completed_at >= last.last_completed_at - timedelta(seconds=settings.LEDGER_LATE_SECONDS))
+    return query
+
+
+def seal_pending_batches_sync(db: SyncSession, force: bool = False) -> List[int]:
+    """
+    Sela lotes de até LEDGER_BATCH_SIZE análises concluídas: enquanto houver um lote cheio, ou a
+    pendente mais antiga esperar mais que LEDGER_MAX_WAIT_SECONDS (ou `force`). A sequência é a PK:
+    dois seladores concorrentes não bifurcam a cadeia (o segundo falha no commit). Depois do commit,
+    a cabeça da cadeia vai para o backend de âncora; âncoras que falharem são refeitas na próxima rodada.
+    Retorna as sequências seladas.
+    """
+    from src.core.analysis_cache import serialize_analysis
+
+    sealed = []
+    while True:
+        last = db.execute(select(LedgerBatch).order_by(LedgerBatch.sequence.desc()).limit(1)).scalars().first()
+        pending = db.execute(_pending_query(last, settings.LEDGER_BATCH_SIZE)).scalars().all()
+        if not pending:
+            break
+        oldest = pending[0].completed_at or pending[0].created_at
+        waited_enough = oldest is None or oldest <= datetime.utcnow() - timedelta(seconds=settings.LEDGER_MAX_WAIT_SECONDS)
+        if len(pending) < settings.LEDGER_BATCH_SIZE and not (force or waited_enough):
+            break
+
+        hashes = [record_hash(serialize_analysis(analysis)) for analysis in pending]
+        levels = merkle.build_levels([merkle.leaf_hash(bytes.fromhex(h)) for h in hashes])
+        sequence = last.sequence + 1 if last else 1
+        prev_hash = last.batch_hash if last else GENESIS_HASH
+        root = levels[-1][0].hex()
+        sealed_at = datetime.utcnow()
+        db.add(LedgerBatch(
+            sequence=sequence,
+            merkle_root=root,
+            prev_hash=prev_hash,
+            batch_hash=chain_hash(sequence, prev_hash, root, len(pending), sealed_at),
+            size=len(pending),
+            sealed_at=sealed_at,
+            last_completed_at=max((analysis.completed_at for analysis in pending if analysis.completed_at), default=None),
+        ))
+        entries = []
+        for index, (analysis, hash_) in enumerate(zip(pending, hashes)):
+            proof, directions = merkle.inclusion_proof(levels, index)
+            entries.append({
+                "analysis_id": analysis.id, "batch_sequence": sequence, "leaf_index": index,
+                "record_hash": hash_, "proof": proof, "proof_directions": directions,
+            })
+        db.execute(LedgerEntry.__table__.insert(), entries)
+        db.commit()
+        sealed.append(sequence)
+
+    anchor_pending_sync(db)
+    return sealed
+
+
+def anchor_pending_sync(db: SyncSession) -> int:
+    backend = anchor_backend()
+    if backend is None:
+        return 0
+    anchored = 0
+    for batch in db.execute(
+        select(LedgerBatch).where(LedgerBatch.anchored_at.is_(None)).order_by(LedgerBatch.sequence)
+    ).scalars().all():
+        try:
+            reference = backend.anchor(batch)
+        except Exception as e:
+            print(f"Falha ao ancorar o lote {batch.sequence} do ledger: {e}")
+            break # Mantém a ordem: os seguintes esperam este
+        batch.anchor_backend = getattr(backend, "name", type(backend).__name__)
+        batch.anchor_reference = reference
+        batch.anchored_at = datetime.utcnow()
+        db.commit()
+        anchored += 1
+    return anchored
+
+
+def verify_chain_sync(db: SyncSession) -> List[str]:
+    """
+    Percorre a cadeia inteira conferindo sequência, encadeamento e hash de cada lote.
+    Retorna a lista de problemas encontrados (vazia se íntegra).
+    """
+    problems, expected_prev, expected_sequence = [], GENESIS_HASH, 1
+    for batch in db.execute(select(LedgerBatch).order_by(LedgerBatch.sequence)).scalars():
+        if batch.sequence != expected_sequence:
+            problems.append(f"Lote {expected_sequence} ausente (encontrado {batch.sequence}).")
+        if batch.prev_hash != expected_prev:
+            problems.append(f"Lote {batch.sequence}: prev_hash não corresponde ao lote anterior.")
+        if chain_hash(batch.sequence, batch.prev_hash, batch.merkle_root, batch.size, batch.sealed_at) != batch.batch_hash:
+            problems.append(f"Lote {batch.sequence}: batch_hash não confere.")
+        expected_prev, expected_sequence = batch.batch_hash, batch.sequence + 1
+    return problems
+
+
+async def get_ledger_entry(db: AsyncSession, analysis_id: Any) -> Optional[Tuple[LedgerEntry, LedgerBatch]]:
+    result = await db.execute(
+        select(LedgerEntry, LedgerBatch)
+        .join(LedgerBatch, LedgerBatch.sequence == LedgerEntry.batch_sequence)
+        .where(LedgerEntry.analysis_id == analysis_id)
+    )
+    row = result.first()
+    return (row[0], row[1]) if row else None
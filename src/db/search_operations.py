@@ -0,0 +1,243 @@
+# src/db/search_operations.py
+
+import base64
+import json
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import delete, event, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.db.upsert import insert_for
+from src.models.analysis import Analysis, TERMINAL_STATUSES
+from src.models.search_document import SearchDocument
+from src.utils.text_search import analyze_terms, build_fts5_query, highlight, terms_text
+
+# Pesos das colunas no ranking: o conteúdo pesa mais que a justificativa
+CONTENT_WEIGHT = 2.0
+MESSAGE_WEIGHT = 1.0
+
+_SQLITE_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS analysis_fts USING fts5(
+        content_terms, message_terms,
+        content='search_documents', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"INSERT INTO analysis_fts(analysis_fts, rank) VALUES ('rank', 'bm25({CONTENT_WEIGHT}, {MESSAGE_WEIGHT})')",
+    """
+    CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN
+        INSERT INTO analysis_fts(rowid, content_terms, message_terms)
+        VALUES (new.id, new.content_terms, new.message_terms);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN
+        INSERT INTO analysis_fts(analysis_fts, rowid, content_terms, message_terms)
+        VALUES ('delete', old.id, old.content_terms, old.message_terms);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN
+        INSERT INTO analysis_fts(analysis_fts, rowid, content_terms, message_terms)
+        VALUES ('delete', old.id, old.content_terms, old.message_terms);
+        INSERT INTO analysis_fts(rowid, content_terms, message_terms)
+        VALUES (new.id, new.content_terms, new.message_terms);
+    END
+    """,
+]
+
+_POSTGRES_SCHEMA = [
+    "ALTER TABLE search_documents ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    "CREATE INDEX IF NOT EXISTS ix_search_documents_search_vector ON search_documents USING GIN (search_vector)",
+]
+
+
+def ensure_search_schema(engine) -> None:
+    """
+    Cria as estruturas de busca que o create_all não cobre: tabela FTS5 + gatilhos (SQLite)
+    ou coluna tsvector + índice GIN (PostgreSQL). Idempotente.
+    """
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            for statement in _POSTGRES_SCHEMA:
+                conn.execute(text(statement))
+            return
+        created = not inspect(conn).has_table("analysis_fts")
+        for statement in _SQLITE_SCHEMA:
+            conn.execute(text(statement))
+        if created:
+            # Documentos gravados antes da criação do índice
+            conn.execute(text("INSERT INTO analysis_fts(analysis_fts) VALUES ('rebuild')"))
+
+
+# --- Escrita no índice ---
+
+def index_analysis(connection, analysis_id, content: Optional[str], message: Optional[str], created_at) -> None:
+    """
+    Insere ou atualiza o documento de busca de uma análise. No SQLite os gatilhos
+    propagam a mudança para o FTS5; no PostgreSQL o tsvector é calculado pelo próprio banco.
+    """
+    insert = insert_for(connection)
+    if connection.dialect.name == "postgresql":
+        stmt = insert(SearchDocument).values(analysis_id=analysis_id, created_at=created_at)
+        doc_id = connection.execute(
+            stmt.on_conflict_do_update(index_elements=["analysis_id"], set_={"created_at": created_at})
+            .returning(SearchDocument.id)
+        ).scalar()
+        connection.execute(
+            text(
+                "UPDATE search_documents SET search_vector = "
+                "setweight(to_tsvector('portuguese', :content), 'A') || "
+                "setweight(to_tsvector('portuguese', :message), 'B') WHERE id = :id"
+            ),
+            {"content": content or "", "message": message or "", "id": doc_id},
+        )
+        return
+    values = {
+        "analysis_id": analysis_id,
+        "content_terms": terms_text(content),
+        "message_terms": terms_text(message),
+        "created_at": created_at,
+    }
+    stmt = insert(SearchDocument).values(**values)
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=["analysis_id"],
+        set_={k: v for k, v in values.items() if k != "analysis_id"},
+    ))
+
+
+def unindex_analysis_statement(analysis_id):
+    return delete(SearchDocument).where(SearchDocument.analysis_id == analysis_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_search_index(session, flush_context):
+    """
+    Indexa análises que chegaram a um estado final (ou cuja mensagem/conteúdo mudou depois disso)
+    e remove do índice as análises apagadas pela sessão. Análises pendentes não são indexadas.
+    """
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Analysis) or obj.status not in TERMINAL_STATUSES:
+            continue
+        state = inspect(obj)
+        changed = obj in session.new or any(
+            state.attrs[key].history.has_changes() for key in ("status", "message", "content_hash")
+        )
+        if changed:
+            index_analysis(session.connection(), obj.id, obj.content, obj.message, obj.created_at)
+    for obj in session.deleted:
+        if isinstance(obj, Analysis):
+            session.connection().execute(unindex_analysis_statement(obj.id))
+
+
+def reindex_analysis_sync(db: Session, analysis_id) -> None:
+    """
+    Reindexa uma análise alterada fora do ORM (ex.: UPDATE direto da mensagem).
+    """
+    analysis = db.execute(select(Analysis).where(Analysis.id == analysis_id)).scalars().first()
+    if analysis is not None and analysis.status in TERMINAL_STATUSES:
+        index_analysis(db.connection(), analysis.id, analysis.content, analysis.message, analysis.created_at)
+
+
+def reindex_all_sync(db: Session, batch_size: int = 200) -> int:
+    """
+    Indexa, em lotes, as análises finalizadas que ainda não têm documento de busca.
+    """
+    indexed = 0
+    while True:
+        missing = (
+            select(Analysis)
+            .outerjoin(SearchDocument, SearchDocument.analysis_id == Analysis.id)
+            .where(SearchDocument.id.is_(None), Analysis.status.in_(TERMINAL_STATUSES))
+            .limit(batch_size)
+        )
+        batch = db.execute(missing).scalars().all()
+        if not batch:
+            return indexed
+        for analysis in batch:
+            index_analysis(db.connection(), analysis.id, analysis.content, analysis.message, analysis.created_at)
+        db.commit()
+        indexed += len(batch)
+
+
+# --- Consulta ---
+
+def encode_cursor(score: float, doc_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([score, doc_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """
+    Levanta ValueError se o cursor for inválido.
+    """
+    try:
+        score, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), int(doc_id)
+    except Exception as e:
+        raise ValueError("Cursor inválido.") from e
+
+
+async def search_analyses(
+    db: AsyncSession, query: str, limit: int = 20, cursor: Optional[str] = None
+) -> Tuple[List[Tuple[Any, float]], Optional[str]]:
+    """
+    Busca textual ranqueada com paginação por chave (score, id do documento): o custo de cada
+    página não depende da posição na lista. Retorna [(analysis_id, score)] e o cursor da próxima página.
+    SQLite: BM25 do FTS5 (menor é melhor). PostgreSQL: ts_rank_cd (maior é melhor).
+    """
+    after = decode_cursor(cursor) if cursor else None
+    params = {"limit": limit + 1}
+    if db.get_bind().dialect.name == "postgresql":
+        keyset = "AND (s.score < :score OR (s.score = :score AND s.doc_id > :doc_id))" if after else ""
+        sql = f"""
+            SELECT s.doc_id, s.analysis_id, s.score FROM (
+                SELECT d.id AS doc_id, d.analysis_id, ts_rank_cd(d.search_vector, q) AS score
+                FROM search_documents d, websearch_to_tsquery('portuguese', :query) q
+                WHERE d.search_vector @@ q
+            ) s WHERE TRUE {keyset}
+            ORDER BY s.score DESC, s.doc_id LIMIT :limit
+        """
+        params["query"] = query
+    else:
+        match = build_fts5_query(query)
+        if match is None:
+            return [], None
+        keyset = (
+            "AND (analysis_fts.rank > :score OR (analysis_fts.rank = :score AND analysis_fts.rowid > :doc_id))"
+            if after else ""
+        )
+        sql = f"""
+            SELECT d.id AS doc_id, d.analysis_id, analysis_fts.rank AS score
+            FROM analysis_fts JOIN search_documents d ON d.id = analysis_fts.rowid
+            WHERE analysis_fts MATCH :query {keyset}
+            ORDER BY analysis_fts.rank, analysis_fts.rowid LIMIT :limit
+        """
+        params["query"] = match
+    if after:
+        params["score"], params["doc_id"] = after
+
+    # Tipagem explícita: o GUID volta como UUID, igual ao carregado pelo ORM
+    stmt = text(sql).columns(analysis_id=SearchDocument.__table__.c.analysis_id.type)
+    rows = (await db.execute(stmt, params)).all()
+    next_cursor = encode_cursor(rows[limit - 1].score, rows[limit - 1].doc_id) if len(rows) > limit else None
+    return [(row.analysis_id, row.score) for row in rows[:limit]], next_cursor
+
+
+def snippets_for(analysis: Analysis, query: str):
+    """
+    Trechos destacados do conteúdo e da mensagem para exibição no resultado.
+    """
+    stems = set(analyze_terms(query))
+    return highlight(analysis.content, stems), highlight(analysis.message, stems)
+
+
+if __name__ == "__main__":
+    from src.db.database import Base, SyncSessionLocal, sync_engine
+
+    Base.metadata.create_all(bind=sync_engine)
+    ensure_search_schema(sync_engine)
+    with SyncSessionLocal() as session:
+        total = reindex_all_sync(session)
+    print(f"{total} análises indexadas para busca.")
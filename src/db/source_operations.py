@@ -0,0 +1,214 @@
+# src/db/source_operations.py
+
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as SyncSession
+
+from src.db.upsert import insert_for
+from src.models.analysis import Analysis
+from src.models.source import AnalysisSource, DomainStats, Source
+from src.utils.urls import canonicalize_url, domain_of
+
+# Classificação -> coluna de contagem em DomainStats
+CLASSIFICATION_COUNTERS = {
+    "verdadeiro": "verdadeiro_count",
+    "fake_news": "fake_news_count",
+    "sátira": "satira_count",
+    "opinião": "opiniao_count",
+    "tendencioso": "tendencioso_count",
+    "indefinido": "indefinido_count",
+}
+
+
+def _canonical_sources(urls: Iterable[str]) -> List[str]:
+    """
+    Canonicaliza e deduplica as URLs mantendo a ordem de citação.
+    """
+    seen = {}
+    for url in urls or []:
+        canonical = canonicalize_url(url) if isinstance(url, str) else None
+        if canonical and canonical not in seen:
+            seen[canonical] = None
+    return list(seen)
+
+
+def record_analysis_sources_sync(
+    db: SyncSession, analysis_id, urls: Iterable[str], classification: Optional[str]
+) -> int:
+    """
+    Grava as fontes de uma análise nas tabelas normalizadas e atualiza domain_stats.
+    Idempotente: se a análise já tiver fontes registradas, nada é feito (evita contagem dupla
+    em re-tentativas da tarefa). Não faz commit; retorna o número de fontes associadas.
+    """
+    canonical_urls = _canonical_sources(urls)
+    if not canonical_urls:
+        return 0
+    already_recorded = db.execute(
+        select(AnalysisSource.source_id).where(AnalysisSource.analysis_id == analysis_id).limit(1)
+    ).first()
+    if already_recorded:
+        return 0
+
+    insert = insert_for(db)
+    now = datetime.utcnow()
+
+    # 1. Upsert das URLs canônicas (cada URL existe uma única vez em `sources`)
+    db.execute(
+        insert(Source)
+        .values([{"url": url, "domain": domain_of(url), "first_seen_at": now} for url in canonical_urls])
+        .on_conflict_do_nothing(index_elements=["url"])
+    )
+    source_ids = dict(db.execute(select(Source.url, Source.id).where(Source.url.in_(canonical_urls))).all())
+
+    # 2. Associação análise -> fontes
+    db.execute(
+        insert(AnalysisSource).values([
+            {"analysis_id": analysis_id, "source_id": source_ids[url], "position": position}
+            for position, url in enumerate(canonical_urls)
+        ]).on_conflict_do_nothing()
+    )
+
+    # 3. Agregado por domínio, incrementado uma vez por análise
+    counter = CLASSIFICATION_COUNTERS.get(classification, "indefinido_count")
+    for domain in {domain_of(url) for url in canonical_urls}:
+        row = {column: 0 for column in CLASSIFICATION_COUNTERS.values()}
+        row.update({"domain": domain, "analyses_count": 1, counter: 1, "last_cited_at": now})
+        stmt = insert(DomainStats).values(row)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["domain"],
+            set_={
+                "analyses_count": DomainStats.analyses_count + 1,
+                counter: getattr(DomainStats, counter) + 1,
+                "last_cited_at": now,
+            },
+        ))
+    return len(canonical_urls)
+
+
+async def remove_analysis_sources(db: AsyncSession, analysis_id, classification: Optional[str]) -> None:
+    """
+    Inverso de record_analysis_sources_sync, para a exclusão de uma análise: decrementa domain_stats
+    uma vez por domínio citado e remove as associações. Não faz commit (a exclusão da análise vai na
+    mesma transação).
+    """
+    domains = (await db.execute(
+        select(Source.domain).distinct()
+        .join(AnalysisSource, AnalysisSource.source_id == Source.id)
+        .where(AnalysisSource.analysis_id == analysis_id)
+    )).scalars().all()
+    if domains:
+        counter = CLASSIFICATION_COUNTERS.get(classification, "indefinido_count")
+        await db.execute(
+            update(DomainStats)
+            .where(DomainStats.domain.in_(domains))
+            .values({
+                name: case((column > 0, column - 1), else_=0)
+                for name, column in (("analyses_count", DomainStats.analyses_count), (counter, getattr(DomainStats, counter)))
+            })
+        )
+    # Remove explicitamente as associações (o SQLite não aplica ON DELETE CASCADE por padrão)
+    await db.execute(delete(AnalysisSource).where(AnalysisSource.analysis_id == analysis_id))
+
+
+def get_domain_reliability_sync(db: SyncSession, domains: Iterable[str]) -> Dict[str, float]:
+    """
+    Retorna o reliability_score dos domínios informados que já possuem estatísticas.
+    """
+    domains = [d for d in set(domains) if d]
+    if not domains:
+        return {}
+    stats = db.execute(select(DomainStats).where(DomainStats.domain.in_(domains))).scalars().all()
+    return {s.domain: s.reliability_score for s in stats}
+
+
+def backfill_analysis_sources_sync(db: SyncSession, batch_size: int = 500) -> int:
+    """
+    Migra o JSON de `analyses.sources` das análises finalizadas para as tabelas normalizadas,
+    em lotes com commit a cada lote. Análises já migradas são ignoradas. Retorna quantas foram processadas.
+    """
+    processed = 0
+    last_id = None
+    while True:
+        # Paginação por chave (id), estável mesmo com inserções concorrentes
+        query = (
+            select(Analysis.id, Analysis.sources, Analysis.classification)
+            .where(Analysis.status == "completed", Analysis.sources.isnot(None), Analysis.sources != "")
+            .order_by(Analysis.id)
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            query = query.where(Analysis.id > last_id)
+        batch = db.execute(query).all()
+        if not batch:
+            return processed
+        for row in batch:
+            try:
+                urls = json.loads(row.sources)
+            except (json.JSONDecodeError, TypeError):
+                urls = []
+            if isinstance(urls, list):
+                record_analysis_sources_sync(db, row.id, urls, row.classification)
+            processed += 1
+        db.commit()
+        last_id = batch[-1].id
+
+
+# --- Consultas assíncronas (API) ---
+
+async def get_domain_stats(db: AsyncSession, domain: str) -> Optional[DomainStats]:
+    result = await db.execute(select(DomainStats).where(DomainStats.domain == domain.lower()))
+    return result.scalars().first()
+
+
+async def get_top_domains(db: AsyncSession, skip: int = 0, limit: int = 50) -> List[DomainStats]:
+    """
+    Domínios mais citados, usando o agregado (sem varrer analyses).
+    """
+    result = await db.execute(
+        select(DomainStats).order_by(DomainStats.analyses_count.desc()).offset(skip).limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def get_analyses_citing_domain(
+    db: AsyncSession, domain: str, skip: int = 0, limit: int = 100, preview_chars: int = 200
+) -> List[Row]:
+    """
+    Análises que citaram alguma URL do domínio, via índices de sources.domain e analysis_sources.source_id.
+    """
+    citing = (
+        select(AnalysisSource.analysis_id)
+        .join(Source, Source.id == AnalysisSource.source_id)
+        .where(Source.domain == domain.lower())
+        .distinct()
+        .subquery()
+    )
+    result = await db.execute(
+        select(
+            Analysis.id,
+            Analysis.status,
+            Analysis.classification,
+            Analysis.color,
+            Analysis.created_at,
+            func.substr(Analysis.content_preview, 1, preview_chars).label("content_preview"),
+        )
+        .join(citing, citing.c.analysis_id == Analysis.id)
+        .order_by(Analysis.created_at.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return result.all()
+
+
+if __name__ == "__main__":
+    from src.db.database import Base, SyncSessionLocal, sync_engine
+
+    Base.metadata.create_all(bind=sync_engine)
+    with SyncSessionLocal() as session:
+        total = backfill_analysis_sources_sync(session)
+    print(f"Fontes normalizadas para {total} análises.")
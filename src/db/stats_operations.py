@@ -0,0 +1,328 @@
+# src/db/stats_operations.py
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as SyncSession
+
+from src.db.upsert import insert_for
+from src.models.analysis import Analysis, TERMINAL_STATUSES, ensure_analysis_schema
+from src.core.model_tiering import TIERS
+from src.models.stats import AnalysisRollup, TierRollup
+from src.utils.ddsketch import DDSketch
+
+GRANULARITIES = ("hour", "day")
+LATENCY_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+def ensure_stats_schema(engine) -> None:
+    """
+    Adiciona `completed_at` e `provider` em tabelas `analyses` criadas antes delas.
+    A tabela `analysis_rollups` em si é criada pelo create_all.
+    """
+    columns = {c["name"] for c in inspect(engine).get_columns("analyses")}
+    with engine.begin() as conn:
+        for name, ddl_type in (("completed_at", "TIMESTAMP"), ("provider", "VARCHAR")):
+            if name not in columns:
+                conn.execute(text(f"ALTER TABLE analyses ADD COLUMN {name} {ddl_type}"))
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Granularidade inválida: {granularity!r}")
+
+
+def latency_ms(analysis) -> Optional[float]:
+    if analysis.created_at is None or analysis.completed_at is None:
+        return None
+    return max(0.0, (analysis.completed_at - analysis.created_at).total_seconds() * 1000)
+
+
+def tier_transition(analysis) -> Optional[Tuple[str, str, bool]]:
+    """
+    (nível inicial, nível final, escalonou) da análise, ou None se ela não passou pela LLM por
+    níveis (reaproveitada, classificador local, falha antes da análise).
+    """
+    if analysis.model_tier not in TIERS:
+        return None
+    escalations = analysis.tier_escalations or 0
+    # Nível inicial = final menos os escalonamentos (um nível por vez)
+    initial = TIERS[max(0, TIERS.index(analysis.model_tier) - escalations)]
+    return initial, analysis.model_tier, escalations > 0
+
+
+def _dimensions(analysis) -> Dict[str, str]:
+    return {
+        "classification": analysis.classification or "",
+        "status": analysis.status or "",
+        "provider": analysis.provider or "",
+    }
+
+
+# --- Atualização incremental (worker) ---
+
+def record_analysis_rollup_sync(db: SyncSession, analysis: Analysis) -> None:
+    """
+    Soma uma análise recém-finalizada aos rollups horário e diário. Chamar uma única vez,
+    na transição para completed/failed, na mesma transação que grava o resultado; não faz commit.
+    Desvios (re-tentativas, exclusões) são corrigidos por reconcile_rollups_sync.
+    """
+    if analysis.status not in TERMINAL_STATUSES or analysis.created_at is None:
+        return
+    latency = latency_ms(analysis)
+    insert = insert_for(db)
+    for granularity in GRANULARITIES:
+        key = {"granularity": granularity, "bucket_start": bucket_start(analysis.created_at, granularity), **_dimensions(analysis)}
+        # Garante a linha e a trava (o INSERT já obtém o lock de escrita no SQLite) antes do read-modify-write do sketch
+        db.execute(
+            insert(AnalysisRollup)
+            .values(**key, count=0, latency_sum_ms=0.0, latency_sketch=None)
+            .on_conflict_do_nothing()
+        )
+        row = db.execute(
+            select(AnalysisRollup.latency_sketch)
+            .where(*[getattr(AnalysisRollup, name) == value for name, value in key.items()])
+            .with_for_update()
+        ).first()
+        sketch = DDSketch.from_bytes(row.latency_sketch) if row.latency_sketch else DDSketch()
+        if latency is not None:
+            sketch.add(latency)
+        db.execute(
+            AnalysisRollup.__table__.update()
+            .where(*[AnalysisRollup.__table__.c[name] == value for name, value in key.items()])
+            .values(
+                count=AnalysisRollup.__table__.c.count + 1,
+                latency_sum_ms=AnalysisRollup.__table__.c.latency_sum_ms + (latency or 0.0),
+                latency_sketch=sketch.to_bytes(),
+            )
+        )
+
+    transition = tier_transition(analysis)
+    if transition is None:
+        return
+    initial, final, escalated = transition
+    for granularity in GRANULARITIES:
+        start = bucket_start(analysis.created_at, granularity)
+        _add_tier_rollup(db, granularity, start, initial, started=1, escalated=int(escalated))
+        _add_tier_rollup(db, granularity, start, final, finished=1, latency=analysis.llm_latency_ms)
+
+
+def _add_tier_rollup(
+    db: SyncSession, granularity: str, start: datetime, tier: str,
+    started: int = 0, escalated: int = 0, finished: int = 0, latency: Optional[float] = None,
+) -> None:
+    table = TierRollup.__table__
+    key = {"granularity": granularity, "bucket_start": start, "tier": tier}
+    db.execute(
+        insert_for(db)(TierRollup)
+        .values(**key, started=0, escalated=0, finished=0, latency_sketch=None)
+        .on_conflict_do_nothing()
+    )
+    where = [table.c[name] == value for name, value in key.items()]
+    values = {
+        "started": table.c.started + started,
+        "escalated": table.c.escalated + escalated,
+        "finished": table.c.finished + finished,
+    }
+    if latency is not None:
+        row = db.execute(select(table.c.latency_sketch).where(*where).with_for_update()).first()
+        sketch = DDSketch.from_bytes(row.latency_sketch) if row.latency_sketch else DDSketch()
+        sketch.add(latency)
+        values["latency_sketch"] = sketch.to_bytes()
+    db.execute(table.update().where(*where).values(**values))
+
+
+# --- Reconciliação ---
+
+def reconcile_rollups_sync(db: SyncSession, since: datetime, until: Optional[datetime] = None) -> int:
+    """
+    Recalcula os rollups de [since, until) a partir de `analyses` e substitui os existentes.
+    `since` é arredondado para o início do dia, para que nenhum balde diário fique parcial.
+    Lê apenas colunas pequenas (sem conteúdo/mensagem). Retorna quantas linhas de rollup foram gravadas.
+    """
+    since = bucket_start(since, "day")
+    until = until or datetime.utcnow()
+    if until != bucket_start(until, "day"):
+        until = bucket_start(until, "day") + timedelta(days=1)
+
+    rows = db.execute(
+        select(
+            Analysis.created_at, Analysis.completed_at, Analysis.classification, Analysis.status, Analysis.provider,
+            Analysis.model_tier, Analysis.tier_escalations, Analysis.llm_latency_ms,
+        ).where(
+            Analysis.created_at >= since,
+            Analysis.created_at < until,
+            Analysis.status.in_(TERMINAL_STATUSES),
+        )
+    ).all()
+
+    aggregates: Dict[Tuple, List[Any]] = defaultdict(lambda: [0, 0.0, DDSketch()])
+    tier_aggregates: Dict[Tuple, List[Any]] = defaultdict(lambda: [0, 0, 0, DDSketch()])
+    for row in rows:
+        latency = latency_ms(row)
+        transition = tier_transition(row)
+        for granularity in GRANULARITIES:
+            start = bucket_start(row.created_at, granularity)
+            entry = aggregates[(granularity, start, *_dimensions(row).values())]
+            entry[0] += 1
+            if latency is not None:
+                entry[1] += latency
+                entry[2].add(latency)
+            if transition is not None:
+                initial, final, escalated = transition
+                tier_aggregates[(granularity, start, initial)][0] += 1
+                tier_aggregates[(granularity, start, initial)][1] += int(escalated)
+                tier_entry = tier_aggregates[(granularity, start, final)]
+                tier_entry[2] += 1
+                if row.llm_latency_ms is not None:
+                    tier_entry[3].add(row.llm_latency_ms)
+
+    db.execute(delete(AnalysisRollup).where(
+        AnalysisRollup.bucket_start >= since, AnalysisRollup.bucket_start < until,
+    ))
+    db.execute(delete(TierRollup).where(
+        TierRollup.bucket_start >= since, TierRollup.bucket_start < until,
+    ))
+    if aggregates:
+        db.execute(AnalysisRollup.__table__.insert(), [
+            {
+                "granularity": granularity, "bucket_start": start,
+                "classification": classification, "status": status, "provider": provider,
+                "count": count, "latency_sum_ms": latency_sum, "latency_sketch": sketch.to_bytes(),
+            }
+            for (granularity, start, classification, status, provider), (count, latency_sum, sketch) in aggregates.items()
+        ])
+    if tier_aggregates:
+        db.execute(TierRollup.__table__.insert(), [
+            {
+                "granularity": granularity, "bucket_start": start, "tier": tier,
+                "started": started, "escalated": escalated, "finished": finished, "latency_sketch": sketch.to_bytes(),
+            }
+            for (granularity, start, tier), (started, escalated, finished, sketch) in tier_aggregates.items()
+        ])
+    db.commit()
+    return len(aggregates) + len(tier_aggregates)
+
+
+# --- Consulta (API) ---
+
+async def get_stats(db: AsyncSession, granularity: str, since: datetime, until: datetime) -> Dict[str, Any]:
+    """
+    Agrega os rollups do intervalo: totais por dimensão, série temporal e percentis de latência
+    (sketches combinados). O custo depende do número de baldes, não do número de análises.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularidade inválida: {granularity!r}")
+    result = await db.execute(
+        select(AnalysisRollup).where(and_(
+            AnalysisRollup.granularity == granularity,
+            AnalysisRollup.bucket_start >= bucket_start(since, granularity),
+            AnalysisRollup.bucket_start < until,
+        )).order_by(AnalysisRollup.bucket_start)
+    )
+
+    totals = {"classification": defaultdict(int), "status": defaultdict(int), "provider": defaultdict(int)}
+    series: Dict[datetime, Dict[str, Any]] = {}
+    overall = DDSketch()
+    for rollup in result.scalars():
+        for dimension, counts in totals.items():
+            counts[getattr(rollup, dimension) or "unknown"] += rollup.count
+        bucket = series.setdefault(rollup.bucket_start, {"count": 0, "by_classification": defaultdict(int), "sketch": DDSketch()})
+        bucket["count"] += rollup.count
+        bucket["by_classification"][rollup.classification or "unknown"] += rollup.count
+        if rollup.latency_sketch:
+            sketch = DDSketch.from_bytes(rollup.latency_sketch)
+            bucket["sketch"].merge(sketch)
+            overall.merge(sketch)
+
+    return {
+        "granularity": granularity,
+        "since": since,
+        "until": until,
+        "total": sum(totals["status"].values()),
+        "by_classification": dict(totals["classification"]),
+        "by_status": dict(totals["status"]),
+        "by_provider": dict(totals["provider"]),
+        "latency_ms": latency_summary(overall),
+        "buckets": [
+            {
+                "bucket_start": start,
+                "count": bucket["count"],
+                "by_classification": dict(bucket["by_classification"]),
+                "latency_ms": latency_summary(bucket["sketch"]),
+            }
+            for start, bucket in series.items()
+        ],
+    }
+
+
+async def get_tier_stats(db: AsyncSession, since: datetime, until: datetime) -> Dict[str, Any]:
+    """
+    Por nível do modelo: análises iniciadas e finalizadas, latência das chamadas à LLM e taxa de
+    escalonamento (fração das análises que começaram no nível e precisaram subir). Lê os rollups
+    horários de TierRollup, como get_stats: o custo depende do número de baldes.
+    """
+    result = await db.execute(
+        select(TierRollup).where(and_(
+            TierRollup.granularity == "hour",
+            TierRollup.bucket_start >= bucket_start(since, "hour"),
+            TierRollup.bucket_start < until,
+        ))
+    )
+    sketches: Dict[str, DDSketch] = defaultdict(DDSketch)
+    started: Dict[str, int] = defaultdict(int)
+    finished: Dict[str, int] = defaultdict(int)
+    escalated: Dict[str, int] = defaultdict(int)
+    for rollup in result.scalars():
+        started[rollup.tier] += rollup.started
+        escalated[rollup.tier] += rollup.escalated
+        finished[rollup.tier] += rollup.finished
+        if rollup.latency_sketch:
+            sketches[rollup.tier].merge(DDSketch.from_bytes(rollup.latency_sketch))
+    total = sum(started.values())
+    return {
+        "since": since,
+        "until": until,
+        "total": total,
+        "escalation_rate": round(sum(escalated.values()) / total, 4) if total else None,
+        "tiers": [
+            {
+                "tier": tier,
+                "started": started[tier],
+                "finished": finished[tier],
+                "escalation_rate": round(escalated[tier] / started[tier], 4) if started[tier] else None,
+                "latency_ms": latency_summary(sketches[tier]),
+            }
+            for tier in TIERS
+        ],
+    }
+
+
+def latency_summary(sketch: DDSketch) -> Dict[str, Optional[float]]:
+    summary = {"count": sketch.count, "mean": sketch.mean, "max": sketch.max}
+    for q in LATENCY_QUANTILES:
+        summary[f"p{round(q * 100)}"] = sketch.quantile(q)
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.db.database import Base, SyncSessionLocal, sync_engine
+
+    parser = argparse.ArgumentParser(description="Reconstrói os rollups de estatísticas a partir de analyses.")
+    parser.add_argument("--days", type=int, default=7, help="Quantos dias para trás recalcular.")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=sync_engine)
+    ensure_stats_schema(sync_engine)
+    ensure_analysis_schema(sync_engine)
+    with SyncSessionLocal() as session:
+        total = reconcile_rollups_sync(session, datetime.utcnow() - timedelta(days=args.days))
+    print(f"{total} linhas de rollup recalculadas.")
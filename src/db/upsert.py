@@ -0,0 +1,15 @@
+# src/db/upsert.py
+
+
+def insert_for(bind):
+    """
+    Retorna o insert() do dialeto em uso (SQLite ou PostgreSQL), que suporta ON CONFLICT.
+    Aceita Session, Connection ou Engine.
+    """
+    if hasattr(bind, "get_bind"):
+        bind = bind.get_bind()
+    if bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
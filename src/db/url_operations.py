@@ -0,0 +1,45 @@
+# src/db/url_operations.py
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session as SyncSession
+
+from src.db.upsert import insert_for
+from src.models.url_extraction import UrlExtraction
+from src.utils.article import Article
+
+
+def get_url_extraction_sync(
+    db: SyncSession, url: str, max_age_seconds: int, failure_max_age_seconds: int
+) -> Optional[UrlExtraction]:
+    """
+    Extração em cache para a URL canônica, se ainda válida. Falhas (sem texto) expiram antes.
+    """
+    extraction = db.execute(select(UrlExtraction).where(UrlExtraction.url == url)).scalars().first()
+    if extraction is None:
+        return None
+    max_age = max_age_seconds if extraction.text else failure_max_age_seconds
+    if extraction.extracted_at < datetime.utcnow() - timedelta(seconds=max_age):
+        return None
+    return extraction
+
+
+def store_url_extraction_sync(db: SyncSession, url: str, article: Optional[Article]) -> None:
+    """
+    Upsert da extração (ou da falha, com article=None). Faz commit: é independente da análise.
+    """
+    values = {
+        "url": url,
+        "canonical_url": article.canonical_url if article else None,
+        "final_url": article.final_url if article else None,
+        "title": article.title if article else None,
+        "text": article.text if article else None,
+        "extracted_at": datetime.utcnow(),
+    }
+    stmt = insert_for(db)(UrlExtraction).values(**values)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["url"], set_={k: v for k, v in values.items() if k != "url"},
+    ))
+    db.commit()
@@ -0,0 +1,18 @@
+# src/db/user_operations.py
+
+from sqlalchemy import inspect, text
+
+from src.models.user import User
+
+
+def ensure_user_schema(engine) -> None:
+    """
+    Adiciona `token_version` a tabelas de usuários criadas antes dela.
+    """
+    table = User.__tablename__
+    if not inspect(engine).has_table(table):
+        return
+    columns = {c["name"] for c in inspect(engine).get_columns(table)}
+    if "token_version" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0'))
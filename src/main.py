@@ -1,12 +1,29 @@
 # src/main.py
 
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
 from src.core.config import settings # Caminho corrigido
 from src.db.database import Base, sync_engine
+from src.db.compression_migration import ensure_compression_schema
+from src.db.content_operations import ensure_content_schema
+from src.db.search_operations import ensure_search_schema
+from src.db.stats_operations import ensure_stats_schema
+from src.db.ledger_operations import ensure_ledger_schema
+from src.db.user_operations import ensure_user_schema
+from src.db.feedback_operations import ensure_feedback_schema
+from src.models.analysis import ensure_analysis_schema
+from src.core.llm_providers import warm_up as warm_up_llm_providers
+from src.core.job_backends import get_job_backend
+from src.core.cost_accounting import cost_writer
 from src.api.routes_history import router as history_router # Verifique se este arquivo e o router existem
 from src.api.routes_auth import router as auth_router     # Verifique se este arquivo e o router existem
 from src.api.routes_analysis import router as analysis_router # Caminho e router corretos
+from src.api.routes_status import router as status_router
+from src.api.routes_sources import router as sources_router
+from src.api.routes_search import router as search_router
+from src.api.routes_stats import router as stats_router
+from src.api.routes_feedback import router as feedback_router
 
 # Esta função será executada antes do aplicativo iniciar e ao desligar
 @asynccontextmanager
@@ -15,8 +32,25 @@ async def lifespan(app: FastAPI):
     # Cria as tabelas do banco de dados (se não existirem) usando o motor síncrono.
     # Esta operação é síncrona e não deve ser executada no loop de eventos assíncrono.
     Base.metadata.create_all(bind=sync_engine)
+    # Colunas adicionadas depois da criação original da tabela `analyses`
+    ensure_compression_schema(sync_engine)
+    ensure_content_schema(sync_engine)
+    ensure_search_schema(sync_engine)
+    ensure_stats_schema(sync_engine)
+    ensure_analysis_schema(sync_engine)
+    ensure_ledger_schema(sync_engine)
+    ensure_user_schema(sync_engine)
+    ensure_feedback_schema(sync_engine)
     print("Database initialized.")
+    # SDKs de LLM são importados no primeiro uso; LLM_WARMUP_PROVIDERS antecipa isso para o startup
+    if settings.LLM_WARMUP_PROVIDERS:
+        warm_up_llm_providers()
+    # Backend de jobs das análises (JOB_BACKEND); o embutido retoma aqui os jobs pendentes
+    job_backend = get_job_backend()
+    await job_backend.start()
     yield # O código após o 'yield' será executado no desligamento da aplicação
+    await job_backend.stop()
+    await run_in_threadpool(cost_writer.flush) # Registros de custo ainda no buffer (análises embutidas e respostas da API)
     print("Application shutdown.")
 
 app = FastAPI(
@@ -32,6 +66,11 @@ app = FastAPI(
 app.include_router(history_router, prefix="/history", tags=["history"])
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
 app.include_router(analysis_router, prefix="/analysis", tags=["analysis"]) # Prefixo para todas as rotas de análise
+app.include_router(status_router, tags=["status"]) # Rotas já definem o caminho /status/...
+app.include_router(sources_router, prefix="/sources", tags=["sources"])
+app.include_router(search_router, prefix="/search", tags=["search"])
+app.include_router(stats_router, prefix="/stats", tags=["stats"])
+app.include_router(feedback_router, tags=["feedback"]) # POST /feedback e GET /feedback/{analysis_id}
 
 @app.get("/")
 async def read_root():
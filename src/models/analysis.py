@@ -1,12 +1,21 @@
 # src/models/analysis.py
 
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Float, ForeignKey, Integer, event, inspect, text
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID # Para PostgreSQL
 from sqlalchemy.types import TypeDecorator, CHAR # Para UUID no SQLite
 from sqlalchemy.schema import PrimaryKeyConstraint
+from sqlalchemy.orm import Session, relationship
 import uuid
 from datetime import datetime
 from src.db.database import Base # Importa a Base declarativa
+from src.db.compression import CompressedText # Texto comprimido de forma transparente
+from src.models.content import Content, acquire_content, release_content_statements
+from src.utils.content_hash import content_hash as compute_content_hash
+
+CONTENT_PREVIEW_CHARS = 200
+
+# Depois de 'completed' ou 'failed' a linha da análise não muda mais.
+TERMINAL_STATUSES = frozenset({"completed", "failed"})
 
 # Adaptador para UUIDs que funciona tanto com PostgreSQL quanto SQLite
 class GUID(TypeDecorator):
@@ -46,17 +55,94 @@ class Analysis(Base):
     __tablename__ = "analyses"
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4) # UUID como PK
-    content = Column(String, nullable=False) # O conteúdo (texto/URL) que foi analisado - RENOMEADO DE 'text'
+    # O conteúdo (texto/URL) analisado fica na tabela `contents`, endereçado pelo hash do texto normalizado.
+    # Use o atributo `content` (property abaixo) para ler/escrever o texto.
+    content_hash = Column(String(64), ForeignKey("contents.hash"), nullable=True, index=True)
+    content_ref = relationship(Content, lazy="joined", viewonly=True)
+    legacy_content = Column("content", CompressedText(), nullable=False, default="") # Texto de linhas anteriores ao armazenamento por hash
+    content_preview = Column(String, nullable=True) # Trecho inicial do conteúdo, legível pelo banco (histórico/listagens)
     classification = Column(String, nullable=True) # A classificação de veracidade (ex: "verdadeiro", "fake news") - RENOMEADO DE 'result'
     color = Column(String, default="white") # Cor associada ao resultado (ex: "green", "red", "grey")
     status = Column(String, default="pending") # Status da análise (ex: "pending", "completed", "failed")
-    sources = Column(String, nullable=True) # Fontes ou evidências usadas na análise - NOVO CAMPO
-    message = Column(String, nullable=True) # Mensagem ou justificativa detalhada da análise do LLM - NOVO CAMPO
-    created_at = Column(DateTime, default=datetime.utcnow) # Timestamp da criação
+    sources = Column(CompressedText(), nullable=True) # Fontes ou evidências usadas na análise - NOVO CAMPO
+    message = Column(CompressedText(), nullable=True) # Mensagem ou justificativa detalhada da análise do LLM - NOVO CAMPO
+    created_at = Column(DateTime, default=datetime.utcnow, index=True) # Timestamp da criação (intervalos de reconciliação/arquivamento)
+    completed_at = Column(DateTime, nullable=True) # Quando o resultado final foi gravado
+    provider = Column(String, nullable=True) # LLM que produziu o veredito ("reuse" quando reaproveitado, "local" pelo classificador local)
+    model_tier = Column(String, nullable=True) # Nível do modelo que deu o veredito final (fast/standard/strong)
+    tier_escalations = Column(Integer, nullable=True) # Quantas vezes a análise subiu de nível
+    llm_latency_ms = Column(Float, nullable=True) # Tempo somado das chamadas de análise à LLM
+    decision_path = Column(String, nullable=True) # Como o veredito foi obtido: "reuse", "local" (classificador) ou "llm"
+    local_confidence = Column(Float, nullable=True) # Probabilidade calibrada do classificador local, quando consultado
 
     __table_args__ = (
         PrimaryKeyConstraint('id', name='pk_analysis_id'),
     )
 
+    @property
+    def content(self) -> str:
+        cached = self.__dict__.get("_content_cache")
+        if cached is not None:
+            return cached
+        if self.content_ref is not None:
+            return self.content_ref.body
+        return self.legacy_content
+
+    @content.setter
+    def content(self, value: str) -> None:
+        # O texto em si é gravado em `contents` no flush (ver _store_contents abaixo)
+        self._content_cache = value
+        self.content_hash = compute_content_hash(value) if value is not None else None
+        # Trecho em texto puro: permite listagens sem ler/descomprimir o conteúdo
+        self.content_preview = value[:CONTENT_PREVIEW_CHARS] if value is not None else None
+
     def __repr__(self):
-        return f"<Analysis(id={self.id}, status='{self.status}', content='{self.content[:30]}...')>" 
\ No newline at end of file
+        return f"<Analysis(id={self.id}, status='{self.status}', content='{self.content[:30]}...')>"
+
+
+# Colunas de roteamento por nível de modelo e do classificador local, declaradas acima
+ROUTING_COLUMNS = ("model_tier", "tier_escalations", "llm_latency_ms", "decision_path", "local_confidence")
+
+
+def ensure_analysis_schema(engine) -> None:
+    """
+    Adiciona as colunas de ROUTING_COLUMNS a tabelas `analyses` criadas antes delas,
+    com o tipo declarado no modelo, e os índices declarados que ainda não existem.
+    """
+    existing = {c["name"] for c in inspect(engine).get_columns(Analysis.__tablename__)}
+    with engine.begin() as conn:
+        for name in ROUTING_COLUMNS:
+            if name not in existing:
+                ddl_type = Analysis.__table__.c[name].type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {Analysis.__tablename__} ADD COLUMN {name} {ddl_type}"))
+        for index in Analysis.__table__.indexes:
+            index.create(conn, checkfirst=True)
+
+
+@event.listens_for(Session, "before_flush")
+def _store_contents(session, flush_context, instances):
+    """
+    Mantém `contents` e seus ref_count em sincronia com as análises da sessão:
+    upsert do texto para hashes novos e liberação dos hashes removidos/substituídos.
+    Vale também para AsyncSession, que usa uma Session síncrona internamente.
+    """
+    connection = None
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, Analysis):
+            continue
+        history = inspect(obj).attrs.content_hash.history
+        released = list(history.deleted or ())
+        acquired = None
+        if obj in session.deleted:
+            released.append(obj.content_hash)
+        elif history.added and obj.__dict__.get("_content_cache") is not None:
+            acquired = obj.content_hash
+        if acquired is None and not any(released):
+            continue
+        connection = connection or session.connection()
+        if acquired:
+            acquire_content(connection, acquired, obj._content_cache, obj.content_preview)
+        for old_hash in filter(None, released):
+            for stmt in release_content_statements(old_hash):
+                connection.execute(stmt)
+
@@ -0,0 +1,20 @@
+# src/models/archive.py
+
+from sqlalchemy import Column, DateTime, String
+
+from src.db.database import Base
+from src.models.analysis import GUID
+
+
+class ArchivedAnalysis(Base):
+    """
+    Índice id -> arquivo do arquivo frio: análises antigas saem de `analyses` e passam a viver
+    em arquivos Parquet particionados por mês (ver src/db/archive_operations.py).
+    """
+    __tablename__ = "archived_analyses"
+
+    analysis_id = Column(GUID(), primary_key=True)
+    archive_file = Column(String, nullable=False, index=True) # Caminho relativo a ARCHIVE_DIR
+    month = Column(String(7), nullable=False, index=True) # "AAAA-MM" de created_at
+    created_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, nullable=True)
@@ -0,0 +1,54 @@
+# src/models/content.py
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, delete, update
+
+from src.db.compression import CompressedText
+from src.db.database import Base
+from src.db.upsert import insert_for
+
+
+class Content(Base):
+    """
+    Texto submetido para análise, armazenado uma única vez por hash do conteúdo normalizado
+    (ver src/utils/content_hash.py). `ref_count` conta quantas análises apontam para ele.
+    """
+    __tablename__ = "contents"
+
+    hash = Column(String(64), primary_key=True)
+    body = Column(CompressedText(), nullable=False)
+    preview = Column(String, nullable=True)
+    ref_count = Column(Integer, nullable=False, default=0)
+    first_seen_at = Column(DateTime, default=datetime.utcnow)
+    last_seen_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Content(hash='{self.hash[:12]}...', ref_count={self.ref_count})>"
+
+
+def acquire_content(connection, hash_: str, body: str, preview: str) -> None:
+    """
+    Upsert de um conteúdo: insere na primeira vez e, nas seguintes, apenas incrementa ref_count.
+    Recebe uma Connection (é chamado durante o flush da sessão).
+    """
+    now = datetime.utcnow()
+    insert = insert_for(connection)
+    stmt = insert(Content).values(
+        hash=hash_, body=body, preview=preview, ref_count=1, first_seen_at=now, last_seen_at=now
+    )
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=["hash"],
+        set_={"ref_count": Content.ref_count + 1, "last_seen_at": now},
+    ))
+
+
+def release_content_statements(hash_: str):
+    """
+    Comandos que decrementam ref_count e removem o conteúdo que ficou sem referências.
+    Retornados como lista para serem executados pela sessão síncrona ou assíncrona do chamador.
+    """
+    return [
+        update(Content).where(Content.hash == hash_).values(ref_count=Content.ref_count - 1),
+        delete(Content).where(Content.hash == hash_, Content.ref_count <= 0),
+    ]
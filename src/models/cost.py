@@ -0,0 +1,59 @@
+# src/models/cost.py
+
+from sqlalchemy import Column, DateTime, Float, Index, Integer, PrimaryKeyConstraint, String
+
+from src.db.database import Base
+from src.db.compression import CompressedText
+from src.models.analysis import GUID
+
+
+class AnalysisCost(Base):
+    """
+    Custo de uma análise (src/core/cost_accounting.py): totais em colunas, para ordenar e somar no
+    banco, e o detalhe (tempo por fase, tentativas por provedor/modelo, buscas, caches) em JSON
+    comprimido. Re-tentativas da mesma análise somam tokens e custo; o detalhe é o da última execução.
+    """
+    __tablename__ = "analysis_costs"
+
+    analysis_id = Column(GUID(), primary_key=True)
+    created_at = Column(DateTime, nullable=False)
+    decision_path = Column(String, nullable=True) # "llm", "reuse" ou "local"
+    provider = Column(String, nullable=True) # Provedor do veredito final
+    llm_calls = Column(Integer, nullable=False, default=0)
+    failed_calls = Column(Integer, nullable=False, default=0)
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    cached_tokens = Column(Integer, nullable=False, default=0) # Parte da entrada servida do cache de prefixo do provedor
+    search_calls = Column(Integer, nullable=False, default=0)
+    cache_hits = Column(Integer, nullable=False, default=0)
+    cost_usd = Column(Float, nullable=False, default=0.0)
+    total_ms = Column(Float, nullable=True)
+    detail = Column(CompressedText(), nullable=True)
+
+    __table_args__ = (
+        Index("ix_analysis_costs_created_at", "created_at"),
+    )
+
+
+class CostRollup(Base):
+    """
+    Gasto somado por dia × provedor × modelo × fase ("query_generation", "analysis", "search"),
+    atualizado a cada lote gravado. Base de GET /stats/costs e do orçamento diário.
+    """
+    __tablename__ = "cost_rollups"
+
+    day = Column(DateTime, nullable=False)
+    provider = Column(String, nullable=False, default="")
+    model = Column(String, nullable=False, default="")
+    phase = Column(String, nullable=False, default="")
+    calls = Column(Integer, nullable=False, default=0)
+    failed_calls = Column(Integer, nullable=False, default=0)
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    cached_tokens = Column(Integer, nullable=False, default=0)
+    cost_usd = Column(Float, nullable=False, default=0.0)
+    latency_sum_ms = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("day", "provider", "model", "phase"),
+    )
@@ -0,0 +1,47 @@
+# src/models/feedback.py
+
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String
+
+from src.db.database import Base
+from src.models.analysis import GUID
+
+
+class Feedback(Base):
+    """
+    Correção enviada por um usuário para uma análise, gravada em lote pelo consumidor do stream
+    (ver src/core/feedback_stream.py). `stream_id` é o ID da entrada no Redis Stream: torna a
+    gravação idempotente quando uma entrada é reentregue. Cada usuário tem um único voto por
+    análise (`ux_feedback_analysis_user`); o voto mais recente substitui o anterior.
+    """
+    __tablename__ = "feedback"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    stream_id = Column(String, nullable=False, unique=True)
+    analysis_id = Column(GUID(), nullable=False) # Sem FK: a análise pode já estar no arquivo frio
+    user_id = Column(GUID(), nullable=True) # Autor do voto; None só em entradas anteriores à autenticação
+    agrees = Column(Boolean, nullable=True) # None: só sugeriu uma classificação
+    suggested_classification = Column(String, nullable=True)
+    comment = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow) # Momento do envio (não da gravação)
+
+    __table_args__ = (
+        Index("ix_feedback_analysis_id", "analysis_id"),
+        Index("ux_feedback_analysis_user", "analysis_id", "user_id", unique=True), # NULLs não colidem
+        Index("ix_feedback_created_at", "created_at"), # Leitura incremental para re-treino
+    )
+
+
+class AnalysisFeedback(Base):
+    """
+    Contadores de concordância por análise (um voto por usuário), recalculados a cada lote gravado. `disputed` marca
+    vereditos contestados pela maioria: saem do cache e deixam de ser reaproveitados.
+    """
+    __tablename__ = "analysis_feedback"
+
+    analysis_id = Column(GUID(), primary_key=True)
+    agree_count = Column(Integer, nullable=False, default=0)
+    disagree_count = Column(Integer, nullable=False, default=0)
+    disputed = Column(Boolean, nullable=False, default=False)
+    last_feedback_at = Column(DateTime, nullable=True)
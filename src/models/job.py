@@ -0,0 +1,30 @@
+# src/models/job.py
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, String
+
+from src.db.database import Base
+from src.models.analysis import GUID
+
+
+class PendingJob(Base):
+    """
+    Análise enfileirada no backend de jobs embutido (src/core/job_backends.py). A linha existe enquanto
+    o job não termina: se o processo cair, outro (ou o mesmo, ao reiniciar) retoma as linhas cujo
+    heartbeat parou. O conteúdo não é duplicado aqui, vem da própria análise.
+    """
+    __tablename__ = "pending_jobs"
+
+    analysis_id = Column(GUID(), primary_key=True) # Um job por análise
+    preferred_llm = Column(String, nullable=True)
+    status = Column(String, nullable=False, default="queued") # queued | running
+    attempts = Column(Integer, nullable=False, default=0)
+    owner = Column(String, nullable=True) # Processo que detém o job (host:pid:instância)
+    heartbeat_at = Column(DateTime, nullable=True) # Renovado pelo dono; parado há muito = job órfão
+    enqueued_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_pending_jobs_heartbeat", "heartbeat_at"),
+    )
@@ -0,0 +1,47 @@
+# src/models/ledger.py
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, LargeBinary, String
+
+from src.db.database import Base
+from src.models.analysis import GUID
+
+
+class LedgerBatch(Base):
+    """
+    Lote selado do ledger: raiz de Merkle das análises do lote, encadeada ao lote anterior
+    (batch_hash = sha256(sequência, prev_hash, raiz, tamanho, selado_em)). Só recebe inserts;
+    os campos de âncora são preenchidos uma vez, quando o backend confirma a publicação.
+    """
+    __tablename__ = "ledger_batches"
+
+    sequence = Column(Integer, primary_key=True, autoincrement=False) # 1, 2, 3... sem buracos
+    merkle_root = Column(String(64), nullable=False)
+    prev_hash = Column(String(64), nullable=False)
+    batch_hash = Column(String(64), nullable=False, unique=True)
+    size = Column(Integer, nullable=False)
+    sealed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_completed_at = Column(DateTime, nullable=True) # Marca d'água para achar as pendentes sem varrer tudo
+    anchor_backend = Column(String, nullable=True)
+    anchor_reference = Column(String, nullable=True)
+    anchored_at = Column(DateTime, nullable=True)
+
+
+class LedgerEntry(Base):
+    """
+    Análise incluída num lote: hash do registro e prova de inclusão compacta (irmãos concatenados
+    + bitmask de lados, ver src/utils/merkle.py), ~32·log2(n) bytes por análise.
+    """
+    __tablename__ = "ledger_entries"
+
+    analysis_id = Column(GUID(), primary_key=True)
+    batch_sequence = Column(Integer, nullable=False)
+    leaf_index = Column(Integer, nullable=False)
+    record_hash = Column(String(64), nullable=False) # sha256 do registro canônico da análise
+    proof = Column(LargeBinary, nullable=False)
+    proof_directions = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_ledger_entries_batch", "batch_sequence", "leaf_index"),
+    )
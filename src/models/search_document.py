@@ -0,0 +1,21 @@
+# src/models/search_document.py
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, Text
+
+from src.db.database import Base
+from src.models.analysis import GUID
+
+
+class SearchDocument(Base):
+    """
+    Documento de busca de uma análise finalizada (ver src/db/search_operations.py).
+    No SQLite guarda os radicais indexados e serve de tabela de conteúdo externo do FTS5
+    `analysis_fts`; no PostgreSQL recebe a coluna `search_vector` (tsvector com índice GIN).
+    """
+    __tablename__ = "search_documents"
+
+    id = Column(Integer, primary_key=True, autoincrement=True) # rowid do FTS5
+    analysis_id = Column(GUID(), ForeignKey("analyses.id", ondelete="CASCADE"), nullable=False, unique=True)
+    content_terms = Column(Text, nullable=True)
+    message_terms = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=True) # created_at da análise
@@ -0,0 +1,71 @@
+# src/models/source.py
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+
+from src.db.database import Base
+from src.models.analysis import GUID
+
+
+class Source(Base):
+    """
+    URL de fonte, armazenada uma única vez na forma canônica (ver src/utils/urls.py).
+    """
+    __tablename__ = "sources"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    url = Column(String, nullable=False, unique=True) # URL canônica
+    domain = Column(String, nullable=False, index=True)
+    first_seen_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Source(id={self.id}, url='{self.url}')>"
+
+
+class AnalysisSource(Base):
+    """
+    Associação N:N entre análises e fontes citadas, na ordem em que apareceram.
+    """
+    __tablename__ = "analysis_sources"
+
+    analysis_id = Column(GUID(), ForeignKey("analyses.id", ondelete="CASCADE"), primary_key=True)
+    source_id = Column(Integer, ForeignKey("sources.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_analysis_sources_source_id", "source_id"), # "quais análises citaram a fonte X"
+    )
+
+
+class DomainStats(Base):
+    """
+    Agregado por domínio, mantido incrementalmente pelo worker quando uma análise termina.
+    Cada análise conta uma vez por domínio, independentemente de quantas URLs dele citou.
+    """
+    __tablename__ = "domain_stats"
+
+    domain = Column(String, primary_key=True)
+    analyses_count = Column(Integer, nullable=False, default=0)
+    verdadeiro_count = Column(Integer, nullable=False, default=0)
+    fake_news_count = Column(Integer, nullable=False, default=0)
+    satira_count = Column(Integer, nullable=False, default=0)
+    opiniao_count = Column(Integer, nullable=False, default=0)
+    tendencioso_count = Column(Integer, nullable=False, default=0)
+    indefinido_count = Column(Integer, nullable=False, default=0)
+    last_cited_at = Column(DateTime, nullable=True)
+
+    @property
+    def conclusive_count(self) -> int:
+        return (self.verdadeiro_count or 0) + (self.fake_news_count or 0)
+
+    @property
+    def reliability_score(self) -> float:
+        """
+        Proporção suavizada (Laplace) de análises conclusivas (verdadeiro/fake_news)
+        entre as que citaram o domínio: o quanto as evidências do domínio costumam decidir o veredito.
+        """
+        return (self.conclusive_count + 1) / ((self.analyses_count or 0) + 2)
+
+    def __repr__(self):
+        return f"<DomainStats(domain='{self.domain}', analyses_count={self.analyses_count})>"
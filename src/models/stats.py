@@ -0,0 +1,48 @@
+# src/models/stats.py
+
+from sqlalchemy import Column, DateTime, Float, Integer, LargeBinary, PrimaryKeyConstraint, String
+
+from src.db.database import Base
+
+
+class AnalysisRollup(Base):
+    """
+    Contagens pré-agregadas de análises finalizadas por balde de tempo (hora ou dia, pela
+    data de criação) × classificação × status × provedor, mantidas incrementalmente pelo worker
+    (ver src/db/stats_operations.py). Dimensões ausentes são gravadas como "" (fazem parte da PK).
+    """
+    __tablename__ = "analysis_rollups"
+
+    granularity = Column(String(8), nullable=False) # "hour" | "day"
+    bucket_start = Column(DateTime, nullable=False)
+    classification = Column(String, nullable=False, default="")
+    status = Column(String, nullable=False, default="")
+    provider = Column(String, nullable=False, default="")
+    count = Column(Integer, nullable=False, default=0)
+    latency_sum_ms = Column(Float, nullable=False, default=0.0)
+    latency_sketch = Column(LargeBinary, nullable=True) # DDSketch serializado (src/utils/ddsketch.py)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("granularity", "bucket_start", "classification", "status", "provider"),
+    )
+
+
+class TierRollup(Base):
+    """
+    Por balde de tempo × nível do modelo: análises que começaram no nível (e quantas delas
+    escalonaram) e que terminaram nele, com a latência das chamadas à LLM das que terminaram.
+    Mantido junto com AnalysisRollup; alimenta GET /stats/tiers.
+    """
+    __tablename__ = "analysis_tier_rollups"
+
+    granularity = Column(String(8), nullable=False) # "hour" | "day"
+    bucket_start = Column(DateTime, nullable=False)
+    tier = Column(String(16), nullable=False)
+    started = Column(Integer, nullable=False, default=0)
+    escalated = Column(Integer, nullable=False, default=0)
+    finished = Column(Integer, nullable=False, default=0)
+    latency_sketch = Column(LargeBinary, nullable=True) # DDSketch de llm_latency_ms das análises finalizadas no nível
+
+    __table_args__ = (
+        PrimaryKeyConstraint("granularity", "bucket_start", "tier"),
+    )
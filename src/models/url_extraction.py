@@ -0,0 +1,21 @@
+# src/models/url_extraction.py
+
+from sqlalchemy import Column, DateTime, String
+
+from src.db.database import Base
+from src.db.compression import CompressedText
+
+
+class UrlExtraction(Base):
+    """
+    Texto principal extraído de uma URL enviada para análise, guardado pela URL canônica
+    (ver src/core/url_content.py). Falhas também são registradas (text vazio) por um prazo menor.
+    """
+    __tablename__ = "url_extractions"
+
+    url = Column(String, primary_key=True) # canonicalize_url da URL enviada
+    canonical_url = Column(String, nullable=True) # <link rel="canonical"> / og:url da página
+    final_url = Column(String, nullable=True) # Depois dos redirecionamentos
+    title = Column(String, nullable=True)
+    text = Column(CompressedText(), nullable=True)
+    extracted_at = Column(DateTime, nullable=False)
@@ -1,12 +1,12 @@
 # src/models/user.py
 
 from typing import Optional
-from sqlalchemy import Column, String, Boolean
+from sqlalchemy import Column, String, Boolean, Integer, text
 # Se você tiver relacionamentos, pode precisar de 'relationship'
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
 from fastapi_users_db_sqlalchemy import SQLAlchemyBaseUserTableUUID
-from fastapi_users.db import SQLAlchemyUserDatabase
+from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
 
 from src.db.database import Base, get_db_session_async # Importa get_db_session_async
 
@@ -18,7 +18,10 @@ class User(SQLAlchemyBaseUserTableUUID, Base):
     # Exemplo de campos adicionais se você quiser estender o modelo de usuário:
     # first_name = Column(String(255), nullable=True)
     # last_name = Column(String(255), nullable=True)
-    pass
+
+    # Vai na claim "ver" do JWT; incrementada ao trocar/redefinir a senha ou desativar o usuário,
+    # o que revoga os tokens já emitidos (ver src/core/auth_cache.py)
+    token_version = Column(Integer, nullable=False, default=0, server_default=text("0"))
 
 # Função para obter a sessão do banco de dados para o gerenciador de usuários
 async def get_user_db(session: AsyncSession = Depends(get_db_session_async)):
@@ -1,7 +1,25 @@
 from pydantic import BaseModel, Field, ConfigDict, computed_field
 from datetime import datetime
-from typing import Optional, List
+from functools import cached_property
+from typing import Dict, Optional, List
 import json
+import uuid
+
+from src.utils import fast_json
+
+
+def parse_sources(sources_raw: Optional[str]) -> List[str]:
+    """
+    Converte a string JSON de fontes armazenada no banco em uma lista.
+    Retorna lista vazia se o valor estiver ausente ou inválido.
+    """
+    if not sources_raw:
+        return []
+    try:
+        parsed = fast_json.loads(sources_raw)
+    except (json.JSONDecodeError, TypeError):
+        return []
+    return parsed if isinstance(parsed, list) else []
 
 class AnalysisCreate(BaseModel):
     content: str = Field(..., example="É verdade que comer chocolate ajuda na memória?")
@@ -21,24 +39,34 @@ class AnalyzeResponse(BaseModel):
     updated_at: datetime
     color: str = "⚫"
 
+    # cached_property: o JSON é decodificado uma única vez por objeto, mesmo com várias serializações
     @computed_field
-    @property
+    @cached_property
     def sources(self) -> List[str]:
-        if self.sources_raw:
-            try:
-                return json.loads(self.sources_raw)
-            except (json.JSONDecodeError, TypeError):
-                return []
-        return []
+        return parse_sources(self.sources_raw)
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class AnalysisDetail(BaseModel):
+    """
+    Corpo de GET /analysis/{id}: o payload servido pelo cache (ver serialize_analysis), com as fontes já como lista.
+    """
+    id: str
+    content: str
+    classification: Optional[str] = None
+    color: Optional[str] = None
+    status: str
+    sources: List[str] = Field(default_factory=list)
+    message: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
 class AnalysisStatus(BaseModel):
     id: str
     status: str
-    classification: str
-    color: str
+    classification: Optional[str] = None # Ainda sem veredito enquanto pendente
+    color: Optional[str] = None
 
 
 class AnalysisMessage(BaseModel):
@@ -57,14 +85,250 @@ class AnalysisResult(BaseModel):
     updated_at: datetime
     color: str
 
+    # cached_property: o JSON é decodificado uma única vez por objeto, mesmo com várias serializações
     @computed_field
-    @property
+    @cached_property
     def sources(self) -> List[str]:
-        if self.sources_raw:
-            try:
-                return json.loads(self.sources_raw)
-            except (json.JSONDecodeError, TypeError):
-                return []
-        return []
+        return parse_sources(self.sources_raw)
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AnalysisHistoryItem(BaseModel):
+    """
+    Item leve do histórico: não carrega `message` nem o `content` completo,
+    apenas um trecho inicial do conteúdo calculado no próprio banco.
+    """
+    id: str
+    status: str
+    classification: Optional[str] = None
+    color: Optional[str] = None
+    content_preview: str
+    created_at: datetime
+
+
+class DomainStatsResponse(BaseModel):
+    domain: str
+    analyses_count: int
+    verdadeiro_count: int
+    fake_news_count: int
+    satira_count: int
+    opiniao_count: int
+    tendencioso_count: int
+    indefinido_count: int
+    reliability_score: float
+    last_cited_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class DuplicateContent(BaseModel):
+    hash: str
+    preview: Optional[str] = None
+    ref_count: int
+    first_seen_at: Optional[datetime] = None
+    last_seen_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SearchHit(BaseModel):
+    id: str
+    status: str
+    classification: Optional[str] = None
+    color: Optional[str] = None
+    score: float
+    content_snippet: Optional[str] = None # Fragmento HTML: texto escapado, termos entre <mark></mark>
+    message_snippet: Optional[str] = None
+    created_at: datetime
+
+
+class SearchResponse(BaseModel):
+    """
+    Página de resultados da busca; `next_cursor` é None na última página.
+    """
+    query: str
+    results: List[SearchHit]
+    next_cursor: Optional[str] = None
+
+
+class LatencySummary(BaseModel):
+    """
+    Latência (ms) entre a criação e o resultado final; percentis estimados por DDSketch (erro relativo ~1%).
+    """
+    count: int
+    mean: Optional[float] = None
+    max: Optional[float] = None
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+
+
+class StatsBucket(BaseModel):
+    bucket_start: datetime
+    count: int
+    by_classification: Dict[str, int]
+    latency_ms: LatencySummary
+
+
+class StatsResponse(BaseModel):
+    granularity: str
+    since: datetime
+    until: datetime
+    total: int
+    by_classification: Dict[str, int]
+    by_status: Dict[str, int]
+    by_provider: Dict[str, int]
+    latency_ms: LatencySummary
+    buckets: List[StatsBucket]
+
+
+class TierStats(BaseModel):
+    """
+    Um nível de modelo: análises que começaram nele, que terminaram nele, fração das que começaram
+    e precisaram subir de nível e latência das chamadas à LLM (das que terminaram nele).
+    """
+    tier: str
+    started: int
+    finished: int
+    escalation_rate: Optional[float] = None
+    latency_ms: LatencySummary
+
+
+class TierStatsResponse(BaseModel):
+    since: datetime
+    until: datetime
+    total: int
+    escalation_rate: Optional[float] = None
+    tiers: List[TierStats]
+
+
+class LLMAttemptCost(BaseModel):
+    phase: str
+    provider: str
+    model: Optional[str] = None
+    outcome: str # "ok", "invalid", "error", "rate_limited", "throttled" (não chegou a sair) ou "cancelled"
+    input_tokens: int
+    output_tokens: int
+    cached_tokens: int
+    estimated: bool # Tokens contados localmente: o provedor não informou o uso
+    latency_ms: float
+    cost_usd: float
+    billed: bool = True # False: o provedor não respondeu; fica de fora dos totais
+
+
+class AnalysisCostResponse(BaseModel):
+    """
+    Custo de uma análise. Tempos por fase somam tarefas paralelas; tentativas incluem as que falharam.
+    """
+    analysis_id: uuid.UUID
+    created_at: datetime
+    decision_path: Optional[str] = None
+    provider: Optional[str] = None
+    total_ms: Optional[float] = None
+    llm_calls: int
+    failed_calls: int
+    input_tokens: int
+    output_tokens: int
+    cached_tokens: int
+    search_calls: int
+    cache_hits: int
+    cost_usd: float
+    phases_ms: Dict[str, float]
+    attempts: List[LLMAttemptCost]
+    search_calls_by_kind: Dict[str, int]
+    cache_hits_by_kind: Dict[str, int]
+
+
+class CostDay(BaseModel):
+    day: datetime
+    cost_usd: float
+    calls: int
+    input_tokens: int
+    output_tokens: int
+    by_provider: Dict[str, float]
+
+
+class CostBreakdown(BaseModel):
+    provider: str
+    model: str
+    phase: str
+    calls: int
+    failed_calls: int
+    input_tokens: int
+    output_tokens: int
+    cached_tokens: int
+    cost_usd: float
+    avg_latency_ms: Optional[float] = None
+
+
+class ExpensiveAnalysis(BaseModel):
+    analysis_id: uuid.UUID
+    created_at: datetime
+    provider: Optional[str] = None
+    llm_calls: int
+    input_tokens: int
+    output_tokens: int
+    cost_usd: float
+    total_ms: Optional[float] = None
+
+
+class CostStatsResponse(BaseModel):
+    since: datetime
+    until: datetime
+    total_cost_usd: float
+    daily_budget_usd: Optional[float] = None
+    days: List[CostDay]
+    breakdown: List[CostBreakdown]
+    most_expensive: List[ExpensiveAnalysis]
+
+
+class LedgerProofStep(BaseModel):
+    hash: str
+    position: str # "left" | "right": lado do irmão ao subir na árvore
+
+
+class LedgerBatchInfo(BaseModel):
+    sequence: int
+    merkle_root: str
+    prev_hash: str
+    batch_hash: str
+    size: int
+    sealed_at: datetime
+    anchor_backend: Optional[str] = None
+    anchor_reference: Optional[str] = None
+    anchored_at: Optional[datetime] = None
+
+
+class LedgerProofResponse(BaseModel):
+    """
+    Prova de inclusão da análise no ledger: folha = sha256(0x00 || record_hash), nós =
+    sha256(0x01 || esquerda || direita), até merkle_root do lote.
+    """
+    analysis_id: uuid.UUID
+    record_hash: str
+    leaf_index: int
+    proof: List[LedgerProofStep]
+    batch: LedgerBatchInfo
+    record_matches: bool # O registro atual da análise ainda tem o hash selado
+    verified: bool
+    verification_us: float
+
+
+class CrawlDomainReport(BaseModel):
+    """
+    Crawler de evidências, por domínio: vazão, novas/alteradas e atraso de frescor (publicação → índice).
+    """
+    domain: str
+    fetched: int = 0
+    new: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    pages_per_hour: Optional[float] = None
+    pages_per_second: Optional[float] = None
+    freshness_lag_p50_seconds: Optional[float] = None
+    freshness_lag_p95_seconds: Optional[float] = None
+    overdue_urls: int = 0
+    max_overdue_seconds: float = 0.0
@@ -1,8 +1,10 @@
 # src/schemas/user_schemas.py
+import uuid
+
 from fastapi_users import schemas
 from pydantic import ConfigDict # Importar ConfigDict para Pydantic v2
 
-class UserRead(schemas.BaseUser[int]):
+class UserRead(schemas.BaseUser[uuid.UUID]):
     model_config = ConfigDict(from_attributes=True) # <<< ADICIONE ESTA LINHA PARA PYDANTIC V2
     pass # Você pode adicionar campos aqui se quiser que sejam retornados na leitura
 
@@ -0,0 +1,180 @@
+# src/utils/article.py
+#
+# Extração do texto principal de páginas de notícia, sem navegador: pontuação por densidade de
+# texto no estilo Readability sobre a árvore lxml. Parágrafos longos, com vírgulas e poucos links
+# dão pontos ao elemento pai (e metade ao avô); classes/ids típicos de conteúdo ou de menus
+# ajustam a pontuação. O texto final vem do melhor candidato e dos irmãos com pontuação próxima.
+
+import re
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+from lxml import etree
+
+BOILERPLATE_TAGS = (
+    "script", "style", "noscript", "template", "svg", "iframe", "object", "embed",
+    "nav", "header", "footer", "aside", "form", "button", "select", "input", "figure",
+)
+PARAGRAPH_TAGS = {"p", "pre", "blockquote", "td", "li", "h2", "h3"}
+OUTPUT_TAGS = ("p", "pre", "blockquote", "li", "h1", "h2", "h3", "h4")
+MIN_PARAGRAPH_CHARS = 25
+SIBLING_SCORE_RATIO = 0.2
+
+_POSITIVE = re.compile(r"article|body|content|entry|hentry|main|page|post|text|blog|story|materia|noticia|corpo", re.I)
+_NEGATIVE = re.compile(
+    r"comment|comentario|meta|footer|footnote|foot|nav|menu|sidebar|share|compartilh|social|related|relacionad|"
+    r"promo|banner|sponsor|publicidade|advert|\bads?\b|cookie|newsletter|popup|modal|breadcrumb|tags|author-bio",
+    re.I,
+)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class Article:
+    __slots__ = ("title", "text", "canonical_url", "final_url")
+
+    def __init__(self, title: Optional[str], text: str, canonical_url: Optional[str], final_url: Optional[str] = None):
+        self.title = title
+        self.text = text
+        self.canonical_url = canonical_url
+        self.final_url = final_url
+
+
+def _clean(text: Optional[str]) -> str:
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+
+def _class_weight(element) -> int:
+    weight = 0
+    for attribute in (element.get("class"), element.get("id")):
+        if attribute:
+            if _NEGATIVE.search(attribute):
+                weight -= 25
+            if _POSITIVE.search(attribute):
+                weight += 25
+    return weight
+
+
+def _link_density(element) -> float:
+    text_length = len(_clean(element.text_content()))
+    if not text_length:
+        return 0.0
+    link_length = sum(len(_clean(a.text_content())) for a in element.iter("a"))
+    return link_length / text_length
+
+
+def _meta(tree, *names: str) -> Optional[str]:
+    for name in names:
+        for node in tree.xpath(f'//meta[@property="{name}" or @name="{name}"]/@content'):
+            value = _clean(node)
+            if value:
+                return value
+    return None
+
+
+def extract_title(tree) -> Optional[str]:
+    title = _meta(tree, "og:title", "twitter:title")
+    if title:
+        return title
+    for xpath in ("//h1", "//title"):
+        nodes = tree.xpath(xpath)
+        if nodes and _clean(nodes[0].text_content()):
+            return _clean(nodes[0].text_content())
+    return None
+
+
+def extract_canonical_url(tree, base_url: str) -> Optional[str]:
+    hrefs = tree.xpath('//link[@rel="canonical"]/@href')
+    href = hrefs[0].strip() if hrefs else _meta(tree, "og:url")
+    return urljoin(base_url, href) if href else None
+
+
+def _remove_boilerplate(tree) -> None:
+    etree.strip_elements(tree, *BOILERPLATE_TAGS, with_tail=False)
+    for element in list(tree.iter("div", "section", "ul", "table", "span")):
+        attributes = f"{element.get('class', '')} {element.get('id', '')}"
+        if _NEGATIVE.search(attributes) and not _POSITIVE.search(attributes) and element.getparent() is not None:
+            element.drop_tree()
+
+
+def _score_candidates(tree) -> Dict[etree._Element, float]:
+    scores: Dict[etree._Element, float] = {}
+    for paragraph in tree.iter(*PARAGRAPH_TAGS):
+        text = _clean(paragraph.text_content())
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+        points = 1 + text.count(",") + min(len(text) // 100, 3)
+        parent = paragraph.getparent()
+        grandparent = parent.getparent() if parent is not None else None
+        for node, share in ((parent, 1.0), (grandparent, 0.5)):
+            if node is None or not isinstance(node.tag, str):
+                continue
+            if node not in scores:
+                scores[node] = _class_weight(node) + (5 if node.tag in ("article", "main") else 0)
+            scores[node] += points * share
+    # Penaliza candidatos feitos de links (listas de manchetes, menus)
+    return {node: score * (1 - _link_density(node)) for node, score in scores.items()}
+
+
+def _collect_text(container) -> List[str]:
+    blocks = []
+    for element in container.iter(*OUTPUT_TAGS):
+        # Evita repetir o texto de blocos aninhados (ex.: <li><p>...</p></li>)
+        if any(ancestor.tag in OUTPUT_TAGS for ancestor in element.iterancestors() if ancestor is not container):
+            continue
+        text = _clean(element.text_content())
+        if not text:
+            continue
+        if element.tag.startswith("h") or (len(text) >= MIN_PARAGRAPH_CHARS and _link_density(element) < 0.5):
+            blocks.append(text)
+    if not blocks:
+        text = _clean(container.text_content())
+        if text:
+            blocks.append(text)
+    return blocks
+
+
+def extract_article(tree, base_url: str) -> Optional[Article]:
+    """
+    Extrai título, URL canônica e texto principal de um documento lxml já parseado.
+    Retorna None se nenhum bloco de texto relevante for encontrado.
+    """
+    title = extract_title(tree)
+    canonical_url = extract_canonical_url(tree, base_url)
+    _remove_boilerplate(tree)
+
+    scores = _score_candidates(tree)
+    if not scores:
+        return None
+    best = max(scores, key=scores.get)
+    threshold = max(10.0, scores[best] * SIBLING_SCORE_RATIO)
+
+    # O corpo de uma matéria costuma vir dividido em vários blocos irmãos
+    parent = best.getparent()
+    containers = [best]
+    if parent is not None:
+        containers = [
+            node for node in parent
+            if node is best or (isinstance(node.tag, str) and scores.get(node, 0) >= threshold)
+        ]
+
+    blocks: List[str] = []
+    for container in containers:
+        blocks.extend(_collect_text(container))
+    text = "\n\n".join(dict.fromkeys(blocks)) # Remove parágrafos repetidos mantendo a ordem
+    if not text:
+        return None
+    return Article(title=title, text=text, canonical_url=canonical_url, final_url=base_url)
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    """
+    Corta o texto em até max_chars, preferindo o fim de um parágrafo ou frase.
+    """
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    for separator in ("\n\n", ". ", " "):
+        position = cut.rfind(separator)
+        if position >= max_chars * 0.6:
+            return cut[: position + (1 if separator == ". " else 0)].rstrip() + " […]"
+    return cut.rstrip() + " […]"
@@ -0,0 +1,22 @@
+# src/utils/content_hash.py
+
+import hashlib
+import re
+import unicodedata
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_content(text: str) -> str:
+    """
+    Forma normalizada usada apenas para o hash: Unicode NFKC e espaços colapsados.
+    Reenvios do mesmo texto com quebras de linha/espaços diferentes geram o mesmo hash.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def content_hash(text: str) -> str:
+    """
+    SHA-256 (hex) do conteúdo normalizado: chave natural da tabela `contents`.
+    """
+    return hashlib.sha256(normalize_content(text).encode("utf-8")).hexdigest()
@@ -0,0 +1,121 @@
+# src/utils/ddsketch.py
+
+import math
+from typing import Dict, Iterable, Optional
+
+from src.utils import fast_json
+
+
+class DDSketch:
+    """
+    Sketch de quantis com erro relativo garantido (DDSketch, Masson et al. 2019).
+    Valores caem em baldes logarítmicos; dois sketches com o mesmo `relative_accuracy`
+    são combinados somando os baldes, o que permite juntar horas em dias sem perder precisão.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0 # Valores <= 0 (ex.: veredito reaproveitado, sem espera)
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value: float, weight: int = 1) -> None:
+        if value > 0:
+            key = self._index(value)
+            self.bins[key] = self.bins.get(key, 0) + weight
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        else:
+            self.zero_count += weight
+        self.count += weight
+        self.sum += value * weight
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def _collapse(self) -> None:
+        """
+        Junta os baldes mais baixos: a precisão só se perde nos quantis inferiores.
+        """
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins
+        merged = sum(self.bins.pop(k) for k in keys[: excess + 1])
+        self.bins[keys[excess]] = self.bins.get(keys[excess], 0) + merged
+
+    def merge(self, other: "DDSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Sketches com precisões diferentes não podem ser combinados.")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                # O estimador nunca sai do intervalo realmente observado
+                return min(max(self._value(key), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def to_bytes(self) -> bytes:
+        return fast_json.dumps({
+            "a": self.relative_accuracy,
+            "b": [[k, c] for k, c in self.bins.items()],
+            "z": self.zero_count,
+            "n": self.count,
+            "s": self.sum,
+            "lo": self.min,
+            "hi": self.max,
+        })
+
+    @classmethod
+    def from_bytes(cls, data) -> "DDSketch":
+        raw = fast_json.loads(bytes(data))
+        sketch = cls(relative_accuracy=raw["a"])
+        sketch.bins = {int(k): int(c) for k, c in raw["b"]}
+        sketch.zero_count = raw["z"]
+        sketch.count = raw["n"]
+        sketch.sum = raw["s"]
+        sketch.min = raw["lo"]
+        sketch.max = raw["hi"]
+        return sketch
+
+    @classmethod
+    def from_values(cls, values: Iterable[float], relative_accuracy: float = 0.01) -> "DDSketch":
+        sketch = cls(relative_accuracy=relative_accuracy)
+        for value in values:
+            sketch.add(value)
+        return sketch
@@ -0,0 +1,29 @@
+# src/utils/fast_json.py
+
+import json
+from typing import Any
+
+# orjson é opcional: quando instalado, (de)serializa várias vezes mais rápido que o json da stdlib.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+
+def loads(data: Any) -> Any:
+    """
+    Decodifica JSON a partir de str/bytes usando orjson quando disponível.
+    Levanta json.JSONDecodeError (orjson.JSONDecodeError é subclasse) em caso de erro.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serializa um objeto para bytes JSON (UTF-8, sem escapar caracteres não-ASCII).
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
@@ -0,0 +1,402 @@
+# src/utils/http_fetch.py
+
+import asyncio
+import hashlib
+import ipaddress
+import json
+import logging
+import os
+import re
+import socket
+import time
+import weakref
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import httpcore
+import httpx
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 exige o pacote h2 (httpx[http2]); sem ele o cliente usa HTTP/1.1 com keep-alive.
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    HTTP2_AVAILABLE = False
+
+TEXT_CONTENT_TYPES = (
+    "text/html", "application/xhtml+xml", "text/plain", "application/xml", "text/xml",
+    "application/rss+xml", "application/atom+xml", # Feeds do crawler de evidências
+)
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+class UnsafeURLError(Exception):
+    """URL fora da política de download: esquema/porta não padrão ou destino que não é público."""
+
+
+def _is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0]) # Remove o escopo de endereços IPv6 link-local
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global
+
+
+async def _resolve_public(host: str, port: int) -> List[str]:
+    """
+    Endereços de `host`, exigindo que todos sejam públicos (ip_address(...).is_global): loopback,
+    redes privadas, link-local (169.254.169.254), CGNAT e afins são recusados.
+    """
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        raise UnsafeURLError(f"não foi possível resolver {host}: {e}") from e
+    addresses = list(dict.fromkeys(info[4][0] for info in infos))
+    blocked = [address for address in addresses if not _is_public_address(address)]
+    if not addresses or blocked:
+        raise UnsafeURLError(f"{host} resolve para endereço não público ({', '.join(blocked) or 'nenhum'})")
+    return addresses
+
+
+async def ensure_public_url(url: str) -> None:
+    """Só http/https, na porta padrão do esquema, para hosts que resolvem apenas para endereços públicos."""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS:
+        raise UnsafeURLError(f"esquema não permitido: {scheme or '(vazio)'}")
+    try:
+        port = parts.port
+    except ValueError as e:
+        raise UnsafeURLError(str(e)) from e
+    if port is not None and port != _DEFAULT_PORTS[scheme]:
+        raise UnsafeURLError(f"porta não permitida: {port}")
+    if not parts.hostname or parts.username is not None or parts.password is not None:
+        raise UnsafeURLError("URL sem host ou com credenciais")
+    await _resolve_public(parts.hostname, _DEFAULT_PORTS[scheme])
+
+
+class _PublicOnlyNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    Backend de rede do transporte: resolve o host na hora de conectar, recusa destinos não públicos
+    e conecta ao próprio endereço verificado (sem nova resolução: fecha a janela de DNS rebinding).
+    O SNI e o Host continuam sendo os da URL.
+    """
+
+    def __init__(self):
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        try:
+            addresses = await _resolve_public(host, port)
+        except UnsafeURLError as e:
+            raise httpcore.ConnectError(str(e)) from e
+        return await self._backend.connect_tcp(addresses[0], port, timeout=timeout, local_address=local_address, socket_options=socket_options)
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        raise httpcore.ConnectError("sockets unix não são permitidos")
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class _PublicOnlyTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport do httpx com o pool do httpcore ligado a _PublicOnlyNetworkBackend."""
+
+    def __init__(self, http2: bool, limits: httpx.Limits):
+        super().__init__(http2=http2, limits=limits)
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            network_backend=_PublicOnlyNetworkBackend(),
+        )
+
+
+class FetchResult:
+    """
+    Resposta baixada (ou servida do cache em disco). `body` tem no máximo SCRAPER_MAX_BYTES;
+    `truncated` indica que o corpo foi cortado no limite.
+    """
+    __slots__ = ("url", "final_url", "status_code", "content_type", "encoding", "body", "from_cache", "truncated")
+
+    def __init__(self, url, final_url, status_code, content_type, encoding, body, from_cache=False, truncated=False):
+        self.url = url
+        self.final_url = final_url
+        self.status_code = status_code
+        self.content_type = content_type
+        self.encoding = encoding
+        self.body = body
+        self.from_cache = from_cache
+        self.truncated = truncated
+
+    def __repr__(self):
+        return f"<FetchResult(url='{self.url}', status={self.status_code}, bytes={len(self.body)}, cache={self.from_cache})>"
+
+
+class HttpDiskCache:
+    """
+    Cache HTTP em disco: corpo + metadados (ETag, Last-Modified, max-age) por URL.
+    Entradas frescas são servidas sem rede; as demais são revalidadas com GET condicional.
+    """
+
+    def __init__(self, directory: Optional[str], enabled: bool = True):
+        self.directory = directory
+        self.enabled = enabled and bool(directory)
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key[:2], key)
+        return base + ".json", base + ".body"
+
+    def load(self, url: str):
+        """
+        Retorna (metadados, corpo) ou None.
+        """
+        if not self.enabled:
+            return None
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None
+
+    def store(self, url: str, response: httpx.Response, body: bytes) -> None:
+        if not self.enabled:
+            return
+        cache_control = response.headers.get("cache-control", "").lower()
+        if "no-store" in cache_control:
+            return
+        etag, last_modified = response.headers.get("etag"), response.headers.get("last-modified")
+        max_age = _MAX_AGE.search(cache_control)
+        if not (etag or last_modified or max_age):
+            return # Sem validadores nem frescor não há ganho em guardar
+        meta = {
+            "url": url,
+            "final_url": str(response.url),
+            "status_code": response.status_code,
+            "content_type": response.headers.get("content-type", ""),
+            "encoding": response.charset_encoding,
+            "etag": etag,
+            "last_modified": last_modified,
+            "max_age": int(max_age.group(1)) if max_age and "no-cache" not in cache_control else 0,
+            "stored_at": time.time(),
+        }
+        self._write(url, meta, body)
+
+    def touch(self, url: str, meta: dict, body: bytes, response: httpx.Response) -> None:
+        """
+        Revalidação 304: renova o frescor (e validadores, se o servidor enviar novos).
+        """
+        meta["etag"] = response.headers.get("etag", meta.get("etag"))
+        meta["last_modified"] = response.headers.get("last-modified", meta.get("last_modified"))
+        max_age = _MAX_AGE.search(response.headers.get("cache-control", "").lower())
+        if max_age:
+            meta["max_age"] = int(max_age.group(1))
+        meta["stored_at"] = time.time()
+        self._write(url, meta, body)
+
+    def _write(self, url: str, meta: dict, body: bytes) -> None:
+        meta_path, body_path = self._paths(url)
+        try:
+            os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+            for path, data, mode in ((body_path, body, "wb"), (meta_path, json.dumps(meta).encode("utf-8"), "wb")):
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, mode) as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Falha ao gravar cache HTTP de {url}: {e}")
+
+    @staticmethod
+    def is_fresh(meta: dict) -> bool:
+        return meta.get("max_age", 0) > 0 and time.time() - meta.get("stored_at", 0) < meta["max_age"]
+
+    @staticmethod
+    def conditional_headers(meta: dict) -> Dict[str, str]:
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+
+class FetchEngine:
+    """
+    Motor de download assíncrono com um único httpx.AsyncClient (pool de conexões, HTTP/2 quando
+    disponível), limite de concorrência por host, intervalo mínimo entre requisições ao mesmo host,
+    timeouts estritos e leitura em streaming com teto de tamanho.
+    Um motor pertence a um event loop; use get_fetch_engine().
+    As URLs vêm de usuários (envio de URL para análise): só destinos públicos são baixados
+    (ensure_public_url), e os redirecionamentos são seguidos aqui, verificando cada salto.
+    O transporte também recusa conexões a endereços não públicos, e proxies do ambiente são ignorados.
+    """
+
+    def __init__(self):
+        http2 = settings.SCRAPER_HTTP2 and HTTP2_AVAILABLE
+        limits = httpx.Limits(
+            max_connections=settings.SCRAPER_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SCRAPER_MAX_CONNECTIONS,
+        )
+        self.client = httpx.AsyncClient(
+            transport=_PublicOnlyTransport(http2, limits),
+            follow_redirects=False,
+            timeout=httpx.Timeout(settings.SCRAPER_TIMEOUT_SECONDS, connect=settings.SCRAPER_CONNECT_TIMEOUT_SECONDS),
+            headers={"User-Agent": settings.SCRAPER_USER_AGENT, "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.5"},
+        )
+        self.cache = HttpDiskCache(settings.HTTP_CACHE_DIR, settings.HTTP_CACHE_ENABLED)
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._host_locks: Dict[str, asyncio.Lock] = {}
+        self._host_last_request: Dict[str, float] = {}
+
+    async def _polite_wait(self, host: str) -> None:
+        """
+        Garante SCRAPER_POLITENESS_DELAY_SECONDS entre o início de duas requisições ao mesmo host.
+        """
+        delay = settings.SCRAPER_POLITENESS_DELAY_SECONDS
+        if delay <= 0:
+            return
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            wait = self._host_last_request.get(host, 0.0) + delay - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._host_last_request[host] = time.monotonic()
+
+    async def fetch(self, url: str) -> Optional[FetchResult]:
+        """
+        Baixa uma URL de texto/HTML. Retorna None em erro, timeout, status != 2xx ou tipo não textual.
+        """
+        host = urlsplit(url).hostname or ""
+        try:
+            await ensure_public_url(url) # Antes do cache: entradas antigas de destinos internos não são servidas
+        except UnsafeURLError as e:
+            logger.warning(f"Download de {url} recusado: {e}")
+            return None
+        cached = self.cache.load(url)
+        if cached is not None and HttpDiskCache.is_fresh(cached[0]):
+            return self._from_cache(url, *cached)
+
+        slot = self._host_slots.setdefault(host, asyncio.Semaphore(settings.SCRAPER_PER_HOST_LIMIT))
+        async with slot:
+            await self._polite_wait(host)
+            headers = HttpDiskCache.conditional_headers(cached[0]) if cached is not None else {}
+            try:
+                return await asyncio.wait_for(self._get(url, headers, cached), timeout=settings.SCRAPER_TOTAL_TIMEOUT_SECONDS)
+            except UnsafeURLError as e:
+                logger.warning(f"Download de {url} recusado: {e}")
+                return None
+            except (httpx.HTTPError, asyncio.TimeoutError) as e:
+                logger.info(f"Falha ao baixar {url}: {type(e).__name__}: {e}")
+                return None
+
+    async def _get(self, url: str, headers: Dict[str, str], cached) -> Optional[FetchResult]:
+        current = url
+        for hop in range(settings.SCRAPER_MAX_REDIRECTS + 1):
+            if hop:
+                await ensure_public_url(current) # O primeiro salto já foi verificado em fetch()
+            async with self.client.stream("GET", current, headers=headers) as response:
+                if response.is_redirect:
+                    location = response.headers.get("location")
+                    if not location:
+                        return None
+                    current = str(response.url.join(location))
+                    headers = {} # Validadores do cache valem só para a URL original
+                    continue
+                return await self._read(url, response, cached)
+        logger.info(f"{url}: mais de {settings.SCRAPER_MAX_REDIRECTS} redirecionamentos.")
+        return None
+
+    async def _read(self, url: str, response: httpx.Response, cached) -> Optional[FetchResult]:
+        if response.status_code == 304 and cached is not None:
+            meta, body = cached
+            self.cache.touch(url, meta, body, response)
+            return self._from_cache(url, meta, body)
+        if not response.is_success:
+            logger.info(f"{url} respondeu {response.status_code}.")
+            return None
+        content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type and not content_type.startswith(TEXT_CONTENT_TYPES):
+            logger.info(f"{url} ignorada: tipo {content_type}.")
+            return None
+        declared = response.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > settings.SCRAPER_MAX_BYTES * 4:
+            logger.info(f"{url} ignorada: {declared} bytes declarados.")
+            return None
+
+        chunks, size, truncated = [], 0, False
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= settings.SCRAPER_MAX_BYTES:
+                truncated = True
+                break
+        body = b"".join(chunks)[: settings.SCRAPER_MAX_BYTES]
+        if not truncated:
+            self.cache.store(url, response, body)
+        return FetchResult(
+            url=url,
+            final_url=str(response.url),
+            status_code=response.status_code,
+            content_type=content_type,
+            encoding=response.charset_encoding,
+            body=body,
+            truncated=truncated,
+        )
+
+    @staticmethod
+    def _from_cache(url: str, meta: dict, body: bytes) -> FetchResult:
+        return FetchResult(
+            url=url,
+            final_url=meta.get("final_url", url),
+            status_code=meta.get("status_code", 200),
+            content_type=meta.get("content_type", "").split(";")[0].strip().lower(),
+            encoding=meta.get("encoding"),
+            body=body,
+            from_cache=True,
+        )
+
+    async def fetch_many(self, urls: Iterable[str]) -> Dict[str, Optional[FetchResult]]:
+        """
+        Baixa todas as URLs em paralelo (respeitando os limites por host): o tempo total
+        é o da página mais lenta, não a soma.
+        """
+        unique = list(dict.fromkeys(urls))
+        results: List[Optional[FetchResult]] = await asyncio.gather(*(self.fetch(url) for url in unique))
+        return dict(zip(unique, results))
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+_engines: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, FetchEngine]" = weakref.WeakKeyDictionary()
+
+
+def get_fetch_engine() -> FetchEngine:
+    """
+    Motor compartilhado do event loop atual (o cliente httpx e os semáforos são ligados ao loop).
+    """
+    loop = asyncio.get_running_loop()
+    engine = _engines.get(loop)
+    if engine is None:
+        engine = _engines[loop] = FetchEngine()
+    return engine
+
+
+async def close_fetch_engine() -> None:
+    """
+    Fecha o motor do event loop atual (ex.: ao final de um asyncio.run em código síncrono).
+    """
+    engine = _engines.pop(asyncio.get_running_loop(), None)
+    if engine is not None:
+        await engine.aclose()
@@ -0,0 +1,63 @@
+# src/utils/merkle.py
+#
+# Árvore de Merkle com separação de domínio no estilo da RFC 6962 (folha: 0x00 || dado,
+# nó interno: 0x01 || esquerda || direita), o que impede apresentar um nó interno como folha.
+# Nó sem par num nível sobe inalterado (sem duplicar a última folha, que permitiria duas
+# listas diferentes com a mesma raiz). Provas de inclusão têm no máximo ceil(log2 n) irmãos.
+
+import hashlib
+from typing import List, Sequence, Tuple
+
+HASH_SIZE = 32
+
+
+def leaf_hash(data: bytes) -> bytes:
+    return hashlib.sha256(b"\x00" + data).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def build_levels(leaves: Sequence[bytes]) -> List[List[bytes]]:
+    """Níveis da árvore, das folhas (já com leaf_hash) até a raiz."""
+    if not leaves:
+        raise ValueError("Árvore de Merkle sem folhas.")
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def inclusion_proof(levels: List[List[bytes]], index: int) -> Tuple[bytes, int]:
+    """
+    Prova compacta da folha `index`: os irmãos concatenados (32 bytes cada, da folha para a raiz)
+    e um bitmask de lados (bit i = 1: o i-ésimo irmão fica à esquerda).
+    """
+    siblings, directions = [], 0
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            if sibling < index:
+                directions |= 1 << len(siblings)
+            siblings.append(level[sibling])
+        index //= 2
+    return b"".join(siblings), directions
+
+
+def root_from_proof(leaf: bytes, siblings: bytes, directions: int) -> bytes:
+    node = leaf
+    for i in range(len(siblings) // HASH_SIZE):
+        sibling = siblings[i * HASH_SIZE:(i + 1) * HASH_SIZE]
+        node = node_hash(sibling, node) if directions >> i & 1 else node_hash(node, sibling)
+    return node
+
+
+def verify_inclusion(leaf: bytes, siblings: bytes, directions: int, root: bytes) -> bool:
+    if len(siblings) % HASH_SIZE:
+        return False
+    return root_from_proof(leaf, siblings, directions) == root
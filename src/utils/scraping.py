@@ -1,28 +1,99 @@
-# Esta função analisa uma URL e compara com portais confiáveis para ajudar a detectar fake news
-def analisar_url(url: str):
-    # lógica aqui
-    ...
+# src/utils/scraping.py
 
+import asyncio
+import logging
+import re
+from typing import Dict, Iterable, Optional
 
-from bs4 import BeautifulSoup
-import requests
+import lxml.html
+from lxml import etree
 
-def scrape_website(url):
-    """Scrapes the content of a given website URL."""
+from src.core.event_loops import run_sync
+from src.utils.article import Article, extract_article
+from src.utils.http_fetch import FetchResult, get_fetch_engine
+
+logger = logging.getLogger(__name__)
+
+# Elementos sem texto útil, removidos antes de extrair o texto
+NON_CONTENT_TAGS = ("script", "style", "noscript", "template", "svg", "iframe", "object", "embed", "head")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def parse_html(result: FetchResult) -> Optional[etree._Element]:
+    """
+    Monta a árvore lxml da página. Usa o charset do cabeçalho HTTP quando existir;
+    caso contrário o lxml detecta pelo <meta charset>.
+    """
+    if not result.body:
+        return None
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for bad responses
-        soup = BeautifulSoup(response.text, 'html.parser')
-        return soup.get_text()  # Return the text content of the page
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching {url}: {e}")
+        if result.encoding:
+            parser = lxml.html.HTMLParser(encoding=result.encoding, remove_comments=True)
+            return lxml.html.document_fromstring(result.body, parser=parser)
+        return lxml.html.document_fromstring(result.body, parser=lxml.html.HTMLParser(remove_comments=True))
+    except (etree.ParserError, ValueError, LookupError) as e:
+        logger.info(f"HTML inválido em {result.url}: {e}")
         return None
 
+
+def html_to_text(tree: etree._Element) -> str:
+    """
+    Texto visível do documento, com espaços normalizados.
+    """
+    etree.strip_elements(tree, *NON_CONTENT_TAGS, with_tail=False)
+    return _WHITESPACE.sub(" ", tree.text_content()).strip()
+
+
+def result_to_text(result: Optional[FetchResult]) -> Optional[str]:
+    if result is None:
+        return None
+    if result.content_type == "text/plain":
+        return result.body.decode(result.encoding or "utf-8", errors="replace").strip() or None
+    tree = parse_html(result)
+    return (html_to_text(tree) or None) if tree is not None else None
+
+
+async def fetch_page_text(url: str) -> Optional[str]:
+    """Baixa uma página e retorna seu texto (None em caso de erro)."""
+    return result_to_text(await get_fetch_engine().fetch(url))
+
+
+async def extract_reliable_sources_async(urls: Iterable[str]) -> Dict[str, str]:
+    """Baixa as fontes em paralelo e retorna {url: texto} das que responderam."""
+    results = await get_fetch_engine().fetch_many(urls)
+    # O parsing é CPU: fora do event loop para não travar as demais requisições
+    texts = await asyncio.gather(*(asyncio.to_thread(result_to_text, result) for result in results.values()))
+    return {url: text for url, text in zip(results, texts) if text}
+
+
+async def fetch_article(url: str) -> Optional[Article]:
+    """
+    Baixa a página e extrai título, URL canônica e texto principal (sem menus, rodapés, anúncios).
+    """
+    result = await get_fetch_engine().fetch(url)
+    if result is None or result.content_type == "text/plain":
+        text = result_to_text(result)
+        return Article(title=None, text=text, canonical_url=None, final_url=result.final_url) if text else None
+
+    def parse_and_extract():
+        tree = parse_html(result)
+        return extract_article(tree, result.final_url) if tree is not None else None
+
+    return await asyncio.to_thread(parse_and_extract)
+
+
+# Versões síncronas (fora de um event loop, ex.: scripts)
+def scrape_website(url):
+    """Scrapes the content of a given website URL."""
+    return run_sync(fetch_page_text(url))
+
+
 def extract_reliable_sources(urls):
     """Extracts content from a list of reliable sources."""
-    contents = {}
-    for url in urls:
-        content = scrape_website(url)
-        if content:
-            contents[url] = content
-    return contents
\ No newline at end of file
+    return run_sync(extract_reliable_sources_async(urls))
+
+
+# Esta função analisa uma URL e compara com portais confiáveis para ajudar a detectar fake news
+def analisar_url(url: str) -> Optional[Article]:
+    """Baixa a URL e retorna o texto principal da matéria (None se não for possível)."""
+    return run_sync(fetch_article(url))
@@ -0,0 +1,118 @@
+# src/utils/text_search.py
+
+import html
+import re
+import unicodedata
+from functools import lru_cache
+from typing import List, Optional, Set
+
+# snowballstemmer é opcional (Python puro); sem ele usamos um redutor leve de plurais/sufixos.
+try:
+    import snowballstemmer
+except ImportError:  # pragma: no cover - depende do ambiente
+    snowballstemmer = None
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_LIGHT_SUFFIXES = ("mente", "ções", "ção", "ões", "ães", "ais", "éis", "eis", "óis", "is", "ns", "es", "as", "os", "s", "a", "o", "e")
+
+STOPWORDS = frozenset("""
+a ao aos as à às com como da das de do dos e é em entre era essa esse esta este eu foi há isso
+já mais mas me mesmo muito na nas não no nos o os ou para pela pelas pelo pelos por que se sem ser
+seu sua são também te tem um uma uns umas você
+""".split())
+
+_stemmer = snowballstemmer.stemmer("portuguese") if snowballstemmer is not None else None
+
+
+def _strip_accents(token: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFD", token) if unicodedata.category(c) != "Mn")
+
+
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    """
+    Radical de uma palavra em português, em minúsculas e sem acentos.
+    """
+    token = token.lower()
+    if _stemmer is not None:
+        token = _stemmer.stemWord(token)
+    elif len(token) > 4:
+        for suffix in _LIGHT_SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+                token = token[: -len(suffix)]
+                break
+    return _strip_accents(token)
+
+
+def analyze_terms(text: Optional[str]) -> List[str]:
+    """
+    Tokeniza e reduz o texto aos radicais indexáveis (sem stopwords).
+    """
+    if not text:
+        return []
+    return [stem(t) for t in _TOKEN.findall(text) if t.lower() not in STOPWORDS]
+
+
+def terms_text(text: Optional[str]) -> str:
+    """
+    Texto de termos gravado no índice FTS5 (radicais separados por espaço).
+    """
+    return " ".join(analyze_terms(text))
+
+
+def build_fts5_query(query: str, any_term: bool = False) -> Optional[str]:
+    """
+    Converte a consulta do usuário numa expressão MATCH do FTS5: por padrão todos os radicais são
+    obrigatórios (AND implícito); com any_term=True basta um (OR), e o BM25 ordena pela cobertura.
+    Cada radical vai entre aspas, neutralizando a sintaxe do FTS5.
+    """
+    stems = analyze_terms(query)
+    if not stems:
+        return None
+    separator = " OR " if any_term else " "
+    return separator.join('"' + s.replace('"', '""') + '"' for s in dict.fromkeys(stems))
+
+
+def highlight(
+    text: Optional[str],
+    query_stems: Set[str],
+    window: int = 24,
+    start_mark: str = "<mark>",
+    end_mark: str = "</mark>",
+) -> Optional[str]:
+    """
+    Trecho do texto original (janela de `window` palavras com mais ocorrências) com os termos
+    da consulta destacados. Calculado em Python porque o índice guarda apenas os radicais.
+    O resultado é um fragmento HTML: o texto do usuário sai escapado, só as marcas são HTML.
+    """
+    if not text:
+        return None
+    tokens = list(_TOKEN.finditer(text))
+    if not tokens:
+        return None
+    hits = [i for i, m in enumerate(tokens) if stem(m.group()) in query_stems]
+    if not hits:
+        first = tokens[min(window, len(tokens)) - 1].end()
+        return html.escape(text[:first]) + ("…" if first < len(text) else "")
+
+    # Janela com o maior número de ocorrências (duas pontas sobre a lista de acertos)
+    best_start, best_count, lo = hits[0], 0, 0
+    for hi in range(len(hits)):
+        while hits[hi] - hits[lo] >= window:
+            lo += 1
+        if hi - lo + 1 > best_count:
+            best_start, best_count = hits[lo], hi - lo + 1
+    first_token = max(0, min(best_start - 3, len(tokens) - window))
+    last_token = min(len(tokens), first_token + window) - 1
+
+    hit_set = set(hits)
+    parts, cursor = [], tokens[first_token].start()
+    for i in range(first_token, last_token + 1):
+        match = tokens[i]
+        parts.append(html.escape(text[cursor:match.start()]))
+        word = html.escape(match.group())
+        parts.append(f"{start_mark}{word}{end_mark}" if i in hit_set else word)
+        cursor = match.end()
+    prefix = "…" if tokens[first_token].start() > 0 else ""
+    suffix = "…" if tokens[last_token].end() < len(text) else ""
+    return prefix + "".join(parts) + suffix
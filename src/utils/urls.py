@@ -0,0 +1,71 @@
+# src/utils/urls.py
+
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Parâmetros de rastreamento que não mudam o documento apontado pela URL
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "ref_url", "amp", "cmpid", "ocid",
+})
+DEFAULT_PORTS = {"http": 80, "https": 443}
+_BARE_URL = re.compile(r"^(?:https?://|www\.)\S+$", re.IGNORECASE)
+
+
+def canonicalize_url(url: str) -> Optional[str]:
+    """
+    Normaliza uma URL para deduplicação: esquema e host em minúsculas, sem 'www.',
+    sem porta padrão, sem fragmento, sem parâmetros de rastreamento (utm_* etc.),
+    com a query ordenada e sem barra final no caminho.
+    Retorna None se a string não for uma URL http(s) válida.
+    """
+    if not url:
+        return None
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower().rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+def domain_of(url: str) -> Optional[str]:
+    """
+    Domínio (host sem 'www.') de uma URL, em minúsculas.
+    """
+    canonical = canonicalize_url(url)
+    if canonical is None:
+        return None
+    return urlsplit(canonical).hostname
+
+
+def detect_submission_url(content: str) -> Optional[str]:
+    """
+    Se o conteúdo enviado for apenas uma URL (com ou sem esquema, ex.: "www.site.com/x"),
+    retorna-a pronta para download; caso contrário None (o conteúdo é tratado como texto).
+    """
+    candidate = (content or "").strip().strip("<>\"'")
+    if not _BARE_URL.match(candidate):
+        return None
+    if not candidate.lower().startswith(("http://", "https://")):
+        candidate = "https://" + candidate
+    return candidate if canonicalize_url(candidate) else None
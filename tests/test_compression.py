@@ -0,0 +1,66 @@
+# tests/test_compression.py
+
+import zlib
+
+import pytest
+
+from src.db import compression
+from src.db.compression import CompressedText, compress_text, decompress_text, is_compressed
+
+LONG_TEXT = "A vacina foi aprovada pela agência reguladora após três fases de testes. " * 40
+
+
+@pytest.mark.parametrize("value", [
+    "",
+    "curto",
+    "\x00começa com NUL",
+    "\x00z parece zlib",
+    "\x00s parece zstd",
+    "acentuação: ção, é, ü 🟢",
+    LONG_TEXT,
+    "\x00" + LONG_TEXT,
+])
+def test_round_trip(value):
+    assert decompress_text(compress_text(value, min_bytes=64)) == value
+
+
+def test_below_threshold_is_stored_plain():
+    assert compress_text("curto", min_bytes=64) == "curto".encode("utf-8")
+    assert not is_compressed(compress_text("curto", min_bytes=64))
+
+
+def test_leading_nul_is_escaped_not_compressed():
+    encoded = compress_text("\x00z", min_bytes=64)
+    assert encoded == b"\x00p\x00z"
+    assert not is_compressed(encoded)
+
+
+def test_long_text_is_compressed():
+    encoded = compress_text(LONG_TEXT, min_bytes=64)
+    assert is_compressed(encoded)
+    assert len(encoded) < len(LONG_TEXT.encode("utf-8"))
+
+
+def test_zlib_fallback(monkeypatch):
+    monkeypatch.setattr(compression, "zstandard", None)
+    encoded = compress_text(LONG_TEXT, min_bytes=64)
+    assert encoded.startswith(b"\x00z")
+    assert decompress_text(encoded) == LONG_TEXT
+
+
+def test_legacy_values():
+    assert decompress_text("texto legado") == "texto legado"
+    assert decompress_text("texto legado".encode("utf-8")) == "texto legado"
+    assert decompress_text(b"\x00z" + zlib.compress(LONG_TEXT.encode("utf-8"))) == LONG_TEXT
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        decompress_text(b"\x00?abc")
+
+
+def test_column_type_round_trip():
+    column = CompressedText(min_bytes=64)
+    for value in ("curto", "\x00NUL", LONG_TEXT):
+        assert column.process_result_value(column.process_bind_param(value, None), None) == value
+    assert column.process_bind_param(None, None) is None
@@ -0,0 +1,108 @@
+# tests/test_job_stream.py
+#
+# Retomada (XAUTOCLAIM), limite de entregas e renovação das entradas do stream de análises,
+# contra um Redis em memória.
+
+import threading
+import time
+import uuid
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from src.core import tasks
+from src.core.job_stream import JobStreamWorker, encode_job
+
+IDLE_SECONDS = 0.05
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis()
+
+
+@pytest.fixture
+def failed(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tasks, "mark_analysis_failed", lambda analysis_id, reason: calls.append(analysis_id))
+    return calls
+
+
+def _worker(redis_client, name, handler=None, max_attempts=3):
+    return JobStreamWorker(
+        handler=handler or (lambda *job: None), concurrency=2, stream="jobs", group="workers", consumer=name,
+        redis_client=redis_client, claim_idle_seconds=IDLE_SECONDS, max_attempts=max_attempts,
+    )
+
+
+def _publish(redis_client, count=1):
+    analysis_ids = [str(uuid.uuid4()) for _ in range(count)]
+    for analysis_id in analysis_ids:
+        redis_client.xadd("jobs", encode_job(analysis_id, "conteúdo", None))
+    return analysis_ids
+
+
+def _pending(redis_client):
+    return redis_client.xpending_range("jobs", "workers", min="-", max="+", count=10)
+
+
+def test_run_acks_and_deletes(redis_client):
+    seen = []
+    _publish(redis_client, 3)
+    worker = _worker(redis_client, "a", handler=lambda *job: seen.append(job))
+    assert worker.run(max_jobs=3, idle_block_ms=10) == 3
+    assert len(seen) == 3 and all(content == "conteúdo" for _, content, _ in seen)
+    assert redis_client.xlen("jobs") == 0
+    assert _pending(redis_client) == []
+
+
+def test_failed_job_stays_pending(redis_client):
+    stop = threading.Event()
+
+    def handler(*job):
+        stop.set()
+        raise RuntimeError("falhou")
+
+    _publish(redis_client)
+    worker = _worker(redis_client, "a", handler=handler)
+    assert worker.run(stop=stop, idle_block_ms=10) == 0
+    assert redis_client.xlen("jobs") == 1
+    assert len(_pending(redis_client)) == 1 # Sem ACK: volta pelo XAUTOCLAIM
+
+
+def test_abandoned_entry_is_reclaimed(redis_client, failed):
+    _publish(redis_client)
+    first, second = _worker(redis_client, "a"), _worker(redis_client, "b")
+    (stream_id, _), = first.read(1, None)
+    assert second.read(1, None) == [] # Ainda não ficou ocioso
+    time.sleep(IDLE_SECONDS * 2)
+    second._next_claim = 0.0
+    reclaimed = second.read(1, None)
+    assert [message[0] for message in reclaimed] == [stream_id]
+    assert _pending(redis_client)[0]["consumer"] == b"b"
+    assert failed == []
+
+
+def test_exhausted_entry_is_failed_and_dropped(redis_client, failed):
+    analysis_id = _publish(redis_client)[0]
+    first, second = _worker(redis_client, "a", max_attempts=1), _worker(redis_client, "b", max_attempts=1)
+    first.read(1, None)
+    time.sleep(IDLE_SECONDS * 2)
+    assert second.read(1, None) == [] # Segunda entrega passa de max_attempts
+    assert failed == [analysis_id]
+    assert redis_client.xlen("jobs") == 0
+    assert _pending(redis_client) == []
+
+
+def test_heartbeat_keeps_running_entry(redis_client, failed):
+    _publish(redis_client)
+    first, second = _worker(redis_client, "a"), _worker(redis_client, "b")
+    (stream_id, _), = first.read(1, None)
+    time.sleep(IDLE_SECONDS * 2)
+    first.heartbeat([stream_id])
+    second._next_claim = 0.0
+    assert second.read(1, None) == []
+    pending, = _pending(redis_client)
+    assert pending["consumer"] == b"a"
+    assert pending["times_delivered"] == 1 # JUSTID: a renovação não conta como entrega
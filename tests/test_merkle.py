@@ -0,0 +1,49 @@
+# tests/test_merkle.py
+
+import pytest
+
+from src.utils.merkle import HASH_SIZE, build_levels, inclusion_proof, leaf_hash, verify_inclusion
+
+
+def _tree(n):
+    leaves = [leaf_hash(f"registro {i}".encode()) for i in range(n)]
+    levels = build_levels(leaves)
+    return leaves, levels, levels[-1][0]
+
+
+@pytest.mark.parametrize("n", range(1, 18))
+def test_every_leaf_has_a_valid_proof(n):
+    leaves, levels, root = _tree(n)
+    for index, leaf in enumerate(leaves):
+        siblings, directions = inclusion_proof(levels, index)
+        assert len(siblings) // HASH_SIZE <= max(n - 1, 0).bit_length()
+        assert verify_inclusion(leaf, siblings, directions, root)
+
+
+def test_proof_does_not_verify_other_leaf_or_root():
+    leaves, levels, root = _tree(7)
+    siblings, directions = inclusion_proof(levels, 3)
+    assert not verify_inclusion(leaves[4], siblings, directions, root)
+    assert not verify_inclusion(leaves[3], siblings, directions ^ 1, root)
+    assert not verify_inclusion(leaves[3], siblings[:-1], directions, root)
+    _, _, other_root = _tree(8)
+    assert not verify_inclusion(leaves[3], siblings, directions, other_root)
+
+
+def test_odd_leaf_is_not_duplicated():
+    # Duplicar a última folha daria a mesma raiz para [a, b, c] e [a, b, c, c]
+    _, _, root3 = _tree(3)
+    leaves = [leaf_hash(f"registro {i}".encode()) for i in (0, 1, 2, 2)]
+    assert build_levels(leaves)[-1][0] != root3
+
+
+def test_internal_node_is_not_a_leaf():
+    _, levels, root = _tree(4)
+    # Os bytes do nó interno (0, 1) apresentados como dado de folha, com o nó (2, 3) de irmão
+    assert not verify_inclusion(leaf_hash(levels[1][0]), levels[1][1], 0, root)
+    assert verify_inclusion(levels[1][0], levels[1][1], 0, root)
+
+
+def test_empty_tree_is_rejected():
+    with pytest.raises(ValueError):
+        build_levels([])
@@ -0,0 +1,77 @@
+# tests/test_rate_limiter.py
+#
+# GCRA do limite de taxa contra um Redis em memória (fakeredis executa o script Lua com lupa).
+
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from src.core.config import settings
+from src.core.rate_limiter import ACQUIRE_SCRIPT, RateLimiter
+
+
+@pytest.fixture
+async def limiter(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RATE_LIMITS", {
+        "gemini": {"rpm": 60, "burst_requests": 3},
+        "openai": {"tpm": 600, "burst_tokens": 100},
+        "openai:gpt-4o": {"rpm": 6000},
+    })
+    client = fakeredis.FakeAsyncRedis()
+    limiter = RateLimiter("redis://fakeredis", enabled=True)
+    limiter._clients[asyncio.get_running_loop()] = (client, client.register_script(ACQUIRE_SCRIPT))
+    yield limiter
+    await client.aclose()
+
+
+async def test_burst_then_wait(limiter):
+    # 60 rpm = 1 requisição por segundo, com rajada de 3
+    for _ in range(3):
+        assert await limiter.try_acquire("gemini", None, 10) == 0.0
+    wait = await limiter.try_acquire("gemini", None, 10)
+    assert 0.9 < wait <= 1.0
+    # A recusa não reserva nada: a espera continua a mesma
+    assert await limiter.try_acquire("gemini", None, 10) == pytest.approx(wait, abs=0.05)
+
+
+async def test_large_call_is_charged_in_full(limiter):
+    # 600 tpm = 100 ms por token, rajada de 100 tokens (10 s); 200 tokens passam com o limite ocioso...
+    assert await limiter.try_acquire("openai", None, 200) == 0.0
+    # ...e a dívida inteira (20 s) é cobrada de quem vem depois
+    wait = await limiter.try_acquire("openai", None, 1)
+    assert 10.0 < wait <= 10.1
+
+
+async def test_large_call_waits_for_an_idle_limit(limiter):
+    assert await limiter.try_acquire("openai", None, 5) == 0.0
+    wait = await limiter.try_acquire("openai", None, 200)
+    assert 0.4 < wait <= 0.5
+
+
+async def test_model_and_provider_limits_are_reserved_together(limiter):
+    # openai:gpt-4o tem folga, mas a cota de tokens do provedor não
+    assert await limiter.try_acquire("openai", "gpt-4o", 100) == 0.0
+    assert await limiter.try_acquire("openai", "gpt-4o", 100) > 9.0
+    assert await limiter.try_acquire("deepseek", "deepseek-chat", 10 ** 6) == 0.0 # Sem limite configurado
+
+
+async def test_penalize_blocks_the_provider(limiter):
+    await limiter.penalize("deepseek")
+    wait = await limiter.try_acquire("deepseek", None, 1)
+    assert 0 < wait <= settings.LLM_RATE_LIMIT_COOLDOWN_SECONDS
+    assert await limiter.try_acquire("gemini", None, 1) == 0.0
+
+
+async def test_acquire_gives_up_after_max_wait(limiter):
+    for _ in range(3):
+        assert await limiter.acquire("gemini", None, 1, max_wait=0.0)
+    assert not await limiter.acquire("gemini", None, 1, max_wait=0.1)
+
+
+async def test_redis_failure_does_not_block():
+    limiter = RateLimiter("redis://127.0.0.1:1/0", enabled=True)
+    assert await limiter.try_acquire("gemini", None, 1) == 0.0
+    await limiter.aclose()
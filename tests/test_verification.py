@@ -0,0 +1,78 @@
+# tests/test_verification.py
+
+import numpy as np
+import pytest
+
+from src.core.color_decision import CATEGORIES
+from src.core.verification import Verification, aggregate_scores, reliability_weight, verdict_scores
+
+RELIABILITY = {"a": 0.8, "b": 0.8, "c": 0.8, "fraco": 1.0 / len(CATEGORIES)}
+
+
+def _verification(*providers, quorum=0.5):
+    return Verification(providers, RELIABILITY, quorum)
+
+
+def test_verdict_scores():
+    vector = verdict_scores("fake_news", 0.8)
+    assert vector.sum() == pytest.approx(1.0)
+    assert CATEGORIES[int(np.argmax(vector))] == "fake_news"
+    assert vector[CATEGORIES.index("fake_news")] == pytest.approx(0.8)
+    for abstention in ("indefinido", "desconhecida"):
+        assert np.allclose(verdict_scores(abstention, 0.8), 1.0 / len(CATEGORIES))
+
+
+def test_weight_is_zero_at_chance():
+    assert reliability_weight(1.0 / len(CATEGORIES)) == pytest.approx(0.0)
+    assert reliability_weight(0.9) > reliability_weight(0.8) > 0
+
+
+def test_quorum_needs_more_than_the_fraction():
+    verification = _verification("a", "b", "c")
+    assert verification.quorum_reached([verification.vote("a", "verdadeiro")]) is None
+    votes = [verification.vote("a", "verdadeiro"), verification.vote("b", "verdadeiro")]
+    assert verification.quorum_reached(votes) == "verdadeiro"
+
+
+def test_quorum_is_relative_to_all_consulted_providers():
+    # Dois de quatro concordando é exatamente metade do peso: ainda pode empatar
+    verification = _verification("a", "b", "c", "d")
+    verification.reliability["d"] = 0.8
+    votes = [verification.vote("a", "sátira"), verification.vote("b", "sátira")]
+    assert verification.quorum_reached(votes) is None
+
+
+def test_abstentions_and_disagreement_do_not_reach_quorum():
+    verification = _verification("a", "b", "c")
+    votes = [verification.vote("a", "indefinido"), verification.vote("b", "indefinido")]
+    assert verification.quorum_reached(votes) is None
+    votes = [verification.vote("a", "verdadeiro"), verification.vote("b", "fake_news")]
+    assert verification.quorum_reached(votes) is None
+
+
+def test_aggregate_scores_follows_the_weights():
+    verification = _verification("a", "b", "fraco")
+    votes = [verification.vote("a", "opinião"), verification.vote("fraco", "fake_news")]
+    scores = aggregate_scores(np.stack([vote.scores for vote in votes]), np.array([vote.weight for vote in votes]))
+    assert CATEGORIES[int(np.argmax(scores))] == "opinião"
+    assert scores.sum() == pytest.approx(1.0)
+    assert np.allclose(aggregate_scores(np.empty((0, len(CATEGORIES))), np.array([])), 1.0 / len(CATEGORIES))
+
+
+def test_score_batch_matches_single_aggregation():
+    verification = _verification("a", "b", "c")
+    verdicts = [
+        [("a", "verdadeiro"), ("b", "verdadeiro"), ("c", "fake_news")],
+        [("a", "tendencioso")],
+        [("a", "indefinido"), ("b", "indefinido")],
+        [],
+    ]
+    results = verification.score_batch(verdicts)
+    assert [result["classification"] for result in results[:2]] == ["verdadeiro", "tendencioso"]
+    for row, result in zip(verdicts, results):
+        votes = [verification.vote(provider, classification) for provider, classification in row]
+        weights = np.array([0.0 if vote.abstained else vote.weight for vote in votes])
+        vectors = np.stack([vote.scores for vote in votes]) if votes else np.empty((0, len(CATEGORIES)))
+        expected = aggregate_scores(vectors, weights)
+        assert [result["scores"][name] for name in CATEGORIES] == pytest.approx(expected, abs=1e-4)
+    assert all(score == pytest.approx(1.0 / len(CATEGORIES), abs=1e-4) for score in results[2]["scores"].values())